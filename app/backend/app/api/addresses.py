@@ -2,17 +2,27 @@
 Address Autocomplete API - Fast address search for Calgary properties.
 
 This module provides:
-- Autocomplete endpoint for address search with pg_trgm optimization
+- Autocomplete endpoint served from the in-memory address index
+  (services/address_index.py), with a pg_trgm/LIKE fallback
+- Reverse geocoding (nearest parcels to a point) from the in-memory
+  parcel grid (services/parcel_locator.py)
 - Returns address, community, and zone information
+
+Autocomplete and reverse geocoding run on the async session; their index
+and grid lookups (sync services) go through `AsyncSession.run_sync`.
 """
 from typing import List, Optional
 from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import text, or_
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
-from ..database import get_db
+from ..config import get_settings
+from ..database import get_read_db, get_async_read_db
 from ..models.zones import Parcel, Zone
+from ..services.address_index import address_index
+from ..services.parcel_locator import parcel_locator
 
 
 router = APIRouter()
@@ -31,20 +41,134 @@ class AddressAutocompleteResult(BaseModel):
         from_attributes = True
 
 
+class ReverseGeocodeResult(AddressAutocompleteResult):
+    """A parcel near the requested point."""
+    distance_m: float
+
+
+class ReversePoint(BaseModel):
+    """One point to reverse-geocode."""
+    lat: float = Field(..., ge=-90, le=90)
+    lon: float = Field(..., ge=-180, le=180)
+
+
+class ReverseGeocodeBatchRequest(BaseModel):
+    """Schema for batch reverse geocoding."""
+    points: List[ReversePoint] = Field(..., min_length=1, max_length=1000)
+    k: int = Field(default=1, ge=1, le=20)
+    radius_m: float = Field(default=250.0, gt=0, le=5000)
+
+
+class ReverseGeocodeBatchResult(BaseModel):
+    """Nearest parcels for one point of a batch, in request order."""
+    lat: float
+    lon: float
+    results: List[ReverseGeocodeResult]
+
+
+def _reverse_results(db: Session, hits_per_point: List[List[tuple]]) -> List[List[ReverseGeocodeResult]]:
+    """Attach address/zone details to (parcel_id, distance) hits with one query for all points."""
+    parcel_ids = {parcel_id for hits in hits_per_point for parcel_id, _ in hits}
+    rows = {}
+    if parcel_ids:
+        rows = {
+            str(r.id): r
+            for r in db.query(
+                Parcel.id, Parcel.address, Parcel.community_name, Parcel.land_use_designation,
+                Zone.zone_code, Parcel.latitude, Parcel.longitude,
+            ).outerjoin(Zone, Parcel.zone_id == Zone.id).filter(Parcel.id.in_(parcel_ids)).all()
+        }
+    return [
+        [
+            ReverseGeocodeResult(
+                address=r.address,
+                community=r.community_name,
+                zone_code=r.zone_code or r.land_use_designation,
+                parcel_id=parcel_id,
+                latitude=float(r.latitude) if r.latitude is not None else None,
+                longitude=float(r.longitude) if r.longitude is not None else None,
+                distance_m=round(distance, 1),
+            )
+            for parcel_id, distance in hits
+            if (r := rows.get(parcel_id)) is not None  # Deleted since the grid was built
+        ]
+        for hits in hits_per_point
+    ]
+
+
+def _reverse_geocode(db: Session, points: List[ReversePoint], k: int,
+                     radius_m: float) -> List[List[ReverseGeocodeResult]]:
+    """Nearest parcels with their details for each point (one detail query for all points)."""
+    hits = [parcel_locator.nearest(db, p.lat, p.lon, k, radius_m) for p in points]
+    return _reverse_results(db, hits)
+
+
+@router.get("/reverse", response_model=List[ReverseGeocodeResult])
+async def reverse_geocode(
+    lat: float = Query(..., ge=-90, le=90, description="WGS84 latitude"),
+    lon: float = Query(..., ge=-180, le=180, description="WGS84 longitude"),
+    k: int = Query(1, ge=1, le=20, description="Number of nearest parcels"),
+    radius_m: float = Query(250.0, gt=0, le=5000, description="Ignore parcels farther than this (metres)"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Find the parcels nearest a point (e.g. a map click), nearest first.
+
+    Served from an in-memory grid of parcel coordinates; no PostGIS needed.
+    Returns an empty list if no parcel is within `radius_m`.
+    """
+    results = await db.run_sync(_reverse_geocode, [ReversePoint(lat=lat, lon=lon)], k, radius_m)
+    return results[0]
+
+
+@router.post("/reverse/batch", response_model=List[ReverseGeocodeBatchResult])
+async def reverse_geocode_batch(
+    request: ReverseGeocodeBatchRequest,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Nearest parcels for up to 1000 points, in request order.
+    """
+    results_per_point = await db.run_sync(_reverse_geocode, request.points, request.k, request.radius_m)
+    return [
+        ReverseGeocodeBatchResult(lat=p.lat, lon=p.lon, results=results)
+        for p, results in zip(request.points, results_per_point)
+    ]
+
+
 @router.get("/autocomplete", response_model=List[AddressAutocompleteResult])
 async def address_autocomplete(
     q: str = Query(..., min_length=2, max_length=200, description="Search query for address"),
     limit: int = Query(10, ge=1, le=50, description="Maximum number of results to return"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Fast address autocomplete endpoint.
 
     Searches for addresses matching the query string (case-insensitive).
-    Optimized for speed with trigram index support (pg_trgm).
+    Served from the in-memory address index (prefix and typo-tolerant
+    matching); falls back to pg_trgm/LIKE queries when the index is disabled.
 
     Returns address, community, zone_code, and parcel_id.
     """
+    return await db.run_sync(_autocomplete, q, limit)
+
+
+def _autocomplete(db: Session, q: str, limit: int) -> List[AddressAutocompleteResult]:
+    """Autocomplete matches from the address index, or SQL when it is disabled."""
+    if get_settings().address_index_enabled:
+        return [
+            AddressAutocompleteResult(
+                address=m.address,
+                community=m.community,
+                zone_code=m.zone_code,
+                parcel_id=m.parcel_id,
+                latitude=m.latitude,
+                longitude=m.longitude
+            )
+            for m in address_index.search(db, q, limit)
+        ]
+
     # Normalize query - remove extra spaces
     search_query = q.strip().upper()
 
@@ -148,12 +272,12 @@ async def address_autocomplete(
 
 
 @router.get("/search", response_model=List[AddressAutocompleteResult])
-async def search_addresses(
+def search_addresses(
     query: str = Query(..., min_length=2, max_length=200, description="Search query for address"),
     community: Optional[str] = Query(None, description="Filter by community name"),
     zone: Optional[str] = Query(None, description="Filter by zone code"),
     limit: int = Query(20, ge=1, le=100, description="Maximum number of results to return"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Advanced address search with optional filters.
@@ -19,10 +19,10 @@ from ..schemas.auth import (
     PasswordChange, EmailVerificationRequest, MessageResponse
 )
 from ..core.security import (
-    verify_password, get_password_hash,
     create_access_token, create_refresh_token, decode_token,
-    generate_verification_token, generate_reset_token
+    generate_verification_token, generate_reset_token, credential_version
 )
+from ..core.password_hashing import password_hasher
 from ..core.deps import get_current_user, get_current_active_user
 
 settings = get_settings()
@@ -51,6 +51,15 @@ def set_auth_cookies(response: Response, access_token: str, refresh_token: str)
     )
 
 
+def token_data_for(user: User) -> dict:
+    """Claims for a user's access and refresh tokens."""
+    return {
+        "user_id": str(user.id),
+        "email": user.email,
+        "ver": credential_version(user.password_changed_at),
+    }
+
+
 def clear_auth_cookies(response: Response) -> None:
     """Clear authentication cookies."""
     response.delete_cookie(key="access_token")
@@ -85,7 +94,7 @@ async def register(
     # Create user
     user = User(
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await password_hasher.hash(user_data.password),
         full_name=user_data.full_name,
         is_active=True,
         is_verified=False,
@@ -98,10 +107,7 @@ async def register(
     db.refresh(user)
 
     # Create tokens for auto-login after registration
-    token_data = {
-        "user_id": str(user.id),
-        "email": user.email
-    }
+    token_data = token_data_for(user)
     access_token = create_access_token(token_data)
     refresh_token = create_refresh_token(token_data)
 
@@ -135,8 +141,9 @@ async def login(
             detail="Invalid email or password"
         )
 
-    # Verify password
-    if not verify_password(credentials.password, user.hashed_password):
+    # Verify password (off the event loop)
+    valid, new_hash = await password_hasher.verify_and_update(credentials.password, user.hashed_password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
@@ -149,11 +156,13 @@ async def login(
             detail="Account is inactive"
         )
 
+    # Hashes made with weaker Argon2 parameters are upgraded transparently
+    # (password_changed_at is untouched, so the user's other tokens stay valid)
+    if new_hash is not None:
+        user.hashed_password = new_hash
+
     # Create tokens
-    token_data = {
-        "user_id": str(user.id),
-        "email": user.email
-    }
+    token_data = token_data_for(user)
     access_token = create_access_token(token_data)
     refresh_token = create_refresh_token(token_data)
 
@@ -219,11 +228,16 @@ async def refresh_token(
             detail="User not found or inactive"
         )
 
+    # Refresh tokens issued before a password change or reset are revoked
+    version = payload.get("ver")
+    if version is not None and version != credential_version(user.password_changed_at):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token"
+        )
+
     # Create new tokens
-    token_data = {
-        "user_id": str(user.id),
-        "email": user.email
-    }
+    token_data = token_data_for(user)
     new_access_token = create_access_token(token_data)
     new_refresh_token = create_refresh_token(token_data)
 
@@ -391,7 +405,8 @@ async def reset_password(
         )
 
     # Update password
-    user.hashed_password = get_password_hash(reset_data.new_password)
+    user.hashed_password = await password_hasher.hash(reset_data.new_password)
+    user.password_changed_at = datetime.utcnow()
     user.reset_token = None
     user.reset_token_expires = None
     user.updated_at = datetime.utcnow()
@@ -402,6 +417,7 @@ async def reset_password(
 
 @router.post("/change-password", response_model=MessageResponse)
 async def change_password(
+    response: Response,
     password_data: PasswordChange,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -409,18 +425,22 @@ async def change_password(
     """
     Change password for the currently logged in user.
 
-    Requires the current password for verification.
+    Requires the current password for verification. Tokens issued before
+    the change stop working; this session gets new ones.
     """
     # Verify current password
-    if not verify_password(password_data.current_password, current_user.hashed_password):
+    if not await password_hasher.verify(password_data.current_password, current_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect"
         )
 
     # Update password
-    current_user.hashed_password = get_password_hash(password_data.new_password)
-    current_user.updated_at = datetime.utcnow()
+    current_user.hashed_password = await password_hasher.hash(password_data.new_password)
+    current_user.password_changed_at = current_user.updated_at = datetime.utcnow()
     db.commit()
 
+    token_data = token_data_for(current_user)
+    set_auth_cookies(response, create_access_token(token_data), create_refresh_token(token_data))
+
     return MessageResponse(message="Password successfully changed")
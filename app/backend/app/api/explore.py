@@ -7,20 +7,33 @@ This mode allows users to:
 - Browse code structure (parts, divisions, sections)
 - View specific articles and their requirements
 """
+import time
 from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import text, func
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import select, text, func
 
-from ..database import get_db
+from ..database import get_db, get_read_db, get_async_read_db
 from ..models.codes import Code, Article, Requirement
 from ..models.standata import Standata
 from ..schemas.codes import (
-    CodeResponse, ArticleResponse, ArticleSearchResult,
-    RequirementResponse, CodeSearchQuery, CodeSearchResponse
+    CodeResponse, ArticleResponse, ArticleSummary, ArticleSearchResult,
+    RequirementResponse, RequirementSummary, CodeSearchQuery, CodeSearchResponse
 )
 from ..schemas.standata import StandataSummary, StandataByCodeResponse
+from ..services.hybrid_search import hybrid_search_service
+from ..services.search_cache import search_cache, make_result_key
+from ..services.snippets import snippet_engine, DOC_ARTICLE
+from ..services.code_references import find_related_bulletin_ids
+from ..services.code_tree import code_tree_cache
+from ..services.field_selection import parse_fields, load_options, project
+from ..services.pagination import Keyset, InvalidCursor, paginate, set_page_headers
+from ..services.search_capabilities import search_capabilities, refresh_search_capabilities
+from ..core.deps import get_current_admin_user
+from ..models.auth import User
 
 router = APIRouter()
 
@@ -29,88 +42,133 @@ router = APIRouter()
 async def list_codes(
     code_type: Optional[str] = Query(None, description="Filter by code type: building, fire, zoning, etc."),
     current_only: bool = Query(True, description="Only return current (non-superseded) codes"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     List all available codes/bylaws/standards.
     """
-    query = db.query(Code)
+    query = select(Code)
 
     if code_type:
-        query = query.filter(Code.code_type == code_type)
+        query = query.where(Code.code_type == code_type)
     if current_only:
-        query = query.filter(Code.is_current == True)
+        query = query.where(Code.is_current == True)
 
-    return query.order_by(Code.code_type, Code.effective_date.desc()).all()
+    result = await db.scalars(query.order_by(Code.code_type, Code.effective_date.desc()))
+    return result.all()
 
 
 @router.get("/codes/{code_id}", response_model=CodeResponse)
-async def get_code(code_id: UUID, db: Session = Depends(get_db)):
+async def get_code(code_id: UUID, db: AsyncSession = Depends(get_async_read_db)):
     """
     Get details for a specific code.
     """
-    code = db.query(Code).filter(Code.id == code_id).first()
+    code = await db.get(Code, code_id)
     if not code:
         raise HTTPException(status_code=404, detail="Code not found")
     return code
 
 
-@router.get("/codes/{code_id}/articles", response_model=List[ArticleResponse])
+FIELDS_DESCRIPTION = "Comma-separated fields to return (id is always included)"
+CURSOR_DESCRIPTION = "Cursor from the previous page's X-Next-Cursor header"
+TOTAL_DESCRIPTION = "Return an approximate total in the X-Total-Count header"
+
+ARTICLE_KEYSET = Keyset("articles", Article.article_number, Article.id)
+REQUIREMENT_KEYSET = Keyset("requirements", Requirement.created_at, Requirement.id)
+STANDATA_KEYSET = Keyset("standata", Standata.effective_date, Standata.id, descending=True)
+
+
+def _selected_fields(fields: Optional[str], schema) -> Optional[List[str]]:
+    """Parse `fields=`, turning unknown names into a 400."""
+    try:
+        return parse_fields(fields, schema)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _page(query, keyset: Keyset, limit: int, cursor: Optional[str], include_total: bool):
+    """Keyset page for a list endpoint, turning bad cursors into a 400."""
+    try:
+        return paginate(query, keyset, limit, cursor=cursor, with_total=include_total)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/codes/{code_id}/articles", response_model=List[ArticleSummary])
 async def list_articles(
     code_id: UUID,
+    response: Response,
     part_number: Optional[int] = Query(None, description="Filter by part number"),
     division_number: Optional[int] = Query(None, description="Filter by division number"),
-    db: Session = Depends(get_db)
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    include_total: bool = Query(False, description=TOTAL_DESCRIPTION),
+    db: Session = Depends(get_read_db)
 ):
     """
     List articles for a specific code, optionally filtered by part/division.
+
+    Returns ArticleSummary rows by default; pass e.g. `fields=article_number,full_text`
+    to choose any ArticleResponse fields instead. Pages are ordered by
+    article number; the next page's cursor is in the X-Next-Cursor header.
     """
-    query = db.query(Article).filter(Article.code_id == code_id)
+    selected = _selected_fields(fields, ArticleResponse)
+    query = db.query(Article).options(
+        *load_options(Article, [*(selected or ArticleSummary.model_fields), "article_number"])
+    ).filter(Article.code_id == code_id)
 
     if part_number:
         query = query.filter(Article.part_number == part_number)
     if division_number:
         query = query.filter(Article.division_number == division_number)
 
-    return query.order_by(Article.article_number).all()
+    page = _page(query, ARTICLE_KEYSET, limit, cursor, include_total)
+    if selected:
+        content = [project(a, selected, ArticleResponse) for a in page.items]
+        return set_page_headers(JSONResponse(content), page)
+    set_page_headers(response, page)
+    return page.items
 
 
 @router.get("/articles/{article_id}", response_model=ArticleResponse)
-async def get_article(article_id: UUID, db: Session = Depends(get_db)):
+async def get_article(
+    article_id: UUID,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_read_db)
+):
     """
     Get a specific article by ID.
     """
-    article = db.query(Article).filter(Article.id == article_id).first()
+    selected = _selected_fields(fields, ArticleResponse)
+    article = await db.scalar(select(Article).options(
+        *load_options(Article, selected or ArticleResponse.model_fields)
+    ).where(Article.id == article_id))
     if not article:
         raise HTTPException(status_code=404, detail="Article not found")
+    if selected:
+        return JSONResponse(project(article, selected, ArticleResponse))
     return article
 
 
 @router.get("/articles/{article_id}/requirements", response_model=List[RequirementResponse])
-async def get_article_requirements(article_id: UUID, db: Session = Depends(get_db)):
+async def get_article_requirements(article_id: UUID, db: AsyncSession = Depends(get_async_read_db)):
     """
     Get all requirements extracted from an article.
     """
-    requirements = db.query(Requirement).filter(
-        Requirement.article_id == article_id
-    ).all()
-    return requirements
+    requirements = await db.scalars(
+        select(Requirement)
+        .options(selectinload(Requirement.conditions))
+        .where(Requirement.article_id == article_id)
+    )
+    return requirements.all()
 
 
-@router.post("/search", response_model=CodeSearchResponse)
-async def search_codes(query: CodeSearchQuery, db: Session = Depends(get_db)):
+def _article_rows(db: Session, query: CodeSearchQuery, article_ids: Optional[List[str]] = None) -> list:
     """
-    Search code articles using semantic search (vector similarity) or full-text search.
-
-    This is the main search endpoint for EXPLORE mode. It supports:
-    - Natural language queries (e.g., "stair width requirements for residential")
-    - Exact phrase matching
-    - Filtering by code type and part number
+    Article rows for search results: the requested IDs, or in browse mode
+    the first `query.limit` articles by number, within the query's filters.
     """
-    results = []
-    search_type = "fulltext"  # Default to fulltext until embeddings are populated
-
-    # Build base query
     base_query = db.query(
         Article.id,
         Article.article_number,
@@ -126,105 +184,130 @@ async def search_codes(query: CodeSearchQuery, db: Session = Depends(get_db)):
     if query.part_numbers:
         base_query = base_query.filter(Article.part_number.in_(query.part_numbers))
 
+    if article_ids is None:
+        return base_query.order_by(Article.article_number).limit(query.limit).all()
+    return base_query.filter(Article.id.in_([UUID(article_id) for article_id in article_ids])).all()
+
+
+@router.post("/search", response_model=CodeSearchResponse)
+async def search_codes(query: CodeSearchQuery, db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Search code articles using hybrid retrieval (full-text + vector similarity).
+
+    This is the main search endpoint for EXPLORE mode. It supports:
+    - Natural language queries (e.g., "stair width requirements for residential")
+    - Exact phrase matching
+    - Filtering by code type and part number
+
+    Lexical (tsvector, or FTS5 on SQLite) and semantic (ANN index) candidates
+    are merged with reciprocal-rank fusion; relevance_score holds the fused
+    score, highlight a capped snippet with matched terms in <mark> tags and
+    `timings` the per-stage latency in milliseconds.
+
+    Responses are cached per (query, filters, limit) until the code corpus
+    changes. Database stages run through `AsyncSession.run_sync`.
+    """
+    cache_start = time.perf_counter()
+    cache_key = make_result_key(
+        "explore", query.query, query.code_types, query.part_numbers, query.limit, query.use_semantic
+    )
+    await db.run_sync(search_cache.validate)
+    cached = search_cache.get_result(cache_key)
+    if cached is not None:
+        # Keys are normalized queries: echo this request's text, not the first caller's
+        return cached.model_copy(update={
+            "query": query.query,
+            "timings": {"cache_ms": round((time.perf_counter() - cache_start) * 1000, 2)},
+        })
+
+    results = []
+    timings = None
+    fused_scores = {}
+    highlights = {}
+
     # Handle browse mode - if query is "*" or "**", just return filtered results
     is_browse_mode = query.query.strip() in ('*', '**', 'browse', 'all')
 
     if is_browse_mode:
         search_type = "browse"
         # Just use the filters, order by article number
-        base_query = base_query.order_by(Article.article_number)
-
-    # Try semantic search first if enabled and embeddings exist
-    elif query.use_semantic:
-        # Check if we have embeddings
-        has_embeddings = db.query(Article).filter(Article.embedding.isnot(None)).first()
-
-        if has_embeddings:
-            # TODO: Generate query embedding using sentence-transformers
-            # For now, fall back to full-text search
-            search_type = "semantic"
-            pass
-
-    # Full-text search using PostgreSQL tsvector (only if not in browse mode)
-    if search_type == "fulltext" and not is_browse_mode:
-        # Check if search_vector is populated
-        has_vectors = db.query(Article).filter(Article.search_vector.isnot(None)).first()
-
-        if has_vectors:
-            # Build OR-based tsquery for better natural language support
-            # Convert "ceiling height bedrooms" to "ceiling | height | bedrooms"
-            words = query.query.strip().split()
-            # Filter out common stop words and short words
-            stop_words = {'what', 'is', 'the', 'a', 'an', 'are', 'for', 'to', 'of', 'in', 'on', 'at', 'and', 'or', 'between'}
-            search_terms = [w for w in words if len(w) >= 3 and w.lower() not in stop_words]
-
-            if search_terms:
-                # Join with OR operator for more forgiving search
-                or_query = ' | '.join(search_terms)
-                search_query = func.to_tsquery('english', or_query)
-
-                # Use the pre-computed search vector
-                base_query = base_query.filter(
-                    Article.search_vector.op('@@')(search_query)
-                ).order_by(
-                    func.ts_rank(Article.search_vector, search_query).desc()
-                )
-        else:
-            # Fall back to ILIKE search with individual words (OR logic)
-            words = query.query.split()
-            if words:
-                from sqlalchemy import or_
-                conditions = []
-                for word in words:
-                    if len(word) >= 3:  # Skip very short words
-                        pattern = f"%{word}%"
-                        conditions.append(Article.full_text.ilike(pattern))
-                        conditions.append(Article.title.ilike(pattern))
-                        conditions.append(Article.article_number.ilike(pattern))
-                if conditions:
-                    base_query = base_query.filter(or_(*conditions))
-
-    # Execute query with limit
-    raw_results = base_query.limit(query.limit).all()
+        raw_results = await db.run_sync(_article_rows, query)
+    else:
+        outcome = await hybrid_search_service.search(
+            db,
+            query.query,
+            limit=query.limit,
+            code_types=query.code_types,
+            part_numbers=query.part_numbers,
+            use_semantic=query.use_semantic,
+        )
+        search_type = outcome.search_type
+        timings = outcome.timings
+        fused_scores = dict(outcome.ranked)
+
+        raw_results = []
+        if fused_scores:
+            raw_results = await db.run_sync(_article_rows, query, list(fused_scores))
+            raw_results.sort(key=lambda r: fused_scores[str(r.id)], reverse=True)
+
+            # Highlighted snippets for the returned page only
+            snippet_start = time.perf_counter()
+            snippets = await db.run_sync(
+                snippet_engine.snippets, DOC_ARTICLE, [str(r.id) for r in raw_results], query.query
+            )
+            highlights = {doc_id: snippet.render() for doc_id, snippet in snippets.items()}
+            timings["snippet_ms"] = round((time.perf_counter() - snippet_start) * 1000, 2)
 
     # Transform to response format
     for row in raw_results:
         results.append(ArticleSearchResult(
-            id=row.id,
+            id=str(row.id),
             article_number=row.article_number,
             title=row.title,
             full_text=row.full_text[:500] + "..." if len(row.full_text) > 500 else row.full_text,
             code_short_name=row.code_short_name,
             code_version=row.code_version,
-            relevance_score=None,  # TODO: Add when semantic search is implemented
-            highlight=None  # TODO: Add highlighted snippets
+            relevance_score=fused_scores.get(str(row.id)),
+            highlight=highlights.get(str(row.id))
         ))
 
-    return CodeSearchResponse(
+    response = CodeSearchResponse(
         query=query.query,
         total_results=len(results),
         results=results,
-        search_type=search_type
+        search_type=search_type,
+        timings=timings
     )
+    search_cache.set_result(cache_key, response)
+    return response
 
 
-@router.get("/requirements", response_model=List[RequirementResponse])
+@router.get("/requirements", response_model=List[RequirementSummary])
 async def search_requirements(
+    response: Response,
     element: Optional[str] = Query(None, description="Filter by element (e.g., stair_width, fire_rating)"),
     requirement_type: Optional[str] = Query(None, description="Filter by type: dimensional, material, procedural, performance"),
     occupancy_group: Optional[str] = Query(None, description="Filter by occupancy group: A1, A2, B1, C, D, E, F1, F2, F3"),
     part_9_only: bool = Query(False, description="Only return Part 9 requirements"),
     verified_only: bool = Query(False, description="Only return verified requirements"),
     limit: int = Query(50, ge=1, le=200),
-    db: Session = Depends(get_db)
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    include_total: bool = Query(False, description=TOTAL_DESCRIPTION),
+    db: Session = Depends(get_read_db)
 ):
     """
     Search for specific requirements across all codes.
 
     Useful for finding all requirements related to a specific building element
     (e.g., all stair width requirements, all fire rating requirements).
+    Returns RequirementSummary rows by default; `fields=` selects any
+    RequirementResponse fields (including `exact_quote` and `conditions`).
     """
-    query = db.query(Requirement)
+    selected = _selected_fields(fields, RequirementResponse)
+    query = db.query(Requirement).options(
+        *load_options(Requirement, [*(selected or RequirementSummary.model_fields), "created_at"])
+    )
 
     if element:
         query = query.filter(Requirement.element.ilike(f"%{element}%"))
@@ -237,19 +320,37 @@ async def search_requirements(
     if verified_only:
         query = query.filter(Requirement.is_verified == True)
 
-    return query.limit(limit).all()
+    page = _page(query, REQUIREMENT_KEYSET, limit, cursor, include_total)
+    if selected:
+        content = [project(r, selected, RequirementResponse) for r in page.items]
+        return set_page_headers(JSONResponse(content), page)
+    set_page_headers(response, page)
+    return page.items
 
 
-@router.get("/browse/{code_type}")
-async def browse_code_structure(
-    code_type: str,
-    db: Session = Depends(get_db)
+@router.get("/capabilities")
+async def get_search_capabilities(db: Session = Depends(get_read_db)):
+    """
+    Search backends currently available (tsvector, embeddings, FTS5, ANN index), per code.
+    """
+    return search_capabilities.get(db).to_dict()
+
+
+@router.post("/capabilities/refresh")
+async def refresh_capabilities(
+    db: Session = Depends(get_db),
+    admin: User = Depends(get_current_admin_user)
 ):
     """
-    Browse the hierarchical structure of a code type.
-    Returns parts, divisions, and sections for navigation.
+    Recompute search capabilities now, e.g. after loading data from another process.
+
+    Admin only.
     """
-    # Get the current code of this type
+    return refresh_search_capabilities(db).to_dict()
+
+
+def _current_code(db: Session, code_type: str) -> Code:
+    """The current code of a type, or 404."""
     code = db.query(Code).filter(
         Code.code_type == code_type,
         Code.is_current == True
@@ -257,47 +358,88 @@ async def browse_code_structure(
 
     if not code:
         raise HTTPException(status_code=404, detail=f"No current {code_type} code found")
+    return code
+
+
+def _tree_response(request: Request, tree, content) -> Response:
+    """JSON response tagged with the tree's ETag; 304 if the client already has it."""
+    headers = {"ETag": tree.etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == tree.etag:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=content, headers=headers)
 
-    # Get distinct parts
-    parts = db.query(
-        Article.part_number,
-        func.min(Article.title).label("part_title"),
-        func.count(Article.id).label("article_count")
-    ).filter(
-        Article.code_id == code.id,
-        Article.part_number.isnot(None)
-    ).group_by(Article.part_number).order_by(Article.part_number).all()
-
-    structure = {
-        "code": {
-            "id": str(code.id),
-            "name": code.name,
-            "short_name": code.short_name,
-            "version": code.version
-        },
-        "parts": [
-            {
-                "part_number": p.part_number,
-                "title": p.part_title,
-                "article_count": p.article_count
-            }
-            for p in parts
-        ]
-    }
 
-    return structure
+@router.get("/browse/{code_type}")
+async def browse_code_structure(
+    code_type: str,
+    request: Request,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Browse the hierarchical structure of a code type.
+    Returns the parts of the current code for navigation.
+
+    Served from a cached code tree and tagged with an ETag; send it back in
+    If-None-Match to get 304 Not Modified while the code is unchanged.
+    """
+    code = _current_code(db, code_type)
+    tree = code_tree_cache.get(db, code)
+    return _tree_response(request, tree, tree.browse())
+
+
+@router.get("/browse/{code_type}/tree")
+async def get_code_tree(
+    code_type: str,
+    request: Request,
+    depth: int = Query(2, ge=0, le=3, description="Levels below parts: 1 = divisions, 2 = sections, 3 = articles"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Get the part -> division -> section -> article tree of the current code.
+
+    Nodes carry titles and article counts; articles carry only id, number
+    and title (never full text). Supports ETag / If-None-Match.
+    """
+    code = _current_code(db, code_type)
+    tree = code_tree_cache.get(db, code)
+    return _tree_response(request, tree, tree.tree(depth))
+
+
+@router.get("/browse/{code_type}/nodes/{node_number}")
+async def get_code_tree_node(
+    code_type: str,
+    node_number: str,
+    request: Request,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Expand one node of the code tree lazily.
+
+    Args:
+        node_number: Part, division or section number (e.g., "9", "9.8", "9.8.4")
+
+    Returns the node's direct children and the articles attached to it.
+    Supports ETag / If-None-Match.
+    """
+    code = _current_code(db, code_type)
+    tree = code_tree_cache.get(db, code)
+    node = tree.node(node_number)
+    if node is None:
+        raise HTTPException(status_code=404, detail=f"Node {node_number} not found in {code_type} code")
+    return _tree_response(request, tree, node)
 
 
 @router.get("/articles/{article_number}/related-standata", response_model=StandataByCodeResponse)
 async def get_related_standata(
     article_number: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get STANDATA bulletins related to a specific code article.
 
-    This endpoint searches for STANDATA bulletins that reference the given
-    article number in their code_references field. Useful for showing
+    This endpoint looks up STANDATA bulletins that reference the given
+    article number in their code_references field, falling back to bulletins
+    that cite other articles in the same Section. Useful for showing
     official interpretations when viewing a code article.
 
     Args:
@@ -306,19 +448,17 @@ async def get_related_standata(
     Returns:
         List of STANDATA bulletins that reference this article
     """
-    # Query standata bulletins where code_references contains the article number
-    # PostgreSQL ARRAY contains operator: @> or ANY()
-    bulletins = db.query(Standata).filter(
-        Standata.code_references.any(article_number)
-    ).order_by(Standata.effective_date.desc()).all()
-
-    # Also check for partial matches (e.g., "9.10" matches "9.10.9.6")
-    if not bulletins:
-        # Try prefix match for broader searches
-        article_prefix = '.'.join(article_number.split('.')[:3])  # e.g., "9.10.9"
-        bulletins = db.query(Standata).filter(
-            func.array_to_string(Standata.code_references, ',').ilike(f"%{article_prefix}%")
-        ).order_by(Standata.effective_date.desc()).limit(10).all()
+    # Bulletins citing the article, else anything cited under it or its Section
+    bulletin_ids, exact = find_related_bulletin_ids(db, article_number)
+
+    bulletins = []
+    if bulletin_ids:
+        query = db.query(Standata).filter(
+            Standata.id.in_(bulletin_ids)
+        ).order_by(Standata.effective_date.desc())
+        if not exact:
+            query = query.limit(10)
+        bulletins = query.all()
 
     return StandataByCodeResponse(
         code_reference=article_number,
@@ -340,15 +480,19 @@ async def get_related_standata(
 
 @router.get("/standata", response_model=list[StandataSummary])
 async def list_standata(
+    response: Response,
     category: Optional[str] = Query(None, description="Filter by category: BCI, BCB, FCB, PCB"),
     search: Optional[str] = Query(None, description="Search in title, summary, keywords"),
     limit: int = Query(50, ge=1, le=200),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    include_total: bool = Query(False, description=TOTAL_DESCRIPTION),
+    db: Session = Depends(get_read_db)
 ):
     """
     List all STANDATA bulletins with optional filtering.
 
-    Returns a summary list of bulletins for browsing.
+    Returns a summary list of bulletins for browsing, newest first; the next
+    page's cursor is in the X-Next-Cursor header.
     """
     query = db.query(Standata)
 
@@ -367,7 +511,8 @@ async def list_standata(
             )
         )
 
-    bulletins = query.order_by(Standata.effective_date.desc()).limit(limit).all()
+    page = _page(query, STANDATA_KEYSET, limit, cursor, include_total)
+    set_page_headers(response, page)
 
     return [
         StandataSummary(
@@ -379,21 +524,21 @@ async def list_standata(
             summary=b.summary,
             code_references=b.code_references
         )
-        for b in bulletins
+        for b in page.items
     ]
 
 
 @router.get("/standata/{bulletin_number}")
 async def get_standata_bulletin(
     bulletin_number: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Get full details of a specific STANDATA bulletin.
     """
-    bulletin = db.query(Standata).filter(
+    bulletin = await db.scalar(select(Standata).where(
         Standata.bulletin_number == bulletin_number
-    ).first()
+    ))
 
     if not bulletin:
         raise HTTPException(status_code=404, detail=f"Bulletin '{bulletin_number}' not found")
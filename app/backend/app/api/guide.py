@@ -22,6 +22,8 @@ from ..schemas.projects import (
     ProjectCreate, ProjectResponse
 )
 from ..schemas.zones import ZoningCheckRequest
+from ..services.address_resolver import address_resolver
+from ..services.zone_index import lookup_zone
 
 router = APIRouter()
 
@@ -215,12 +217,15 @@ async def analyze_project(
     warnings = []
 
     # Find the parcel
-    parcel = db.query(Parcel).filter(
-        Parcel.address.ilike(f"%{project_input.address}%")
-    ).first()
+    parcel = address_resolver.resolve(db, project_input.address)
 
     if not parcel:
         warnings.append(f"Address '{project_input.address}' not found in Calgary parcel database. Zoning rules may not be accurate.")
+    elif address_resolver.resolve_match(db, project_input.address).ambiguous:
+        warnings.append(
+            f"Address '{project_input.address}' matches more than one parcel; using {parcel.address}. "
+            "Include the unit and quadrant (e.g. NW) to be exact."
+        )
 
     # Get zone information
     zone = None
@@ -228,6 +233,10 @@ async def analyze_project(
 
     if parcel and parcel.zone_id:
         zone = db.query(Zone).filter(Zone.id == parcel.zone_id).first()
+    elif parcel and parcel.latitude is not None and parcel.longitude is not None:
+        zone = lookup_zone(db, float(parcel.latitude), float(parcel.longitude))
+
+    if zone:
         zoning_status = "pending_check"
     else:
         warnings.append("Could not determine zoning for this address. Manual verification required.")
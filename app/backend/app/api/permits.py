@@ -48,9 +48,14 @@ from ..schemas.permits import (
     ContactInfo,
 )
 from ..services.document_service import document_service
+from ..services.pagination import Keyset, InvalidCursor, paginate
 
 router = APIRouter()
 
+PERMIT_KEYSET = Keyset(
+    "permit_applications", PermitApplication.created_at, PermitApplication.id, descending=True
+)
+
 
 # --- Helper Functions ---
 
@@ -398,14 +403,18 @@ async def list_permit_applications(
     permit_type: Optional[PermitType] = Query(None, description="Filter by permit type"),
     status: Optional[ApplicationStatus] = Query(None, description="Filter by status"),
     address: Optional[str] = Query(None, description="Filter by address (partial match)"),
-    page: int = Query(1, ge=1, description="Page number"),
+    page: int = Query(1, ge=1, description="Page number (deprecated, use cursor)"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    include_total: bool = Query(True, description="Include the approximate total"),
     db: Session = Depends(get_db)
 ):
     """
     List permit applications with optional filtering.
 
-    Returns paginated results with summary information for each application.
+    Returns paginated results with summary information for each application,
+    newest first. Follow `next_cursor` for further pages; `page` still works
+    but costs more the deeper it goes.
     """
     query = db.query(PermitApplication)
 
@@ -417,13 +426,16 @@ async def list_permit_applications(
     if address:
         query = query.filter(PermitApplication.address.ilike(f"%{address}%"))
 
-    # Get total count
-    total = query.count()
-
-    # Sort and paginate
-    query = query.order_by(desc(PermitApplication.created_at))
-    offset = (page - 1) * page_size
-    applications = query.offset(offset).limit(page_size).all()
+    # Keyset pagination; the total is a cached count, not a COUNT(*) per page
+    try:
+        result = paginate(
+            query, PERMIT_KEYSET, page_size,
+            cursor=cursor,
+            with_total=include_total,
+            offset=0 if cursor else (page - 1) * page_size,
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     # Convert to summaries
     summaries = [
@@ -437,14 +449,15 @@ async def list_permit_applications(
             submitted_at=app.submitted_at,
             created_at=app.created_at,
         )
-        for app in applications
+        for app in result.items
     ]
 
     return PermitSearchResponse(
-        total=total,
+        total=result.total,
         page=page,
         page_size=page_size,
-        results=summaries
+        results=summaries,
+        next_cursor=result.next_cursor
     )
 
 
@@ -7,12 +7,15 @@ for users who haven't registered yet, encouraging sign-up.
 from typing import List, Optional
 from fastapi import APIRouter, Depends, Request, Query
 from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
-from ..database import get_db
+from ..database import get_db, get_async_db
 from ..models.codes import Code, Article
 from ..schemas.codes import ArticleSearchResult, CodeSearchQuery, CodeSearchResponse
+from ..services.search_cache import search_cache, make_result_key
+from ..services.search_capabilities import search_capabilities
 from ..middleware.rate_limit import (
     check_rate_limit, get_client_ip, get_rate_limit_status,
     RateLimitExceeded, DAILY_QUERY_LIMIT
@@ -50,7 +53,7 @@ async def get_public_rate_limit_status(
 async def public_explore_search(
     request: Request,
     query: CodeSearchQuery,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Rate-limited public search endpoint for code exploration.
@@ -65,7 +68,11 @@ async def public_explore_search(
         - Search results (limited to 2)
         - 429 error when limit exceeded
     """
-    ip_address = get_client_ip(request)
+    return await db.run_sync(_public_search, get_client_ip(request), query)
+
+
+def _public_search(db: Session, ip_address: str, query: CodeSearchQuery) -> JSONResponse:
+    """Rate-limit check and preview search, on the sync side of the async session."""
 
     # Check rate limit
     allowed, queries_remaining = check_rate_limit(db, ip_address)
@@ -73,6 +80,21 @@ async def public_explore_search(
     if not allowed:
         raise RateLimitExceeded(queries_remaining=0)
 
+    rate_limit_headers = {
+        "X-Queries-Remaining": str(queries_remaining),
+        "X-Daily-Limit": str(DAILY_QUERY_LIMIT),
+        "X-Rate-Limited": "true"
+    }
+
+    # Preview queries repeat all day - serve them from the search cache
+    cache_key = make_result_key(
+        "public", query.query, query.code_types, query.part_numbers, PUBLIC_RESULT_LIMIT, False
+    )
+    search_cache.validate(db)
+    cached_content = search_cache.get_result(cache_key)
+    if cached_content is not None:
+        return JSONResponse(content={**cached_content, "query": query.query}, headers=rate_limit_headers)
+
     # Build base query
     base_query = db.query(
         Article.id,
@@ -91,8 +113,8 @@ async def public_explore_search(
 
     search_type = "fulltext"
 
-    # Check if search_vector is populated
-    has_vectors = db.query(Article).filter(Article.search_vector.isnot(None)).first()
+    # Use the pre-computed search vector if populated (cached, no probe query)
+    has_vectors = search_capabilities.get(db).has_tsvector(query.code_types)
 
     if has_vectors:
         # Use the pre-computed search vector
@@ -192,24 +214,18 @@ async def public_explore_search(
         search_type=search_type
     )
 
-    # Return response with rate limit headers
-    response = JSONResponse(
-        content={
-            **response_data.model_dump(mode='json'),  # mode='json' converts UUIDs to strings
-            "is_limited": True,
-            "results_shown": len(results),
-            "total_available": total_available,
-            "upgrade_message": f"Sign up free to see all {total_available} results and get unlimited searches."
-            if total_available > PUBLIC_RESULT_LIMIT else None
-        },
-        headers={
-            "X-Queries-Remaining": str(queries_remaining),
-            "X-Daily-Limit": str(DAILY_QUERY_LIMIT),
-            "X-Rate-Limited": "true"
-        }
-    )
+    content = {
+        **response_data.model_dump(mode='json'),  # mode='json' converts UUIDs to strings
+        "is_limited": True,
+        "results_shown": len(results),
+        "total_available": total_available,
+        "upgrade_message": f"Sign up free to see all {total_available} results and get unlimited searches."
+        if total_available > PUBLIC_RESULT_LIMIT else None
+    }
+    search_cache.set_result(cache_key, content)
 
-    return response
+    # Return response with rate limit headers
+    return JSONResponse(content=content, headers=rate_limit_headers)
 
 
 @router.get("/sample-questions")
@@ -13,11 +13,15 @@ Types:
 from typing import List, Optional
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, defer
+from sqlalchemy import func, select
 
-from ..database import get_db
+from ..database import get_async_read_db
 from ..models.standata import Standata
+from ..services.fulltext import get_fulltext_backend
+from ..services.snippets import snippet_engine, DOC_STANDATA
+from ..services.code_references import find_bulletin_ids
 from ..schemas.standata import (
     StandataResponse, StandataSummary, StandataSearchResult,
     StandataSearchQuery, StandataSearchResponse, StandataByCodeResponse,
@@ -32,7 +36,7 @@ async def list_standata(
     category: Optional[str] = Query(None, description="Filter by category: BCI, BCB, FCB, PCB"),
     limit: int = Query(50, ge=1, le=200, description="Maximum number of results"),
     offset: int = Query(0, ge=0, description="Number of results to skip"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     List all STANDATA bulletins.
@@ -40,44 +44,43 @@ async def list_standata(
     Returns a summary list of bulletins, optionally filtered by category.
     Results are sorted by bulletin number descending (newest first).
     """
-    query = db.query(Standata)
+    query = select(Standata)
 
     if category:
-        query = query.filter(Standata.category == category.upper())
+        query = query.where(Standata.category == category.upper())
 
-    total = query.count()
-
-    bulletins = query.order_by(Standata.bulletin_number.desc())\
-        .offset(offset)\
-        .limit(limit)\
-        .all()
+    bulletins = await db.scalars(
+        query.order_by(Standata.bulletin_number.desc())
+        .offset(offset)
+        .limit(limit)
+    )
 
-    return bulletins
+    return bulletins.all()
 
 
 @router.get("/stats", response_model=StandataStats)
-async def get_standata_stats(db: Session = Depends(get_db)):
+async def get_standata_stats(db: AsyncSession = Depends(get_async_read_db)):
     """
     Get statistics about STANDATA bulletins in the database.
     """
-    total = db.query(Standata).count()
+    total = await db.scalar(select(func.count(Standata.id)))
 
     # Count by category
-    category_counts = db.query(
+    category_counts = (await db.execute(select(
         Standata.category,
         func.count(Standata.id)
-    ).group_by(Standata.category).all()
+    ).group_by(Standata.category))).all()
 
     by_category = {cat: count for cat, count in category_counts}
 
     # Latest effective date
-    latest = db.query(func.max(Standata.effective_date)).scalar()
+    latest = await db.scalar(select(func.max(Standata.effective_date)))
 
     # Count unique code references
     # This is an approximation since code_references is stored as array
-    all_refs = db.query(Standata.code_references).filter(
+    all_refs = (await db.execute(select(Standata.code_references).where(
         Standata.code_references.isnot(None)
-    ).all()
+    ))).all()
 
     unique_refs = set()
     for refs_tuple in all_refs:
@@ -128,7 +131,7 @@ async def search_standata(
     q: str = Query(..., min_length=2, description="Search query"),
     categories: Optional[str] = Query(None, description="Comma-separated categories to filter: BCI,BCB,FCB,PCB"),
     limit: int = Query(20, ge=1, le=100, description="Maximum results"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Full-text search across STANDATA bulletins.
@@ -141,54 +144,54 @@ async def search_standata(
     - Code references
     - Keywords
 
-    Returns results with relevance snippets showing where the match occurred.
+    Results are ranked by the full-text backend (bm25 over an FTS5 index
+    on SQLite) and carry relevance snippets showing where the match
+    occurred; full-text snippets are capped and highlight matched terms
+    with <mark> tags.
     """
-    results = []
-    search_pattern = f"%{q}%"
+    return await db.run_sync(_search_standata, q, categories, limit)
 
-    query = db.query(Standata)
 
-    # Apply category filter if provided
+def _search_standata(db: Session, q: str, categories: Optional[str], limit: int) -> StandataSearchResponse:
+    """Ranked, snippeted bulletins, on the sync side of the async session."""
+    results = []
+
+    cat_list = None
     if categories:
         cat_list = [c.strip().upper() for c in categories.split(",")]
-        query = query.filter(Standata.category.in_(cat_list))
-
-    # Search across multiple fields
-    query = query.filter(
-        or_(
-            Standata.bulletin_number.ilike(search_pattern),
-            Standata.title.ilike(search_pattern),
-            Standata.summary.ilike(search_pattern),
-            Standata.full_text.ilike(search_pattern),
-        )
-    )
 
-    bulletins = query.limit(limit).all()
-
-    # Build results with snippets
+    # Ranked IDs from the full-text backend
+    hits = get_fulltext_backend(db).search_standata(db, q, limit, cat_list)
+
+    bulletins = []
+    if hits:
+        # full_text is not returned; snippets are fetched from the positional index
+        bulletins = db.query(Standata).options(defer(Standata.full_text)).filter(
+            Standata.id.in_([UUID(hit.id) for hit in hits])
+        ).all()
+        rank = {hit.id: i for i, hit in enumerate(hits)}
+        bulletins.sort(key=lambda b: rank[str(b.id)])
+
+    # Determine match type and create snippet
+    q_lower = q.lower()
+    matches = []
     for bulletin in bulletins:
-        # Determine match type and create snippet
-        match_type = "full_text"
-        snippet = None
-
-        if q.lower() in bulletin.bulletin_number.lower():
-            match_type = "bulletin_number"
-            snippet = f"Bulletin: {bulletin.bulletin_number}"
-        elif q.lower() in bulletin.title.lower():
-            match_type = "title"
-            snippet = bulletin.title
-        elif bulletin.summary and q.lower() in bulletin.summary.lower():
-            match_type = "summary"
-            snippet = bulletin.summary[:200] + "..." if len(bulletin.summary) > 200 else bulletin.summary
+        if q_lower in bulletin.bulletin_number.lower():
+            matches.append((bulletin, "bulletin_number", f"Bulletin: {bulletin.bulletin_number}"))
+        elif q_lower in bulletin.title.lower():
+            matches.append((bulletin, "title", bulletin.title))
+        elif bulletin.summary and q_lower in bulletin.summary.lower():
+            summary = bulletin.summary[:200] + "..." if len(bulletin.summary) > 200 else bulletin.summary
+            matches.append((bulletin, "summary", summary))
         else:
-            # Find snippet in full text
-            q_lower = q.lower()
-            full_text_lower = bulletin.full_text.lower()
-            pos = full_text_lower.find(q_lower)
-            if pos >= 0:
-                start = max(0, pos - 50)
-                end = min(len(bulletin.full_text), pos + len(q) + 150)
-                snippet = ("..." if start > 0 else "") + bulletin.full_text[start:end] + ("..." if end < len(bulletin.full_text) else "")
+            matches.append((bulletin, "full_text", None))
+
+    full_text_ids = [str(b.id) for b, match_type, _ in matches if match_type == "full_text"]
+    snippets = snippet_engine.snippets(db, DOC_STANDATA, full_text_ids, q)
+
+    for bulletin, match_type, snippet in matches:
+        if match_type == "full_text" and str(bulletin.id) in snippets:
+            snippet = snippets[str(bulletin.id)].render()
 
         results.append(StandataSearchResult(
             id=bulletin.id,
@@ -212,7 +215,7 @@ async def search_standata(
 @router.get("/by-code/{code_reference}", response_model=StandataByCodeResponse)
 async def get_bulletins_by_code(
     code_reference: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Find STANDATA bulletins that reference a specific NBC article.
@@ -220,14 +223,23 @@ async def get_bulletins_by_code(
     Args:
         code_reference: NBC article number (e.g., "9.8.4.1", "9.10.9.6")
 
-    Returns all bulletins that contain this code reference.
+    Returns all bulletins that cite this article or, for a Section or
+    Division number such as "9.10", any article beneath it.
     """
-    # Search for bulletins containing this code reference
-    # Search in full text as code_references is stored as array and
-    # also appears in the full text content
-    bulletins = db.query(Standata).filter(
-        Standata.full_text.ilike(f"%{code_reference}%")
-    ).order_by(Standata.bulletin_number.desc()).all()
+    return await db.run_sync(_bulletins_by_code, code_reference)
+
+
+def _bulletins_by_code(db: Session, code_reference: str) -> StandataByCodeResponse:
+    """Bulletins citing an article, on the sync side of the async session."""
+    # Bulletins citing this article (or a sub-reference of it), via the
+    # cross-reference index built from code_references
+    bulletin_ids = find_bulletin_ids(db, code_reference)
+
+    bulletins = []
+    if bulletin_ids:
+        bulletins = db.query(Standata).options(defer(Standata.full_text)).filter(
+            Standata.id.in_(bulletin_ids)
+        ).order_by(Standata.bulletin_number.desc()).all()
 
     return StandataByCodeResponse(
         code_reference=code_reference,
@@ -247,7 +259,7 @@ async def get_bulletins_by_code(
 @router.get("/{bulletin_number}", response_model=StandataResponse)
 async def get_standata_bulletin(
     bulletin_number: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Get a specific STANDATA bulletin by its bulletin number.
@@ -256,15 +268,15 @@ async def get_standata_bulletin(
         bulletin_number: The bulletin number (e.g., "23-BCI-030", "23-BCB-001")
     """
     # Try exact match first
-    bulletin = db.query(Standata).filter(
+    bulletin = await db.scalar(select(Standata).where(
         Standata.bulletin_number == bulletin_number.upper()
-    ).first()
+    ))
 
     # Try case-insensitive match
     if not bulletin:
-        bulletin = db.query(Standata).filter(
+        bulletin = await db.scalar(select(Standata).where(
             Standata.bulletin_number.ilike(bulletin_number)
-        ).first()
+        ).limit(1))
 
     if not bulletin:
         raise HTTPException(
@@ -278,12 +290,12 @@ async def get_standata_bulletin(
 @router.get("/id/{bulletin_id}", response_model=StandataResponse)
 async def get_standata_by_id(
     bulletin_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Get a specific STANDATA bulletin by its UUID.
     """
-    bulletin = db.query(Standata).filter(Standata.id == bulletin_id).first()
+    bulletin = await db.get(Standata, bulletin_id)
 
     if not bulletin:
         raise HTTPException(
@@ -4,21 +4,29 @@ Zones & Parcels API - Calgary zoning information and address lookup.
 This module provides:
 - Zone information lookup
 - Address/parcel search
-- Zoning compliance checks
+- Zoning compliance checks (single and batch)
 """
+import json
 from typing import List, Optional
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import func, select
 
-from ..database import get_db
+from ..database import get_async_read_db
 from ..models.zones import Zone, ZoneRule, Parcel
 from ..schemas.zones import (
     ZoneResponse, ZoneSummary, ZoneRuleResponse,
     ParcelResponse, ParcelSearchResult,
-    AddressSearchQuery, ZoningCheckRequest, ZoningCheckResponse, ZoningCheckResult
+    AddressSearchQuery, ZoningCheckRequest, ZoningCheckResponse, ZoningCheckResult,
+    ZoneLookupResponse, ZoningBatchRequest, ZoningBatchResponse,
 )
+from ..services.address_resolver import address_resolver
+from ..services.zone_index import get_zone_index, clean_zone_code, lookup_zone
+from ..services.zoning_batch import check_zoning_batch, iter_rows
+from ..services.zone_rules import zone_rule_engine
 
 router = APIRouter()
 
@@ -26,27 +34,63 @@ router = APIRouter()
 @router.get("/zones", response_model=List[ZoneSummary])
 async def list_zones(
     category: Optional[str] = Query(None, description="Filter by category: residential, commercial, industrial, mixed"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     List all zone designations.
     """
-    query = db.query(Zone)
+    query = select(Zone)
 
     if category:
-        query = query.filter(Zone.category == category)
+        query = query.where(Zone.category == category)
 
-    return query.order_by(Zone.zone_code).all()
+    result = await db.scalars(query.order_by(Zone.zone_code))
+    return result.all()
+
+
+@router.get("/lookup", response_model=ZoneLookupResponse)
+async def lookup_zone_at_point(
+    lat: float = Query(..., ge=-90, le=90, description="WGS84 latitude"),
+    lon: float = Query(..., ge=-180, le=180, description="WGS84 longitude"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Get the land-use district containing a point.
+
+    Resolved from the district polygons in memory, so it works for points
+    without a parcel and for parcels whose zone is unknown.
+    """
+    index = get_zone_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Land-use district polygons are not loaded")
+
+    zone_code = index.lookup(lat, lon)
+    if zone_code is None:
+        raise HTTPException(status_code=404, detail="No land-use district at this location")
+
+    zone = await db.scalar(select(Zone).where(Zone.zone_code == clean_zone_code(zone_code)))
+    return ZoneLookupResponse(latitude=lat, longitude=lon, zone_code=zone_code, zone=zone)
+
+
+async def _get_zone_by_code(db: AsyncSession, zone_code: str) -> Optional[Zone]:
+    """Zone with its rules by code, case-insensitively (resolved in memory, then fetched by primary key)."""
+    compiled = await db.run_sync(zone_rule_engine.get_zone, zone_code)
+    if not compiled:
+        return None
+    return await db.get(Zone, compiled.zone_id, options=[selectinload(Zone.rules)])
+
+
+def _fmt(value: float) -> str:
+    """Limit for display: 10.0 -> "10", 1.2 -> "1.2"."""
+    return f"{value:g}"
 
 
 @router.get("/zones/{zone_code}", response_model=ZoneResponse)
-async def get_zone(zone_code: str, db: Session = Depends(get_db)):
+async def get_zone(zone_code: str, db: AsyncSession = Depends(get_async_read_db)):
     """
     Get detailed information for a zone by its code (e.g., R-C1, M-CG).
     """
-    zone = db.query(Zone).filter(
-        func.upper(Zone.zone_code) == zone_code.upper()
-    ).first()
+    zone = await _get_zone_by_code(db, zone_code)
 
     if not zone:
         raise HTTPException(status_code=404, detail=f"Zone '{zone_code}' not found")
@@ -58,24 +102,23 @@ async def get_zone(zone_code: str, db: Session = Depends(get_db)):
 async def get_zone_rules(
     zone_code: str,
     rule_type: Optional[str] = Query(None, description="Filter by rule type: setback_front, height, FAR, etc."),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Get all rules for a specific zone.
     """
-    zone = db.query(Zone).filter(
-        func.upper(Zone.zone_code) == zone_code.upper()
-    ).first()
+    zone = await db.run_sync(zone_rule_engine.get_zone, zone_code)
 
     if not zone:
         raise HTTPException(status_code=404, detail=f"Zone '{zone_code}' not found")
 
-    query = db.query(ZoneRule).filter(ZoneRule.zone_id == zone.id)
+    query = select(ZoneRule).where(ZoneRule.zone_id == zone.zone_id)
 
     if rule_type:
-        query = query.filter(ZoneRule.rule_type == rule_type)
+        query = query.where(ZoneRule.rule_type == rule_type)
 
-    return query.all()
+    result = await db.scalars(query)
+    return result.all()
 
 
 @router.get("/parcels/search", response_model=List[ParcelSearchResult])
@@ -83,55 +126,43 @@ async def search_parcels(
     query: str = Query(..., min_length=3, description="Address or partial address to search"),
     community: Optional[str] = Query(None, description="Filter by community name"),
     limit: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Search for parcels by address.
     Returns matching parcels with their zoning information.
+
+    Addresses are compared in normalized form ("17th Ave" matches "17 AV"),
+    prefix matches first.
     """
-    search_pattern = f"%{query}%"
+    return await db.run_sync(_search_parcels, query, limit, community)
 
-    base_query = db.query(
-        Parcel.id,
-        Parcel.address,
-        Parcel.community_name,
-        Parcel.land_use_designation,
-        Parcel.latitude,
-        Parcel.longitude,
-        Zone.zone_code,
-        Zone.zone_name
-    ).outerjoin(Zone, Parcel.zone_id == Zone.id)
-
-    base_query = base_query.filter(Parcel.address.ilike(search_pattern))
-
-    if community:
-        base_query = base_query.filter(
-            Parcel.community_name.ilike(f"%{community}%")
-        )
 
-    results = base_query.limit(limit).all()
+def _search_parcels(db: Session, query: str, limit: int, community: Optional[str]) -> List[ParcelSearchResult]:
+    """Parcel search results with zones, on the sync side of the async session."""
+    parcels = address_resolver.search(db, query, limit, community=community)
 
     return [
         ParcelSearchResult(
-            id=r.id,
-            address=r.address,
-            community_name=r.community_name,
-            land_use_designation=r.land_use_designation,
-            zone_code=r.zone_code,
-            zone_name=r.zone_name,
-            latitude=float(r.latitude) if r.latitude else None,
-            longitude=float(r.longitude) if r.longitude else None
+            id=p.id,
+            address=p.address,
+            community_name=p.community_name,
+            land_use_designation=p.land_use_designation,
+            zone_code=p.zone.zone_code if p.zone else None,
+            zone_name=p.zone.zone_name if p.zone else None,
+            latitude=float(p.latitude) if p.latitude else None,
+            longitude=float(p.longitude) if p.longitude else None
         )
-        for r in results
+        for p in parcels
     ]
 
 
 @router.get("/parcels/{parcel_id}", response_model=ParcelResponse)
-async def get_parcel(parcel_id: UUID, db: Session = Depends(get_db)):
+async def get_parcel(parcel_id: UUID, db: AsyncSession = Depends(get_async_read_db)):
     """
     Get detailed information for a specific parcel.
     """
-    parcel = db.query(Parcel).filter(Parcel.id == parcel_id).first()
+    parcel = await db.get(Parcel, parcel_id, options=[selectinload(Parcel.zone)])
 
     if not parcel:
         raise HTTPException(status_code=404, detail="Parcel not found")
@@ -142,7 +173,7 @@ async def get_parcel(parcel_id: UUID, db: Session = Depends(get_db)):
 @router.post("/check-zoning", response_model=ZoningCheckResponse)
 async def check_zoning_compliance(
     request: ZoningCheckRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Check if proposed building parameters comply with zoning rules.
@@ -150,14 +181,17 @@ async def check_zoning_compliance(
     Provide either parcel_id or address to identify the location.
     Then provide proposed building parameters to check against zone rules.
     """
+    return await db.run_sync(_check_zoning, request)
+
+
+def _check_zoning(db: Session, request: ZoningCheckRequest) -> ZoningCheckResponse:
+    """Zoning check for one parcel, on the sync side of the async session."""
     # Find the parcel
     parcel = None
     if request.parcel_id:
         parcel = db.query(Parcel).filter(Parcel.id == request.parcel_id).first()
     elif request.address:
-        parcel = db.query(Parcel).filter(
-            Parcel.address.ilike(f"%{request.address}%")
-        ).first()
+        parcel = address_resolver.resolve(db, request.address)
 
     if not parcel:
         raise HTTPException(
@@ -165,16 +199,23 @@ async def check_zoning_compliance(
             detail="Parcel not found. Please provide a valid parcel_id or searchable address."
         )
 
-    # Get the zone
-    if not parcel.zone_id:
-        raise HTTPException(
-            status_code=400,
-            detail=f"No zone designation found for parcel at {parcel.address}"
-        )
-
-    zone = db.query(Zone).filter(Zone.id == parcel.zone_id).first()
-    if not zone:
-        raise HTTPException(status_code=500, detail="Zone data inconsistency")
+    # Get the zone (parcels never matched to a zone fall back to the district polygons)
+    if parcel.zone_id:
+        zone = db.query(Zone).filter(Zone.id == parcel.zone_id).first()
+        if not zone:
+            raise HTTPException(status_code=500, detail="Zone data inconsistency")
+    else:
+        zone = None
+        if parcel.latitude is not None and parcel.longitude is not None:
+            zone = lookup_zone(db, float(parcel.latitude), float(parcel.longitude))
+        if not zone:
+            raise HTTPException(
+                status_code=400,
+                detail=f"No zone designation found for parcel at {parcel.address}"
+            )
+
+    # Limits for this parcel: zone defaults adjusted by applicable zone rules
+    limits = zone_rule_engine.limits(db, zone.id, parcel, request)
 
     # Perform compliance checks
     checks = []
@@ -182,107 +223,123 @@ async def check_zoning_compliance(
     warning_count = 0
 
     # Height check (metres)
-    if request.building_height_m is not None and zone.max_height_m:
-        status = "pass" if request.building_height_m <= float(zone.max_height_m) else "fail"
+    if request.building_height_m is not None and limits["height_m"]:
+        status = "pass" if request.building_height_m <= limits["height_m"] else "fail"
         if status == "fail":
             failed_count += 1
         checks.append(ZoningCheckResult(
             check_name="Building Height (metres)",
             rule_type="height",
-            required_value=f"≤ {zone.max_height_m} m",
+            required_value=f"≤ {_fmt(limits['height_m'])} m",
             proposed_value=f"{request.building_height_m} m",
             status=status,
-            message=f"Maximum height is {zone.max_height_m} m" if status == "fail" else None,
+            message=f"Maximum height is {_fmt(limits['height_m'])} m" if status == "fail" else None,
             bylaw_reference=f"LUB 1P2007 - Zone {zone.zone_code}"
         ))
 
     # Height check (storeys)
-    if request.building_storeys is not None and zone.max_storeys:
-        status = "pass" if request.building_storeys <= zone.max_storeys else "fail"
+    if request.building_storeys is not None and limits["storeys"]:
+        status = "pass" if request.building_storeys <= limits["storeys"] else "fail"
         if status == "fail":
             failed_count += 1
         checks.append(ZoningCheckResult(
             check_name="Building Height (storeys)",
             rule_type="height",
-            required_value=f"≤ {zone.max_storeys} storeys",
+            required_value=f"≤ {_fmt(limits['storeys'])} storeys",
             proposed_value=f"{request.building_storeys} storeys",
             status=status,
-            message=f"Maximum is {zone.max_storeys} storeys" if status == "fail" else None,
+            message=f"Maximum is {_fmt(limits['storeys'])} storeys" if status == "fail" else None,
             bylaw_reference=f"LUB 1P2007 - Zone {zone.zone_code}"
         ))
 
     # Front setback check
-    if request.front_setback_m is not None and zone.min_front_setback_m:
-        status = "pass" if request.front_setback_m >= float(zone.min_front_setback_m) else "fail"
+    if request.front_setback_m is not None and limits["front_setback_m"]:
+        status = "pass" if request.front_setback_m >= limits["front_setback_m"] else "fail"
         if status == "fail":
             failed_count += 1
         checks.append(ZoningCheckResult(
             check_name="Front Setback",
             rule_type="setback_front",
-            required_value=f"≥ {zone.min_front_setback_m} m",
+            required_value=f"≥ {_fmt(limits['front_setback_m'])} m",
             proposed_value=f"{request.front_setback_m} m",
             status=status,
-            message=f"Minimum front setback is {zone.min_front_setback_m} m" if status == "fail" else None,
+            message=f"Minimum front setback is {_fmt(limits['front_setback_m'])} m" if status == "fail" else None,
             bylaw_reference=f"LUB 1P2007 - Zone {zone.zone_code}"
         ))
 
     # Side setback check
-    if request.side_setback_m is not None and zone.min_side_setback_m:
-        status = "pass" if request.side_setback_m >= float(zone.min_side_setback_m) else "fail"
+    if request.side_setback_m is not None and limits["side_setback_m"]:
+        status = "pass" if request.side_setback_m >= limits["side_setback_m"] else "fail"
         if status == "fail":
             failed_count += 1
         checks.append(ZoningCheckResult(
             check_name="Side Setback",
             rule_type="setback_side",
-            required_value=f"≥ {zone.min_side_setback_m} m",
+            required_value=f"≥ {_fmt(limits['side_setback_m'])} m",
             proposed_value=f"{request.side_setback_m} m",
             status=status,
-            message=f"Minimum side setback is {zone.min_side_setback_m} m" if status == "fail" else None,
+            message=f"Minimum side setback is {_fmt(limits['side_setback_m'])} m" if status == "fail" else None,
             bylaw_reference=f"LUB 1P2007 - Zone {zone.zone_code}"
         ))
 
     # Rear setback check
-    if request.rear_setback_m is not None and zone.min_rear_setback_m:
-        status = "pass" if request.rear_setback_m >= float(zone.min_rear_setback_m) else "fail"
+    if request.rear_setback_m is not None and limits["rear_setback_m"]:
+        status = "pass" if request.rear_setback_m >= limits["rear_setback_m"] else "fail"
         if status == "fail":
             failed_count += 1
         checks.append(ZoningCheckResult(
             check_name="Rear Setback",
             rule_type="setback_rear",
-            required_value=f"≥ {zone.min_rear_setback_m} m",
+            required_value=f"≥ {_fmt(limits['rear_setback_m'])} m",
             proposed_value=f"{request.rear_setback_m} m",
             status=status,
-            message=f"Minimum rear setback is {zone.min_rear_setback_m} m" if status == "fail" else None,
+            message=f"Minimum rear setback is {_fmt(limits['rear_setback_m'])} m" if status == "fail" else None,
             bylaw_reference=f"LUB 1P2007 - Zone {zone.zone_code}"
         ))
 
     # FAR check
-    if request.floor_area_ratio is not None and zone.max_far:
-        status = "pass" if request.floor_area_ratio <= float(zone.max_far) else "fail"
+    if request.floor_area_ratio is not None and limits["far"]:
+        status = "pass" if request.floor_area_ratio <= limits["far"] else "fail"
         if status == "fail":
             failed_count += 1
         checks.append(ZoningCheckResult(
             check_name="Floor Area Ratio",
             rule_type="FAR",
-            required_value=f"≤ {zone.max_far}",
+            required_value=f"≤ {_fmt(limits['far'])}",
             proposed_value=f"{request.floor_area_ratio}",
             status=status,
-            message=f"Maximum FAR is {zone.max_far}" if status == "fail" else None,
+            message=f"Maximum FAR is {_fmt(limits['far'])}" if status == "fail" else None,
+            bylaw_reference=f"LUB 1P2007 - Zone {zone.zone_code}"
+        ))
+
+    # Lot coverage check (building footprint over lot area)
+    if request.building_area_sqm is not None and parcel.area_sqm and limits["coverage"]:
+        coverage = request.building_area_sqm / float(parcel.area_sqm)
+        status = "pass" if coverage <= limits["coverage"] else "fail"
+        if status == "fail":
+            failed_count += 1
+        checks.append(ZoningCheckResult(
+            check_name="Lot Coverage",
+            rule_type="coverage",
+            required_value=f"≤ {_fmt(limits['coverage'] * 100)}%",
+            proposed_value=f"{_fmt(round(coverage * 100, 1))}%",
+            status=status,
+            message=f"Maximum lot coverage is {_fmt(limits['coverage'] * 100)}%" if status == "fail" else None,
             bylaw_reference=f"LUB 1P2007 - Zone {zone.zone_code}"
         ))
 
     # Parking check
-    if request.parking_stalls is not None and zone.min_parking_stalls:
-        status = "pass" if request.parking_stalls >= zone.min_parking_stalls else "fail"
+    if request.parking_stalls is not None and limits["parking_stalls"]:
+        status = "pass" if request.parking_stalls >= limits["parking_stalls"] else "fail"
         if status == "fail":
             failed_count += 1
         checks.append(ZoningCheckResult(
             check_name="Parking Stalls",
             rule_type="parking",
-            required_value=f"≥ {zone.min_parking_stalls} stalls",
+            required_value=f"≥ {_fmt(limits['parking_stalls'])} stalls",
             proposed_value=f"{request.parking_stalls} stalls",
             status=status,
-            message=f"Minimum {zone.min_parking_stalls} parking stalls required" if status == "fail" else None,
+            message=f"Minimum {_fmt(limits['parking_stalls'])} parking stalls required" if status == "fail" else None,
             bylaw_reference=f"LUB 1P2007 - Zone {zone.zone_code}"
         ))
 
@@ -300,40 +357,63 @@ async def check_zoning_compliance(
         overall_status = "pass"
         summary = f"All {len(checks)} zoning checks passed for zone {zone.zone_code}."
 
+    # Validated here, while the parcel and zone can still load attributes
     return ZoningCheckResponse(
-        parcel=parcel,
-        zone=zone,
+        parcel=ParcelResponse.model_validate(parcel),
+        zone=ZoneResponse.model_validate(zone),
         checks=checks,
         overall_status=overall_status,
         summary=summary
     )
 
 
+@router.post("/check-zoning/batch", response_model=ZoningBatchResponse)
+async def check_zoning_compliance_batch(
+    request: ZoningBatchRequest,
+    format: str = Query("columnar", pattern="^(columnar|ndjson)$",
+                        description="columnar (one JSON object of aligned lists) or ndjson (one line per item)"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Check up to 1000 (parcel, proposal) pairs against zoning in one request.
+
+    Each item takes the same fields as /check-zoning. Height, storeys,
+    setbacks, FAR, lot coverage and parking are evaluated for all items at
+    once. Items whose parcel or zone cannot be found get overall_status
+    "error" instead of failing the whole batch.
+    """
+    result = await db.run_sync(check_zoning_batch, request.items)
+    if format == "ndjson":
+        lines = (json.dumps(row) + "\n" for row in iter_rows(result))
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+    return result
+
+
 @router.get("/communities", response_model=List[dict])
 async def list_communities(
     quadrant: Optional[str] = Query(None, description="Filter by quadrant: NE, NW, SE, SW"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     List all Calgary communities with parcel counts.
     """
-    query = db.query(
+    query = select(
         Parcel.community_name,
         Parcel.community_code,
         Parcel.quadrant,
         func.count(Parcel.id).label("parcel_count")
-    ).filter(
+    ).where(
         Parcel.community_name.isnot(None)
     )
 
     if quadrant:
-        query = query.filter(Parcel.quadrant == quadrant.upper())
+        query = query.where(Parcel.quadrant == quadrant.upper())
 
-    results = query.group_by(
+    results = (await db.execute(query.group_by(
         Parcel.community_name,
         Parcel.community_code,
         Parcel.quadrant
-    ).order_by(Parcel.community_name).all()
+    ).order_by(Parcel.community_name))).all()
 
     return [
         {
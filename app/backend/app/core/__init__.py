@@ -11,6 +11,7 @@ from .security import (
     generate_reset_token,
 )
 from .deps import get_current_user, get_current_active_user
+from .password_hashing import password_hasher
 
 __all__ = [
     "verify_password",
@@ -22,4 +23,5 @@ __all__ = [
     "generate_reset_token",
     "get_current_user",
     "get_current_active_user",
+    "password_hasher",
 ]
@@ -8,7 +8,8 @@ from fastapi import Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
 
 from ..database import get_db
-from ..models.auth import User
+from ..models.auth import User, UserRole
+from ..services.user_cache import user_cache
 from .security import decode_token
 
 
@@ -103,7 +104,8 @@ async def get_current_user(
     except ValueError:
         raise credentials_exception
 
-    user = db.query(User).filter(User.id == user_uuid).first()
+    # Cached by user id; tokens issued before a password change are rejected
+    user = user_cache.get_user(db, user_uuid, payload.get("ver"))
     if user is None:
         raise credentials_exception
 
@@ -160,6 +162,31 @@ async def get_current_verified_user(
     return current_user
 
 
+async def get_current_admin_user(
+    current_user: User = Depends(get_current_active_user)
+) -> User:
+    """
+    Get the current user and verify they are an administrator.
+
+    Use this dependency for operational endpoints (cache/index refreshes).
+
+    Args:
+        current_user: The active user from get_current_active_user
+
+    Returns:
+        The admin User object
+
+    Raises:
+        HTTPException: If the user is not an admin
+    """
+    if current_user.role != UserRole.ADMIN.value:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Administrator access required"
+        )
+    return current_user
+
+
 async def get_optional_current_user(
     request: Request,
     db: Session = Depends(get_db)
@@ -197,4 +224,4 @@ async def get_optional_current_user(
     except ValueError:
         return None
 
-    return db.query(User).filter(User.id == user_uuid).first()
+    return user_cache.get_user(db, user_uuid, payload.get("ver"))
@@ -0,0 +1,298 @@
+"""
+Argon2 password hashing off the event loop.
+
+Hashing or verifying a password takes tens to hundreds of milliseconds of
+CPU. Called directly from the async auth endpoints it blocked the event
+loop, stalling every other request on the worker during login bursts.
+`PasswordHasher` runs it in a small dedicated thread pool instead (argon2
+releases the GIL while hashing), and:
+
+- Takes the Argon2 time cost from `password_hash_time_cost`, or else tunes
+  it once: the largest cost whose hash stays within
+  `password_hash_target_ms` on this machine (never below passlib's
+  default), persisted to `password_hash_params_path` so later boots and
+  the other workers reuse it instead of re-measuring. Memory and
+  parallelism are fixed by settings
+- Reports hashes whose parameters are weaker than the current ones, so
+  login can rehash them transparently (never downgrading a stronger hash,
+  so workers tuned slightly differently do not rehash back and forth)
+- Publishes queue depth, queue wait and hash latency
+"""
+import asyncio
+import json
+import logging
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Tuple
+
+import argon2
+from passlib.context import CryptContext
+from passlib.hash import argon2 as passlib_argon2
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+TUNING_PASSWORD = "tuning-password-0123456789"
+
+# Tuning never picks a cost weaker than passlib's own default
+MIN_TIME_COST = passlib_argon2.default_rounds
+
+
+def make_context(time_cost: Optional[int] = None, memory_kib: Optional[int] = None,
+                 parallelism: Optional[int] = None) -> CryptContext:
+    """CryptContext hashing with the given Argon2 parameters (passlib defaults where None)."""
+    options = {}
+    if time_cost is not None:
+        options["argon2__time_cost"] = time_cost
+    if memory_kib is not None:
+        options["argon2__memory_cost"] = memory_kib
+    if parallelism is not None:
+        options["argon2__parallelism"] = parallelism
+    return CryptContext(schemes=["argon2"], deprecated="auto", **options)
+
+
+class PasswordHasher:
+    """Bounded thread pool for Argon2 hashing, with startup cost tuning and metrics."""
+
+    def __init__(self):
+        settings = get_settings()
+        self.workers = max(1, settings.password_hash_workers)
+        self.memory_kib = settings.password_hash_memory_kib
+        self.parallelism = settings.password_hash_parallelism
+        self.time_cost = max(MIN_TIME_COST, settings.password_hash_time_cost or MIN_TIME_COST)
+        self.context = make_context(self.time_cost, self.memory_kib, self.parallelism)
+        self.tuned_ms: Optional[float] = None
+        self.source = "config" if settings.password_hash_time_cost else "default"
+        self.configured = False
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self.max_queue_depth = 0
+        self.operations = 0
+        self.rehashes = 0
+        self.hash_ms_total = 0.0
+        self.hash_ms_max = 0.0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+
+    # --- Tuning ---
+
+    def tune(self, target_ms: Optional[float] = None, max_time_cost: Optional[int] = None,
+             min_time_cost: int = MIN_TIME_COST) -> dict:
+        """
+        Pick the Argon2 time cost for this machine.
+
+        Raises the time cost from `min_time_cost` until a hash takes longer
+        than the target and keeps the last one within it (at least
+        `min_time_cost`). Blocking; `configure` runs it in the executor.
+
+        Args:
+            target_ms: Target latency of one hash (defaults to settings)
+            max_time_cost: Upper bound on the time cost (defaults to settings)
+            min_time_cost: Lower bound on the time cost (passlib's default)
+
+        Returns:
+            The chosen time_cost, memory_kib, parallelism and measured ms
+        """
+        settings = get_settings()
+        target_ms = target_ms if target_ms is not None else settings.password_hash_target_ms
+        max_time_cost = max(min_time_cost, max_time_cost or settings.password_hash_max_time_cost)
+
+        chosen, chosen_ms = min_time_cost, None
+        for time_cost in range(min_time_cost, max_time_cost + 1):
+            context = make_context(time_cost, self.memory_kib, self.parallelism)
+            context.hash(TUNING_PASSWORD)  # Warm up (allocations, first-call overhead)
+            samples = []
+            for _ in range(3):
+                started = time.perf_counter()
+                context.hash(TUNING_PASSWORD)
+                samples.append((time.perf_counter() - started) * 1000)
+            elapsed_ms = statistics.median(samples)
+            if elapsed_ms > target_ms and time_cost > min_time_cost:
+                break
+            chosen, chosen_ms = time_cost, elapsed_ms
+            if elapsed_ms > target_ms:
+                break
+
+        self._apply(chosen, round(chosen_ms, 1), "tuned")
+        result = self._params()
+        logger.info(f"Argon2 tuned for {target_ms:.0f} ms: {result}")
+        return result
+
+    def _apply(self, time_cost: int, tuned_ms: Optional[float], source: str) -> None:
+        self.context = make_context(time_cost, self.memory_kib, self.parallelism)
+        self.time_cost = time_cost
+        self.tuned_ms = tuned_ms
+        self.source = source
+
+    def _params(self) -> dict:
+        return {
+            "time_cost": self.time_cost,
+            "memory_kib": self.memory_kib,
+            "parallelism": self.parallelism,
+            "hash_ms": self.tuned_ms,
+        }
+
+    def _load_params(self, path: Path) -> bool:
+        """Adopt a persisted time cost tuned for the same memory and parallelism."""
+        try:
+            params = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return False
+        if params.get("memory_kib") != self.memory_kib or params.get("parallelism") != self.parallelism:
+            return False
+        self._apply(max(MIN_TIME_COST, int(params["time_cost"])), params.get("hash_ms"), "persisted")
+        return True
+
+    def _save_params(self, path: Path) -> None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.tmp")
+            tmp_path.write_text(json.dumps(self._params()))
+            tmp_path.replace(path)
+        except OSError as e:
+            logger.warning(f"Could not persist Argon2 parameters to {path}: {e}")
+
+    def _configure(self) -> dict:
+        settings = get_settings()
+        if not settings.password_hash_time_cost:
+            path = params_path()
+            if not self._load_params(path) and settings.password_hash_target_ms > 0:
+                self.tune()
+                self._save_params(path)
+        self.configured = True
+        return {**self._params(), "source": self.source}
+
+    async def configure(self) -> dict:
+        """
+        Settle the time cost for this process (application startup).
+
+        A configured `password_hash_time_cost` wins; otherwise the cost
+        persisted by an earlier tuning is reused, and only when there is
+        none is it tuned (in the executor, off the event loop) and saved.
+
+        Returns:
+            The time_cost, memory_kib, parallelism, measured ms and source
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), self._configure)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """True if the hash is not Argon2id or uses weaker parameters than the current ones."""
+        try:
+            params = argon2.extract_parameters(hashed_password)
+        except (argon2.exceptions.InvalidHashError, ValueError):
+            return True
+        return (
+            params.type is not argon2.Type.ID
+            or params.time_cost < self.time_cost
+            or params.memory_cost < self.memory_kib
+        )
+
+    # --- Running off the event loop ---
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix="password-hash"
+                    )
+        return self._executor
+
+    def _timed(self, submitted: float, fn, *args):
+        started = time.perf_counter()
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            return fn(*args)
+        finally:
+            finished = time.perf_counter()
+            wait_ms = (started - submitted) * 1000
+            hash_ms = (finished - started) * 1000
+            with self._lock:
+                self._running -= 1
+                self.operations += 1
+                self.wait_ms_total += wait_ms
+                self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+                self.hash_ms_total += hash_ms
+                self.hash_ms_max = max(self.hash_ms_max, hash_ms)
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            self._queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, self._queued)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), self._timed, time.perf_counter(), fn, *args)
+
+    async def hash(self, password: str) -> str:
+        """Hash a password with the current parameters."""
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """Check a password against a stored hash."""
+        return await self._run(self.context.verify, password, hashed_password)
+
+    def _verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        if not self.context.verify(password, hashed_password):
+            return False, None
+        if self.needs_rehash(hashed_password):
+            self.rehashes += 1
+            return True, self.context.hash(password)
+        return True, None
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Check a password and rehash it if its parameters are out of date.
+
+        Returns:
+            Tuple of (valid, new_hash); new_hash is None unless the stored
+            hash should be replaced
+        """
+        return await self._run(self._verify_and_update, password, hashed_password)
+
+    def shutdown(self) -> None:
+        """Stop the worker threads."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            operations = self.operations or 1
+            return {
+                "workers": self.workers,
+                "time_cost": self.time_cost,
+                "memory_kib": self.memory_kib,
+                "parallelism": self.parallelism,
+                "tuned_hash_ms": self.tuned_ms,
+                "time_cost_source": self.source,
+                "queue_depth": self._queued,
+                "running": self._running,
+                "max_queue_depth": self.max_queue_depth,
+                "operations": self.operations,
+                "rehashes": self.rehashes,
+                "avg_hash_ms": round(self.hash_ms_total / operations, 1),
+                "max_hash_ms": round(self.hash_ms_max, 1),
+                "avg_wait_ms": round(self.wait_ms_total / operations, 1),
+                "max_wait_ms": round(self.wait_ms_max, 1),
+            }
+
+
+def params_path() -> Path:
+    """File holding the tuned Argon2 parameters."""
+    settings = get_settings()
+    if settings.password_hash_params_path:
+        return Path(settings.password_hash_params_path)
+    return Path(settings.data_dir) / "password_hash.json"
+
+
+# Singleton instance for easy import
+password_hasher = PasswordHasher()
@@ -1,25 +1,26 @@
 """
 Security utilities for password hashing and JWT token management.
 """
+import hashlib
 import secrets
 from datetime import datetime, timedelta
 from typing import Optional, Any
 
 from jose import jwt, JWTError
-from passlib.context import CryptContext
 
 from ..config import get_settings
+from .password_hashing import password_hasher
 
 settings = get_settings()
 
-# Password hashing context using Argon2
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
-
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verify a plain password against a hashed password.
 
+    Blocks for the length of an Argon2 hash; async code should await
+    `password_hasher.verify` instead.
+
     Args:
         plain_password: The password to verify
         hashed_password: The stored hashed password
@@ -27,12 +28,15 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         True if password matches, False otherwise
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.context.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     """
-    Hash a password using Argon2.
+    Hash a password using Argon2 (with the parameters tuned at startup).
+
+    Blocks for the length of the hash; async code should await
+    `password_hasher.hash` instead.
 
     Args:
         password: The plain text password
@@ -40,7 +44,25 @@ def get_password_hash(password: str) -> str:
     Returns:
         The hashed password
     """
-    return pwd_context.hash(password)
+    return password_hasher.context.hash(password)
+
+
+def credential_version(password_changed_at: Optional[datetime]) -> str:
+    """
+    Short stamp of a user's credentials, carried in tokens as the "ver" claim.
+
+    Derived from when the password was last changed or reset, so tokens
+    issued before that stop being accepted, while rehashing the same
+    password with new Argon2 parameters leaves existing tokens valid.
+
+    Args:
+        password_changed_at: The user's password_changed_at (None if never changed)
+
+    Returns:
+        An 8-character hex stamp
+    """
+    changed = password_changed_at.isoformat() if password_changed_at else ""
+    return hashlib.blake2b(changed.encode("utf-8"), digest_size=4).hexdigest()
 
 
 def create_access_token(
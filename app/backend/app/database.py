@@ -1,24 +1,136 @@
 """
 Database connection and session management.
+
+Two paths onto the same database:
+- Sync (`SessionLocal`, `get_db`): scripts, services and most endpoints
+- Async (`get_async_db`): hot read endpoints, so a worker keeps serving
+  other requests while their queries wait on the database. The engine
+  (asyncpg for PostgreSQL, aiosqlite for SQLite) is created on first use;
+  services written against a sync Session run on it through
+  `AsyncSession.run_sync`
+
+Read-only endpoints take `get_read_db` / `get_async_read_db` instead, which
+use `database_read_replica_url` when it is set and the primary otherwise.
+
+Server databases get explicitly sized pools (`database_pool_*` settings)
+that record checkout waits and timeouts; `get_pool_stats` reports them with
+the in-use and overflow gauges of every engine.
 """
-from sqlalchemy import create_engine
+import threading
+import time
+from typing import AsyncIterator, Dict, Optional
+
+from sqlalchemy import create_engine, exc
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
 
 from .config import get_settings
 
 settings = get_settings()
 
+
+class PoolMetrics:
+    """Checkout waits and timeouts of one connection pool."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.peak_in_use = 0
+
+    def record(self, wait_seconds: float, in_use: int, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self.peak_in_use = max(self.peak_in_use, in_use)
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+    def get_stats(self, pool) -> dict:
+        with self._lock:
+            waits = self.checkouts + self.timeouts
+            return {
+                "pool_size": pool.size(),
+                "in_use": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(0, pool.overflow()),
+                "max_overflow": pool._max_overflow,
+                "peak_in_use": self.peak_in_use,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.wait_seconds_total / waits * 1000, 2) if waits else None,
+                "max_wait_ms": round(self.wait_seconds_max * 1000, 2),
+            }
+
+
+class _MonitoredPoolMixin:
+    """Times `_do_get` (waiting for a free connection or opening one) into `metrics`."""
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record(time.perf_counter() - started, self.checkedout(), timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - started, self.checkedout())
+        return connection
+
+
+def monitored_pool_class(name: str, async_: bool = False) -> type:
+    """
+    A QueuePool class recording into its own PoolMetrics.
+
+    The metrics live on the class so they survive `Pool.recreate()`
+    (engine.dispose()), which builds the new pool from `self.__class__`.
+    """
+    base = AsyncAdaptedQueuePool if async_ else QueuePool
+    return type(f"Monitored{base.__name__}", (_MonitoredPoolMixin, base), {"metrics": PoolMetrics(name)})
+
+
+def engine_options(url: str, name: str, async_: bool = False) -> dict:
+    """
+    create_engine keyword arguments for a database URL.
+
+    SQLite keeps SQLAlchemy's default pool (one file, nothing to size);
+    server databases get a monitored QueuePool sized from settings.
+    """
+    options = {"echo": settings.database_echo, "pool_pre_ping": settings.database_pool_pre_ping}
+    if not url.startswith("sqlite"):
+        options.update(
+            poolclass=monitored_pool_class(name, async_),
+            pool_size=settings.database_pool_size,
+            max_overflow=settings.database_max_overflow,
+            pool_timeout=settings.database_pool_timeout_seconds,
+            pool_recycle=settings.database_pool_recycle_seconds,
+        )
+    return options
+
+
 # Create engine
-engine = create_engine(
-    settings.database_url,
-    echo=settings.database_echo,
-    pool_pre_ping=True,
-)
+engine = create_engine(settings.database_url, **engine_options(settings.database_url, "primary"))
 
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Read replica for read-only endpoints (the primary when none is configured)
+if settings.database_read_replica_url:
+    read_engine = create_engine(
+        settings.database_read_replica_url,
+        **engine_options(settings.database_read_replica_url, "replica"),
+    )
+else:
+    read_engine = engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
 # Base class for models
 Base = declarative_base()
 
@@ -35,6 +147,114 @@ def get_db():
         db.close()
 
 
+def get_read_db():
+    """
+    Dependency that provides a session on the read replica (or the primary).
+    Only for endpoints that never write; replica data may lag slightly.
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# Sync driver -> async driver for the same database
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+_async_engines: Dict[str, AsyncEngine] = {}
+_async_sessionmakers: Dict[str, async_sessionmaker] = {}
+
+
+def async_database_url(url: str) -> str:
+    """
+    The async-driver form of a database URL.
+
+    Args:
+        url: SQLAlchemy URL, e.g. "postgresql://..." or "sqlite:///./app.db"
+
+    Returns:
+        The URL with an async driver, e.g. "postgresql+asyncpg://..."
+    """
+    scheme, sep, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
+def _async_target(replica: bool) -> str:
+    return "replica" if replica and settings.database_read_replica_url else "primary"
+
+
+def get_async_engine(replica: bool = False) -> AsyncEngine:
+    """
+    The async engine, created on first use.
+
+    Args:
+        replica: Use the read replica if one is configured
+    """
+    target = _async_target(replica)
+    if target not in _async_engines:
+        url = settings.database_read_replica_url if target == "replica" else settings.database_url
+        _async_engines[target] = create_async_engine(
+            async_database_url(url), **engine_options(url, f"async_{target}", async_=True)
+        )
+    return _async_engines[target]
+
+
+def get_async_sessionmaker(replica: bool = False) -> async_sessionmaker:
+    """Factory for AsyncSessions on the async engine."""
+    target = _async_target(replica)
+    if target not in _async_sessionmakers:
+        # Objects stay readable after commit: an AsyncSession cannot lazily reload them
+        _async_sessionmakers[target] = async_sessionmaker(get_async_engine(replica), expire_on_commit=False)
+    return _async_sessionmakers[target]
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """
+    Dependency that provides an async database session.
+    Used with FastAPI's Depends() in async endpoints.
+    """
+    async with get_async_sessionmaker()() as session:
+        yield session
+
+
+async def get_async_read_db() -> AsyncIterator[AsyncSession]:
+    """
+    Dependency that provides an async session on the read replica (or the primary).
+    Only for endpoints that never write.
+    """
+    async with get_async_sessionmaker(replica=True)() as session:
+        yield session
+
+
+async def dispose_async_engine() -> None:
+    """Close the async engines' connections (application shutdown)."""
+    engines = list(_async_engines.values())
+    _async_engines.clear()
+    _async_sessionmakers.clear()
+    for async_engine in engines:
+        await async_engine.dispose()
+
+
+def get_pool_stats() -> dict:
+    """Pool gauges and checkout waits per engine (SQLite engines report only their pool class)."""
+    engines = {"primary": engine.pool}
+    if read_engine is not engine:
+        engines["replica"] = read_engine.pool
+    for target, async_engine in _async_engines.items():
+        engines[f"async_{target}"] = async_engine.pool
+    return {
+        name: pool.metrics.get_stats(pool) if isinstance(pool, _MonitoredPoolMixin)
+        else {"pool": type(pool).__name__}
+        for name, pool in engines.items()
+    }
+
+
 def init_db():
     """
     Initialize database tables.
@@ -56,3 +276,8 @@ def init_db():
                 print(f"Warning: Could not create extensions: {e}")
 
     Base.metadata.create_all(bind=engine)
+
+    # SQLite: FTS5 index for code/STANDATA search (no-op on PostgreSQL)
+    from .services.fulltext import ensure_fulltext_schema
+    with engine.begin() as conn:
+        ensure_fulltext_schema(conn)
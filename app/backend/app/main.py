@@ -1,17 +1,28 @@
 """
 Calgary Building Code Expert System - Main FastAPI Application
 """
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from .config import get_settings
 from .database import init_db
+from .core.deps import get_current_admin_user
 from .api import explore, guide, review, zones, checklists, permits, auth, documents, fees, addresses, public, standata, admin, dssp, quantity_survey, reports, presets, chat
 
 settings = get_settings()
 
 
+def _with_session(fn):
+    """Call `fn(db)` with a session that is closed afterwards (startup tasks)."""
+    from .database import SessionLocal
+    db = SessionLocal()
+    try:
+        return fn(db)
+    finally:
+        db.close()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler."""
@@ -20,6 +31,105 @@ async def lifespan(app: FastAPI):
     init_db()
     print("Database initialized")
 
+    # Memory-map the ANN index for semantic search (built from embeddings if missing)
+    try:
+        from .services.vector_index import load_article_index
+        index = _with_session(load_article_index)
+        if index is not None:
+            print(f"Vector index loaded: {index.size} article embeddings")
+        else:
+            print("Vector index not available - semantic search will fall back to full-text")
+    except Exception as e:
+        print(f"Warning: Vector index initialization failed: {e}")
+
+    # Record which search backends are populated so requests need no probe queries
+    try:
+        from .services.search_capabilities import refresh_search_capabilities
+        capabilities = _with_session(refresh_search_capabilities)
+        print(
+            f"Search capabilities: tsvector={capabilities.has_tsvector()}, "
+            f"embeddings={capabilities.has_embeddings()}, fts5={sorted(capabilities.fts5_sources)}, "
+            f"ann_index={capabilities.ann_index_size}"
+        )
+    except Exception as e:
+        print(f"Warning: Search capability detection failed: {e}")
+
+    # Normalized address keys for parcel lookup (adds/backfills the column on older databases)
+    try:
+        from .services.address_resolver import ensure_address_keys
+        filled = _with_session(ensure_address_keys)
+        if filled:
+            print(f"Address keys filled for {filled} parcels")
+    except Exception as e:
+        print(f"Warning: Address key backfill failed: {e}")
+
+    # Article -> STANDATA cross-references (built on databases loaded before the index existed)
+    try:
+        from .services.code_references import ensure_cross_references
+        indexed = _with_session(ensure_cross_references)
+        if indexed:
+            print(f"STANDATA cross-references built: {indexed} bulletins")
+    except Exception as e:
+        print(f"Warning: STANDATA cross-reference backfill failed: {e}")
+
+    # Positional term index for SQLite search snippets (built on databases loaded before it existed)
+    try:
+        from .services.snippets import ensure_snippet_index
+        indexed = _with_session(ensure_snippet_index)
+        if indexed:
+            print(f"Snippet index built: {indexed} documents")
+    except Exception as e:
+        print(f"Warning: Snippet index backfill failed: {e}")
+
+    # Credential stamp column for token revocation (added on older databases)
+    try:
+        from .services.user_cache import ensure_password_changed_at
+        if _with_session(ensure_password_changed_at):
+            print("Added users.password_changed_at")
+    except Exception as e:
+        print(f"Warning: users.password_changed_at migration failed: {e}")
+
+    # Build the in-memory address autocomplete index
+    if settings.address_index_enabled:
+        try:
+            from .services.address_index import address_index
+            count = _with_session(address_index.build)
+            print(f"Address index built: {count} addresses")
+        except Exception as e:
+            print(f"Warning: Address index build failed: {e} - it will be built on first use")
+
+    # Nearest-parcel grid for reverse geocoding (memory-mapped from disk when current)
+    try:
+        from .services.parcel_locator import parcel_locator
+        grid = _with_session(parcel_locator.load)
+        print(f"Parcel locator ready: {grid.size} parcels")
+    except Exception as e:
+        print(f"Warning: Parcel locator initialization failed: {e} - it will be built on first use")
+
+    # Land-use district polygons for spatial zone lookup
+    try:
+        from .services.zone_index import load_zone_index
+        zone_index = load_zone_index()
+        if zone_index is not None:
+            print(f"Zone index loaded: {zone_index.size} land-use districts")
+        else:
+            print("Land-use districts not available - spatial zone lookup disabled")
+    except Exception as e:
+        print(f"Warning: Zone index initialization failed: {e}")
+
+    # Argon2 cost: configured, persisted from an earlier tuning, or tuned once off the event loop
+    try:
+        from .core.password_hashing import password_hasher
+        if not password_hasher.configured:
+            params = await password_hasher.configure()
+            print(f"Password hashing: time_cost={params['time_cost']} ({params['source']})")
+    except Exception as e:
+        print(f"Warning: Password hash tuning failed: {e} - using default Argon2 parameters")
+
+    # Batched persistence of public API rate-limit counts
+    from .middleware.rate_limit import rate_limiter
+    rate_limiter.start()
+
     # Initialize price scheduler for background price updates
     try:
         from .services.quantity_survey.price_scheduler import initialize_price_scheduler
@@ -38,6 +148,14 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     print("Shutting down...")
+    from .services.embedding_service import get_embedding_service
+    await get_embedding_service().batcher.close()
+    from .middleware.rate_limit import rate_limiter
+    rate_limiter.stop()
+    from .core.password_hashing import password_hasher
+    password_hasher.shutdown()
+    from .database import dispose_async_engine
+    await dispose_async_engine()
     try:
         from .services.quantity_survey.price_scheduler import get_price_scheduler
         scheduler = get_price_scheduler()
@@ -68,6 +186,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Total-Count"],
 )
 
 # Include routers
@@ -116,3 +235,42 @@ async def root():
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+@app.get("/metrics", dependencies=[Depends(get_current_admin_user)])
+async def metrics():
+    """Runtime metrics for the search and data-access hot paths (admins only)."""
+    from .services.embedding_service import get_embedding_service
+    from .services.search_cache import search_cache
+    from .services.code_tree import code_tree_cache
+    from .services.pagination import count_cache
+    from .services.search_capabilities import search_capabilities
+    from .services.address_index import address_index
+    from .services.address_resolver import address_resolver
+    from .services.zone_index import get_zone_index
+    from .services.parcel_locator import parcel_locator
+    from .services.zone_rules import zone_rule_engine
+    from .services.parcel_sync import parcel_change_feed
+    from .middleware.rate_limit import rate_limiter
+    from .services.user_cache import user_cache
+    from .core.password_hashing import password_hasher
+    from .database import get_pool_stats
+
+    zone_index = get_zone_index()
+    return {
+        "embedding_batcher": get_embedding_service().batcher.get_metrics(),
+        "search_cache": search_cache.get_stats(),
+        "code_tree": code_tree_cache.get_stats(),
+        "list_counts": count_cache.get_stats(),
+        "search_capabilities": search_capabilities.get_stats(),
+        "address_index": address_index.get_stats(),
+        "address_resolver": address_resolver.get_stats(),
+        "zone_index": zone_index.get_stats() if zone_index else {"loaded": False},
+        "parcel_locator": parcel_locator.get_stats(),
+        "zone_rules": zone_rule_engine.get_stats(),
+        "parcel_changes": parcel_change_feed.get_stats(),
+        "rate_limiter": rate_limiter.get_stats(),
+        "user_cache": user_cache.get_stats(),
+        "password_hasher": password_hasher.get_stats(),
+        "database_pools": get_pool_stats(),
+    }
@@ -1,19 +1,22 @@
 """
 Rate limiting middleware for public API endpoints.
 
-Tracks queries by IP address using PostgreSQL.
+Tracks queries by IP address in memory, persisted to the rate_limits table
+in batches (see services/rate_limiter.py).
 Limit: 5 queries per IP per day (resets at midnight UTC).
 """
-from datetime import date, datetime
-from typing import Tuple, Optional
+from typing import Tuple
 from fastapi import Request, HTTPException
 from sqlalchemy.orm import Session
 
-from ..models.rate_limits import RateLimit
+from ..services.rate_limiter import RateLimiter
 
 # Configuration
 DAILY_QUERY_LIMIT = 5
 
+# Singleton instance for easy import
+rate_limiter = RateLimiter(DAILY_QUERY_LIMIT)
+
 
 class RateLimitExceeded(HTTPException):
     """Custom exception for rate limit exceeded."""
@@ -58,6 +61,9 @@ def check_rate_limit(db: Session, ip_address: str) -> Tuple[bool, int]:
     """
     Check if an IP address has exceeded the daily rate limit.
 
+    Counting happens in memory (services/rate_limiter.py); the count reaches
+    the rate_limits table with the next batched flush.
+
     Args:
         db: Database session
         ip_address: The client's IP address
@@ -67,35 +73,7 @@ def check_rate_limit(db: Session, ip_address: str) -> Tuple[bool, int]:
         - allowed: True if the request should be permitted
         - queries_remaining: Number of queries left for today
     """
-    today = date.today()
-
-    # Find or create rate limit record for this IP
-    rate_limit = db.query(RateLimit).filter(
-        RateLimit.ip_address == ip_address,
-        RateLimit.last_query_date == today
-    ).first()
-
-    if not rate_limit:
-        # First query today - create new record
-        rate_limit = RateLimit(
-            ip_address=ip_address,
-            query_count=0,
-            last_query_date=today
-        )
-        db.add(rate_limit)
-        db.flush()  # Get the ID without committing
-
-    # Check if limit exceeded
-    if rate_limit.query_count >= DAILY_QUERY_LIMIT:
-        return False, 0
-
-    # Increment counter
-    rate_limit.query_count += 1
-    rate_limit.updated_at = datetime.utcnow()
-    db.commit()
-
-    queries_remaining = DAILY_QUERY_LIMIT - rate_limit.query_count
-    return True, queries_remaining
+    return rate_limiter.hit(db, ip_address)
 
 
 def get_rate_limit_status(db: Session, ip_address: str) -> Tuple[int, int]:
@@ -109,16 +87,4 @@ def get_rate_limit_status(db: Session, ip_address: str) -> Tuple[int, int]:
     Returns:
         Tuple of (queries_used, queries_remaining)
     """
-    today = date.today()
-
-    rate_limit = db.query(RateLimit).filter(
-        RateLimit.ip_address == ip_address,
-        RateLimit.last_query_date == today
-    ).first()
-
-    if not rate_limit:
-        return 0, DAILY_QUERY_LIMIT
-
-    queries_used = rate_limit.query_count
-    queries_remaining = max(0, DAILY_QUERY_LIMIT - queries_used)
-    return queries_used, queries_remaining
+    return rate_limiter.status(db, ip_address)
@@ -2,7 +2,7 @@
 SQLAlchemy models for Calgary Building Code Expert System.
 """
 from .codes import Code, Article, Requirement, RequirementCondition
-from .zones import Zone, ZoneRule, Parcel
+from .zones import Zone, ZoneRule, Parcel, ParcelSyncState, ParcelChange
 from .projects import Project, ComplianceCheck, Document, ExtractedData
 from .auth import User
 from .permits import (
@@ -12,7 +12,8 @@ from .permits import (
     DeficiencyStatusEnum, DeficiencyPriorityEnum, AppealStatusEnum, AppealTypeEnum,
 )
 from .rate_limits import RateLimit
-from .standata import Standata
+from .standata import Standata, StandataCodeReference
+from .search_index import TermPosition
 from .dssp import (
     DSSPProject, Catchment, StormwaterCalculation, SanitaryCalculation,
     WaterServiceCalculation, DSSPSheet, IDFCurve, RunoffCoefficient,
@@ -38,6 +39,8 @@ __all__ = [
     "Zone",
     "ZoneRule",
     "Parcel",
+    "ParcelSyncState",
+    "ParcelChange",
     # Projects
     "Project",
     "ComplianceCheck",
@@ -64,6 +67,9 @@ __all__ = [
     "RateLimit",
     # STANDATA
     "Standata",
+    "StandataCodeReference",
+    # Search
+    "TermPosition",
     # DSSP
     "DSSPProject",
     "Catchment",
@@ -49,6 +49,7 @@ class User(Base):
     # Password reset
     reset_token = Column(String(255), nullable=True)
     reset_token_expires = Column(DateTime, nullable=True)
+    password_changed_at = Column(DateTime, nullable=True)  # Tokens carry a stamp of it ("ver")
 
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -10,7 +10,7 @@ from sqlalchemy import (
 )
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID, JSONB, ARRAY, TSVECTOR
 from sqlalchemy.types import CHAR
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from enum import Enum as PyEnum
 
 from ..database import Base
@@ -181,10 +181,12 @@ class Article(Base):
     page_number = Column(Integer, nullable=True)
 
     # Full-text search vector (TSVECTOR for PostgreSQL)
-    search_vector = Column(TSVECTOR, nullable=True)
+    # Deferred: only the search backends read it, and they query the column directly
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
 
     # Vector embedding for semantic search (1536 dimensions for OpenAI, 384 for sentence-transformers)
-    embedding = Column(Vector(384), nullable=True)
+    # Deferred: loading an Article must not decode 384 floats it never returns
+    embedding = deferred(Column(Vector(384), nullable=True))
 
     # Extraction tracking (for VLM re-extraction)
     extraction_model = Column(String(100), nullable=True)  # e.g., "qwen3-vl:30b", "pdfplumber"
@@ -265,6 +267,7 @@ class Requirement(Base):
         Index("idx_requirements_element", "element"),
         Index("idx_requirements_verified", "is_verified"),
         Index("idx_requirements_type", "requirement_type"),
+        Index("idx_requirements_created", "created_at", "id"),  # Keyset pagination
     )
 
 
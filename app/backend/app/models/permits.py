@@ -192,6 +192,7 @@ class PermitApplication(Base):
         Index("idx_permit_app_address", "address"),
         Index("idx_permit_app_submitted", "submitted_at"),
         Index("idx_permit_app_reviewer", "assigned_reviewer"),
+        Index("idx_permit_app_created", "created_at", "id"),  # Keyset pagination
     )
 
 
@@ -0,0 +1,30 @@
+"""
+Positional term index used to build search snippets.
+
+One row per (document, normalized term) holding the character offsets of
+that term in the document's full_text, so a snippet window can be chosen
+and fetched with SUBSTR without reading or re-tokenizing the document.
+"""
+from sqlalchemy import Column, String, Text
+
+from ..database import Base
+from .codes import UUID
+
+
+class TermPosition(Base):
+    """
+    Where one normalized term occurs in an article or STANDATA bulletin.
+
+    Maintained by services/snippets.py (ORM events plus a rebuild after bulk
+    loads). Not used on PostgreSQL, where snippets come from ts_headline.
+    """
+    __tablename__ = "term_positions"
+
+    doc_type = Column(String(20), primary_key=True)  # "article" or "standata"
+    doc_id = Column(UUID(), primary_key=True)
+    term = Column(String(64), primary_key=True)
+    positions = Column(Text, nullable=False)
+    # Space-separated "start:end" character offsets into full_text, first N occurrences
+
+    def __repr__(self):
+        return f"<TermPosition {self.doc_type}:{self.doc_id} {self.term}>"
@@ -15,7 +15,7 @@ from datetime import datetime, date
 from typing import Optional, List
 
 from sqlalchemy import (
-    Column, String, Text, Date, DateTime, Index
+    Column, String, Text, Integer, Date, DateTime, ForeignKey, Index
 )
 
 from ..database import Base
@@ -100,3 +100,29 @@ class Standata(Base):
 
     def __repr__(self):
         return f"<Standata {self.bulletin_number}: {self.title[:50]}>"
+
+
+class StandataCodeReference(Base):
+    """
+    Cross-reference from an NBC article number (or any ancestor of it) to a
+    STANDATA bulletin that cites it.
+
+    A bulletin citing "9.10.9.6" gets one row per level of the hierarchy -
+    prefixes "9", "9.10", "9.10.9" and "9.10.9.6" - all with reference
+    "9.10.9.6". Looking up `prefix` finds the bulletins citing that article
+    or anything below it; `prefix == reference` restricts to exact citations.
+    Maintained by services/code_references.py.
+    """
+    __tablename__ = "standata_code_references"
+
+    prefix = Column(String(50), primary_key=True)
+    standata_id = Column(UUID(), ForeignKey("standata.id", ondelete="CASCADE"), primary_key=True)
+    reference = Column(String(50), primary_key=True)
+    depth = Column(Integer, nullable=False)  # Number of segments in prefix
+
+    __table_args__ = (
+        Index("idx_standata_code_references_standata_id", "standata_id"),
+    )
+
+    def __repr__(self):
+        return f"<StandataCodeReference {self.prefix} -> {self.reference}>"
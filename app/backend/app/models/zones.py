@@ -94,6 +94,7 @@ class Parcel(Base):
 
     # Address information
     address = Column(String(255), nullable=False)
+    address_key = Column(String(255), nullable=True)  # normalize_address(address), for exact/prefix lookup
     street_name = Column(String(100), nullable=True)
     street_type = Column(String(20), nullable=True)  # ST, AVE, DR, etc.
     street_direction = Column(String(5), nullable=True)  # N, S, E, W, NE, NW, SE, SW
@@ -135,6 +136,39 @@ class Parcel(Base):
 
     __table_args__ = (
         Index("idx_parcels_address", "address"),
+        Index("idx_parcels_address_key", "address_key",
+              postgresql_ops={"address_key": "varchar_pattern_ops"}),  # Serves LIKE 'key%' too
         Index("idx_parcels_community", "community_name"),
         Index("idx_parcels_zone", "zone_id"),
     )
+
+
+class ParcelSyncState(Base):
+    """
+    Content hash of each parcel as last delivered by the open data dumps.
+
+    Keyed by the record's source id, or its normalized address when it has
+    none; delta sync compares incoming records against these hashes.
+    """
+    __tablename__ = "parcel_sync_state"
+
+    sync_key = Column(String(300), primary_key=True)  # "id:<source_id>" or "addr:<address_key>"
+    parcel_id = Column(UUID(), nullable=False)
+    row_hash = Column(String(32), nullable=False)
+    synced_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ParcelChange(Base):
+    """Journal of parcel inserts, updates and deletes applied by delta sync."""
+    __tablename__ = "parcel_changes"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    sync_id = Column(String(36), nullable=False)  # One id per sync run
+    change = Column(String(10), nullable=False)  # insert, update, delete
+    sync_key = Column(String(300), nullable=False)
+    parcel_id = Column(UUID(), nullable=False)
+    changed_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("idx_parcel_changes_sync", "sync_id"),
+    )
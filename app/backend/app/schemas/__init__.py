@@ -3,8 +3,8 @@ Pydantic schemas for API request/response validation.
 """
 from .codes import (
     CodeBase, CodeCreate, CodeResponse,
-    ArticleBase, ArticleCreate, ArticleResponse, ArticleSearchResult,
-    RequirementBase, RequirementCreate, RequirementResponse,
+    ArticleBase, ArticleCreate, ArticleResponse, ArticleSummary, ArticleSearchResult,
+    RequirementBase, RequirementCreate, RequirementResponse, RequirementSummary,
 )
 from .zones import (
     ZoneBase, ZoneCreate, ZoneResponse,
@@ -2,7 +2,7 @@
 Pydantic schemas for building codes, articles, and requirements.
 """
 from datetime import date, datetime
-from typing import Optional, List
+from typing import Dict, Optional, List
 from uuid import UUID
 from pydantic import BaseModel, Field
 
@@ -67,6 +67,21 @@ class ArticleResponse(ArticleBase):
         from_attributes = True
 
 
+class ArticleSummary(BaseModel):
+    """Compact Article for list endpoints (no full_text)."""
+    id: UUID
+    code_id: UUID
+    article_number: str
+    title: Optional[str] = None
+    part_number: Optional[int] = None
+    division_number: Optional[int] = None
+    section_number: Optional[int] = None
+    page_number: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+
 class ArticleSearchResult(BaseModel):
     """Schema for article search results."""
     id: str  # String for JSON serialization compatibility
@@ -143,6 +158,27 @@ class RequirementResponse(RequirementBase):
         from_attributes = True
 
 
+class RequirementSummary(BaseModel):
+    """Compact Requirement for list endpoints (no quote, provenance or conditions)."""
+    id: UUID
+    article_id: UUID
+    requirement_type: str
+    element: str
+    description: Optional[str] = None
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+    exact_value: Optional[str] = None
+    unit: Optional[str] = None
+    is_mandatory: bool = True
+    applies_to_part_9: bool = True
+    applies_to_part_3: bool = False
+    occupancy_groups: Optional[List[str]] = None
+    is_verified: bool
+
+    class Config:
+        from_attributes = True
+
+
 # --- Search Schemas ---
 
 class CodeSearchQuery(BaseModel):
@@ -160,3 +196,4 @@ class CodeSearchResponse(BaseModel):
     total_results: int
     results: List[ArticleSearchResult]
     search_type: str  # "semantic", "fulltext", "hybrid"
+    timings: Optional[Dict[str, float]] = None  # Per-stage latency in ms (lexical_ms, vector_ms, ...)
@@ -469,10 +469,11 @@ class PermitSearchFilters(BaseModel):
 
 class PermitSearchResponse(BaseModel):
     """Response for permit search."""
-    total: int
+    total: Optional[int] = None  # Approximate; omitted when include_total=false
     page: int
     page_size: int
     results: List[PermitApplicationSummary]
+    next_cursor: Optional[str] = None  # Pass as `cursor` for the next page
 
 
 # --- Statistics and Reports ---
@@ -2,7 +2,7 @@
 Pydantic schemas for zones, zone rules, and parcels.
 """
 from datetime import datetime
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Dict
 from uuid import UUID
 from decimal import Decimal
 from pydantic import BaseModel, Field
@@ -129,6 +129,14 @@ class ParcelSearchResult(BaseModel):
         from_attributes = True
 
 
+class ZoneLookupResponse(BaseModel):
+    """Schema for the land-use district at a point."""
+    latitude: float
+    longitude: float
+    zone_code: str  # As given in the district data, e.g. "R-C1" or "DC (PRE 1P2007)"
+    zone: Optional[ZoneSummary] = None  # None if the code is not in the zones table
+
+
 # --- Search Schemas ---
 
 class AddressSearchQuery(BaseModel):
@@ -171,3 +179,27 @@ class ZoningCheckResponse(BaseModel):
     checks: List[ZoningCheckResult]
     overall_status: str  # pass, fail, needs_review
     summary: str
+
+
+class ZoningBatchRequest(BaseModel):
+    """Schema for checking many (parcel, proposal) pairs at once."""
+    items: List[ZoningCheckRequest] = Field(..., min_length=1, max_length=1000)
+
+
+class ZoningBatchResponse(BaseModel):
+    """
+    Columnar batch zoning check: every list is aligned with the request items.
+
+    `status[check][i]` is "pass", "fail" or None (not checked: no proposed
+    value or no limit for the zone); `limit[check][i]` is the zone's limit.
+    """
+    count: int
+    checks: List[str]
+    parcel_id: List[Optional[str]]
+    address: List[Optional[str]]
+    zone_code: List[Optional[str]]
+    overall_status: List[str]  # pass, fail, needs_review, error
+    failed: List[int]
+    error: List[Optional[str]]
+    status: Dict[str, List[Optional[str]]]
+    limit: Dict[str, List[Optional[float]]]
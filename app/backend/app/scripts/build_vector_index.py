@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Build the ANN vector index used for semantic search in EXPLORE mode.
+
+Reads every populated `Article.embedding`, clusters the vectors into an
+IVF-flat index and writes it to the index directory (see
+`vector_index_dir` in settings). The API memory-maps this index at startup.
+
+Run after loading or re-embedding articles (repopulate_db.py does this
+automatically when it generates embeddings).
+
+Usage:
+    python -m app.scripts.build_vector_index [--output DIR] [--nlist N]
+
+Options:
+    --output    Directory to write the index to (default from settings)
+    --nlist     Number of inverted lists (default ~sqrt(N))
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# Add parent directories to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.database import SessionLocal
+from app.models.codes import Article
+from app.services.embedding_service import MODEL_NAME
+from app.services.vector_index import VectorIndex, build_article_index, get_index_dir
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Main entry point for the index build script."""
+    parser = argparse.ArgumentParser(
+        description="Build the ANN vector index over article embeddings"
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="Directory to write the index to (default from settings)"
+    )
+    parser.add_argument(
+        "--nlist",
+        type=int,
+        default=None,
+        help="Number of inverted lists (default ~sqrt(N))"
+    )
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.output is None and args.nlist is None:
+            index = build_article_index(db)
+            output = get_index_dir()
+        else:
+            rows = db.query(Article.id, Article.embedding).filter(
+                Article.embedding.isnot(None)
+            ).all()
+            if not rows:
+                index = None
+            else:
+                index = VectorIndex.build(
+                    ids=[r.id for r in rows],
+                    embeddings=[list(r.embedding) for r in rows],
+                    nlist=args.nlist,
+                    model_name=MODEL_NAME,
+                )
+                output = args.output or get_index_dir()
+                index.save(output)
+
+        if index is None:
+            logger.error("No article embeddings found - run repopulate_db.py first")
+            sys.exit(1)
+
+        logger.info(f"Indexed {index.size} articles into {index.nlist} lists")
+        logger.info(f"Index written to {output}")
+
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
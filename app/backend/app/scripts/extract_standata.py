@@ -8,7 +8,7 @@ This script:
 3. Parses bulletin number, title, and content
 4. Identifies NBC code references (pattern: "Article X.X.X.X" or "X.X.X.X")
 5. Generates keywords from content
-6. Saves to database
+6. Saves to database and rebuilds the search and cross-reference indexes
 
 Usage:
     python -m app.scripts.extract_standata [--dry-run] [--force] [--verbose]
@@ -36,6 +36,10 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from app.database import SessionLocal
 from app.models.standata import Standata
+from app.services.fulltext import rebuild_fulltext_index
+from app.services.search_capabilities import refresh_search_capabilities
+from app.services.snippets import rebuild_snippet_index, DOC_STANDATA
+from app.services.code_references import rebuild_cross_references
 from app.config import get_settings
 
 # Set up logging
@@ -494,6 +498,10 @@ def main():
         # Final commit
         if not args.dry_run:
             db.commit()
+            rebuild_fulltext_index(db)
+            rebuild_snippet_index(db, DOC_STANDATA)
+            rebuild_cross_references(db)
+            refresh_search_capabilities(db)
 
         logger.info("=" * 60)
         logger.info(f"Processing complete!")
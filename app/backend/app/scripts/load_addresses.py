@@ -3,27 +3,37 @@
 Load Calgary address data from JSON files into PostgreSQL database.
 
 This script reads parcel-addresses-*.json files and loads them into
-the parcels table for the address autocomplete feature.
+the parcels table for the address autocomplete feature. A running API
+server adds the new rows to its in-memory autocomplete index within
+`address_index_check_interval_seconds`. Each row gets its normalized
+`address_key`, used by GUIDE and zoning to resolve typed addresses.
+
+Files are streamed (services/parcel_ingest.py): records are parsed
+incrementally, bulk-loaded into a staging table (COPY on PostgreSQL) and
+merged into parcels one chunk per transaction.
+
+With --delta (services/parcel_sync.py) only records that changed since the
+previous delta load are written: new ones inserted, changed ones updated
+and (unless --file limits the load to one file) parcels no longer in the
+dump deleted. Running API servers apply the change journal instead of
+rebuilding their address indexes.
 
 Usage:
-    python -m app.scripts.load_addresses [--dry-run] [--force] [--batch-size 1000]
+    python -m app.scripts.load_addresses [--dry-run] [--force | --delta] [--resume] [--batch-size 10000]
 
 Options:
     --dry-run      Show what would be done without making changes
     --force        Delete existing parcel data and reload
-    --batch-size   Number of records to commit per batch (default: 1000)
+    --delta        Apply only inserts, updates and deletes since the last delta load
+    --resume       Continue an interrupted load after its last committed chunk
+    --batch-size   Number of records to stage and commit per chunk (default: 10000)
 """
 
 import argparse
-import json
 import logging
 import sys
-import uuid
-from datetime import datetime
-from decimal import Decimal, InvalidOperation
 from glob import glob
 from pathlib import Path
-from typing import Any, Dict, List, Optional
 
 from sqlalchemy import text
 from sqlalchemy.orm import Session
@@ -32,8 +42,13 @@ from sqlalchemy.orm import Session
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from app.database import SessionLocal, engine
-from app.models.zones import Parcel
+from app.models.zones import Parcel, ParcelSyncState
 from app.config import get_settings
+from app.services.address_resolver import ensure_address_keys
+from app.services.parcel_ingest import (
+    ingest_parcel_file, iter_json_records, parse_parcel_record, peak_rss_mb, progress_table,
+)
+from app.services.parcel_sync import sync_parcel_files
 
 # Set up logging
 logging.basicConfig(
@@ -43,72 +58,6 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def parse_decimal(value: Any) -> Optional[Decimal]:
-    """Parse a value to Decimal, handling various formats."""
-    if value is None:
-        return None
-    try:
-        return Decimal(str(value))
-    except (InvalidOperation, ValueError):
-        return None
-
-
-def parse_address_record(record: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Parse a JSON address record into a format suitable for the Parcel model.
-    """
-    # Extract address components
-    address = record.get("address", "").strip()
-    if not address:
-        return None
-
-    # Parse latitude/longitude
-    latitude = parse_decimal(record.get("latitude"))
-    longitude = parse_decimal(record.get("longitude"))
-
-    # Get street components
-    street_name = record.get("street_name", "").strip() if record.get("street_name") else None
-    street_type = record.get("street_type", "").strip() if record.get("street_type") else None
-    street_quad = record.get("street_quad", "").strip() if record.get("street_quad") else None
-    house_number = record.get("house_number", "").strip() if record.get("house_number") else None
-
-    # Extract unit number if present (addresses like "#2402 111 TARAWOOD LN NE")
-    unit_number = None
-    if address.startswith("#"):
-        parts = address.split(" ", 1)
-        if len(parts) > 1:
-            unit_number = parts[0].replace("#", "")
-
-    return {
-        "address": address,
-        "street_name": street_name,
-        "street_type": street_type,
-        "street_direction": street_quad,  # street_quad maps to quadrant/direction
-        "house_number": house_number,
-        "unit_number": unit_number,
-        "quadrant": street_quad,
-        "latitude": latitude,
-        "longitude": longitude,
-        "source_id": None,  # No source ID in this data
-        "source_updated": datetime.utcnow(),
-    }
-
-
-def load_json_file(file_path: Path) -> List[Dict[str, Any]]:
-    """Load and parse a JSON file."""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-
-def check_address_exists(db: Session, address: str) -> bool:
-    """Check if an address already exists in the database."""
-    result = db.execute(
-        text("SELECT 1 FROM parcels WHERE address = :address LIMIT 1"),
-        {"address": address}
-    ).fetchone()
-    return result is not None
-
-
 def create_trigram_index(db: Session) -> None:
     """
     Create trigram index on address column for faster autocomplete.
@@ -142,71 +91,30 @@ def create_trigram_index(db: Session) -> None:
 def process_address_file(
     db: Session,
     file_path: Path,
-    batch_size: int = 1000,
+    batch_size: int = 10000,
     dry_run: bool = False,
-    skip_existing: bool = True
+    skip_existing: bool = True,
+    resume: bool = False,
 ) -> int:
     """
-    Process a single address JSON file.
+    Stream a single address JSON file into the parcels table.
     Returns the number of addresses loaded.
     """
     logger.info(f"Loading {file_path.name}...")
 
-    data = load_json_file(file_path)
-    total_records = len(data)
-    loaded_count = 0
-    skipped_count = 0
-    error_count = 0
-
-    batch = []
-
-    for i, record in enumerate(data):
-        parsed = parse_address_record(record)
-
-        if not parsed:
-            error_count += 1
-            continue
-
-        if skip_existing and not dry_run:
-            if check_address_exists(db, parsed["address"]):
-                skipped_count += 1
-                continue
-
-        if dry_run:
-            loaded_count += 1
-            continue
-
-        # Create parcel record
-        parcel = Parcel(
-            id=uuid.uuid4(),
-            address=parsed["address"],
-            street_name=parsed["street_name"],
-            street_type=parsed["street_type"],
-            street_direction=parsed["street_direction"],
-            house_number=parsed["house_number"],
-            unit_number=parsed["unit_number"],
-            quadrant=parsed["quadrant"],
-            latitude=parsed["latitude"],
-            longitude=parsed["longitude"],
-            source_updated=parsed["source_updated"],
-        )
-        batch.append(parcel)
-        loaded_count += 1
-
-        # Commit in batches
-        if len(batch) >= batch_size:
-            db.bulk_save_objects(batch)
-            db.commit()
-            logger.info(f"  Committed batch: {loaded_count}/{total_records} records")
-            batch = []
-
-    # Commit remaining records
-    if batch and not dry_run:
-        db.bulk_save_objects(batch)
-        db.commit()
+    if dry_run:
+        valid = sum(1 for record in iter_json_records(file_path) if parse_parcel_record(record))
+        logger.info(f"  Would load up to {valid} addresses")
+        return valid
 
-    logger.info(f"  Completed: {loaded_count} loaded, {skipped_count} skipped, {error_count} errors")
-    return loaded_count
+    stats = ingest_parcel_file(
+        db, file_path, chunk_size=batch_size, resume=resume, skip_existing=skip_existing
+    )
+    logger.info(
+        f"  Completed: {stats['inserted']} loaded, {stats['skipped']} skipped, {stats['invalid']} errors "
+        f"({stats['rows_per_sec']:,.0f} rows/s, peak RSS {stats['peak_rss_mb']} MB)"
+    )
+    return stats["inserted"]
 
 
 def main():
@@ -224,11 +132,21 @@ def main():
         action="store_true",
         help="Delete existing parcel data and reload (WARNING: destructive)"
     )
+    parser.add_argument(
+        "--delta",
+        action="store_true",
+        help="Apply only records changed since the last delta load (deletes parcels missing from the dump)"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted load: skip completed files and committed chunks"
+    )
     parser.add_argument(
         "--batch-size",
         type=int,
-        default=1000,
-        help="Number of records to commit per batch (default: 1000)"
+        default=10000,
+        help="Number of records to stage and commit per chunk (default: 10000)"
     )
     parser.add_argument(
         "--verbose", "-v",
@@ -244,6 +162,8 @@ def main():
 
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
+    if args.delta and (args.force or args.resume):
+        parser.error("--delta cannot be combined with --force or --resume")
 
     settings = get_settings()
     data_dir = Path(settings.data_dir) / "zoning"
@@ -275,10 +195,31 @@ def main():
     try:
         if args.force and not args.dry_run:
             logger.warning("FORCE MODE - Deleting existing parcel data")
+            db.query(ParcelSyncState).delete()
             db.query(Parcel).delete()
+            progress_table.drop(bind=db.connection(), checkfirst=True)
             db.commit()
             logger.info("Existing parcel data deleted")
 
+        if not args.dry_run:
+            # Databases created before address_key existed get the column (and keys) first
+            ensure_address_keys(db)
+
+        if args.delta and not args.dry_run:
+            stats = sync_parcel_files(
+                db, [Path(f) for f in json_files], delete_missing=not args.file, batch_size=args.batch_size
+            )
+            logger.info("=" * 60)
+            logger.info("Delta load complete!")
+            logger.info(
+                f"  {stats['inserted']} inserted, {stats['updated']} updated, {stats['deleted']} deleted, "
+                f"{stats['unchanged']} unchanged ({stats['adopted']} adopted from earlier loads)"
+            )
+            if stats["kept_referenced"]:
+                logger.info(f"  {stats['kept_referenced']} parcels missing from the dump kept (referenced)")
+            logger.info(f"  {stats['rows_per_sec']:,.0f} rows/s, peak RSS {stats['peak_rss_mb']} MB")
+            return
+
         total_loaded = 0
 
         for json_file in json_files:
@@ -288,7 +229,8 @@ def main():
                 file_path,
                 batch_size=args.batch_size,
                 dry_run=args.dry_run,
-                skip_existing=not args.force
+                skip_existing=not args.force,
+                resume=args.resume,
             )
             total_loaded += loaded
 
@@ -299,6 +241,7 @@ def main():
         logger.info("=" * 60)
         logger.info(f"Processing complete!")
         logger.info(f"  Total addresses loaded: {total_loaded}")
+        logger.info(f"  Peak RSS: {peak_rss_mb()} MB")
 
         if args.dry_run:
             logger.info("(DRY RUN - no changes were made)")
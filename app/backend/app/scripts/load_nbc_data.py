@@ -32,6 +32,9 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from app.database import SessionLocal, engine
 from app.models.codes import Code, Article, Requirement, RequirementCondition
+from app.services.fulltext import rebuild_fulltext_index
+from app.services.search_capabilities import refresh_search_capabilities
+from app.services.snippets import rebuild_snippet_index, DOC_ARTICLE
 from app.config import get_settings
 
 # Set up logging
@@ -475,6 +478,9 @@ def main():
             # Final commit
             db.commit()
             logger.info("All changes committed to database")
+            rebuild_fulltext_index(db)
+            rebuild_snippet_index(db, DOC_ARTICLE)
+            refresh_search_capabilities(db)
 
     except Exception as e:
         logger.error(f"Error during processing: {e}")
@@ -0,0 +1,548 @@
+"""
+In-memory address autocomplete index.
+
+Built once from `parcels` (~500k Calgary addresses) and queried per
+keystroke without touching the database:
+
+- Token vocabulary: every distinct canonical address token ("123",
+  "MACLEOD", "TRAIL", "SE" - see address_normalizer, so "17th Ave" finds
+  "17 AV") in one sorted list; all tokens starting with a prefix are one
+  bisect range - the lookup a prefix trie gives, without a node per char
+- Postings: token -> sorted array of entry numbers, 4 bytes per posting;
+  adjacent word pairs ("SAGE HILL") get postings too, so multi-word street
+  names are found without scanning every address on "HILL" or "DRIVE"
+- Trigrams: trigram -> vocabulary tokens, to correct typos ("MAKLEOD")
+  when exact/prefix matching finds too little
+
+Every query token must match a token of the address; the last one may be a
+prefix of it (the user is still typing). Results starting with the query
+rank first, then alphabetically, then typo-corrected matches.
+
+Kept current by:
+- Parcel/Zone ORM events in this process (incremental)
+- A (count, latest updated_at) check at most every
+  `address_index_check_interval_seconds`, which picks up rows written by
+  load_addresses.py and other out-of-process imports incrementally
+  (rebuilding only when rows were deleted), after applying the delta-sync
+  change journal (services/parcel_sync.py), which carries deletes
+- Dropping the index when the parcels table is created or dropped
+"""
+import bisect
+import heapq
+import logging
+import re
+import sys
+import threading
+import time
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..models.zones import Parcel, Zone
+from .address_normalizer import canonical_tokens
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"[A-Z0-9]+")
+FUZZY_MIN_LENGTH = 3  # Shorter tokens have too few trigrams to compare
+FUZZY_THRESHOLD = 0.5  # Share of the query token's trigrams a correction must contain
+FUZZY_MAX_TOKENS = 8  # Corrections tried per query token
+CANDIDATE_FACTOR = 20  # Matches ranked per requested result
+
+
+def tokenize(text: str) -> List[str]:
+    """Canonical address tokens ("#2402 111 Tarawood Ln NE" -> 2402, 111, TARAWOOD, LANE, NE)."""
+    return [token.lstrip("#") for token in canonical_tokens(text)]
+
+
+def _key_tokens(row) -> List[str]:
+    # Stored address_key is already canonical; rows written without one are tokenized here
+    key = getattr(row, "address_key", None)
+    return key.replace("#", "").split() if key else tokenize(row.address)
+
+
+def word_pairs(tokens: Iterable[str]) -> List[str]:
+    """Adjacent non-numeric token pairs ("SAGE HILL", "HILL DR")."""
+    tokens = list(tokens)
+    return [
+        f"{a} {b}" for a, b in zip(tokens, tokens[1:])
+        if not a.isdigit() and not b.isdigit()
+    ]
+
+
+def trigrams(token: str) -> Set[str]:
+    """pg_trgm-style trigrams of one token, padded at both ends."""
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class AddressEntry(NamedTuple):
+    """One indexed parcel address."""
+    parcel_id: str
+    address: str
+    community: Optional[str]
+    zone_id: Optional[str]
+    latitude: Optional[float]
+    longitude: Optional[float]
+    tokens: Tuple[str, ...]
+    key: str  # Space-joined tokens, for starts-with ranking
+
+
+class AddressMatch(NamedTuple):
+    """Autocomplete result."""
+    parcel_id: str
+    address: str
+    community: Optional[str]
+    zone_code: Optional[str]
+    latitude: Optional[float]
+    longitude: Optional[float]
+
+
+def _float(value) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+def _insert_slot(postings: array, slot: int) -> None:
+    # New slots append; re-tokenized entries and reused slots insert
+    if not postings or postings[-1] < slot:
+        postings.append(slot)
+    else:
+        postings.insert(bisect.bisect_left(postings, slot), slot)
+
+
+def _delete_slot(postings: array, slot: int) -> None:
+    i = bisect.bisect_left(postings, slot)
+    if i < len(postings) and postings[i] == slot:
+        del postings[i]
+
+
+class AddressIndex:
+    """Token/prefix/trigram index over parcel addresses."""
+
+    def __init__(self):
+        settings = get_settings()
+        self.check_interval = settings.address_index_check_interval_seconds
+        self._lock = threading.RLock()
+        self._reset()
+        self.builds = 0
+        self.incremental_updates = 0
+        self.queries = 0
+        self.query_seconds = 0.0
+
+    def _reset(self) -> None:
+        self._built = False
+        self._entries: List[Optional[AddressEntry]] = []
+        self._slots: Dict[str, int] = {}  # parcel_id -> entry number
+        self._free_slots: List[int] = []  # Entry numbers of removed parcels, reused by new ones
+        self._vocabulary: List[str] = []  # Sorted distinct tokens
+        self._postings: Dict[str, array] = {}
+        self._pair_postings: Dict[str, array] = {}
+        self._trigrams: Dict[str, Set[str]] = {}
+        self._zone_codes: Dict[str, str] = {}
+        self._fingerprint: Optional[Tuple] = None
+        self._latest_update = None
+        self._last_check = 0.0
+
+    @property
+    def size(self) -> int:
+        return len(self._slots)
+
+    # --- Building and maintenance ---
+
+    def build(self, db: Session) -> int:
+        """
+        (Re)build the whole index from the parcels table.
+
+        Returns:
+            Number of addresses indexed
+        """
+        started = time.perf_counter()
+        zone_codes = {str(zone_id): code for zone_id, code in db.query(Zone.id, Zone.zone_code).all()}
+        rows = self._parcel_rows(db).order_by(Parcel.address).all()
+
+        with self._lock:
+            self._reset()
+            self._zone_codes = zone_codes
+            postings: Dict[str, List[int]] = {}
+            pair_postings: Dict[str, List[int]] = {}
+            for row in rows:
+                entry = self._entry(row)
+                slot = len(self._entries)
+                self._entries.append(entry)
+                self._slots[entry.parcel_id] = slot
+                for token in set(entry.tokens):
+                    postings.setdefault(token, []).append(slot)
+                for pair in set(word_pairs(entry.tokens)):
+                    pair_postings.setdefault(pair, []).append(slot)
+                self._track_update(row.updated_at)
+
+            self._postings = {token: array("I", slots) for token, slots in postings.items()}
+            self._pair_postings = {pair: array("I", slots) for pair, slots in pair_postings.items()}
+            self._vocabulary = sorted(self._postings)
+            for token in self._vocabulary:
+                self._add_trigrams(token)
+            self._fingerprint = (len(rows), self._latest_update)
+            self._last_check = time.monotonic()
+            self._built = True
+            self.builds += 1
+
+        logger.info(
+            f"Address index built: {len(rows)} addresses, {len(self._vocabulary)} tokens "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+        return len(rows)
+
+    def ensure_current(self, db: Session) -> None:
+        """Build on first use; apply rows written by other processes at most every check interval."""
+        from .parcel_sync import parcel_change_feed
+
+        if not self._built:
+            parcel_change_feed.poll(db)  # Start following the delta-sync journal from here
+            self.build(db)
+            return
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+
+        parcel_change_feed.poll(db)  # Delta-sync deletes, without a rebuild
+
+        count, latest = db.query(func.count(Parcel.id), func.max(Parcel.updated_at)).one()
+        if (count, latest) == self._fingerprint:
+            return
+        if self._latest_update is not None:
+            changed = self._parcel_rows(db).filter(Parcel.updated_at > self._latest_update).all()
+        else:
+            changed = self._parcel_rows(db).all()
+        for row in changed:
+            self.upsert(row)
+        if self.size != count:
+            logger.info(f"Address index out of step ({self.size} indexed, {count} parcels) - rebuilding")
+            self.build(db)
+            return
+        self._fingerprint = (count, latest)
+        if changed:
+            logger.info(f"Address index updated incrementally: {len(changed)} parcels")
+
+    @staticmethod
+    def _parcel_rows(db: Session):
+        return db.query(
+            Parcel.id, Parcel.address, Parcel.address_key, Parcel.community_name, Parcel.zone_id,
+            Parcel.latitude, Parcel.longitude, Parcel.updated_at,
+        )
+
+    def _entry(self, row) -> AddressEntry:
+        tokens = tuple(sys.intern(t) for t in _key_tokens(row))
+        return AddressEntry(
+            parcel_id=str(row.id),
+            address=row.address,
+            community=row.community_name,
+            zone_id=str(row.zone_id) if row.zone_id else None,
+            latitude=_float(row.latitude),
+            longitude=_float(row.longitude),
+            tokens=tokens,
+            key=" ".join(tokens),
+        )
+
+    def _track_update(self, updated_at) -> None:
+        if updated_at is not None and (self._latest_update is None or updated_at > self._latest_update):
+            self._latest_update = updated_at
+
+    def _add_trigrams(self, token: str) -> None:
+        if len(token) >= FUZZY_MIN_LENGTH and not token.isdigit():
+            for trigram in trigrams(token):
+                self._trigrams.setdefault(trigram, set()).add(token)
+
+    def upsert(self, row) -> None:
+        """Add or replace one parcel (any object with the Parcel columns)."""
+        if not self._built:
+            return
+        entry = self._entry(row)
+        with self._lock:
+            slot = self._slots.get(entry.parcel_id)
+            if slot is None:
+                # Reuse a removed parcel's slot so delta-sync churn does not grow the index
+                if self._free_slots:
+                    slot = self._free_slots.pop()
+                    self._entries[slot] = entry
+                else:
+                    slot = len(self._entries)
+                    self._entries.append(entry)
+                self._slots[entry.parcel_id] = slot
+                old_tokens: Set[str] = set()
+                old_pairs: Set[str] = set()
+            else:
+                old_tokens = set(self._entries[slot].tokens)
+                old_pairs = set(word_pairs(self._entries[slot].tokens))
+                self._entries[slot] = entry
+            new_tokens = set(entry.tokens)
+            new_pairs = set(word_pairs(entry.tokens))
+            for token in old_tokens - new_tokens:
+                self._remove_posting(token, slot)
+            for token in new_tokens - old_tokens:
+                self._add_posting(token, slot)
+            for pair in old_pairs - new_pairs:
+                self._remove_pair(pair, slot)
+            for pair in new_pairs - old_pairs:
+                _insert_slot(self._pair_postings.setdefault(pair, array("I")), slot)
+            self._track_update(getattr(row, "updated_at", None))
+            self.incremental_updates += 1
+
+    def remove(self, parcel_id: str) -> None:
+        """Drop one parcel."""
+        if not self._built:
+            return
+        with self._lock:
+            slot = self._slots.pop(str(parcel_id), None)
+            if slot is None:
+                return
+            for token in set(self._entries[slot].tokens):
+                self._remove_posting(token, slot)
+            for pair in set(word_pairs(self._entries[slot].tokens)):
+                self._remove_pair(pair, slot)
+            self._entries[slot] = None
+            self._free_slots.append(slot)
+            self.incremental_updates += 1
+
+    def apply_changes(self, db: Session, upserted: Iterable, deleted: Iterable) -> None:
+        """Re-read upserted parcels and drop deleted ones (see services/parcel_sync.py)."""
+        if not self._built:
+            return
+        for parcel_id in deleted:
+            self.remove(parcel_id)
+        ids = list(upserted)
+        for start in range(0, len(ids), 500):
+            for row in self._parcel_rows(db).filter(Parcel.id.in_(ids[start:start + 500])):
+                self.upsert(row)
+
+    def set_zone_code(self, zone_id, zone_code: Optional[str]) -> None:
+        """Track a zone's code (zone_code is looked up at query time)."""
+        with self._lock:
+            if zone_code is None:
+                self._zone_codes.pop(str(zone_id), None)
+            else:
+                self._zone_codes[str(zone_id)] = zone_code
+
+    def _add_posting(self, token: str, slot: int) -> None:
+        postings = self._postings.get(token)
+        if postings is None:
+            self._postings[token] = array("I", [slot])
+            bisect.insort(self._vocabulary, token)
+            self._add_trigrams(token)
+        else:
+            _insert_slot(postings, slot)
+
+    def _remove_pair(self, pair: str, slot: int) -> None:
+        postings = self._pair_postings.get(pair)
+        if postings is not None:
+            _delete_slot(postings, slot)
+            if not postings:
+                del self._pair_postings[pair]
+
+    def _remove_posting(self, token: str, slot: int) -> None:
+        postings = self._postings.get(token)
+        if postings is None:
+            return
+        _delete_slot(postings, slot)
+        if not postings:
+            del self._postings[token]
+            del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+            for trigram in trigrams(token):
+                tokens = self._trigrams.get(trigram)
+                if tokens:
+                    tokens.discard(token)
+
+    def invalidate(self) -> None:
+        """Forget everything; the next query rebuilds."""
+        with self._lock:
+            self._reset()
+
+    # --- Queries ---
+
+    def _prefix_tokens(self, prefix: str) -> List[str]:
+        lo = bisect.bisect_left(self._vocabulary, prefix)
+        hi = bisect.bisect_left(self._vocabulary, prefix + "\x7f")
+        return self._vocabulary[lo:hi]
+
+    def _fuzzy_tokens(self, token: str) -> List[str]:
+        if len(token) < FUZZY_MIN_LENGTH or token.isdigit():
+            return []
+        query_trigrams = trigrams(token)
+        shared = Counter()
+        for trigram in query_trigrams:
+            shared.update(self._trigrams.get(trigram, ()))
+        scored = [
+            (count / len(query_trigrams), candidate)
+            for candidate, count in shared.items()
+            if count / len(query_trigrams) >= FUZZY_THRESHOLD and candidate != token
+        ]
+        return [candidate for _, candidate in heapq.nlargest(FUZZY_MAX_TOKENS, scored)]
+
+    def _matches(self, alternatives: List[List[str]], pairs: List[str], limit: int) -> List[int]:
+        """
+        Entry numbers whose tokens cover every query token, in index order.
+
+        Args:
+            alternatives: Per query token, the index tokens that satisfy it
+            pairs: Word pairs every match must contain (from adjacent exact tokens)
+            limit: Stop after this many matches
+        """
+        if any(not tokens for tokens in alternatives):
+            return []
+        # Drive from whichever token or pair has the fewest postings
+        sources = [
+            (sum(len(self._postings[t]) for t in tokens), [self._postings[t] for t in tokens])
+            for tokens in alternatives
+        ]
+        for pair in pairs:
+            postings = self._pair_postings.get(pair)
+            if postings is None:
+                return []
+            sources.append((len(postings), [postings]))
+        driver = min(sources, key=lambda source: source[0])[1]
+
+        exact = [tokens[0] for tokens in alternatives if len(tokens) == 1]
+        either = [frozenset(tokens) for tokens in alternatives if len(tokens) > 1]
+
+        matches = []
+        previous = -1
+        for slot in heapq.merge(*driver) if len(driver) > 1 else driver[0]:
+            if slot == previous:
+                continue
+            previous = slot
+            entry_tokens = self._entries[slot].tokens
+            if all(t in entry_tokens for t in exact) and all(
+                not tokens.isdisjoint(entry_tokens) for tokens in either
+            ):
+                matches.append(slot)
+                if len(matches) >= limit:
+                    break
+        return matches
+
+    def search(self, db: Session, query: str, limit: int = 10) -> List[AddressMatch]:
+        """
+        Top addresses for a partially typed query.
+
+        Args:
+            db: Database session (used only to build/refresh the index)
+            query: What the user typed so far
+            limit: Maximum results
+
+        Returns:
+            AddressMatch list, best first
+        """
+        self.ensure_current(db)
+        started = time.perf_counter()
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return []
+        key = " ".join(query_tokens)
+        candidate_limit = max(limit * CANDIDATE_FACTOR, 200)
+
+        with self._lock:
+            complete, last = query_tokens[:-1], query_tokens[-1]
+            alternatives = [[t] if t in self._postings else [] for t in complete]
+            last_tokens = self._prefix_tokens(last)
+            typed = TOKEN_RE.findall(query.upper())
+            if typed and typed[-1] != last:
+                # "TR" is still being typed and may not mean TRAIL ("BOW TRAILWOOD")
+                last_tokens = sorted(set(last_tokens) | set(self._prefix_tokens(typed[-1])))
+            alternatives.append(last_tokens)
+
+            ranked = []
+            seen = set()
+            for slot in self._matches(alternatives, word_pairs(complete), candidate_limit):
+                entry = self._entries[slot]
+                ranked.append((0 if entry.key.startswith(key) else 1, entry.address, slot))
+                seen.add(slot)
+            ranked.sort()
+
+            if len(ranked) < limit:
+                # Too few exact/prefix hits - retry with typo corrections
+                fuzzy = [
+                    tokens + [t for t in self._fuzzy_tokens(query_token) if t not in tokens]
+                    for tokens, query_token in zip(alternatives, query_tokens)
+                ]
+                extra = [
+                    (2, self._entries[slot].address, slot)
+                    for slot in self._matches(fuzzy, [], candidate_limit)
+                    if slot not in seen
+                ]
+                ranked.extend(sorted(extra))
+
+            results = []
+            for _, _, slot in ranked[:limit]:
+                entry = self._entries[slot]
+                results.append(AddressMatch(
+                    parcel_id=entry.parcel_id,
+                    address=entry.address,
+                    community=entry.community,
+                    zone_code=self._zone_codes.get(entry.zone_id) if entry.zone_id else None,
+                    latitude=entry.latitude,
+                    longitude=entry.longitude,
+                ))
+
+        self.queries += 1
+        self.query_seconds += time.perf_counter() - started
+        return results
+
+    def get_stats(self) -> dict:
+        return {
+            "built": self._built,
+            "addresses": self.size,
+            "free_slots": len(self._free_slots),
+            "tokens": len(self._vocabulary),
+            "word_pairs": len(self._pair_postings),
+            "builds": self.builds,
+            "incremental_updates": self.incremental_updates,
+            "queries": self.queries,
+            "avg_query_ms": round(1000 * self.query_seconds / self.queries, 3) if self.queries else 0.0,
+        }
+
+
+# Singleton instance for easy import
+address_index = AddressIndex()
+
+
+def _on_parcel_write(mapper, connection, target):
+    address_index.upsert(target)
+
+
+def _on_parcel_delete(mapper, connection, target):
+    address_index.remove(target.id)
+
+
+def _on_zone_write(mapper, connection, target):
+    address_index.set_zone_code(target.id, target.zone_code)
+
+
+def _on_zone_delete(mapper, connection, target):
+    address_index.set_zone_code(target.id, None)
+
+
+def _on_schema_change(target, connection, **kw):
+    address_index.invalidate()
+
+
+def register_index_listeners() -> None:
+    """Keep the index in step with ORM writes and table (re)creation in this process."""
+    for model, handlers in (
+        (Parcel, (("after_insert", _on_parcel_write), ("after_update", _on_parcel_write),
+                  ("after_delete", _on_parcel_delete))),
+        (Zone, (("after_insert", _on_zone_write), ("after_update", _on_zone_write),
+                ("after_delete", _on_zone_delete))),
+    ):
+        for event_name, handler in handlers:
+            if not event.contains(model, event_name, handler):
+                event.listen(model, event_name, handler)
+    table = Parcel.__table__
+    for event_name in ("after_create", "after_drop"):
+        if not event.contains(table, event_name, _on_schema_change):
+            event.listen(table, event_name, _on_schema_change)
+
+
+register_index_listeners()
@@ -0,0 +1,171 @@
+"""
+Canonical form of Calgary street addresses.
+
+User input and the city's parcel data spell the same address differently:
+
+    "#2402 111 Tarawood Lane N.W."   "2402-111 TARAWOOD LN NW"
+    "123 17th Ave SW, Calgary AB"    "123 17 AV SW"
+
+`normalize_address` maps both sides to one key, so a parcel can be found
+by equality (or prefix) on the indexed `Parcel.address_key` column:
+
+- Upper case, punctuation dropped ("N.W." -> "NW")
+- Unit prefixes ("UNIT 5", "APT 5", "SUITE 5", "# 5", "5-123") -> "#5"
+- Ordinals ("17TH" -> "17", "FIRST".."TWELFTH" -> "1".."12"), as the city
+  numbers streets without suffixes
+- Street types expanded to one spelling ("AV", "AVE" -> "AVENUE")
+- Quadrants ("NORTH WEST", "N W", "NORTHWEST") -> "NW"
+- Trailing city, province and postal code dropped
+"""
+import re
+from typing import Dict, List, Optional
+
+TOKEN_RE = re.compile(r"#?[A-Z0-9]+")
+UNIT_HOUSE_RE = re.compile(r"^\s*#?\s*([A-Z0-9]+)\s*-\s*(\d+[A-Z]?)\b")  # "2402-111 ..." (unit-house)
+ORDINAL_RE = re.compile(r"^(\d+)(ST|ND|RD|TH)$")
+POSTAL_RE = re.compile(r"^([A-Z]\d[A-Z]|\d[A-Z]\d|[A-Z]\d[A-Z]\d[A-Z]\d)$")
+
+UNIT_WORDS = {"UNIT", "APT", "APARTMENT", "SUITE", "STE", "NO"}
+TRAILING_WORDS = {"CALGARY", "AB", "ALBERTA", "CANADA"}
+
+ORDINAL_WORDS = {
+    "FIRST": "1", "SECOND": "2", "THIRD": "3", "FOURTH": "4", "FIFTH": "5", "SIXTH": "6",
+    "SEVENTH": "7", "EIGHTH": "8", "NINTH": "9", "TENTH": "10", "ELEVENTH": "11", "TWELFTH": "12",
+}
+
+QUADRANTS = {
+    "NORTHWEST": "NW", "NORTHEAST": "NE", "SOUTHWEST": "SW", "SOUTHEAST": "SE",
+    "NORTH": "N", "SOUTH": "S", "EAST": "E", "WEST": "W",
+}
+
+# Canonical street type -> spellings used by the city and by people
+STREET_TYPES = {
+    "ALLEY": ("AL", "ALY"),
+    "AVENUE": ("AV", "AVE"),
+    "BAY": ("BA",),
+    "BOULEVARD": ("BV", "BLVD", "BLV"),
+    "CIRCLE": ("CI", "CIR"),
+    "CLOSE": ("CL",),
+    "COMMON": ("CM", "CMN"),
+    "COURT": ("CO", "CT", "CRT"),
+    "COVE": ("CV",),
+    "CRESCENT": ("CR", "CRES"),
+    "DRIVE": ("DR",),
+    "GARDENS": ("GD", "GDNS"),
+    "GATE": ("GA",),
+    "GREEN": ("GR", "GRN"),
+    "GROVE": ("GV",),
+    "HEATH": ("HE",),
+    "HEIGHTS": ("HT", "HTS"),
+    "HIGHWAY": ("HI", "HWY"),
+    "HILL": ("HL",),
+    "LANDING": ("LD",),
+    "LANE": ("LN",),
+    "LINK": ("LI",),
+    "MANOR": ("MR",),
+    "MEWS": ("ME",),
+    "PARADE": ("PR",),
+    "PARK": ("PA",),
+    "PARKWAY": ("PY", "PKY", "PKWY"),
+    "PASSAGE": ("PS",),
+    "PATH": ("PH",),
+    "PLACE": ("PL",),
+    "PLAZA": ("PZ",),
+    "POINT": ("PT",),
+    "RISE": ("RI",),
+    "ROAD": ("RD",),
+    "ROW": ("RO",),
+    "SQUARE": ("SQ",),
+    "STREET": ("ST",),
+    "TERRACE": ("TC", "TER", "TERR"),
+    "TRAIL": ("TR", "TRL"),
+    "VIEW": ("VW",),
+    "VILLAS": ("VI",),
+    "WALK": ("WK",),
+    "WAY": ("WY",),
+}
+STREET_TYPE_ALIASES: Dict[str, str] = {
+    alias: canonical for canonical, aliases in STREET_TYPES.items() for alias in aliases
+}
+
+
+def _merge_quadrant(tokens: List[str]) -> None:
+    """Collapse a trailing "N W" / "NORTH WEST" / "NORTHWEST" into "NW" (in place)."""
+    if len(tokens) >= 2:
+        first, second = QUADRANTS.get(tokens[-2], tokens[-2]), QUADRANTS.get(tokens[-1], tokens[-1])
+        if first in ("N", "S") and second in ("E", "W"):
+            tokens[-2:] = [first + second]
+            return
+    if tokens:
+        tokens[-1] = QUADRANTS.get(tokens[-1], tokens[-1])
+
+
+def _is_street_type(token: str) -> bool:
+    return token in STREET_TYPES or token in STREET_TYPE_ALIASES
+
+
+def canonical_tokens(address: Optional[str]) -> List[str]:
+    """
+    Canonical tokens of an address (see module docstring).
+
+    Args:
+        address: Address as typed or as stored
+
+    Returns:
+        Tokens, e.g. ["#2402", "111", "TARAWOOD", "LANE", "NW"]
+    """
+    text = (address or "").upper().replace(".", "").replace("'", "")
+    text = UNIT_HOUSE_RE.sub(r"#\1 \2", text)
+    text = re.sub(r"#\s+", "#", text)
+    raw = TOKEN_RE.findall(text)
+
+    # Units: "UNIT 5" / "APT 5" -> "#5"
+    tokens: List[str] = []
+    i = 0
+    while i < len(raw):
+        token = raw[i]
+        if token in UNIT_WORDS and i + 1 < len(raw) and raw[i + 1][0].isdigit():
+            tokens.append("#" + raw[i + 1])
+            i += 2
+            continue
+        tokens.append(token)
+        i += 1
+
+    # Trailing ", Calgary, AB T2P 1J9"
+    while tokens and (tokens[-1] in TRAILING_WORDS or POSTAL_RE.match(tokens[-1])):
+        tokens.pop()
+
+    _merge_quadrant(tokens)
+
+    # The street name starts after the unit and house number; a type word in
+    # first position is part of the name ("ST ANDREWS PL", "PARK AVENUE").
+    # A leading number followed by the only type word is the street itself
+    # ("17 AVE SW"), not a house number, so it reads like "123 17 AVE SW".
+    name_start = 0
+    while name_start < len(tokens) and tokens[name_start].startswith("#"):
+        name_start += 1
+    if name_start < len(tokens) - 1 and tokens[name_start][0].isdigit():
+        rest = tokens[name_start + 1:]
+        street_only = _is_street_type(rest[0]) and len(rest) > 1 and not any(map(_is_street_type, rest[1:]))
+        if not street_only:
+            name_start += 1
+
+    for i, token in enumerate(tokens):
+        ordinal = ORDINAL_RE.match(token)
+        if ordinal:
+            tokens[i] = ordinal.group(1)
+        elif token in ORDINAL_WORDS:
+            tokens[i] = ORDINAL_WORDS[token]
+        elif i > name_start and token in STREET_TYPE_ALIASES:
+            tokens[i] = STREET_TYPE_ALIASES[token]
+    return tokens
+
+
+def normalize_address(address: Optional[str]) -> str:
+    """
+    Canonical key for an address ("" if it has no tokens).
+
+    >>> normalize_address("123 17th Ave. S.W., Calgary AB")
+    '123 17 AVENUE SW'
+    """
+    return " ".join(canonical_tokens(address))
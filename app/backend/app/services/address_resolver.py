@@ -0,0 +1,234 @@
+"""
+Resolve user-typed addresses to parcels.
+
+GUIDE and the zoning endpoints used to find a parcel with
+`Parcel.address ILIKE '%...%'` - a full scan that returned whichever match
+the database saw first. Here the input is normalized (address_normalizer)
+and looked up on the indexed `Parcel.address_key` column:
+
+1. Equality: "123 17th Ave SW" == "123 17 AVENUE SW"
+2. Prefix on a token boundary: "123 Test Street" -> "123 TEST STREET NW";
+   the first key in order wins, and the result says whether others matched
+
+Resolutions (including misses) are cached in an LRU keyed by the normalized
+address, dropped on Parcel writes and table (re)creation in this process,
+and after `address_resolver_cache_ttl_seconds` for loads by other processes.
+
+`address_key` is filled by an ORM hook on insert/update, by load_addresses.py,
+and for rows that predate the column by `ensure_address_keys` at startup.
+"""
+import logging
+from typing import List, NamedTuple, Optional
+from uuid import UUID
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session, joinedload
+
+from ..config import get_settings
+from ..models.zones import Parcel
+from .address_normalizer import normalize_address
+from .search_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_MISS = object()
+
+
+class AddressResolution(NamedTuple):
+    """Outcome of resolving one address."""
+    parcel_id: UUID
+    match: str  # "exact" or "prefix"
+    ambiguous: bool  # Other parcels matched as well
+
+
+class AddressResolver:
+    """Normalized-key parcel lookup with an LRU of recent resolutions."""
+
+    def __init__(self):
+        settings = get_settings()
+        self._cache = TTLCache(
+            maxsize=settings.address_resolver_cache_size,
+            ttl_seconds=settings.address_resolver_cache_ttl_seconds,
+            name="addresses",
+        )
+
+    def resolve_match(self, db: Session, address: str) -> Optional[AddressResolution]:
+        """
+        Find the parcel for an address.
+
+        Args:
+            db: Database session
+            address: Address as typed
+
+        Returns:
+            AddressResolution, or None if no parcel matches
+        """
+        key = normalize_address(address)
+        if not key:
+            return None
+        cached = self._cache.get(key, _MISS)
+        if cached is not _MISS:
+            return cached
+
+        resolution = self._lookup(db, key)
+        self._cache.set(key, resolution)
+        return resolution
+
+    def resolve(self, db: Session, address: str) -> Optional[Parcel]:
+        """The Parcel for an address, or None (see resolve_match)."""
+        resolution = self.resolve_match(db, address)
+        if resolution is None:
+            return None
+        parcel = db.get(Parcel, resolution.parcel_id)
+        if parcel is None:
+            # Deleted by another process since it was cached
+            self.invalidate()
+            resolution = self.resolve_match(db, address)
+            parcel = db.get(Parcel, resolution.parcel_id) if resolution else None
+        return parcel
+
+    def search(self, db: Session, query: str, limit: int, community: Optional[str] = None) -> List[Parcel]:
+        """
+        Parcels matching a partial address: normalized-key prefix matches
+        first, then addresses containing the words anywhere ("Test" finds
+        "123 TEST ST NW") from the in-memory address index.
+
+        Args:
+            db: Database session
+            query: Partial address
+            limit: Maximum results
+            community: Optional community name filter (substring)
+
+        Returns:
+            Parcels with their zone loaded, best first
+        """
+        key = normalize_address(query)
+        if not key:
+            return []
+
+        def parcels():
+            q = db.query(Parcel).options(joinedload(Parcel.zone))
+            if community:
+                q = q.filter(Parcel.community_name.ilike(f"%{community}%"))
+            return q
+
+        results = parcels().filter(
+            Parcel.address_key.startswith(key)
+        ).order_by(Parcel.address_key).limit(limit).all()
+        if len(results) >= limit:
+            return results
+
+        seen = {parcel.id for parcel in results}
+        if get_settings().address_index_enabled:
+            from .address_index import address_index
+
+            # Over-fetch when filtering by community, which the index does not know
+            want = limit * 5 if community else limit
+            ids = [UUID(m.parcel_id) for m in address_index.search(db, query, want + len(seen))]
+            ids = [parcel_id for parcel_id in ids if parcel_id not in seen]
+            if ids:
+                found = {p.id: p for p in parcels().filter(Parcel.id.in_(ids)).all()}
+                results.extend(found[i] for i in ids if i in found)
+        else:
+            # Index disabled: substring scan, as before
+            legacy = parcels().filter(Parcel.address.ilike(f"%{query}%"))
+            if seen:
+                legacy = legacy.filter(Parcel.id.notin_(seen))
+            results.extend(legacy.limit(limit - len(results)).all())
+        return results[:limit]
+
+    def invalidate(self) -> None:
+        """Drop every cached resolution."""
+        self._cache.clear()
+
+    def get_stats(self) -> dict:
+        return self._cache.get_stats()
+
+    @staticmethod
+    def _lookup(db: Session, key: str) -> Optional[AddressResolution]:
+        rows = db.query(Parcel.id).filter(Parcel.address_key == key).limit(2).all()
+        match = "exact"
+        if not rows:
+            rows = db.query(Parcel.id).filter(
+                Parcel.address_key.startswith(key + " ")
+            ).order_by(Parcel.address_key).limit(2).all()
+            match = "prefix"
+        if not rows:
+            return None
+        return AddressResolution(parcel_id=rows[0].id, match=match, ambiguous=len(rows) > 1)
+
+
+# Singleton instance for easy import
+address_resolver = AddressResolver()
+
+
+def ensure_address_keys(db: Session, batch_size: int = 5000) -> int:
+    """
+    Add `parcels.address_key` to databases created before it existed and
+    fill keys that are missing (rows written with Core or bulk inserts).
+
+    Args:
+        db: Database session
+        batch_size: Rows updated per commit
+
+    Returns:
+        Number of keys filled
+    """
+    columns = {column["name"] for column in inspect(db.get_bind()).get_columns("parcels")}
+    if "address_key" not in columns:
+        db.execute(text("ALTER TABLE parcels ADD COLUMN address_key VARCHAR(255)"))
+        index_ops = " varchar_pattern_ops" if db.get_bind().dialect.name == "postgresql" else ""
+        db.execute(text(
+            f"CREATE INDEX IF NOT EXISTS idx_parcels_address_key ON parcels (address_key{index_ops})"
+        ))
+        db.commit()
+        logger.info("Added parcels.address_key")
+
+    filled = 0
+    while True:
+        rows = db.query(Parcel.id, Parcel.address).filter(
+            Parcel.address_key.is_(None)
+        ).limit(batch_size).all()
+        if not rows:
+            break
+        db.bulk_update_mappings(Parcel, [
+            {"id": row.id, "address_key": normalize_address(row.address)} for row in rows
+        ])
+        db.commit()
+        filled += len(rows)
+    if filled:
+        address_resolver.invalidate()
+        logger.info(f"Filled address_key for {filled} parcels")
+    return filled
+
+
+def _set_address_key(mapper, connection, target):
+    target.address_key = normalize_address(target.address)
+
+
+def _on_parcel_change(mapper, connection, target):
+    address_resolver.invalidate()
+
+
+def _on_schema_change(target, connection, **kw):
+    address_resolver.invalidate()
+
+
+def register_address_listeners() -> None:
+    """Keep address_key in step with address; drop cached resolutions on Parcel writes and table (re)creation."""
+    for event_name, listener in (
+        ("before_insert", _set_address_key),
+        ("before_update", _set_address_key),
+        ("after_insert", _on_parcel_change),
+        ("after_update", _on_parcel_change),
+        ("after_delete", _on_parcel_change),
+    ):
+        if not event.contains(Parcel, event_name, listener):
+            event.listen(Parcel, event_name, listener)
+    table = Parcel.__table__
+    for event_name in ("after_create", "after_drop"):
+        if not event.contains(table, event_name, _on_schema_change):
+            event.listen(table, event_name, _on_schema_change)
+
+
+register_address_listeners()
@@ -0,0 +1,197 @@
+"""
+Article-number -> STANDATA cross-reference index.
+
+Bulletins list the NBC articles they cite in `Standata.code_references`.
+Querying that array directly means either an array-contains test that does
+not work on SQLite, or a string match over every bulletin. This module
+keeps the citations in `standata_code_references`, one row per level of
+the article hierarchy (see StandataCodeReference), so:
+
+- Exact lookup ("which bulletins cite 9.10.9.6?") is one indexed probe
+- Hierarchical lookup ("anything under 9.10.9") is one indexed probe
+- Related-bulletin fallback walks up 9.10.9.6 -> 9.10.9 in O(depth) probes
+
+Rows are written by ORM events whenever a bulletin is added, changes its
+code_references or is deleted, and rebuilt by extract_standata.py after a
+load. Databases loaded before the index existed are filled at startup
+(ensure_cross_references).
+"""
+import logging
+import re
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, event, inspect
+from sqlalchemy.orm import Session
+
+from ..models.standata import Standata, StandataCodeReference
+
+logger = logging.getLogger(__name__)
+
+# Related-bulletin fallback stops at Section level (e.g. "9.10.9"); a whole
+# Division or Part is too broad to be "related"
+MIN_FALLBACK_DEPTH = 3
+
+REFERENCE_PATTERN = re.compile(r"\d+(?:\.\d+)*")
+
+
+def normalize_reference(reference: str) -> Optional[str]:
+    """
+    Canonical form of an article number: digits and dots, no leading zeros.
+
+    "Article 9.10.09.6." -> "9.10.9.6". Returns None if there is no number.
+    """
+    match = REFERENCE_PATTERN.search(reference or "")
+    if not match:
+        return None
+    return ".".join(str(int(segment)) for segment in match.group().split("."))
+
+
+def reference_prefixes(reference: str) -> List[str]:
+    """All hierarchy levels of a normalized reference, shallowest first."""
+    segments = reference.split(".")
+    return [".".join(segments[:depth]) for depth in range(1, len(segments) + 1)]
+
+
+def index_bulletin(connection, standata_id, code_references: Optional[List[str]], replace: bool = True) -> int:
+    """
+    Write the cross-reference rows for one bulletin.
+
+    Args:
+        connection: SQLAlchemy Connection or Session
+        standata_id: Bulletin UUID
+        code_references: The bulletin's code_references
+        replace: Delete the bulletin's existing rows first
+
+    Returns:
+        Number of rows written
+    """
+    table = StandataCodeReference.__table__
+    if replace:
+        connection.execute(delete(table).where(table.c.standata_id == standata_id))
+
+    rows = {}
+    for raw in code_references or []:
+        reference = normalize_reference(raw)
+        if not reference:
+            continue
+        for depth, prefix in enumerate(reference_prefixes(reference), start=1):
+            rows[(prefix, reference)] = {
+                "prefix": prefix,
+                "standata_id": standata_id,
+                "reference": reference,
+                "depth": depth,
+            }
+    if rows:
+        connection.execute(table.insert(), list(rows.values()))
+    return len(rows)
+
+
+def rebuild_cross_references(db: Session) -> int:
+    """
+    Rebuild the whole index from `Standata.code_references`.
+
+    Returns:
+        Number of bulletins indexed
+    """
+    db.execute(delete(StandataCodeReference.__table__))
+    bulletins = db.query(Standata.id, Standata.code_references).all()
+    for standata_id, code_references in bulletins:
+        index_bulletin(db, standata_id, code_references, replace=False)
+    db.commit()
+    logger.info(f"STANDATA cross-reference index rebuilt: {len(bulletins)} bulletins")
+    return len(bulletins)
+
+
+def ensure_cross_references(db: Session) -> int:
+    """
+    Build the index if it is empty while bulletins cite articles - databases
+    loaded before it existed, since only ORM writes and rebuilds fill it.
+    A no-op once built.
+
+    Returns:
+        Number of bulletins indexed
+    """
+    if db.query(StandataCodeReference.prefix).first() is not None:
+        return 0
+    if db.query(Standata.id).filter(Standata.code_references.isnot(None)).first() is None:
+        return 0
+    return rebuild_cross_references(db)
+
+
+def find_bulletin_ids(db: Session, reference: str, exact: bool = False) -> List[UUID]:
+    """
+    Bulletins citing an article, or (exact=False) anything beneath it.
+
+    Args:
+        db: Database session
+        reference: Article number at any depth ("9", "9.10.9", "9.10.9.6")
+        exact: Only bulletins citing exactly this reference
+
+    Returns:
+        Distinct bulletin IDs
+    """
+    reference = normalize_reference(reference)
+    if not reference:
+        return []
+    query = db.query(StandataCodeReference.standata_id).filter(
+        StandataCodeReference.prefix == reference
+    )
+    if exact:
+        query = query.filter(StandataCodeReference.reference == reference)
+    return [row.standata_id for row in query.distinct().all()]
+
+
+def find_related_bulletin_ids(db: Session, article_number: str) -> Tuple[List[UUID], bool]:
+    """
+    Bulletins related to an article, walking up the hierarchy when needed.
+
+    Tries exact citations first, then anything cited beneath the article
+    itself, then beneath each ancestor down to Section level
+    (9.10.9.6 -> 9.10.9), returning the first non-empty level.
+
+    Returns:
+        (bulletin IDs, True if they cite the article exactly)
+    """
+    reference = normalize_reference(article_number)
+    if not reference:
+        return [], False
+
+    exact_ids = find_bulletin_ids(db, reference, exact=True)
+    if exact_ids:
+        return exact_ids, True
+
+    prefixes = reference_prefixes(reference)
+    for prefix in reversed(prefixes[MIN_FALLBACK_DEPTH - 1:]):
+        ids = find_bulletin_ids(db, prefix)
+        if ids:
+            return ids, False
+    return [], False
+
+
+def _on_insert(mapper, connection, target):
+    index_bulletin(connection, target.id, target.code_references, replace=False)
+
+
+def _on_update(mapper, connection, target):
+    if inspect(target).attrs.code_references.history.has_changes():
+        index_bulletin(connection, target.id, target.code_references)
+
+
+def _on_delete(mapper, connection, target):
+    table = StandataCodeReference.__table__
+    connection.execute(delete(table).where(table.c.standata_id == target.id))
+
+
+def register_index_listeners() -> None:
+    """Keep the cross-reference index in step with ORM writes to bulletins."""
+    for event_name, handler in (
+        ("after_insert", _on_insert),
+        ("after_update", _on_update),
+        ("after_delete", _on_delete),
+    ):
+        if not event.contains(Standata, event_name, handler):
+            event.listen(Standata, event_name, handler)
+
+
+register_index_listeners()
@@ -0,0 +1,270 @@
+"""
+Cached hierarchical code tree for EXPLORE browse and navigation.
+
+Builds part -> division -> section -> article for a Code once (article
+numbers, titles and counts only - never full_text) and serves compact JSON
+from memory. Each tree carries an ETag derived from the code version and
+its articles, so unchanged trees are answered with 304 Not Modified.
+
+Trees are dropped when:
+- A Code or Article row changes in this process (SQLAlchemy ORM events)
+- The code's article count / latest update time changes - re-checked at
+  most every `code_tree_check_interval_seconds`, which catches reloads by
+  load_nbc_data.py and repopulate_db.py
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..models.codes import Code, Article
+
+logger = logging.getLogger(__name__)
+
+LEVELS = ("part", "division", "section")
+
+
+def article_sort_key(article_number: str) -> Tuple:
+    """Natural sort key so 9.2.1.1 sorts before 9.10.1.1."""
+    return tuple(
+        (0, int(segment), "") if segment.isdigit() else (1, 0, segment)
+        for segment in re.split(r"[.\s]+", article_number.strip())
+        if segment
+    )
+
+
+@dataclass
+class TreeNode:
+    """One part, division or section with its children."""
+    number: str  # "9", "9.8", "9.8.4"
+    level: str  # "part", "division" or "section"
+    value: int  # part/division/section number at this level
+    title: Optional[str] = None
+    article_count: int = 0  # Articles anywhere beneath this node
+    children: Dict[str, "TreeNode"] = field(default_factory=dict)
+    articles: List[dict] = field(default_factory=list)  # Articles attached directly
+
+    def summary(self) -> dict:
+        """Compact representation without descendants."""
+        return {
+            "number": self.number,
+            "level": self.level,
+            f"{self.level}_number": self.value,
+            "title": self.title,
+            "article_count": self.article_count,
+            "child_count": len(self.children),
+        }
+
+    def to_dict(self, depth: int) -> dict:
+        """Node plus `depth` levels of descendants; its own articles are listed when depth > 0."""
+        data = self.summary()
+        if depth > 0:
+            if self.children:
+                data["children"] = [child.to_dict(depth - 1) for child in self.children.values()]
+            if self.articles:
+                data["articles"] = self.articles
+        return data
+
+
+class CodeTree:
+    """Navigation tree for one Code version."""
+
+    def __init__(self, code: Code, rows: List, fingerprint: str):
+        self.code_info = {
+            "id": str(code.id),
+            "name": code.name,
+            "short_name": code.short_name,
+            "version": code.version,
+        }
+        self.etag = '"' + hashlib.sha1(
+            f"{code.id}:{code.version}:{fingerprint}".encode()
+        ).hexdigest()[:32] + '"'
+        self.fingerprint = fingerprint
+        self.built_at = time.time()
+        self.parts: Dict[str, TreeNode] = {}
+        self.nodes: Dict[str, TreeNode] = {}
+        self.article_count = 0
+        self._build(rows)
+
+    def _build(self, rows: List) -> None:
+        headings: Dict[str, str] = {}
+        min_titles: Dict[str, str] = {}
+
+        for row in sorted(rows, key=lambda r: article_sort_key(r.article_number)):
+            if row.part_number is None:
+                continue
+            headings.setdefault(row.article_number, row.title)
+
+            path = [row.part_number, row.division_number, row.section_number]
+            node = None
+            siblings = self.parts
+            numbers: List[str] = []
+            for level, value in zip(LEVELS, path):
+                if value is None:
+                    break
+                numbers.append(str(value))
+                number = ".".join(numbers)
+                if number not in siblings:
+                    siblings[number] = TreeNode(number=number, level=level, value=value)
+                    self.nodes[number] = siblings[number]
+                node = siblings[number]
+                node.article_count += 1
+                if level == "part" and row.title and row.title < min_titles.get(number, "\uffff"):
+                    min_titles[number] = row.title
+                siblings = node.children
+
+            node.articles.append({
+                "id": str(row.id),
+                "article_number": row.article_number,
+                "title": row.title,
+            })
+            self.article_count += 1
+
+        # Title from a heading row numbered like the node (e.g. article "9.8");
+        # parts fall back to MIN(title), which browse has always returned
+        for number, node in self.nodes.items():
+            node.title = headings.get(number) or min_titles.get(number)
+
+    def browse(self) -> dict:
+        """Top-level structure: the code and its parts."""
+        return {
+            "code": self.code_info,
+            "parts": [
+                {
+                    "part_number": part.value,
+                    "title": part.title,
+                    "article_count": part.article_count,
+                    "division_count": len(part.children),
+                }
+                for part in self.parts.values()
+            ],
+        }
+
+    def tree(self, depth: int = 2) -> dict:
+        """Parts with `depth` further levels of descendants."""
+        return {
+            "code": self.code_info,
+            "article_count": self.article_count,
+            "parts": [part.to_dict(depth) for part in self.parts.values()],
+        }
+
+    def node(self, number: str) -> Optional[dict]:
+        """A node's direct children (sub-nodes and/or articles), for lazy expansion."""
+        node = self.nodes.get(number)
+        if node is None:
+            return None
+        return {
+            "code": self.code_info,
+            "node": node.summary(),
+            "children": [child.summary() for child in node.children.values()],
+            "articles": node.articles,
+        }
+
+
+def code_fingerprint(db: Session, code: Code) -> str:
+    """Article count and latest update for one code (one aggregate query)."""
+    count, latest = db.query(func.count(Article.id), func.max(Article.updated_at)).filter(
+        Article.code_id == code.id
+    ).one()
+    return f"{count}:{latest}"
+
+
+class CodeTreeCache:
+    """Per-code tree cache with change detection."""
+
+    def __init__(self):
+        self.check_interval = get_settings().code_tree_check_interval_seconds
+        self._trees: Dict[str, CodeTree] = {}
+        self._last_check: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.hits = 0
+        self.invalidations = 0
+
+    def get(self, db: Session, code: Code) -> CodeTree:
+        """
+        Tree for a code, built on first use and rebuilt when the code changes.
+
+        Args:
+            db: Database session
+            code: The Code to build the tree for
+
+        Returns:
+            CodeTree
+        """
+        key = str(code.id)
+        now = time.monotonic()
+        tree = self._trees.get(key)
+
+        if tree is not None and tree.code_info["version"] == code.version:
+            if now - self._last_check.get(key, 0.0) < self.check_interval:
+                self.hits += 1
+                return tree
+            fingerprint = code_fingerprint(db, code)
+            self._last_check[key] = now
+            if fingerprint == tree.fingerprint:
+                self.hits += 1
+                return tree
+        else:
+            fingerprint = code_fingerprint(db, code)
+
+        rows = db.query(
+            Article.id,
+            Article.article_number,
+            Article.title,
+            Article.part_number,
+            Article.division_number,
+            Article.section_number,
+        ).filter(Article.code_id == code.id).all()
+
+        tree = CodeTree(code, rows, fingerprint)
+        with self._lock:
+            self._trees[key] = tree
+            self._last_check[key] = now
+            self.builds += 1
+        logger.info(f"Built code tree for {code.short_name} {code.version}: {tree.article_count} articles")
+        return tree
+
+    def invalidate(self, reason: str = "") -> None:
+        """Drop every cached tree."""
+        with self._lock:
+            if self._trees:
+                self.invalidations += 1
+                logger.info(f"Code tree cache invalidated{': ' + reason if reason else ''}")
+            self._trees.clear()
+            self._last_check.clear()
+
+    def get_stats(self) -> dict:
+        """Cache counters."""
+        return {
+            "trees": len(self._trees),
+            "builds": self.builds,
+            "hits": self.hits,
+            "invalidations": self.invalidations,
+        }
+
+
+# Singleton instance for easy import
+code_tree_cache = CodeTreeCache()
+
+
+def _on_code_change(mapper, connection, target):
+    code_tree_cache.invalidate(f"{type(target).__name__} changed")
+
+
+def register_invalidation_listeners() -> None:
+    """Drop cached trees whenever Code or Article rows change in this process."""
+    for model in (Code, Article):
+        for event_name in ("after_insert", "after_update", "after_delete"):
+            if not event.contains(model, event_name, _on_code_change):
+                event.listen(model, event_name, _on_code_change)
+
+
+register_invalidation_listeners()
@@ -9,8 +9,10 @@ Model: all-MiniLM-L6-v2 (384 dimensions, fast, good quality)
 - Small size (~80MB), fast inference
 - Good performance on technical/legal text
 """
+import asyncio
 import logging
-from typing import List, Optional, Tuple
+import time
+from typing import Dict, List, Optional, Tuple
 from functools import lru_cache
 import threading
 
@@ -25,6 +27,11 @@ _model_loaded = False
 MODEL_NAME = "all-MiniLM-L6-v2"  # 384 dimensions, good balance of speed/quality
 EMBEDDING_DIM = 384
 
+# Micro-batching configuration for concurrent query embedding
+BATCH_MAX_SIZE = 32  # Flush as soon as this many queries are waiting
+BATCH_MAX_WAIT_MS = 5.0  # ...or when the oldest query has waited this long
+MAX_TEXT_LENGTH = 2000  # Model has ~256 token limit
+
 
 def get_embedding_model():
     """Lazy load the sentence-transformers model."""
@@ -63,11 +70,156 @@ def is_model_available() -> bool:
         return False
 
 
+class EmbeddingBatcher:
+    """
+    Async micro-batcher in front of the embedding model.
+
+    Concurrent `embed()` calls are queued; a worker task collects them for up
+    to `max_wait_ms` (or until `max_batch_size` are waiting), runs a single
+    batched `encode` in a worker thread and resolves each caller's future.
+    One batched encode is far cheaper than N single encodes contending for
+    the same model, and the event loop is never blocked by inference.
+    """
+
+    def __init__(
+        self,
+        encode_batch,
+        max_batch_size: int = BATCH_MAX_SIZE,
+        max_wait_ms: float = BATCH_MAX_WAIT_MS,
+    ):
+        """
+        Args:
+            encode_batch: Callable taking a list of texts and returning one
+                embedding (or None) per text
+            max_batch_size: Maximum texts per encode call
+            max_wait_ms: Maximum time to hold a query waiting for company
+        """
+        self._encode_batch = encode_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self._metrics_lock = threading.Lock()
+        self._reset_metrics()
+
+    def _reset_metrics(self):
+        self._batches = 0
+        self._items = 0
+        self._max_batch_seen = 0
+        self._batch_size_histogram: Dict[int, int] = {}
+        self._queue_wait_ms_total = 0.0
+        self._queue_wait_ms_max = 0.0
+        self._encode_ms_total = 0.0
+        self._encode_ms_max = 0.0
+        self._errors = 0
+
+    def _ensure_worker(self):
+        """Start the worker on the running loop (restarting if the loop changed)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def embed(self, text: str) -> Optional[List[float]]:
+        """Queue a text for the next batch and wait for its embedding."""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((text, future, time.perf_counter()))
+        return await future
+
+    async def _collect_batch(self) -> list:
+        """Wait for one item, then gather more until the window or size limit is hit."""
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait_ms / 1000
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect_batch()
+            texts = [text for text, _, _ in batch]
+            dispatched = time.perf_counter()
+
+            try:
+                embeddings = await self._loop.run_in_executor(None, self._encode_batch, texts)
+                error = None
+            except Exception as e:
+                logger.error(f"Error generating batched embeddings: {e}")
+                embeddings = [None] * len(batch)
+                error = e
+
+            encode_ms = (time.perf_counter() - dispatched) * 1000
+            self._record(batch, dispatched, encode_ms, error is not None)
+
+            for (_, future, _), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
+
+    def _record(self, batch: list, dispatched: float, encode_ms: float, failed: bool):
+        size = len(batch)
+        waits = [(dispatched - enqueued) * 1000 for _, _, enqueued in batch]
+        with self._metrics_lock:
+            self._batches += 1
+            self._items += size
+            self._max_batch_seen = max(self._max_batch_seen, size)
+            self._batch_size_histogram[size] = self._batch_size_histogram.get(size, 0) + 1
+            self._queue_wait_ms_total += sum(waits)
+            self._queue_wait_ms_max = max(self._queue_wait_ms_max, max(waits))
+            self._encode_ms_total += encode_ms
+            self._encode_ms_max = max(self._encode_ms_max, encode_ms)
+            if failed:
+                self._errors += 1
+
+    async def close(self):
+        """Stop the worker task."""
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+
+    def get_metrics(self) -> dict:
+        """Batch-size and latency-window metrics since startup."""
+        with self._metrics_lock:
+            batches = self._batches or 1
+            items = self._items or 1
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+                "batches": self._batches,
+                "items": self._items,
+                "errors": self._errors,
+                "avg_batch_size": round(self._items / batches, 2),
+                "max_batch_seen": self._max_batch_seen,
+                "batch_size_histogram": dict(sorted(self._batch_size_histogram.items())),
+                "avg_queue_wait_ms": round(self._queue_wait_ms_total / items, 3),
+                "max_queue_wait_ms": round(self._queue_wait_ms_max, 3),
+                "avg_encode_ms": round(self._encode_ms_total / batches, 3),
+                "max_encode_ms": round(self._encode_ms_max, 3),
+                "pending": self._queue.qsize() if self._queue is not None else 0,
+            }
+
+
 class EmbeddingService:
     """Service for generating text embeddings."""
 
     def __init__(self):
         self._model = None
+        self.batcher = EmbeddingBatcher(self._encode_batch)
 
     def _ensure_model_loaded(self) -> bool:
         """Ensure the model is loaded."""
@@ -146,6 +298,47 @@ class EmbeddingService:
         """
         return self.embed_text(query)
 
+    def _encode_batch(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Encode a micro-batch in one model call (runs in a worker thread)."""
+        truncated = [t[:MAX_TEXT_LENGTH] for t in texts]
+        embeddings = self._model.encode(
+            truncated,
+            convert_to_numpy=True,
+            batch_size=len(truncated),
+            show_progress_bar=False
+        )
+        return [e.tolist() for e in embeddings]
+
+    async def embed_query_async(self, query: str) -> Optional[List[float]]:
+        """
+        Generate a query embedding through the micro-batcher.
+
+        Use this from async request handlers: concurrent queries share a
+        single batched `encode` and the event loop is never blocked.
+        Repeated queries are served from the query-embedding cache.
+
+        Args:
+            query: Search query text
+
+        Returns:
+            Embedding vector or None if the model is unavailable
+        """
+        from .search_cache import search_cache
+
+        cached = search_cache.get_embedding(query)
+        if cached is not None:
+            return cached
+
+        if self._model is None:
+            # First use: the model load takes seconds, so it runs in a worker thread
+            loop = asyncio.get_running_loop()
+            if not await loop.run_in_executor(None, self._ensure_model_loaded):
+                return None
+
+        embedding = await self.batcher.embed(query)
+        search_cache.set_embedding(query, embedding)
+        return embedding
+
     def compute_similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
         """
         Compute cosine similarity between two embeddings.
@@ -183,6 +376,7 @@ class EmbeddingService:
             "embedding_dim": EMBEDDING_DIM,
             "loaded": _model_loaded,
             "available": is_model_available(),
+            "batching": self.batcher.get_metrics(),
         }
 
 
@@ -0,0 +1,85 @@
+"""
+Sparse fieldsets for read endpoints.
+
+Endpoints accept `fields=id,article_number,title` and load only those
+columns (SQLAlchemy load_only), so heavy columns such as `Article.full_text`
+are neither transferred from the database nor deserialized unless a client
+asks for them. Relationship fields (e.g. `Requirement.conditions`) are
+loaded with one extra SELECT IN query for the whole page.
+
+The response schema defines which fields may be requested; `id` is always
+included so clients can key the results.
+"""
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only, selectinload
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Optional[List[str]]:
+    """
+    Parse a comma-separated `fields` parameter.
+
+    Args:
+        fields: Raw query value, e.g. "article_number,title"
+        schema: Response schema listing the selectable fields
+
+    Returns:
+        Field names in schema order with `id` first, or None if not given
+
+    Raises:
+        ValueError: If a field is not part of the schema
+    """
+    if fields is None:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(schema.model_fields)
+    if unknown:
+        raise ValueError(
+            f"Unknown field(s): {', '.join(sorted(unknown))}. "
+            f"Available: {', '.join(schema.model_fields)}"
+        )
+    requested.add("id")
+    return [name for name in schema.model_fields if name in requested]
+
+
+def load_options(model, field_names: Iterable[str]) -> list:
+    """
+    Query options that load only the columns and relationships named.
+
+    Args:
+        model: ORM model class
+        field_names: Attribute names to load
+
+    Returns:
+        Options for `query.options(*...)`
+    """
+    mapper = inspect(model)
+    columns = [getattr(model, name) for name in field_names if name in mapper.column_attrs]
+    options = [load_only(*columns)] if columns else []
+    options.extend(
+        selectinload(getattr(model, name))
+        for name in field_names if name in mapper.relationships
+    )
+    return options
+
+
+@lru_cache(maxsize=None)
+def _adapter(schema: Type[BaseModel], name: str) -> TypeAdapter:
+    return TypeAdapter(schema.model_fields[name].annotation)
+
+
+def project(obj, field_names: Iterable[str], schema: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    Serialize only the named fields of an ORM object.
+
+    Values are validated against the schema's field types, so nested
+    relationships serialize exactly as in the full response.
+    """
+    data = {}
+    for name in field_names:
+        data[name] = _adapter(schema, name).validate_python(getattr(obj, name), from_attributes=True)
+    return jsonable_encoder(data)
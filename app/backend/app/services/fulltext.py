@@ -0,0 +1,368 @@
+"""
+Pluggable full-text backends for code article and STANDATA search.
+
+- PostgreSQL: `Article.search_vector` (tsvector + GIN) ranked with ts_rank_cd
+- SQLite: FTS5 virtual tables ranked with bm25
+- Anything else (or an index that is not built yet): ILIKE scan
+
+The SQLite FTS5 tables are external-content tables over `articles` and
+`standata`, so they store only the inverted index, not a second copy of the
+text. Triggers keep them in sync with every INSERT/UPDATE/DELETE, whichever
+process writes; `rebuild_fulltext_index` re-derives them after bulk loads
+(and after VACUUM, which may renumber the implicit rowids they key on).
+
+Backends return `FullTextHit`s best-first. Highlighted snippets are built
+separately, for the returned page only, by snippets.py.
+"""
+import logging
+import re
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import bindparam, event, func, or_, text
+from sqlalchemy.orm import Session
+
+from ..models.codes import Code, Article
+from ..models.standata import Standata
+
+logger = logging.getLogger(__name__)
+
+# FTS5 tables: source table -> (fts table, indexed columns). Column order
+# matters for the bm25 weights below.
+FTS5_TABLES: Dict[str, tuple] = {
+    "articles": ("articles_fts", ("article_number", "title", "full_text")),
+    "standata": ("standata_fts", ("bulletin_number", "title", "summary", "full_text")),
+}
+
+# bm25 column weights - a hit in the number or title outranks body text
+ARTICLE_BM25_WEIGHTS = (10.0, 5.0, 1.0)
+STANDATA_BM25_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+
+
+class FullTextHit(NamedTuple):
+    """One full-text match: row ID (str) and backend score (higher is better)."""
+    id: str
+    score: float
+
+
+def fts5_match_query(terms: Sequence[str], phrase: bool = False) -> str:
+    """
+    Build an FTS5 MATCH expression from plain search terms.
+
+    Every term is quoted (so punctuation and FTS5 operators in user input
+    are inert) and prefix-matched, mirroring the substring semantics of the
+    ILIKE fallback: "stair" matches "stairs", "9.8.4" matches "9.8.4.1".
+
+    Args:
+        terms: Search terms (see hybrid_search.extract_search_terms)
+        phrase: Match the terms as one phrase instead of OR-ing them
+
+    Returns:
+        MATCH expression, or "" when there is nothing to search for
+    """
+    quoted = [
+        '"' + term.replace('"', '""') + '"'
+        for term in terms
+        if re.search(r"\w", term)
+    ]
+    if not quoted:
+        return ""
+    if phrase:
+        return '"' + " ".join(q[1:-1] for q in quoted) + '" *'
+    return " OR ".join(f"{q} *" for q in quoted)
+
+
+class FullTextBackend:
+    """
+    Portable backend: ILIKE scan with no index and no snippets.
+
+    Subclasses override the search methods and call back into this class
+    when their index is unavailable.
+    """
+
+    name = "like"
+
+    def search_articles(
+        self,
+        db: Session,
+        terms: List[str],
+        limit: int,
+        code_types: Optional[List[str]] = None,
+        part_numbers: Optional[List[int]] = None,
+    ) -> List[FullTextHit]:
+        """
+        Rank articles matching any term, best-first.
+
+        The ILIKE fallback ranks by number of distinct terms matched, with
+        hits in the article number or title counting double.
+        """
+        if not terms:
+            return []
+
+        conditions = []
+        for term in terms:
+            pattern = f"%{term}%"
+            conditions.append(Article.full_text.ilike(pattern))
+            conditions.append(Article.title.ilike(pattern))
+            conditions.append(Article.article_number.ilike(pattern))
+
+        query = db.query(
+            Article.id, Article.article_number, Article.title, Article.full_text
+        ).join(Code)
+        if code_types:
+            query = query.filter(Code.code_type.in_(code_types))
+        if part_numbers:
+            query = query.filter(Article.part_number.in_(part_numbers))
+        rows = query.filter(or_(*conditions)).limit(limit * 4).all()
+
+        lowered_terms = [t.lower() for t in terms]
+
+        def term_score(row) -> int:
+            heading = f"{row.article_number} {row.title or ''}".lower()
+            body = row.full_text.lower()
+            return sum(2 * (t in heading) + (t in body) for t in lowered_terms)
+
+        scored = sorted(((term_score(r), r) for r in rows), key=lambda s: (-s[0], s[1].article_number))
+        return [FullTextHit(str(r.id), float(score)) for score, r in scored[:limit]]
+
+    def search_standata(
+        self,
+        db: Session,
+        query_text: str,
+        limit: int,
+        categories: Optional[List[str]] = None,
+    ) -> List[FullTextHit]:
+        """Bulletins containing the query string in any searchable field."""
+        pattern = f"%{query_text}%"
+        query = db.query(Standata.id)
+        if categories:
+            query = query.filter(Standata.category.in_(categories))
+        rows = query.filter(
+            or_(
+                Standata.bulletin_number.ilike(pattern),
+                Standata.title.ilike(pattern),
+                Standata.summary.ilike(pattern),
+                Standata.full_text.ilike(pattern),
+            )
+        ).limit(limit).all()
+        return [FullTextHit(str(r.id), 0.0) for r in rows]
+
+
+class PostgresFullTextBackend(FullTextBackend):
+    """tsvector/GIN search for articles; bulletins use the ILIKE scan."""
+
+    name = "postgres_tsvector"
+
+    def search_articles(self, db, terms, limit, code_types=None, part_numbers=None):
+        if not terms:
+            return []
+
+        from .search_capabilities import search_capabilities
+        if not search_capabilities.get(db).has_tsvector(code_types):
+            return super().search_articles(db, terms, limit, code_types, part_numbers)
+
+        ts_query = func.to_tsquery('english', " | ".join(terms))
+        rank = func.ts_rank_cd(Article.search_vector, ts_query)
+
+        query = db.query(Article.id, rank.label("rank")).join(Code)
+        if code_types:
+            query = query.filter(Code.code_type.in_(code_types))
+        if part_numbers:
+            query = query.filter(Article.part_number.in_(part_numbers))
+        rows = query.filter(
+            Article.search_vector.op('@@')(ts_query)
+        ).order_by(rank.desc()).limit(limit).all()
+        return [FullTextHit(str(r.id), float(r.rank or 0.0)) for r in rows]
+
+
+class SQLiteFTS5Backend(FullTextBackend):
+    """FTS5 inverted index with bm25 ranking."""
+
+    name = "sqlite_fts5"
+
+    @staticmethod
+    def _has_index(db: Session, source: str) -> bool:
+        from .search_capabilities import search_capabilities
+        return search_capabilities.get(db).has_fts5(source)
+
+    def search_articles(self, db, terms, limit, code_types=None, part_numbers=None):
+        match = fts5_match_query(terms)
+        if not match:
+            return []
+        if not self._has_index(db, "articles"):
+            return super().search_articles(db, terms, limit, code_types, part_numbers)
+
+        bm25 = f"bm25(articles_fts, {', '.join(map(str, ARTICLE_BM25_WEIGHTS))})"
+        sql = f"""
+            SELECT a.id AS id, {bm25} AS rank
+            FROM articles_fts
+            JOIN articles a ON a.rowid = articles_fts.rowid
+            JOIN codes c ON c.id = a.code_id
+            WHERE articles_fts MATCH :match
+        """
+        params = {"match": match, "limit": limit}
+        bind = []
+        if code_types:
+            sql += " AND c.code_type IN :code_types"
+            params["code_types"] = list(code_types)
+            bind.append(bindparam("code_types", expanding=True))
+        if part_numbers:
+            sql += " AND a.part_number IN :part_numbers"
+            params["part_numbers"] = list(part_numbers)
+            bind.append(bindparam("part_numbers", expanding=True))
+        sql += " ORDER BY rank LIMIT :limit"
+
+        rows = db.execute(text(sql).bindparams(*bind), params).all()
+        # bm25() is lower-is-better; negate so scores sort like the other backends
+        return [FullTextHit(str(r.id), -float(r.rank)) for r in rows]
+
+    def search_standata(self, db, query_text, limit, categories=None):
+        match = fts5_match_query(re.findall(r"\w+", query_text), phrase=True)
+        if not match:
+            return []
+        if not self._has_index(db, "standata"):
+            return super().search_standata(db, query_text, limit, categories)
+
+        bm25 = f"bm25(standata_fts, {', '.join(map(str, STANDATA_BM25_WEIGHTS))})"
+        sql = f"""
+            SELECT s.id AS id, {bm25} AS rank
+            FROM standata_fts
+            JOIN standata s ON s.rowid = standata_fts.rowid
+            WHERE standata_fts MATCH :match
+        """
+        params = {"match": match, "limit": limit}
+        bind = []
+        if categories:
+            sql += " AND s.category IN :categories"
+            params["categories"] = list(categories)
+            bind.append(bindparam("categories", expanding=True))
+        sql += " ORDER BY rank LIMIT :limit"
+
+        rows = db.execute(text(sql).bindparams(*bind), params).all()
+        return [FullTextHit(str(r.id), -float(r.rank)) for r in rows]
+
+
+_backends: Dict[str, FullTextBackend] = {
+    "postgresql": PostgresFullTextBackend(),
+    "sqlite": SQLiteFTS5Backend(),
+}
+_default_backend = FullTextBackend()
+
+
+def get_fulltext_backend(db: Session) -> FullTextBackend:
+    """Pick the full-text backend for the session's database dialect."""
+    return _backends.get(db.get_bind().dialect.name, _default_backend)
+
+
+# --- SQLite FTS5 schema maintenance ---
+
+def _fts5_ddl(source: str) -> List[str]:
+    """CREATE statements for one external-content FTS5 table and its sync triggers."""
+    fts_table, columns = FTS5_TABLES[source]
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"new.{c}" for c in columns)
+    old_values = ", ".join(f"old.{c}" for c in columns)
+    delete_row = (
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {cols}) "
+        f"VALUES ('delete', old.rowid, {old_values});"
+    )
+    insert_row = f"INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.rowid, {new_values});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5("
+        f"{cols}, content='{source}', content_rowid='rowid', tokenize='porter unicode61')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {source} BEGIN {insert_row} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {source} BEGIN {delete_row} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {cols} ON {source} "
+        f"BEGIN {delete_row} {insert_row} END",
+    ]
+
+
+def ensure_fulltext_schema(connection, rebuild: bool = False) -> bool:
+    """
+    Create the FTS5 tables and sync triggers if missing (SQLite only).
+
+    A newly created FTS5 table is populated from its source table, so
+    databases that predate the index pick it up on the next startup.
+
+    Args:
+        connection: SQLAlchemy Connection (or Session)
+        rebuild: Re-derive existing indexes from the source tables too
+
+    Returns:
+        True if the FTS5 index is in place
+    """
+    bind = connection.get_bind() if isinstance(connection, Session) else connection
+    if bind.dialect.name != "sqlite":
+        return False
+
+    def table_exists(name: str) -> bool:
+        return connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": name},
+        ).first() is not None
+
+    for source, (fts_table, _) in FTS5_TABLES.items():
+        if not table_exists(source):
+            continue
+        created = not table_exists(fts_table)
+        try:
+            for statement in _fts5_ddl(source):
+                connection.execute(text(statement))
+        except Exception as e:
+            # SQLite built without FTS5 - searches fall back to ILIKE
+            logger.warning(f"FTS5 unavailable, {source} search will use ILIKE: {e}")
+            return False
+        if created or rebuild:
+            connection.execute(text(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')"))
+    _schema_changed()
+    return True
+
+
+def rebuild_fulltext_index(db: Session) -> bool:
+    """
+    Rebuild the FTS5 index after a bulk load (no-op on other databases).
+
+    The triggers already track row changes; rebuilding also covers
+    databases created before the FTS5 tables existed and compacts the
+    index into a single b-tree segment.
+    """
+    if not ensure_fulltext_schema(db, rebuild=True):
+        return False
+    for fts_table, _ in FTS5_TABLES.values():
+        db.execute(text(f"INSERT INTO {fts_table}({fts_table}) VALUES ('optimize')"))
+    db.commit()
+    logger.info("SQLite FTS5 full-text index rebuilt")
+    return True
+
+
+def _schema_changed() -> None:
+    from .search_capabilities import search_capabilities
+    search_capabilities.mark_stale("full-text schema changed")
+
+
+def _after_create(target, connection, **kw):
+    if connection.dialect.name != "sqlite":
+        return
+    try:
+        for statement in _fts5_ddl(target.name):
+            connection.execute(text(statement))
+    except Exception as e:
+        logger.warning(f"FTS5 unavailable, {target.name} search will use ILIKE: {e}")
+    _schema_changed()
+
+
+def _after_drop(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(f"DROP TABLE IF EXISTS {FTS5_TABLES[target.name][0]}"))
+        _schema_changed()
+
+
+def register_schema_listeners() -> None:
+    """Create/drop the FTS5 tables alongside `articles` and `standata` (metadata.create_all)."""
+    for model in (Article, Standata):
+        table = model.__table__
+        if not event.contains(table, "after_create", _after_create):
+            event.listen(table, "after_create", _after_create)
+            event.listen(table, "after_drop", _after_drop)
+
+
+register_schema_listeners()
@@ -0,0 +1,267 @@
+"""
+Hybrid lexical + vector retrieval for EXPLORE mode.
+
+Runs two independent candidate generators over code articles and merges
+their rankings with reciprocal-rank fusion (RRF):
+- Lexical: PostgreSQL tsvector/ts_rank_cd or SQLite FTS5/bm25 (fulltext.py)
+- Vector: cosine similarity from the ANN index (see vector_index.py)
+
+Each generator only returns its top `candidate_limit` article IDs, so the
+lexical stage no longer has to materialize every row matching an OR-query,
+and paraphrased questions ("how wide do my stairs need to be") are still
+found by the vector stage.
+
+RRF score for an article: sum over generators of weight / (k + rank), with
+rank starting at 1. It needs no score calibration between the two stages.
+"""
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..models.codes import Code, Article
+from .embedding_service import get_embedding_service
+from .fulltext import FullTextHit, get_fulltext_backend
+from .vector_index import get_article_index
+
+logger = logging.getLogger(__name__)
+
+# RRF constant - dampens the influence of top ranks (60 is the usual default)
+RRF_K = 60
+
+# Candidates each generator contributes to fusion
+DEFAULT_CANDIDATE_LIMIT = 50
+
+# Vector candidates fetched per requested candidate (filters are applied in SQL)
+VECTOR_OVERFETCH = 3
+
+STOP_WORDS = {
+    'what', 'is', 'the', 'a', 'an', 'are', 'for', 'to', 'of', 'in', 'on', 'at',
+    'and', 'or', 'between', 'how', 'why', 'when', 'where', 'do', 'does', 'my',
+    'need', 'be', 'can', 'i',
+}
+
+
+def extract_search_terms(query: str) -> List[str]:
+    """
+    Split a natural-language query into search terms.
+
+    Drops stop words, very short words and punctuation (keeping dots inside
+    article numbers such as "9.8.4.1"), so terms are safe for to_tsquery
+    and FTS5 MATCH.
+    """
+    terms = []
+    for word in re.findall(r"[\w.]+", query):
+        word = word.strip(".")
+        if len(word) >= 3 and word.lower() not in STOP_WORDS and word not in terms:
+            terms.append(word)
+    return terms
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[str]],
+    k: int = RRF_K,
+    weights: Optional[Sequence[float]] = None,
+) -> List[Tuple[str, float]]:
+    """
+    Merge ranked ID lists with reciprocal-rank fusion.
+
+    Args:
+        rankings: One best-first list of IDs per candidate generator
+        k: RRF constant
+        weights: Optional per-generator weights (default 1.0 each)
+
+    Returns:
+        List of (id, fused_score) sorted best-first
+    """
+    if weights is None:
+        weights = [1.0] * len(rankings)
+
+    scores: Dict[str, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, item_id in enumerate(ranking, start=1):
+            scores[item_id] = scores.get(item_id, 0.0) + weight / (k + rank)
+
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+@dataclass
+class HybridSearchResult:
+    """Outcome of a hybrid search: fused ranking plus diagnostics."""
+    ranked: List[Tuple[str, float]] = field(default_factory=list)
+    search_type: str = "fulltext"  # "hybrid", "semantic" or "fulltext"
+    lexical_count: int = 0
+    vector_count: int = 0
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+class HybridSearchService:
+    """Lexical + vector candidate generation with reciprocal-rank fusion."""
+
+    def __init__(
+        self,
+        candidate_limit: int = DEFAULT_CANDIDATE_LIMIT,
+        rrf_k: int = RRF_K,
+        lexical_weight: float = 1.0,
+        vector_weight: float = 1.0,
+    ):
+        self.candidate_limit = candidate_limit
+        self.rrf_k = rrf_k
+        self.lexical_weight = lexical_weight
+        self.vector_weight = vector_weight
+
+    @staticmethod
+    def _apply_filters(query, code_types: Optional[List[str]], part_numbers: Optional[List[int]]):
+        """Apply the code_types / part_numbers filters shared by both stages."""
+        if code_types:
+            query = query.filter(Code.code_type.in_(code_types))
+        if part_numbers:
+            query = query.filter(Article.part_number.in_(part_numbers))
+        return query
+
+    def lexical_hits(
+        self,
+        db: Session,
+        query_text: str,
+        limit: int,
+        code_types: Optional[List[str]] = None,
+        part_numbers: Optional[List[int]] = None,
+    ) -> List[FullTextHit]:
+        """
+        Top lexical matches, best-first, from the dialect's full-text backend
+        (tsvector on PostgreSQL, FTS5 on SQLite - see fulltext.py).
+        """
+        terms = extract_search_terms(query_text)
+        if not terms:
+            return []
+        backend = get_fulltext_backend(db)
+        return backend.search_articles(db, terms, limit, code_types, part_numbers)
+
+    def lexical_candidates(
+        self,
+        db: Session,
+        query_text: str,
+        limit: int,
+        code_types: Optional[List[str]] = None,
+        part_numbers: Optional[List[int]] = None,
+    ) -> List[str]:
+        """Top lexical matches as article IDs, best-first."""
+        return [hit.id for hit in self.lexical_hits(db, query_text, limit, code_types, part_numbers)]
+
+    def vector_candidates(
+        self,
+        db: Session,
+        query_embedding: List[float],
+        limit: int,
+        code_types: Optional[List[str]] = None,
+        part_numbers: Optional[List[int]] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Top vector matches as (article_id, cosine_similarity), best-first.
+
+        The ANN index has no metadata, so filtered searches over-fetch and
+        keep only the IDs that pass the filters in SQL.
+        """
+        index = get_article_index()
+        if index is None or index.size == 0:
+            return []
+
+        if not code_types and not part_numbers:
+            return index.search(query_embedding, k=limit)
+
+        hits = index.search(query_embedding, k=limit * VECTOR_OVERFETCH)
+        if not hits:
+            return []
+
+        allowed = {
+            str(r.id) for r in self._apply_filters(
+                db.query(Article.id).join(Code), code_types, part_numbers
+            ).filter(Article.id.in_([UUID(article_id) for article_id, _ in hits])).all()
+        }
+        return [(article_id, score) for article_id, score in hits if article_id in allowed][:limit]
+
+    async def search(
+        self,
+        db: AsyncSession,
+        query_text: str,
+        limit: int = 20,
+        code_types: Optional[List[str]] = None,
+        part_numbers: Optional[List[int]] = None,
+        use_semantic: bool = True,
+    ) -> HybridSearchResult:
+        """
+        Run both candidate generators and fuse their rankings.
+
+        Async because the query embedding goes through the micro-batching
+        queue; the database stages run on the caller's session through
+        `AsyncSession.run_sync`, so the event loop keeps serving meanwhile.
+
+        Args:
+            db: Async database session
+            query_text: User query
+            limit: Number of fused results to return
+            code_types: Optional code type filter
+            part_numbers: Optional part number filter
+            use_semantic: Run the vector stage when the index is available
+
+        Returns:
+            HybridSearchResult with fused (article_id, score) pairs and
+            per-stage timings in milliseconds
+        """
+        result = HybridSearchResult()
+        total_start = time.perf_counter()
+        candidate_limit = max(limit, self.candidate_limit)
+
+        start = time.perf_counter()
+        lexical_hits = await db.run_sync(self.lexical_hits, query_text, candidate_limit, code_types, part_numbers)
+        lexical_ids = [hit.id for hit in lexical_hits]
+        result.timings["lexical_ms"] = _elapsed_ms(start)
+        result.lexical_count = len(lexical_ids)
+
+        vector_hits: List[Tuple[str, float]] = []
+        index = get_article_index()
+        if use_semantic and index is not None and index.size > 0:
+            start = time.perf_counter()
+            query_embedding = await get_embedding_service().embed_query_async(query_text)
+            result.timings["embed_ms"] = _elapsed_ms(start)
+
+            if query_embedding is not None:
+                start = time.perf_counter()
+                vector_hits = await db.run_sync(
+                    self.vector_candidates, query_embedding, candidate_limit, code_types, part_numbers
+                )
+                result.timings["vector_ms"] = _elapsed_ms(start)
+                result.vector_count = len(vector_hits)
+
+        start = time.perf_counter()
+        vector_ids = [article_id for article_id, _ in vector_hits]
+        if lexical_ids and vector_ids:
+            result.search_type = "hybrid"
+            result.ranked = reciprocal_rank_fusion(
+                [lexical_ids, vector_ids],
+                k=self.rrf_k,
+                weights=[self.lexical_weight, self.vector_weight],
+            )[:limit]
+        elif vector_ids:
+            result.search_type = "semantic"
+            result.ranked = vector_hits[:limit]
+        else:
+            result.search_type = "fulltext"
+            result.ranked = reciprocal_rank_fusion([lexical_ids], k=self.rrf_k)[:limit]
+        result.timings["fusion_ms"] = _elapsed_ms(start)
+        result.timings["total_ms"] = _elapsed_ms(total_start)
+
+        return result
+
+
+# Singleton instance for easy import
+hybrid_search_service = HybridSearchService()
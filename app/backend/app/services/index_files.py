@@ -0,0 +1,96 @@
+"""
+Versioned on-disk layout for the memory-mapped indexes.
+
+An index directory (vector_index.py, parcel_locator.py) holds one
+subdirectory per saved version and a pointer file naming the live one:
+    CURRENT      name of the current version, e.g. "v1760645000123456789-4242"
+    v<ns>-<pid>/ that version's .npy files and meta.json
+
+Saving into the live files one by one let a concurrent load in another
+worker pair new arrays with the old meta.json. A save now writes a
+complete new version next to the live one and swaps CURRENT with a single
+os.replace, so a load sees either the old version or the new one.
+
+The previous version is kept for loads that read CURRENT just before the
+swap; older ones are removed (memory-mapped files stay readable on POSIX
+until unmapped). Directories written before versioning, with the files
+directly inside, are still loaded until the next save.
+"""
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+POINTER_NAME = "CURRENT"
+
+
+def current_version_dir(directory: Path) -> Optional[Path]:
+    """
+    The directory holding the current version's files.
+
+    Args:
+        directory: Index directory
+
+    Returns:
+        The version directory, the index directory itself for the
+        unversioned layout, or None if nothing was saved there
+    """
+    directory = Path(directory)
+    try:
+        name = (directory / POINTER_NAME).read_text().strip()
+    except FileNotFoundError:
+        return directory if directory.is_dir() else None
+    return directory / name
+
+
+def save_version(directory: Path, write: Callable[[Path], None]) -> Path:
+    """
+    Write a new version and make it current.
+
+    Args:
+        directory: Index directory
+        write: Writes the version's files into the directory it is given
+
+    Returns:
+        The new version directory
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    name = f"v{time.time_ns()}-{os.getpid()}"
+    staging = directory / f".{name}.tmp"
+    staging.mkdir()
+    try:
+        write(staging)
+        os.replace(staging, directory / name)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    previous = current_version_dir(directory)
+    tmp_pointer = directory / f"{POINTER_NAME}.{name}.tmp"
+    tmp_pointer.write_text(name)
+    os.replace(tmp_pointer, directory / POINTER_NAME)
+
+    # Versions older than the previous one; newer ones may belong to a concurrent save
+    oldest_kept = min(
+        stamp for stamp in (_version_stamp(name), _version_stamp(previous.name) if previous else None)
+        if stamp is not None
+    )
+    for entry in directory.iterdir():
+        stamp = _version_stamp(entry.name)
+        if entry.is_dir() and stamp is not None and stamp < oldest_kept:
+            shutil.rmtree(entry, ignore_errors=True)
+            logger.debug(f"Removed old index version {entry}")
+    return directory / name
+
+
+def _version_stamp(name: str) -> Optional[int]:
+    """Save time (ns) encoded in a version directory name, or None for other names."""
+    if not name.startswith("v"):
+        return None
+    stamp, _, _ = name[1:].partition("-")
+    return int(stamp) if stamp.isdigit() else None
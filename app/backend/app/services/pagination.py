@@ -0,0 +1,261 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+OFFSET pagination makes the database walk and discard every skipped row, so
+page 500 costs 500 pages of work, and a COUNT(*) per page doubles it. Here
+each page is fetched with a WHERE on the sort key of the last row returned:
+
+    ORDER BY article_number, id
+    WHERE article_number > :last_number
+       OR (article_number = :last_number AND id > :last_id)
+
+which an index on the sort columns answers in the same time for any page.
+The last row's key is handed to clients as an opaque cursor.
+
+Totals are optional and approximate: counts are cached per query for
+`pagination_count_ttl_seconds` and dropped when this process writes to the
+counted model, so rows written by other processes may be missed until expiry.
+Pages never run a COUNT unless a total is asked for.
+"""
+import base64
+import json
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from fastapi import Response
+from sqlalchemy import and_, event, or_
+from sqlalchemy.orm import Query
+
+from ..config import get_settings
+from .search_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor is malformed or belongs to a different listing."""
+
+
+def _encode_value(value: Any) -> list:
+    if value is None:
+        return ["n", None]
+    if isinstance(value, datetime):
+        return ["dt", value.isoformat()]
+    if isinstance(value, date):
+        return ["d", value.isoformat()]
+    if isinstance(value, UUID):
+        return ["u", str(value)]
+    if isinstance(value, (int, float)):
+        return ["i", value]
+    return ["s", str(value)]
+
+
+def _decode_value(tagged: list) -> Any:
+    tag, value = tagged
+    if tag == "n":
+        return None
+    if tag == "dt":
+        return datetime.fromisoformat(value)
+    if tag == "d":
+        return date.fromisoformat(value)
+    if tag == "u":
+        return UUID(value)
+    if tag in ("i", "s"):
+        return value
+    raise InvalidCursor(f"Unknown cursor value type: {tag}")
+
+
+class Keyset:
+    """
+    A unique sort order for keyset pagination.
+
+    The last column must be unique (normally the primary key) so ties on the
+    earlier columns still give a total order. Nullable columns sort last.
+    """
+
+    def __init__(self, name: str, *columns, descending: bool = False):
+        self.name = name
+        self.columns = columns
+        self.descending = descending
+
+    @property
+    def model(self):
+        """ORM class the key columns belong to."""
+        return self.columns[0].class_
+
+    def order_by(self) -> list:
+        """ORDER BY clauses for this key."""
+        clauses = []
+        for column in self.columns:
+            clause = column.desc() if self.descending else column.asc()
+            if column.nullable:
+                clause = clause.nullslast()
+            clauses.append(clause)
+        return clauses
+
+    def values(self, row) -> Tuple:
+        """The key of one result row."""
+        return tuple(getattr(row, column.key) for column in self.columns)
+
+    def after(self, values: Sequence) -> Any:
+        """WHERE clause selecting rows that sort after `values`."""
+        conditions = []
+        for i, (column, value) in enumerate(zip(self.columns, values)):
+            equal = [
+                prev.is_(None) if prev_value is None else prev == prev_value
+                for prev, prev_value in zip(self.columns[:i], values[:i])
+            ]
+            if value is None:
+                # Only NULLs follow a NULL (nulls sort last)
+                continue
+            beyond = column < value if self.descending else column > value
+            if column.nullable:
+                beyond = or_(beyond, column.is_(None))
+            conditions.append(and_(*equal, beyond))
+        return or_(*conditions)
+
+    def encode(self, values: Sequence) -> str:
+        """Opaque cursor for a key."""
+        payload = json.dumps({"k": self.name, "v": [_encode_value(v) for v in values]},
+                             separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode(self, cursor: str) -> Tuple:
+        """
+        Key from a cursor produced by `encode`.
+
+        Raises:
+            InvalidCursor: If the cursor is malformed or from another keyset
+        """
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            values = tuple(_decode_value(v) for v in payload["v"])
+            name = payload["k"]
+        except InvalidCursor:
+            raise
+        except Exception:
+            raise InvalidCursor("Malformed cursor")
+        if name != self.name or len(values) != len(self.columns):
+            raise InvalidCursor("Cursor does not belong to this listing")
+        return values
+
+
+@dataclass
+class Page:
+    """One page of results plus the cursor for the next page (None on the last page)."""
+    items: List[Any]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+
+
+class CountCache:
+    """Approximate totals: cached COUNT(*) per query, dropped on ORM writes."""
+
+    def __init__(self):
+        settings = get_settings()
+        self._cache = TTLCache(
+            maxsize=settings.pagination_count_cache_size,
+            ttl_seconds=settings.pagination_count_ttl_seconds,
+            name="counts",
+        )
+
+    def count(self, query: Query, model) -> int:
+        """
+        Total rows matched by `query`, from cache when possible.
+
+        Args:
+            query: Filtered query (ORDER BY is ignored)
+            model: The ORM model being counted; writes to it drop cached totals
+
+        Returns:
+            Row count, at most `pagination_count_ttl_seconds` stale
+        """
+        self._watch(model)
+        statement = query.order_by(None).statement
+        compiled = statement.compile()
+        key = (model.__tablename__, str(compiled), repr(sorted(compiled.params.items())))
+
+        total = self._cache.get(key)
+        if total is None:
+            total = query.order_by(None).count()
+            self._cache.set(key, total)
+        return total
+
+    def invalidate(self) -> None:
+        """Drop every cached total."""
+        self._cache.clear()
+
+    def get_stats(self) -> dict:
+        return self._cache.get_stats()
+
+    def _watch(self, model) -> None:
+        for event_name in ("after_insert", "after_update", "after_delete"):
+            if not event.contains(model, event_name, _on_write):
+                event.listen(model, event_name, _on_write)
+
+
+# Singleton instance for easy import
+count_cache = CountCache()
+
+
+def _on_write(mapper, connection, target):
+    count_cache.invalidate()
+
+
+def paginate(
+    query: Query,
+    keyset: Keyset,
+    limit: int,
+    cursor: Optional[str] = None,
+    with_total: bool = False,
+    offset: int = 0,
+) -> Page:
+    """
+    Fetch one page ordered by `keyset`, starting after `cursor`.
+
+    Args:
+        query: Filtered query without ORDER BY/LIMIT
+        keyset: Sort key for the listing
+        limit: Page size
+        cursor: Cursor from the previous page, or None for the first page
+        with_total: Also return the approximate total (see CountCache)
+        offset: Rows to skip; only for legacy page-number clients, which
+            should switch to the returned cursor
+
+    Returns:
+        Page (reads limit + 1 rows to know whether another page exists)
+
+    Raises:
+        InvalidCursor: If the cursor cannot be used with this keyset
+    """
+    after = keyset.decode(cursor) if cursor else None
+    total = count_cache.count(query, keyset.model) if with_total else None
+
+    if after is not None:
+        query = query.filter(keyset.after(after))
+    query = query.order_by(*keyset.order_by())
+    if offset:
+        query = query.offset(offset)
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = keyset.encode(keyset.values(rows[-1]))
+    return Page(items=rows, next_cursor=next_cursor, total=total)
+
+
+def set_page_headers(response: Response, page: Page) -> Response:
+    """Expose a page's cursor and total on a list response."""
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    if page.total is not None:
+        response.headers[TOTAL_COUNT_HEADER] = str(page.total)
+    return response
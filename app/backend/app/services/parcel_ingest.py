@@ -0,0 +1,404 @@
+"""
+Streaming bulk load of Calgary parcel/address files.
+
+The address files (`parcel-addresses-*.json`) are large JSON arrays. They
+used to be read whole with `json.load`, turned into ORM `Parcel` objects and
+saved 1,000 at a time. Here:
+
+- Records are parsed incrementally (`iter_json_records`): a buffered
+  `JSONDecoder.raw_decode` loop over a JSON array or GeoJSON
+  FeatureCollection, so memory stays flat regardless of file size
+- Each record becomes a plain tuple (`parse_parcel_record`)
+- Chunks of tuples go into the `parcel_ingest_staging` table - `COPY FROM
+  STDIN` on PostgreSQL, executemany elsewhere - and are merged into
+  `parcels` with one INSERT ... SELECT that skips addresses already loaded
+  and duplicates within the chunk
+- Staging, merge and the per-file progress row commit together, so an
+  interrupted load can continue where it stopped (`resume=True`)
+
+Rows written this way bypass ORM events; the address index, resolver and
+parcel locator pick them up through their periodic checks.
+"""
+import csv
+import io
+import json
+import logging
+import re
+import sys
+import time
+import uuid
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from sqlalchemy import Boolean, Column, DateTime, Integer, MetaData, Numeric, String, Table, text
+from sqlalchemy.orm import Session
+
+from ..models.codes import UUID
+from .address_normalizer import normalize_address
+
+logger = logging.getLogger(__name__)
+
+FEATURES_RE = re.compile(r'"features"\s*:\s*\[')
+WHITESPACE = " \t\n\r"
+
+# A decode error this close to the end of the buffer may just be a record
+# cut off by the chunk boundary (e.g. "tru" of true, "1e" of 1e5)
+TRUNCATION_MARGIN = 16
+
+# Parcel columns filled from the source files, in staging tuple order
+COLUMNS = (
+    "id", "address", "address_key", "street_name", "street_type", "street_direction",
+    "house_number", "unit_number", "quadrant", "land_use_designation", "zone_id",
+    "latitude", "longitude", "source_id",
+)
+
+ingest_metadata = MetaData()
+
+staging_table = Table(
+    "parcel_ingest_staging", ingest_metadata,
+    Column("seq", Integer, primary_key=True, autoincrement=False),  # Position in the chunk
+    Column("id", UUID(), nullable=False),
+    Column("address", String(255), nullable=False, index=True),
+    Column("address_key", String(255)),
+    Column("street_name", String(100)),
+    Column("street_type", String(20)),
+    Column("street_direction", String(5)),
+    Column("house_number", String(20)),
+    Column("unit_number", String(20)),
+    Column("quadrant", String(5)),
+    Column("land_use_designation", String(50)),
+    Column("zone_id", UUID()),
+    Column("latitude", Numeric),
+    Column("longitude", Numeric),
+    Column("source_id", String(50)),
+)
+
+progress_table = Table(
+    "parcel_ingest_progress", ingest_metadata,
+    Column("source", String(255), primary_key=True),  # File name
+    Column("records", Integer, nullable=False, default=0),  # Records consumed so far
+    Column("inserted", Integer, nullable=False, default=0),
+    Column("completed", Boolean, nullable=False, default=False),
+    Column("updated_at", DateTime, default=datetime.utcnow),
+)
+
+
+# --- Parsing ---
+
+def _skip(buffer: str, pos: int, chars: str) -> int:
+    while pos < len(buffer) and buffer[pos] in chars:
+        pos += 1
+    return pos
+
+
+def _feature_record(feature: dict) -> dict:
+    """Flatten a GeoJSON feature: its properties plus latitude/longitude from the geometry."""
+    record = dict(feature.get("properties") or {})
+    geometry = feature.get("geometry")
+    if geometry and (record.get("latitude") is None or record.get("longitude") is None):
+        if geometry.get("type") == "Point":
+            record["longitude"], record["latitude"] = geometry["coordinates"][:2]
+        else:
+            from shapely.geometry import shape
+
+            point = shape(geometry).representative_point()
+            record["longitude"], record["latitude"] = point.x, point.y
+    return record
+
+
+def iter_json_records(path: Path, chunk_size: int = 1 << 20) -> Iterator[dict]:
+    """
+    Records of a JSON array or GeoJSON FeatureCollection, read incrementally.
+
+    Args:
+        path: JSON file
+        chunk_size: Characters read at a time
+
+    Yields:
+        One dict per array element (features are flattened, see _feature_record)
+
+    Raises:
+        ValueError: If the file is not a JSON array or FeatureCollection, is
+            truncated, or holds a malformed record (with its character offset)
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buffer = f.read(chunk_size)
+        base = 0  # File offset (characters) of buffer[0]
+        pos = _skip(buffer, 0, WHITESPACE)
+        geojson = buffer[pos:pos + 1] == "{"
+        if geojson:
+            match = FEATURES_RE.search(buffer, pos)
+            while match is None:
+                more = f.read(chunk_size)
+                if not more:
+                    raise ValueError(f"{path.name}: no \"features\" array")
+                buffer += more
+                match = FEATURES_RE.search(buffer, pos)
+            pos = match.end()
+        elif buffer[pos:pos + 1] == "[":
+            pos += 1
+        else:
+            raise ValueError(f"{path.name}: expected a JSON array or FeatureCollection")
+
+        while True:
+            pos = _skip(buffer, pos, WHITESPACE + ",")
+            if pos >= len(buffer):
+                more = f.read(chunk_size)
+                if not more:
+                    raise ValueError(f"{path.name}: unexpected end of file")
+                buffer, base, pos = buffer[pos:] + more, base + pos, 0
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                # Only an error at the end of the buffer (or a string running
+                # into it) can be a record continuing past it; anything else is
+                # malformed and fails now rather than after buffering the file
+                truncated = e.pos >= len(buffer) - TRUNCATION_MARGIN or e.msg.startswith("Unterminated string")
+                more = f.read(chunk_size) if truncated else ""
+                if not more:
+                    raise ValueError(
+                        f"{path.name}: invalid JSON record at character {base + pos}: "
+                        f"{e.msg} (character {base + e.pos})"
+                    ) from e
+                buffer, base, pos = buffer[pos:] + more, base + pos, 0
+                continue
+            yield _feature_record(record) if geojson else record
+            pos = end
+            if pos >= chunk_size:
+                buffer, base, pos = buffer[pos:], base + pos, 0
+
+
+def _text(record: Dict[str, Any], key: str) -> Optional[str]:
+    value = record.get(key)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _decimal(value: Any) -> Optional[Decimal]:
+    if value is None or value == "":
+        return None
+    try:
+        return Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def parse_parcel_record(record: Dict[str, Any], zone_map: Optional[Dict[str, Any]] = None) -> Optional[tuple]:
+    """
+    Staging tuple (see COLUMNS) for one source record.
+
+    Args:
+        record: Address/parcel record from the open data files
+        zone_map: zone_code -> zone id, to set zone_id from land_use_designation
+
+    Returns:
+        Tuple, or None if the record has no address
+    """
+    address = _text(record, "address")
+    if not address:
+        return None
+
+    # Unit number from addresses like "#2402 111 TARAWOOD LN NE"
+    unit_number = None
+    if address.startswith("#"):
+        parts = address.split(" ", 1)
+        if len(parts) > 1:
+            unit_number = parts[0].replace("#", "")
+
+    land_use = _text(record, "land_use_designation")
+    quadrant = _text(record, "street_quad")
+    return (
+        uuid.uuid4(),
+        address,
+        normalize_address(address),
+        _text(record, "street_name"),
+        _text(record, "street_type"),
+        quadrant,
+        _text(record, "house_number"),
+        unit_number,
+        quadrant,
+        land_use,
+        zone_map.get(land_use) if zone_map and land_use else None,
+        _decimal(record.get("latitude")),
+        _decimal(record.get("longitude")),
+        _text(record, "source_id") or _text(record, ":@computed_region_4a3i_ccfj"),
+    )
+
+
+# --- Loading ---
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident memory of this process in MB (None where unsupported)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes on Linux
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _stage(db: Session, rows: Sequence[tuple]) -> None:
+    """Replace the staging table's contents with rows."""
+    db.execute(staging_table.delete())
+    if db.get_bind().dialect.name == "postgresql":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for seq, row in enumerate(rows):
+            writer.writerow((seq,) + tuple("" if v is None else v for v in row))
+        buffer.seek(0)
+        columns = ", ".join(("seq",) + COLUMNS)
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY parcel_ingest_staging ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+        finally:
+            cursor.close()
+    else:
+        db.execute(staging_table.insert(), [
+            dict(zip(("seq",) + COLUMNS, (seq,) + row)) for seq, row in enumerate(rows)
+        ])
+
+
+def _merge(db: Session, skip_existing: bool) -> int:
+    """Insert staged rows into parcels (first of each address; optionally only new addresses)."""
+    columns = ", ".join(COLUMNS)
+    selected = ", ".join(f"s.{column}" for column in COLUMNS)
+    existing = "AND NOT EXISTS (SELECT 1 FROM parcels p WHERE p.address = s.address)" if skip_existing else ""
+    result = db.execute(text(f"""
+        INSERT INTO parcels ({columns}, source_updated, created_at, updated_at)
+        SELECT {selected}, :now, :now, :now
+        FROM parcel_ingest_staging s
+        WHERE s.seq = (SELECT MIN(d.seq) FROM parcel_ingest_staging d WHERE d.address = s.address)
+        {existing}
+    """), {"now": datetime.utcnow()})
+    return result.rowcount
+
+
+def _progress(db: Session, source: str) -> Optional[Any]:
+    return db.execute(progress_table.select().where(progress_table.c.source == source)).first()
+
+
+def _save_progress(db: Session, source: str, records: int, inserted: int, completed: bool) -> None:
+    values = {"records": records, "inserted": inserted, "completed": completed, "updated_at": datetime.utcnow()}
+    if _progress(db, source) is None:
+        db.execute(progress_table.insert().values(source=source, **values))
+    else:
+        db.execute(progress_table.update().where(progress_table.c.source == source).values(**values))
+
+
+def _chunks(rows: Iterable[Optional[tuple]], size: int) -> Iterator[List[Optional[tuple]]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def ingest_parcel_file(
+    db: Session,
+    path: Path,
+    zone_map: Optional[Dict[str, Any]] = None,
+    chunk_size: int = 10000,
+    resume: bool = False,
+    skip_existing: bool = True,
+) -> Dict[str, float]:
+    """
+    Stream one parcel/address file into `parcels`.
+
+    Args:
+        db: Database session
+        path: JSON array or GeoJSON FeatureCollection of address records
+        zone_map: zone_code -> zone id, to set zone_id from land_use_designation
+        chunk_size: Records staged and merged per transaction
+        resume: Continue after the last committed chunk of an earlier run
+            (files completed earlier are skipped)
+        skip_existing: Do not insert addresses already in `parcels`
+
+    Returns:
+        Counts: records, invalid, inserted, skipped (existing or duplicate),
+        resumed_from, seconds, rows_per_sec, peak_rss_mb
+    """
+    ingest_metadata.create_all(bind=db.get_bind())
+    source = path.name
+    started = time.perf_counter()
+    stats = {"records": 0, "invalid": 0, "inserted": 0, "skipped": 0, "resumed_from": 0}
+
+    done = _progress(db, source) if resume else None
+    if done is not None and done.completed:
+        logger.info(f"{source}: already loaded ({done.records:,} records), skipping")
+        stats.update(seconds=0.0, rows_per_sec=0.0, peak_rss_mb=peak_rss_mb())
+        return stats
+    start_at = done.records if done is not None else 0
+    inserted_before = done.inserted if done is not None else 0
+    stats["resumed_from"] = start_at
+    if start_at:
+        logger.info(f"{source}: resuming after {start_at:,} records")
+
+    records = iter_json_records(path)
+    for _ in range(start_at):
+        next(records, None)
+
+    consumed = start_at
+    for chunk in _chunks((parse_parcel_record(r, zone_map) for r in records), chunk_size):
+        rows = [row for row in chunk if row is not None]
+        try:
+            inserted = 0
+            if rows:
+                _stage(db, rows)
+                inserted = _merge(db, skip_existing)
+            consumed += len(chunk)
+            _save_progress(db, source, consumed, inserted_before + stats["inserted"] + inserted, False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.error(f"{source}: load failed after {consumed:,} records; rerun with resume to continue")
+            raise
+        stats["records"] += len(chunk)
+        stats["invalid"] += len(chunk) - len(rows)
+        stats["inserted"] += inserted
+        stats["skipped"] += len(rows) - inserted
+        elapsed = time.perf_counter() - started
+        logger.info(f"  {source}: {consumed:,} records, {stats['records'] / elapsed:,.0f} rows/s")
+
+    _save_progress(db, source, consumed, inserted_before + stats["inserted"], True)
+    db.execute(staging_table.delete())
+    db.commit()
+
+    elapsed = time.perf_counter() - started
+    stats["seconds"] = round(elapsed, 2)
+    stats["rows_per_sec"] = round(stats["records"] / elapsed, 1) if elapsed > 0 else 0.0
+    stats["peak_rss_mb"] = peak_rss_mb()
+    logger.info(f"{source}: {stats}")
+    return stats
+
+
+def ingest_parcel_files(db: Session, paths: Sequence[Path], **kwargs) -> Dict[str, float]:
+    """
+    Stream several files (see ingest_parcel_file for arguments).
+
+    Returns:
+        Totals over all files, with overall rows_per_sec and peak_rss_mb
+    """
+    started = time.perf_counter()
+    totals = {"files": 0, "records": 0, "invalid": 0, "inserted": 0, "skipped": 0}
+    for path in paths:
+        stats = ingest_parcel_file(db, Path(path), **kwargs)
+        totals["files"] += 1
+        for key in ("records", "invalid", "inserted", "skipped"):
+            totals[key] += stats[key]
+    elapsed = time.perf_counter() - started
+    totals["seconds"] = round(elapsed, 2)
+    totals["rows_per_sec"] = round(totals["records"] / elapsed, 1) if elapsed > 0 else 0.0
+    totals["peak_rss_mb"] = peak_rss_mb()
+    return totals
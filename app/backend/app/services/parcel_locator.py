@@ -0,0 +1,387 @@
+"""
+Nearest-parcel lookup (reverse geocoding) without PostGIS.
+
+`Parcel.latitude/longitude` are plain Numeric columns, so "which parcel is
+at this map click?" would otherwise be a scan of every parcel. This module
+keeps the parcel coordinates in a uniform grid:
+
+- Coordinates are projected to metres around Calgary (equirectangular;
+  error well under 1% across the city), so distances are plain Euclidean
+- Points are sorted by grid cell (row-major) and cell i owns
+  points[offsets[i]:offsets[i + 1]]; a block of cells is one slice per row
+- A query scans the cells around the point, widening the block until the
+  k nearest points are closer than anything outside it
+
+The grid is persisted as .npy files and memory-mapped at startup (like the
+article vector index), and rebuilt when the parcels change - detected by a
+(count, latest updated_at) check at most every
+`parcel_grid_check_interval_seconds`, brought forward by Parcel ORM writes
+in this process. Rows written by bulk loaders carry updated_at like any
+other, so their changes are picked up too.
+
+Files written to each version of the grid directory (index_files.py):
+    xy.npy       float32 (N, 2) projected metres, grouped by cell
+    ids.npy      parcel UUID strings, same order as xy
+    offsets.npy  int64 (nx * ny + 1,)
+    meta.json    origin, cell size, grid shape, parcel fingerprint
+"""
+import json
+import logging
+import math
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..models.zones import Parcel
+from .index_files import current_version_dir, save_version
+
+logger = logging.getLogger(__name__)
+
+GRID_FORMAT_VERSION = 1
+
+# Projection origin: Calgary City Hall
+ORIGIN_LAT = 51.0447
+ORIGIN_LON = -114.0719
+METRES_PER_DEGREE = 6_371_008.8 * math.pi / 180
+METRES_PER_DEGREE_LON = METRES_PER_DEGREE * math.cos(math.radians(ORIGIN_LAT))
+
+
+def project(latitudes, longitudes) -> Tuple[np.ndarray, np.ndarray]:
+    """WGS84 degrees -> metres east/north of the origin."""
+    x = (np.asarray(longitudes, dtype=np.float64) - ORIGIN_LON) * METRES_PER_DEGREE_LON
+    y = (np.asarray(latitudes, dtype=np.float64) - ORIGIN_LAT) * METRES_PER_DEGREE
+    return x, y
+
+
+class ParcelGrid:
+    """Uniform grid over projected parcel coordinates."""
+
+    def __init__(self, xy: np.ndarray, ids: np.ndarray, offsets: np.ndarray, meta: dict):
+        self.xy = xy
+        self.ids = ids
+        self.offsets = offsets
+        self.meta = meta
+        self.cell_m = float(meta["cell_m"])
+        self.x_min = float(meta["x_min"])
+        self.y_min = float(meta["y_min"])
+        self.nx = int(meta["nx"])
+        self.ny = int(meta["ny"])
+
+    @property
+    def size(self) -> int:
+        return int(self.xy.shape[0])
+
+    @classmethod
+    def build(
+        cls,
+        ids: Sequence[str],
+        latitudes: Sequence[float],
+        longitudes: Sequence[float],
+        cell_m: float = 100.0,
+        fingerprint: Optional[list] = None,
+    ) -> "ParcelGrid":
+        """
+        Build a grid from parallel id / coordinate sequences.
+
+        Args:
+            ids: Parcel IDs
+            latitudes: WGS84 latitudes
+            longitudes: WGS84 longitudes
+            cell_m: Cell edge in metres
+            fingerprint: Parcel table fingerprint the grid was built from
+
+        Returns:
+            A new in-memory ParcelGrid
+        """
+        x, y = project(latitudes, longitudes)
+        id_array = np.asarray([str(i) for i in ids])
+        if len(x):
+            x_min, y_min = float(x.min()), float(y.min())
+            cx = ((x - x_min) // cell_m).astype(np.int64)
+            cy = ((y - y_min) // cell_m).astype(np.int64)
+            nx, ny = int(cx.max()) + 1, int(cy.max()) + 1
+        else:
+            x_min = y_min = 0.0
+            cx = cy = np.zeros(0, dtype=np.int64)
+            nx = ny = 1
+
+        cells = cy * nx + cx
+        order = np.argsort(cells, kind="stable")
+        offsets = np.zeros(nx * ny + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=nx * ny), out=offsets[1:])
+
+        meta = {
+            "format_version": GRID_FORMAT_VERSION,
+            "count": int(len(x)),
+            "cell_m": float(cell_m),
+            "x_min": x_min,
+            "y_min": y_min,
+            "nx": nx,
+            "ny": ny,
+            "fingerprint": fingerprint,
+            "built_at": datetime.utcnow().isoformat(),
+        }
+        xy = np.column_stack([x, y]).astype(np.float32)[order] if len(x) else np.zeros((0, 2), np.float32)
+        return cls(xy, id_array[order], offsets, meta)
+
+    def nearest(self, latitude: float, longitude: float, k: int = 1,
+                radius_m: Optional[float] = None) -> List[Tuple[str, float]]:
+        """
+        The k parcels nearest a point.
+
+        Args:
+            latitude: WGS84 latitude
+            longitude: WGS84 longitude
+            k: Number of parcels
+            radius_m: Ignore parcels farther than this
+
+        Returns:
+            List of (parcel_id, distance in metres), nearest first
+        """
+        if self.size == 0 or k <= 0:
+            return []
+        x, y = (float(v) for v in project(latitude, longitude))
+        cx = math.floor((x - self.x_min) / self.cell_m)
+        cy = math.floor((y - self.y_min) / self.cell_m)
+        limit = radius_m if radius_m is not None else math.inf
+
+        reach = 1
+        while True:
+            x0, x1 = max(cx - reach, 0), min(cx + reach, self.nx - 1)
+            y0, y1 = max(cy - reach, 0), min(cy + reach, self.ny - 1)
+            whole_grid = x0 == 0 and y0 == 0 and x1 == self.nx - 1 and y1 == self.ny - 1
+
+            rows, distances = self._scan(x, y, x0, x1, y0, y1)
+            # Every point within `covered` metres lies inside the scanned block
+            # (sides on the grid edge have nothing beyond them)
+            covered = min(
+                x - (self.x_min + x0 * self.cell_m) if x0 > 0 else math.inf,
+                self.x_min + (x1 + 1) * self.cell_m - x if x1 < self.nx - 1 else math.inf,
+                y - (self.y_min + y0 * self.cell_m) if y0 > 0 else math.inf,
+                self.y_min + (y1 + 1) * self.cell_m - y if y1 < self.ny - 1 else math.inf,
+            )
+            found = len(distances) >= k
+            if whole_grid or covered >= limit or (found and np.partition(distances, k - 1)[k - 1] <= covered):
+                break
+            reach *= 2
+
+        keep = distances <= limit
+        rows, distances = rows[keep], distances[keep]
+        top = np.argsort(distances, kind="stable")[:k]
+        return [(str(self.ids[rows[i]]), float(distances[i])) for i in top]
+
+    def _scan(self, x: float, y: float, x0: int, x1: int, y0: int, y1: int):
+        if x0 > x1 or y0 > y1:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        grid_rows = np.arange(y0, y1 + 1) * self.nx
+        starts = self.offsets[grid_rows + x0]
+        ends = self.offsets[grid_rows + x1 + 1]
+        spans = [np.arange(s, e) for s, e in zip(starts, ends) if e > s]
+        if not spans:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        rows = np.concatenate(spans)
+        points = self.xy[rows]
+        distances = np.hypot(points[:, 0] - x, points[:, 1] - y)
+        return rows, distances
+
+    def save(self, directory: Path) -> None:
+        """Persist the grid as a new version, made current with one rename (index_files.py)."""
+        def write(version_dir: Path) -> None:
+            for name, array in (("xy", self.xy), ("ids", self.ids), ("offsets", self.offsets)):
+                np.save(version_dir / f"{name}.npy", np.ascontiguousarray(array))
+            (version_dir / "meta.json").write_text(json.dumps(self.meta, indent=2))
+
+        save_version(directory, write)
+
+    @classmethod
+    def load(cls, directory: Path, mmap: bool = True) -> Optional["ParcelGrid"]:
+        """Load a persisted grid (memory-mapped), or None if none/incompatible."""
+        directory = current_version_dir(directory)
+        if directory is None or not (directory / "meta.json").exists():
+            return None
+        meta = json.loads((directory / "meta.json").read_text())
+        if meta.get("format_version") != GRID_FORMAT_VERSION:
+            logger.warning(f"Ignoring parcel grid at {directory}: unsupported format {meta.get('format_version')}")
+            return None
+        mode = "r" if mmap else None
+        return cls(
+            xy=np.load(directory / "xy.npy", mmap_mode=mode),
+            ids=np.load(directory / "ids.npy", mmap_mode=mode),
+            offsets=np.load(directory / "offsets.npy"),
+            meta=meta,
+        )
+
+
+def get_grid_dir() -> Path:
+    """Directory holding the persisted parcel grid."""
+    settings = get_settings()
+    if settings.parcel_grid_dir:
+        return Path(settings.parcel_grid_dir)
+    return Path(settings.data_dir) / "indexes" / "parcels"
+
+
+def parcel_fingerprint(db: Session) -> list:
+    """Count and latest update of parcels with coordinates (one aggregate query)."""
+    count, latest = db.query(func.count(Parcel.id), func.max(Parcel.updated_at)).filter(
+        Parcel.latitude.isnot(None), Parcel.longitude.isnot(None)
+    ).one()
+    return [count, latest.isoformat() if latest else None]
+
+
+class ParcelLocator:
+    """Process-wide parcel grid, kept in step with the parcels table."""
+
+    def __init__(self):
+        settings = get_settings()
+        self.cell_m = settings.parcel_grid_cell_m
+        self.check_interval = settings.parcel_grid_check_interval_seconds
+        self._grid: Optional[ParcelGrid] = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.queries = 0
+        self.query_seconds = 0.0
+
+    def build(self, db: Session, save: bool = True) -> ParcelGrid:
+        """
+        (Re)build the grid from the parcels table.
+
+        Args:
+            db: Database session
+            save: Persist the grid to `get_grid_dir()` (empty grids are not saved)
+
+        Returns:
+            The new ParcelGrid
+        """
+        # Queried, built and saved without the lock: under AsyncSession.run_sync a
+        # query yields to the event loop, and a request waiting on a held thread
+        # lock would block the loop thread. Concurrent builds write separate
+        # versions (index_files.save_version); the lock covers only the swap.
+        started = time.perf_counter()
+        fingerprint = parcel_fingerprint(db)
+        rows = db.query(Parcel.id, Parcel.latitude, Parcel.longitude).filter(
+            Parcel.latitude.isnot(None), Parcel.longitude.isnot(None)
+        ).all()
+        grid = ParcelGrid.build(
+            ids=[r.id for r in rows],
+            latitudes=[float(r.latitude) for r in rows],
+            longitudes=[float(r.longitude) for r in rows],
+            cell_m=self.cell_m,
+            fingerprint=fingerprint,
+        )
+        if save and grid.size:
+            try:
+                grid.save(get_grid_dir())
+                grid = ParcelGrid.load(get_grid_dir()) or grid
+            except OSError as e:
+                logger.warning(f"Could not save parcel grid to {get_grid_dir()}: {e}")
+        with self._lock:
+            self._grid = grid
+            self._last_check = time.monotonic()
+            self.builds += 1
+        logger.info(f"Parcel grid built: {grid.size} parcels in {time.perf_counter() - started:.2f}s")
+        return grid
+
+    def load(self, db: Session) -> ParcelGrid:
+        """Use the persisted grid if it matches the parcels table, else rebuild."""
+        grid = None
+        try:
+            grid = ParcelGrid.load(get_grid_dir())
+        except Exception as e:
+            logger.warning(f"Could not load parcel grid from {get_grid_dir()}: {e}")
+        if grid is not None and grid.meta.get("fingerprint") == parcel_fingerprint(db):
+            with self._lock:
+                self._grid = grid
+                self._last_check = time.monotonic()
+            logger.info(f"Loaded parcel grid: {grid.size} parcels (memory-mapped)")
+            return grid
+        return self.build(db)
+
+    def ensure_current(self, db: Session) -> ParcelGrid:
+        """Load on first use; rebuild when the parcels changed (checked at most every check interval)."""
+        grid = self._grid
+        if grid is None:
+            return self.load(db)
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return grid
+        self._last_check = now
+        if grid.meta.get("fingerprint") != parcel_fingerprint(db):
+            return self.build(db)
+        return grid
+
+    def nearest(self, db: Session, latitude: float, longitude: float, k: int = 1,
+                radius_m: Optional[float] = None) -> List[Tuple[str, float]]:
+        """
+        The k parcels nearest a point (see ParcelGrid.nearest).
+
+        Args:
+            db: Database session (used only to load/refresh the grid)
+            latitude: WGS84 latitude
+            longitude: WGS84 longitude
+            k: Number of parcels
+            radius_m: Ignore parcels farther than this
+
+        Returns:
+            List of (parcel_id, distance in metres), nearest first
+        """
+        grid = self.ensure_current(db)
+        started = time.perf_counter()
+        results = grid.nearest(latitude, longitude, k, radius_m)
+        self.queries += 1
+        self.query_seconds += time.perf_counter() - started
+        return results
+
+    def mark_stale(self) -> None:
+        """Re-check the parcels table on next use."""
+        self._last_check = 0.0
+
+    def invalidate(self) -> None:
+        """Drop the grid; the next query loads or rebuilds it."""
+        with self._lock:
+            self._grid = None
+
+    def get_stats(self) -> dict:
+        grid = self._grid
+        return {
+            "loaded": grid is not None,
+            "parcels": grid.size if grid is not None else 0,
+            "grid": [grid.nx, grid.ny] if grid is not None else None,
+            "cell_m": self.cell_m,
+            "builds": self.builds,
+            "queries": self.queries,
+            "avg_query_ms": round(1000 * self.query_seconds / self.queries, 3) if self.queries else 0.0,
+        }
+
+
+# Singleton instance for easy import
+parcel_locator = ParcelLocator()
+
+
+def _on_parcel_change(mapper, connection, target):
+    parcel_locator.mark_stale()
+
+
+def _on_schema_change(target, connection, **kw):
+    parcel_locator.invalidate()
+
+
+def register_locator_listeners() -> None:
+    """Re-check the grid after Parcel writes, and drop it when the table is (re)created, in this process."""
+    for event_name in ("after_insert", "after_update", "after_delete"):
+        if not event.contains(Parcel, event_name, _on_parcel_change):
+            event.listen(Parcel, event_name, _on_parcel_change)
+    table = Parcel.__table__
+    for event_name in ("after_create", "after_drop"):
+        if not event.contains(table, event_name, _on_schema_change):
+            event.listen(table, event_name, _on_schema_change)
+
+
+register_locator_listeners()
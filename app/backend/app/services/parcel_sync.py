@@ -0,0 +1,394 @@
+"""
+Delta sync of Open Calgary parcel/address dumps.
+
+A full reload (`load_addresses.py --force`) deletes and re-inserts every
+parcel, and every in-memory layer then rebuilds from scratch. Delta sync
+applies only what changed between two dumps:
+
+- Each incoming record is parsed as for bulk loads (parcel_ingest), keyed
+  by its source id or, lacking one, its normalized address, and hashed
+- Hashes from the previous sync (`ParcelSyncState`) are held in memory; a
+  record is an insert (new key), an update (hash differs) or unchanged
+- Keys synced before but absent from this dump are deleted - unless a
+  project or permit still references the parcel
+- Every insert, update and delete is journaled in `ParcelChange`
+
+Parcels loaded before delta sync existed are adopted on the first run by
+normalized address, so the first sync does not duplicate them.
+
+Changed parcels are pushed to the address index, address resolver and
+parcel locator in this process (`notify_parcel_changes`); API processes
+pick up changes made elsewhere from the journal (`parcel_change_feed`,
+polled by the address index), so a refresh costs time proportional to
+churn rather than city size.
+"""
+import hashlib
+import json
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import bindparam, func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..database import Base
+from ..models.zones import Parcel, ParcelChange, ParcelSyncState
+from .parcel_ingest import COLUMNS, iter_json_records, parse_parcel_record, peak_rss_mb
+
+logger = logging.getLogger(__name__)
+
+DELETE_CHUNK = 500
+
+
+def _hash_value(value):
+    if value is None:
+        return None
+    if isinstance(value, (float, Decimal)):
+        return repr(float(value))
+    return str(value)
+
+
+def row_hash(row: Sequence) -> str:
+    """Content hash of a staging tuple (see parcel_ingest.COLUMNS), ignoring its id."""
+    payload = json.dumps([_hash_value(value) for value in row[1:]])
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def sync_key(record: dict, row: Sequence) -> str:
+    """Identity of a record across dumps: its source id, else its normalized address."""
+    source_id = record.get("source_id")
+    if source_id is not None and str(source_id).strip():
+        return f"id:{str(source_id).strip()}"
+    return f"addr:{row[COLUMNS.index('address_key')]}"
+
+
+def _parcel_tuple(parcel) -> tuple:
+    """Staging-tuple form of a stored parcel row, for hashing."""
+    return tuple(getattr(parcel, column) for column in COLUMNS)
+
+
+def _referencing_columns():
+    """Foreign-key columns that point at parcels.id (projects, permits, ...)."""
+    parcel_id = Parcel.__table__.c.id
+    return [
+        fk.parent
+        for table in Base.metadata.tables.values()
+        for fk in table.foreign_keys
+        if fk.column is parcel_id
+    ]
+
+
+class _Batch:
+    """Pending writes, applied in one transaction."""
+
+    def __init__(self):
+        self.inserts: List[Tuple[str, tuple, str]] = []  # (key, row, hash)
+        self.updates: List[Tuple[str, object, tuple, str, bool]] = []  # (key, parcel_id, row, hash, new_state)
+        self.adopted: List[Tuple[str, object, str]] = []  # Unchanged adopted parcels: (key, parcel_id, hash)
+
+    def __len__(self) -> int:
+        return len(self.inserts) + len(self.updates) + len(self.adopted)
+
+
+class ParcelSync:
+    """One delta sync run."""
+
+    def __init__(self, db: Session, zone_map: Optional[Dict] = None, batch_size: int = 1000):
+        self.db = db
+        self.zone_map = zone_map
+        self.batch_size = batch_size
+        self.sync_id = str(uuid.uuid4())
+        self.stats = {
+            "records": 0, "invalid": 0, "duplicates": 0, "inserted": 0, "updated": 0,
+            "unchanged": 0, "adopted": 0, "deleted": 0, "kept_referenced": 0,
+        }
+        self.upserted: List = []
+        self.deleted: List = []
+
+    def _load_state(self) -> Dict[str, Tuple[object, str]]:
+        return {
+            key: (parcel_id, row_hash_)
+            for key, parcel_id, row_hash_ in self.db.query(
+                ParcelSyncState.sync_key, ParcelSyncState.parcel_id, ParcelSyncState.row_hash
+            )
+        }
+
+    def _adoption_candidates(self, state: Dict[str, Tuple[object, str]]) -> Dict[str, object]:
+        """Parcels without sync state (loaded before delta sync), by address_key."""
+        parcel_count = self.db.query(func.count(Parcel.id)).scalar()
+        if parcel_count <= len(state):
+            return {}
+        claimed = {parcel_id for parcel_id, _ in state.values()}
+        candidates = {}
+        for parcel in self.db.query(*(getattr(Parcel, c) for c in COLUMNS)).order_by(Parcel.id):
+            if parcel.id not in claimed and parcel.address_key and parcel.address_key not in candidates:
+                candidates[parcel.address_key] = parcel
+        logger.info(f"Delta sync: {len(candidates):,} parcels without sync state can be adopted")
+        return candidates
+
+    def run(self, paths: Sequence[Path], delete_missing: bool = True) -> Dict[str, object]:
+        started = time.perf_counter()
+        state = self._load_state()
+        adoptable = self._adoption_candidates(state)
+        seen: Set[str] = set()
+        batch = _Batch()
+
+        for path in paths:
+            logger.info(f"Delta sync: reading {Path(path).name}")
+            for record in iter_json_records(Path(path)):
+                self.stats["records"] += 1
+                row = parse_parcel_record(record, self.zone_map)
+                if row is None:
+                    self.stats["invalid"] += 1
+                    continue
+                key = sync_key(record, row)
+                if key in seen:
+                    self.stats["duplicates"] += 1
+                    continue
+                seen.add(key)
+                digest = row_hash(row)
+
+                current = state.get(key)
+                if current is not None:
+                    if current[1] == digest:
+                        self.stats["unchanged"] += 1
+                    else:
+                        batch.updates.append((key, current[0], row, digest, False))
+                else:
+                    parcel = adoptable.pop(row[COLUMNS.index("address_key")], None)
+                    if parcel is None:
+                        batch.inserts.append((key, row, digest))
+                    elif row_hash(_parcel_tuple(parcel)) == digest:
+                        batch.adopted.append((key, parcel.id, digest))
+                    else:
+                        batch.updates.append((key, parcel.id, row, digest, True))
+
+                if len(batch) >= self.batch_size:
+                    self._apply(batch)
+                    batch = _Batch()
+        self._apply(batch)
+
+        if delete_missing and seen:
+            self._delete([(key, parcel_id) for key, (parcel_id, _) in state.items() if key not in seen])
+        elif delete_missing:
+            logger.warning("Delta sync: no records read - skipping deletes")
+
+        _prune_journal(self.db)
+        self.db.commit()
+        notify_parcel_changes(self.db, self.upserted, self.deleted)
+        parcel_change_feed.mark_seen(self.db)
+
+        elapsed = time.perf_counter() - started
+        self.stats.update(
+            sync_id=self.sync_id,
+            seconds=round(elapsed, 2),
+            rows_per_sec=round(self.stats["records"] / elapsed, 1) if elapsed > 0 else 0.0,
+            peak_rss_mb=peak_rss_mb(),
+        )
+        logger.info(f"Delta sync: {self.stats}")
+        return self.stats
+
+    def _journal(self, change: str, entries: Iterable[Tuple[str, object]], now: datetime) -> None:
+        rows = [
+            {"sync_id": self.sync_id, "change": change, "sync_key": key, "parcel_id": parcel_id, "changed_at": now}
+            for key, parcel_id in entries
+        ]
+        if rows:
+            self.db.execute(ParcelChange.__table__.insert(), rows)
+
+    def _apply(self, batch: _Batch) -> None:
+        if not len(batch):
+            return
+        db = self.db
+        now = datetime.utcnow()
+        parcels = Parcel.__table__
+        states = ParcelSyncState.__table__
+
+        if batch.inserts:
+            db.execute(parcels.insert(), [
+                dict(zip(COLUMNS, row), source_updated=now, created_at=now, updated_at=now)
+                for _, row, _ in batch.inserts
+            ])
+            db.execute(states.insert(), [
+                {"sync_key": key, "parcel_id": row[0], "row_hash": digest, "synced_at": now}
+                for key, row, digest in batch.inserts
+            ])
+            self._journal("insert", [(key, row[0]) for key, row, _ in batch.inserts], now)
+            self.upserted.extend(row[0] for _, row, _ in batch.inserts)
+
+        if batch.updates:
+            db.execute(
+                parcels.update().where(parcels.c.id == bindparam("_parcel_id")),
+                [
+                    dict(zip(COLUMNS[1:], row[1:]), _parcel_id=parcel_id, source_updated=now, updated_at=now)
+                    for _, parcel_id, row, _, _ in batch.updates
+                ],
+            )
+            existing = [u for u in batch.updates if not u[4]]
+            if existing:
+                db.execute(
+                    states.update().where(states.c.sync_key == bindparam("_key")),
+                    [{"_key": key, "row_hash": digest, "synced_at": now} for key, _, _, digest, _ in existing],
+                )
+            self._journal("update", [(key, parcel_id) for key, parcel_id, _, _, _ in batch.updates], now)
+            self.upserted.extend(parcel_id for _, parcel_id, _, _, _ in batch.updates)
+
+        new_states = [(key, parcel_id, digest) for key, parcel_id, _, digest, new in batch.updates if new]
+        new_states += batch.adopted
+        if new_states:
+            db.execute(states.insert(), [
+                {"sync_key": key, "parcel_id": parcel_id, "row_hash": digest, "synced_at": now}
+                for key, parcel_id, digest in new_states
+            ])
+
+        db.commit()
+        self.stats["inserted"] += len(batch.inserts)
+        self.stats["updated"] += len(batch.updates)
+        self.stats["adopted"] += len(batch.adopted) + sum(1 for u in batch.updates if u[4])
+
+    def _delete(self, missing: List[Tuple[str, object]]) -> None:
+        """Delete parcels whose keys left the dump, except those still referenced."""
+        db = self.db
+        references = _referencing_columns()
+        for start in range(0, len(missing), DELETE_CHUNK):
+            chunk = missing[start:start + DELETE_CHUNK]
+            ids = [parcel_id for _, parcel_id in chunk]
+            referenced = set()
+            for column in references:
+                referenced.update(db.execute(select(column).where(column.in_(ids)).distinct()).scalars())
+            gone = [(key, parcel_id) for key, parcel_id in chunk if parcel_id not in referenced]
+            self.stats["kept_referenced"] += len(chunk) - len(gone)
+            if not gone:
+                continue
+            now = datetime.utcnow()
+            db.execute(Parcel.__table__.delete().where(Parcel.__table__.c.id.in_([p for _, p in gone])))
+            db.execute(ParcelSyncState.__table__.delete().where(
+                ParcelSyncState.__table__.c.sync_key.in_([k for k, _ in gone])
+            ))
+            self._journal("delete", gone, now)
+            db.commit()
+            self.stats["deleted"] += len(gone)
+            self.deleted.extend(parcel_id for _, parcel_id in gone)
+
+
+def sync_parcel_files(
+    db: Session,
+    paths: Sequence[Path],
+    zone_map: Optional[Dict] = None,
+    delete_missing: bool = True,
+    batch_size: int = 1000,
+) -> Dict[str, object]:
+    """
+    Apply the differences between a parcel dump and the database.
+
+    Args:
+        db: Database session
+        paths: Every file of the dump (JSON arrays or GeoJSON)
+        zone_map: zone_code -> zone id, to set zone_id from land_use_designation
+        delete_missing: Delete synced parcels absent from the dump; pass
+            False when syncing only part of a dump
+        batch_size: Changes written per transaction
+
+    Returns:
+        Counts: records, invalid, duplicates, inserted, updated, unchanged,
+        adopted, deleted, kept_referenced; plus sync_id, seconds,
+        rows_per_sec, peak_rss_mb
+    """
+    return ParcelSync(db, zone_map, batch_size).run(paths, delete_missing=delete_missing)
+
+
+def _prune_journal(db: Session) -> None:
+    days = get_settings().parcel_change_retention_days
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    db.execute(ParcelChange.__table__.delete().where(ParcelChange.__table__.c.changed_at < cutoff))
+
+
+# --- Notifying the in-memory layers ---
+
+def notify_parcel_changes(db: Session, upserted: Sequence, deleted: Sequence) -> None:
+    """
+    Push changed parcels to the address index, resolver and locator of this process.
+
+    Args:
+        db: Database session
+        upserted: Ids of inserted or updated parcels
+        deleted: Ids of deleted parcels
+    """
+    if not upserted and not deleted:
+        return
+    from .address_index import address_index
+    from .address_resolver import address_resolver
+    from .parcel_locator import parcel_locator
+
+    address_index.apply_changes(db, upserted, deleted)
+    address_resolver.invalidate()
+    parcel_locator.mark_stale()
+
+
+class ParcelChangeFeed:
+    """Reads the change journal written by delta syncs in other processes."""
+
+    def __init__(self):
+        self._last_id: Optional[int] = None
+        self.polls = 0
+        self.applied = 0
+        self.disabled = False
+
+    def _latest_id(self, db: Session) -> int:
+        return db.query(func.max(ParcelChange.id)).scalar() or 0
+
+    def mark_seen(self, db: Session) -> None:
+        """Skip journal entries up to now (changes this process already applied)."""
+        if self._last_id is not None:
+            self._last_id = self._latest_id(db)
+
+    def poll(self, db: Session) -> int:
+        """
+        Apply journal entries newer than the last poll.
+
+        The first poll only records the current position: whatever calls it
+        has just loaded current data.
+
+        Returns:
+            Number of parcels applied
+        """
+        if self.disabled:
+            return 0
+        try:
+            if self._last_id is None:
+                self._last_id = self._latest_id(db)
+                return 0
+            rows = db.query(ParcelChange.id, ParcelChange.change, ParcelChange.parcel_id).filter(
+                ParcelChange.id > self._last_id
+            ).order_by(ParcelChange.id).all()
+        except SQLAlchemyError as e:
+            db.rollback()
+            self.disabled = True
+            logger.warning(f"Parcel change journal unavailable, not polling it: {e}")
+            return 0
+
+        self.polls += 1
+        if not rows:
+            return 0
+        self._last_id = rows[-1].id
+        latest = {}
+        for row in rows:  # Last change per parcel wins
+            latest[row.parcel_id] = row.change
+        deleted = [parcel_id for parcel_id, change in latest.items() if change == "delete"]
+        upserted = [parcel_id for parcel_id, change in latest.items() if change != "delete"]
+        notify_parcel_changes(db, upserted, deleted)
+        self.applied += len(latest)
+        return len(latest)
+
+    def get_stats(self) -> dict:
+        return {"last_id": self._last_id, "polls": self.polls, "applied": self.applied, "disabled": self.disabled}
+
+
+# Singleton instance for easy import
+parcel_change_feed = ParcelChangeFeed()
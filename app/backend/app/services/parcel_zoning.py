@@ -0,0 +1,162 @@
+"""
+Set-based parcel re-zoning from the property assessment address->zone mapping.
+
+The nightly refresh used to page through every parcel with OFFSET/LIMIT
+(each page slower than the last), look each address up in a dict and
+update ORM objects one at a time. Here the database does the join:
+
+1. The mapping is normalized once in Python - addresses with
+   `normalize_address` (matching the indexed `Parcel.address_key`), zone
+   codes cleaned and resolved to zone ids - and bulk-inserted into a
+   staging table (a regular table, dropped afterwards: session commits
+   may switch connections, which would lose a TEMPORARY one)
+2. PostgreSQL: one `UPDATE parcels ... FROM` join touching only rows whose
+   zone changes. SQLite: the equivalent correlated UPDATE, run over
+   primary-key ranges of `batch_size` parcels with a commit per range
+3. Match counts come from one aggregate query over the same join
+"""
+import logging
+import time
+from datetime import datetime
+from typing import Dict
+
+from sqlalchemy import Column, MetaData, String, Table, text
+from sqlalchemy.orm import Session
+
+from ..models.codes import UUID
+from ..models.zones import Zone
+from .address_normalizer import normalize_address
+from .address_resolver import ensure_address_keys
+from .zone_index import clean_zone_code
+
+logger = logging.getLogger(__name__)
+
+_metadata = MetaData()
+
+zone_map_table = Table(
+    "parcel_zone_map_staging", _metadata,
+    Column("address_key", String(255), primary_key=True),
+    Column("land_use_designation", String(50), nullable=False),
+    Column("zone_id", UUID()),  # NULL when the code is not in the zones table
+)
+
+
+def _load_mapping(db: Session, mapping: Dict[str, str]) -> Dict[str, int]:
+    """Normalize the mapping and fill the staging table; returns counts."""
+    zone_ids = {code: zone_id for zone_id, code in db.query(Zone.id, Zone.zone_code).all()}
+    rows: Dict[str, dict] = {}
+    for address, code in mapping.items():
+        key = normalize_address(address)
+        code = (code or "").strip()
+        if not key or not code or key in rows:
+            continue
+        rows[key] = {
+            "address_key": key,
+            "land_use_designation": code,
+            "zone_id": zone_ids.get(clean_zone_code(code)) or zone_ids.get(code),
+        }
+
+    connection = db.connection()
+    zone_map_table.drop(bind=connection, checkfirst=True)
+    zone_map_table.create(bind=connection)
+    if rows:
+        db.execute(zone_map_table.insert(), list(rows.values()))
+    db.commit()
+    return {
+        "mapping_rows": len(mapping),
+        "mapping_keys": len(rows),
+        "unknown_zone_codes": sum(1 for row in rows.values() if row["zone_id"] is None),
+    }
+
+
+def _update_postgresql(db: Session, now: datetime) -> int:
+    result = db.execute(text("""
+        UPDATE parcels p
+        SET zone_id = m.zone_id, land_use_designation = m.land_use_designation, updated_at = :now
+        FROM parcel_zone_map_staging m
+        WHERE p.address_key = m.address_key AND m.zone_id IS NOT NULL
+          AND (p.zone_id IS DISTINCT FROM m.zone_id
+               OR p.land_use_designation IS DISTINCT FROM m.land_use_designation)
+    """), {"now": now})
+    db.commit()
+    return result.rowcount
+
+
+def _update_in_ranges(db: Session, now: datetime, batch_size: int) -> int:
+    """Correlated UPDATE over primary-key ranges (SQLite and others without UPDATE ... FROM)."""
+    mapped = "SELECT m.{column} FROM parcel_zone_map_staging m WHERE m.address_key = parcels.address_key"
+    statement = text(f"""
+        UPDATE parcels
+        SET zone_id = ({mapped.format(column="zone_id")}),
+            land_use_designation = ({mapped.format(column="land_use_designation")}),
+            updated_at = :now
+        WHERE id > :low AND id <= :high
+          AND EXISTS (SELECT 1 FROM parcel_zone_map_staging m
+                      WHERE m.address_key = parcels.address_key AND m.zone_id IS NOT NULL)
+          AND (zone_id IS NOT ({mapped.format(column="zone_id")})
+               OR land_use_designation IS NOT ({mapped.format(column="land_use_designation")}))
+    """)
+    boundary = text("SELECT id FROM parcels WHERE id > :low ORDER BY id LIMIT 1 OFFSET :skip")
+    last = text("SELECT MAX(id) FROM parcels")
+
+    updated = 0
+    low = ""
+    end = db.execute(last).scalar()
+    while end is not None and low < end:
+        high = db.execute(boundary, {"low": low, "skip": batch_size - 1}).scalar() or end
+        updated += db.execute(statement, {"now": now, "low": low, "high": high}).rowcount
+        db.commit()
+        low = high
+    return updated
+
+
+def rezone_parcels_by_address(db: Session, mapping: Dict[str, str], batch_size: int = 5000) -> Dict[str, float]:
+    """
+    Set each parcel's zone from an address -> land-use designation mapping.
+
+    Parcels whose normalized address is in the mapping get the mapped
+    designation and its zone; parcels that already have both are left
+    alone, as are parcels whose mapped code is not in the zones table.
+
+    Args:
+        db: Database session
+        mapping: Address (any spelling) -> land-use designation, e.g. "R-C1"
+        batch_size: Parcels per primary-key range on databases without
+            UPDATE ... FROM
+
+    Returns:
+        Counts and timings: mapping_rows, mapping_keys, unknown_zone_codes,
+        parcels, matched, updated, unchanged, no_match, zone_not_found,
+        load_seconds, update_seconds, seconds
+    """
+    started = time.perf_counter()
+    ensure_address_keys(db)
+    stats: Dict[str, float] = dict(_load_mapping(db, mapping))
+    loaded = time.perf_counter()
+
+    counts = db.execute(text("""
+        SELECT
+            (SELECT COUNT(*) FROM parcels),
+            COUNT(*),
+            SUM(CASE WHEN m.zone_id IS NULL THEN 1 ELSE 0 END)
+        FROM parcels p JOIN parcel_zone_map_staging m ON p.address_key = m.address_key
+    """)).one()
+    stats["parcels"], stats["matched"], stats["zone_not_found"] = counts[0], counts[1], counts[2] or 0
+
+    now = datetime.utcnow()
+    if db.get_bind().dialect.name == "postgresql":
+        stats["updated"] = _update_postgresql(db, now)
+    else:
+        stats["updated"] = _update_in_ranges(db, now, batch_size)
+
+    stats["unchanged"] = stats["matched"] - stats["zone_not_found"] - stats["updated"]
+    stats["no_match"] = stats["parcels"] - stats["matched"]
+    zone_map_table.drop(bind=db.connection(), checkfirst=True)
+    db.commit()
+
+    finished = time.perf_counter()
+    stats["load_seconds"] = round(loaded - started, 2)
+    stats["update_seconds"] = round(finished - loaded, 2)
+    stats["seconds"] = round(finished - started, 2)
+    logger.info(f"Address re-zoning: {stats}")
+    return stats
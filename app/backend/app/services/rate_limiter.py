@@ -0,0 +1,370 @@
+"""
+Daily per-IP quota for the public API, counted in memory.
+
+`check_rate_limit` used to SELECT, maybe INSERT, UPDATE and COMMIT the
+`rate_limits` row of the client IP on every public request - a write
+transaction on the critical path, racing on the unique (ip, date) index
+under concurrent first requests. Here:
+
+- Counts live in a counter store keyed by client IP: `MemoryCounterStore`
+  (per process, dict shards each behind its own lock) or
+  `SQLiteCounterStore` (one WAL-mode SQLite file shared by the workers on
+  a host; one atomic upsert per request). With the memory store each
+  worker counts on its own, so N workers allow up to N times the quota;
+  multi-worker deployments should set `rate_limit_backend="sqlite"`
+- The store is seeded from today's `rate_limits` rows on the first request
+  of the day, so quotas survive restarts
+- Increments are queued and written to `rate_limits` in one batched upsert
+  every `rate_limit_flush_interval_seconds` by a background thread (and on
+  shutdown); a crash loses at most one interval of counts
+
+The quota window is the calendar day, as before.
+"""
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..models.rate_limits import RateLimit
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryCounterStore:
+    """Per-process counters for the current day, sharded by IP to spread lock contention."""
+
+    def __init__(self, shards: int = 16):
+        self._shards = [(threading.Lock(), {}) for _ in range(max(1, shards))]
+        self._day: Optional[date] = None
+        self._day_lock = threading.Lock()
+
+    def _shard(self, day: date, ip: str) -> Tuple[threading.Lock, Dict[str, int]]:
+        if day != self._day:
+            with self._day_lock:
+                if day != self._day:  # New day: yesterday's counts no longer matter
+                    for lock, counts in self._shards:
+                        with lock:
+                            counts.clear()
+                    self._day = day
+        return self._shards[hash(ip) % len(self._shards)]
+
+    def increment(self, day: date, ip: str, limit: int) -> Optional[int]:
+        """Count one request; the new count, or None if the IP is already at the limit."""
+        lock, counts = self._shard(day, ip)
+        with lock:
+            count = counts.get(ip, 0)
+            if count >= limit:
+                return None
+            counts[ip] = count + 1
+            return count + 1
+
+    def get(self, day: date, ip: str) -> int:
+        if day != self._day:
+            return 0
+        lock, counts = self._shard(day, ip)
+        with lock:
+            return counts.get(ip, 0)
+
+    def seed(self, day: date, counts: Dict[str, int]) -> None:
+        """Raise counts to at least the given (persisted) values."""
+        for ip, count in counts.items():
+            lock, shard = self._shard(day, ip)
+            with lock:
+                shard[ip] = max(shard.get(ip, 0), count)
+
+    def clear(self) -> None:
+        for lock, counts in self._shards:
+            with lock:
+                counts.clear()
+        self._day = None
+
+
+class SQLiteCounterStore:
+    """
+    Counters in a WAL-mode SQLite file, shared by every worker process on a host.
+
+    Each increment is a single conditional upsert; a connection is kept per thread.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS counters ("
+            "day TEXT NOT NULL, ip TEXT NOT NULL, count INTEGER NOT NULL, PRIMARY KEY (day, ip))"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def increment(self, day: date, ip: str, limit: int) -> Optional[int]:
+        row = self._connection().execute(
+            "INSERT INTO counters (day, ip, count) VALUES (?, ?, 1) "
+            "ON CONFLICT (day, ip) DO UPDATE SET count = count + 1 WHERE count < ? "
+            "RETURNING count",
+            (day.isoformat(), ip, limit),
+        ).fetchone()
+        return row[0] if row else None
+
+    def get(self, day: date, ip: str) -> int:
+        row = self._connection().execute(
+            "SELECT count FROM counters WHERE day = ? AND ip = ?", (day.isoformat(), ip)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def seed(self, day: date, counts: Dict[str, int]) -> None:
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute("DELETE FROM counters WHERE day < ?", (day.isoformat(),))
+            connection.executemany(
+                "INSERT INTO counters (day, ip, count) VALUES (?, ?, ?) "
+                "ON CONFLICT (day, ip) DO UPDATE SET count = max(count, excluded.count)",
+                [(day.isoformat(), ip, count) for ip, count in counts.items()],
+            )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM counters")
+
+
+def _default_store():
+    settings = get_settings()
+    if settings.rate_limit_backend == "sqlite":
+        path = settings.rate_limit_shared_path or Path(settings.data_dir) / "rate_limits.sqlite3"
+        return SQLiteCounterStore(Path(path))
+    if settings.rate_limit_backend != "memory":
+        logger.warning(f"Unknown rate_limit_backend '{settings.rate_limit_backend}' - counting in memory")
+    return MemoryCounterStore(settings.rate_limit_shards)
+
+
+class RateLimiter:
+    """Daily request quota per client IP, persisted to `rate_limits` in batches."""
+
+    def __init__(self, limit: int, store=None, flush_interval: Optional[float] = None,
+                 session_factory: Optional[Callable[[], Session]] = None):
+        """
+        Args:
+            limit: Requests allowed per IP per day
+            store: Counter store (defaults from settings.rate_limit_backend)
+            flush_interval: Seconds between batched writes to rate_limits
+            session_factory: Sessions for the background flush (defaults to SessionLocal)
+        """
+        self.limit = limit
+        self._store = store
+        self.flush_interval = (
+            flush_interval if flush_interval is not None else get_settings().rate_limit_flush_interval_seconds
+        )
+        self._session_factory = session_factory
+        self._pending: Dict[Tuple[date, str], int] = {}
+        self._pending_lock = threading.Lock()
+        self._seed_lock = threading.Lock()
+        self._seeded_day: Optional[date] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.allowed = 0
+        self.denied = 0
+        self.check_seconds = 0.0
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.flush_errors = 0
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = _default_store()
+        return self._store
+
+    def _ensure_seeded(self, db: Session, day: date) -> None:
+        """Load today's persisted counts once per day."""
+        if self._seeded_day == day:
+            return
+        # Queried before taking the lock: under AsyncSession.run_sync the query
+        # yields to the event loop, and a request waiting on a held thread lock
+        # would block the loop thread. Seeding raises counts to at least the
+        # persisted ones, so concurrent first requests may both seed harmlessly.
+        counts = dict(
+            db.query(RateLimit.ip_address, RateLimit.query_count)
+            .filter(RateLimit.last_query_date == day).all()
+        )
+        with self._seed_lock:
+            if self._seeded_day == day:
+                return
+            self.store.seed(day, counts)
+            self._seeded_day = day
+        logger.info(f"Rate limiter seeded with {len(counts)} IPs for {day}")
+
+    def hit(self, db: Session, ip_address: str) -> Tuple[bool, int]:
+        """
+        Count one request from an IP.
+
+        Args:
+            db: Database session (read once per day to seed the counts)
+            ip_address: The client's IP address
+
+        Returns:
+            Tuple of (allowed, queries_remaining)
+        """
+        started = time.perf_counter()
+        day = date.today()
+        self._ensure_seeded(db, day)
+        count = self.store.increment(day, ip_address, self.limit)
+        if count is None:
+            self.denied += 1
+            self.check_seconds += time.perf_counter() - started
+            return False, 0
+        with self._pending_lock:
+            self._pending[(day, ip_address)] = self._pending.get((day, ip_address), 0) + 1
+        self.allowed += 1
+        self.check_seconds += time.perf_counter() - started
+        return True, self.limit - count
+
+    def status(self, db: Session, ip_address: str) -> Tuple[int, int]:
+        """Tuple of (queries_used, queries_remaining) for an IP, without counting a request."""
+        day = date.today()
+        self._ensure_seeded(db, day)
+        used = self.store.get(day, ip_address)
+        return used, max(0, self.limit - used)
+
+    # --- Persistence ---
+
+    def flush(self, db: Optional[Session] = None) -> int:
+        """
+        Write queued increments to rate_limits in one transaction.
+
+        Args:
+            db: Session to write with (defaults to a new one from the session factory)
+
+        Returns:
+            Number of (ip, day) rows written
+        """
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        owned = db is None
+        if owned:
+            if self._session_factory is None:
+                from ..database import SessionLocal
+                self._session_factory = SessionLocal
+            db = self._session_factory()
+        try:
+            _upsert_counts(db, pending)
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._pending_lock:  # Keep the counts for the next flush
+                for key, count in pending.items():
+                    self._pending[key] = self._pending.get(key, 0) + count
+            self.flush_errors += 1
+            raise
+        finally:
+            if owned:
+                db.close()
+        self.flushes += 1
+        self.flushed_rows += len(pending)
+        return len(pending)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"Rate limit flush failed (will retry): {e}")
+
+    def start(self) -> None:
+        """Start the background flush thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="rate-limit-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the flush thread and write what is still queued."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 5)
+            self._thread = None
+        try:
+            self.flush()
+        except Exception as e:
+            logger.warning(f"Final rate limit flush failed: {e}")
+
+    def reset(self) -> None:
+        """Forget all counts (they are re-seeded from rate_limits on the next request)."""
+        with self._pending_lock:
+            self._pending = {}
+        if self._store is not None:
+            self._store.clear()
+        self._seeded_day = None
+
+    def get_stats(self) -> dict:
+        checks = self.allowed + self.denied
+        return {
+            "backend": type(self._store).__name__ if self._store is not None else None,
+            "allowed": self.allowed,
+            "denied": self.denied,
+            "avg_check_us": round(self.check_seconds / checks * 1e6, 1) if checks else None,
+            "pending": len(self._pending),
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "flush_errors": self.flush_errors,
+        }
+
+
+def _upsert_counts(db: Session, pending: Dict[Tuple[date, str], int]) -> None:
+    """Add counts to rate_limits rows, creating them as needed (one statement on SQLite/PostgreSQL)."""
+    now = datetime.utcnow()
+    rows = [
+        {"id": uuid.uuid4(), "ip_address": ip, "last_query_date": day, "query_count": count,
+         "created_at": now, "updated_at": now}
+        for (day, ip), count in pending.items()
+    ]
+    table = RateLimit.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        statement = dialect_insert(table)
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[table.c.ip_address, table.c.last_query_date],
+                set_={
+                    "query_count": table.c.query_count + statement.excluded.query_count,
+                    "updated_at": statement.excluded.updated_at,
+                },
+            ),
+            rows,
+        )
+        return
+
+    for row in rows:
+        updated = db.query(RateLimit).filter(
+            RateLimit.ip_address == row["ip_address"], RateLimit.last_query_date == row["last_query_date"]
+        ).update({RateLimit.query_count: RateLimit.query_count + row["query_count"],
+                  RateLimit.updated_at: now}, synchronize_session=False)
+        if not updated:
+            db.execute(insert(table), [row])
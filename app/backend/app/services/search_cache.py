@@ -0,0 +1,290 @@
+"""
+Caches for EXPLORE search: query embeddings and search responses.
+
+Two bounded LRU caches with TTL:
+- Query embeddings: normalized query text -> embedding vector
+- Search results: (scope, query, filters, limit) -> response payload
+
+Result entries depend on the article corpus, so they are invalidated when:
+- A Code row or Article row is inserted/updated/deleted in this process
+  (SQLAlchemy ORM events)
+- The corpus fingerprint changes - article counts, populated search
+  vectors/embeddings, latest update time and code versions/is_current.
+  The fingerprint is re-checked at most every
+  `search_cache_check_interval_seconds`, which catches reloads done by
+  out-of-process loaders such as load_nbc_data.py and repopulate_db.py.
+- The ANN vector index is swapped
+
+Embeddings depend only on the model, so corpus changes leave them alone.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe, size-bounded LRU cache with per-entry time-to-live."""
+
+    def __init__(self, maxsize: int = 1024, ttl_seconds: float = 600.0, name: str = "cache"):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.name = name
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value (refreshing its LRU position) or `default`."""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry if full."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, key: Hashable) -> None:
+        """Drop one entry, if present."""
+        with self._lock:
+            if self._data.pop(key, _MISSING) is not _MISSING:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            if self._data:
+                self.invalidations += 1
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_stats(self) -> dict:
+        """Hit/miss counters and occupancy."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize query text for cache keys.
+
+    Lower-cases, collapses whitespace and strips surrounding punctuation so
+    "Stair width?" and "stair  width" share an entry.
+    """
+    query = re.sub(r"\s+", " ", query.strip().lower())
+    return query.strip(" ?!.,;:")
+
+
+def make_result_key(
+    scope: str,
+    query: str,
+    code_types: Optional[Iterable[str]] = None,
+    part_numbers: Optional[Iterable[int]] = None,
+    limit: int = 20,
+    use_semantic: bool = True,
+) -> tuple:
+    """Build a search-result cache key; filter order does not matter."""
+    return (
+        scope,
+        normalize_query(query),
+        tuple(sorted(code_types or ())),
+        tuple(sorted(part_numbers or ())),
+        limit,
+        use_semantic,
+    )
+
+
+def corpus_fingerprint(db: Session) -> str:
+    """
+    Cheap fingerprint of everything search results depend on.
+
+    One aggregate over articles plus the (small) codes table.
+    """
+    from ..models.codes import Code, Article
+
+    article_stats = db.query(
+        func.count(Article.id),
+        func.count(Article.search_vector),
+        func.count(Article.embedding),
+        func.max(Article.updated_at),
+    ).one()
+    codes = db.query(Code.id, Code.version, Code.is_current).order_by(Code.id).all()
+
+    digest = hashlib.sha1(repr((tuple(article_stats), [tuple(c) for c in codes])).encode())
+    return digest.hexdigest()
+
+
+class SearchCache:
+    """Query-embedding and search-result caches with corpus-version invalidation."""
+
+    def __init__(self):
+        settings = get_settings()
+        self.enabled = settings.search_cache_enabled
+        self.check_interval = settings.search_cache_check_interval_seconds
+        self.embeddings = TTLCache(
+            maxsize=settings.embedding_cache_size,
+            ttl_seconds=settings.embedding_cache_ttl_seconds,
+            name="query_embeddings",
+        )
+        self.results = TTLCache(
+            maxsize=settings.search_cache_size,
+            ttl_seconds=settings.search_cache_ttl_seconds,
+            name="search_results",
+        )
+        self._fingerprint: Optional[str] = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[str], None]] = []
+
+    # --- Query embeddings ---
+
+    def get_embedding(self, query: str):
+        if not self.enabled:
+            return None
+        return self.embeddings.get(normalize_query(query))
+
+    def set_embedding(self, query: str, embedding) -> None:
+        if self.enabled and embedding is not None:
+            self.embeddings.set(normalize_query(query), embedding)
+
+    # --- Search results ---
+
+    def get_result(self, key: tuple):
+        if not self.enabled:
+            return None
+        return self.results.get(key)
+
+    def set_result(self, key: tuple, value) -> None:
+        if self.enabled:
+            self.results.set(key, value)
+
+    # --- Invalidation ---
+
+    def add_invalidation_listener(self, callback: Callable[[str], None]) -> None:
+        """Call `callback(reason)` whenever results are invalidated (corpus changed)."""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def invalidate_results(self, reason: str = "") -> None:
+        """Drop all cached search results (corpus changed)."""
+        if len(self.results):
+            logger.info(f"Search result cache invalidated{': ' + reason if reason else ''}")
+        self.results.clear()
+        for callback in self._listeners:
+            callback(reason)
+
+    def clear(self) -> None:
+        """Drop everything, including query embeddings, and forget the fingerprint."""
+        self.results.clear()
+        self.embeddings.clear()
+        with self._lock:
+            self._fingerprint = None
+            self._last_check = 0.0
+
+    def validate(self, db: Session) -> None:
+        """
+        Invalidate results if the corpus fingerprint changed.
+
+        Runs the fingerprint query at most once per check interval.
+        """
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+
+        # The lock only claims the check and swaps the fingerprint: under
+        # AsyncSession.run_sync the query yields to the event loop, and a request
+        # waiting on a held thread lock would block the loop thread.
+        with self._lock:
+            if now - self._last_check < self.check_interval:
+                return
+            self._last_check = now
+        try:
+            fingerprint = corpus_fingerprint(db)
+        except Exception as e:
+            logger.warning(f"Could not compute corpus fingerprint: {e}")
+            return
+        with self._lock:
+            changed = self._fingerprint is not None and fingerprint != self._fingerprint
+            self._fingerprint = fingerprint
+        if changed:
+            self.invalidate_results("corpus fingerprint changed")
+
+    def get_stats(self) -> dict:
+        """Hit/miss counters for both caches."""
+        return {
+            "enabled": self.enabled,
+            "query_embeddings": self.embeddings.get_stats(),
+            "search_results": self.results.get_stats(),
+        }
+
+
+# Singleton instance for easy import
+search_cache = SearchCache()
+
+
+def _on_corpus_change(mapper, connection, target):
+    search_cache.invalidate_results(f"{type(target).__name__} changed")
+
+
+def register_invalidation_listeners() -> None:
+    """Invalidate cached results whenever Code or Article rows change in this process."""
+    from ..models.codes import Code, Article
+
+    for model in (Code, Article):
+        for event_name in ("after_insert", "after_update", "after_delete"):
+            if not event.contains(model, event_name, _on_corpus_change):
+                event.listen(model, event_name, _on_corpus_change)
+
+
+register_invalidation_listeners()
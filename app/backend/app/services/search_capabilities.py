@@ -0,0 +1,216 @@
+"""
+Search capability registry.
+
+Records which search backends are usable, so a request can pick its
+strategy without probe queries such as "is any search_vector populated?":
+
+- tsvector: `Article.search_vector` populated (PostgreSQL), per code
+- embeddings: `Article.embedding` populated, per code
+- fts5: SQLite FTS5 tables present for articles/STANDATA
+- ann_index: in-memory vector index loaded, and its size
+
+The snapshot is computed at startup (main.py lifespan) and recomputed on
+demand after it is marked stale, which happens when:
+- The FTS5 schema is created or rebuilt
+- Search results are invalidated - Code/Article ORM writes in this process,
+  a changed corpus fingerprint (loads by other processes, picked up by
+  search_cache.validate) or a swapped vector index
+- An admin calls POST /api/v1/explore/capabilities/refresh
+"""
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, FrozenSet, Iterable, Optional
+
+from sqlalchemy import bindparam, func, text
+from sqlalchemy.orm import Session
+
+from ..models.codes import Code, Article
+from .fulltext import FTS5_TABLES
+from .search_cache import search_cache
+from .vector_index import get_article_index
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CodeCapabilities:
+    """Populated search data for one Code."""
+    code_id: str
+    code_type: str
+    short_name: str
+    version: str
+    is_current: bool
+    article_count: int = 0
+    tsvector_count: int = 0
+    embedding_count: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "code_type": self.code_type,
+            "short_name": self.short_name,
+            "version": self.version,
+            "is_current": self.is_current,
+            "article_count": self.article_count,
+            "tsvector": self.tsvector_count > 0,
+            "tsvector_count": self.tsvector_count,
+            "embeddings": self.embedding_count > 0,
+            "embedding_count": self.embedding_count,
+        }
+
+
+@dataclass
+class CapabilitySnapshot:
+    """Search backends available at one point in time."""
+    dialect: str
+    codes: Dict[str, CodeCapabilities] = field(default_factory=dict)
+    fts5_sources: FrozenSet[str] = frozenset()  # "articles", "standata"
+    ann_index_size: int = 0
+    computed_at: datetime = field(default_factory=datetime.utcnow)
+
+    def _codes(self, code_types: Optional[Iterable[str]]):
+        types = set(code_types or ())
+        return [c for c in self.codes.values() if not types or c.code_type in types]
+
+    def has_tsvector(self, code_types: Optional[Iterable[str]] = None) -> bool:
+        """Whether any article (in the given code types) has a search_vector."""
+        return self.dialect == "postgresql" and any(c.tsvector_count for c in self._codes(code_types))
+
+    def has_embeddings(self, code_types: Optional[Iterable[str]] = None) -> bool:
+        """Whether any article (in the given code types) has an embedding."""
+        return any(c.embedding_count for c in self._codes(code_types))
+
+    def has_fts5(self, source: str) -> bool:
+        """Whether the FTS5 table for `articles` or `standata` exists."""
+        return source in self.fts5_sources
+
+    @property
+    def has_ann_index(self) -> bool:
+        return self.ann_index_size > 0
+
+    def to_dict(self) -> dict:
+        return {
+            "dialect": self.dialect,
+            "computed_at": self.computed_at.isoformat(),
+            "tsvector": self.has_tsvector(),
+            "embeddings": self.has_embeddings(),
+            "fts5": {source: source in self.fts5_sources for source in FTS5_TABLES},
+            "ann_index": {"loaded": self.has_ann_index, "size": self.ann_index_size},
+            "codes": {code_id: c.to_dict() for code_id, c in self.codes.items()},
+        }
+
+
+def compute_capabilities(db: Session) -> CapabilitySnapshot:
+    """
+    Inspect the database and vector index (one aggregate query, plus one
+    catalog query on SQLite).
+    """
+    dialect = db.get_bind().dialect.name
+    snapshot = CapabilitySnapshot(dialect=dialect)
+
+    rows = db.query(
+        Code.id, Code.code_type, Code.short_name, Code.version, Code.is_current,
+        func.count(Article.id),
+        func.count(Article.search_vector),
+        func.count(Article.embedding),
+    ).outerjoin(Article, Article.code_id == Code.id).group_by(
+        Code.id, Code.code_type, Code.short_name, Code.version, Code.is_current
+    ).all()
+    for code_id, code_type, short_name, version, is_current, articles, vectors, embeddings in rows:
+        snapshot.codes[str(code_id)] = CodeCapabilities(
+            code_id=str(code_id),
+            code_type=code_type,
+            short_name=short_name,
+            version=version,
+            is_current=bool(is_current),
+            article_count=articles,
+            tsvector_count=vectors,
+            embedding_count=embeddings,
+        )
+
+    if dialect == "sqlite":
+        fts_tables = {fts_table: source for source, (fts_table, _) in FTS5_TABLES.items()}
+        present = db.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'table' AND name IN :names").bindparams(
+                bindparam("names", expanding=True)
+            ),
+            {"names": list(fts_tables)},
+        ).scalars().all()
+        snapshot.fts5_sources = frozenset(fts_tables[name] for name in present)
+
+    index = get_article_index()
+    snapshot.ann_index_size = index.size if index is not None else 0
+    return snapshot
+
+
+class SearchCapabilityRegistry:
+    """Process-wide capability snapshot, recomputed lazily once marked stale."""
+
+    def __init__(self):
+        self._snapshot: Optional[CapabilitySnapshot] = None
+        self._stale = True
+        self._generation = 0  # Bumped by mark_stale, so a refresh racing a change stays stale
+        self._lock = threading.Lock()
+        self.refreshes = 0
+        self.stale_marks = 0
+
+    def refresh(self, db: Session) -> CapabilitySnapshot:
+        """
+        Recompute the snapshot now.
+
+        Args:
+            db: Database session
+
+        Returns:
+            The new CapabilitySnapshot
+        """
+        generation = self._generation
+        snapshot = compute_capabilities(db)
+        with self._lock:
+            self._snapshot = snapshot
+            self._stale = generation != self._generation
+            self.refreshes += 1
+        logger.info(
+            f"Search capabilities: dialect={snapshot.dialect} tsvector={snapshot.has_tsvector()} "
+            f"embeddings={snapshot.has_embeddings()} fts5={sorted(snapshot.fts5_sources)} "
+            f"ann_index={snapshot.ann_index_size}"
+        )
+        return snapshot
+
+    def get(self, db: Session) -> CapabilitySnapshot:
+        """Current snapshot; only queries the database if it is missing or stale."""
+        snapshot = self._snapshot
+        if snapshot is None or self._stale:
+            snapshot = self.refresh(db)
+        return snapshot
+
+    def mark_stale(self, reason: str = "") -> None:
+        """Recompute on next use."""
+        with self._lock:
+            if not self._stale:
+                self.stale_marks += 1
+                logger.debug(f"Search capabilities marked stale{': ' + reason if reason else ''}")
+            self._generation += 1
+            self._stale = True
+
+    def get_stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "refreshes": self.refreshes,
+            "stale_marks": self.stale_marks,
+            "stale": self._stale,
+            "computed_at": snapshot.computed_at.isoformat() if snapshot else None,
+        }
+
+
+# Singleton instance for easy import
+search_capabilities = SearchCapabilityRegistry()
+
+
+def refresh_search_capabilities(db: Session) -> CapabilitySnapshot:
+    """Recompute capabilities (used by startup, loaders and the admin endpoint)."""
+    return search_capabilities.refresh(db)
+
+
+search_cache.add_invalidation_listener(search_capabilities.mark_stale)
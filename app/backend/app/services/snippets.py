@@ -0,0 +1,459 @@
+"""
+Highlighted search snippets from a positional term index.
+
+At load time every article and STANDATA bulletin is tokenized once and the
+character offsets of each normalized term are stored in `term_positions`
+(see models/search_index.py). At query time the snippet engine:
+
+1. Reads the offsets of the query terms for the result documents only
+2. Slides a window of at most `max_chars` over them and keeps the window
+   covering the most distinct terms (then the most occurrences)
+3. Fetches just that window with SUBSTR - the full document is never
+   transferred or re-tokenized
+4. Returns the window text plus highlight spans for the matched terms
+
+On PostgreSQL snippets come from ts_headline instead and the positional
+index is not maintained. ORM events keep it in step with writes; databases
+loaded before it existed are indexed at startup (ensure_snippet_index).
+
+Snippets are capped at `max_chars` so long bulletins do not inflate
+response size.
+"""
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import case, delete, event, func, inspect
+from sqlalchemy.orm import Session
+
+from ..models.codes import Article
+from ..models.standata import Standata
+from ..models.search_index import TermPosition
+
+logger = logging.getLogger(__name__)
+
+DOC_ARTICLE = "article"
+DOC_STANDATA = "standata"
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+SNIPPET_ELLIPSIS = "..."
+
+SNIPPET_MAX_CHARS = 240
+SNIPPET_CONTEXT_CHARS = 60  # Lead-in before the first highlighted term
+MAX_POSITIONS_PER_TERM = 32  # Offsets kept per (document, term)
+MAX_TERM_LENGTH = 64
+
+HEADLINE_OPTIONS = (
+    f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, "
+    "MaxWords=35, MinWords=15, MaxFragments=1"
+)
+
+# Words, keeping dotted article numbers such as "9.8.4.1" and "2.0m" whole
+TOKEN_RE = re.compile(r"\w+(?:\.\w+)*")
+
+STOP_WORDS = {
+    'what', 'is', 'the', 'a', 'an', 'are', 'for', 'to', 'of', 'in', 'on', 'at',
+    'and', 'or', 'between', 'how', 'why', 'when', 'where', 'do', 'does', 'my',
+    'need', 'be', 'can', 'i', 'as', 'by', 'it', 'with', 'shall', 'this',
+    'that', 'not', 'from', 'each',
+}
+
+_MODELS = {DOC_ARTICLE: Article, DOC_STANDATA: Standata}
+
+
+def normalize_term(token: str) -> str:
+    """
+    Lower-case and strip plural endings (the "S" stemmer).
+
+    Deliberately light so "stairs" finds "stair" without a stemming
+    dependency; index and query terms go through the same function.
+    """
+    term = token.lower()
+    if len(term) <= 3 or not term.isalpha():
+        return term
+    if term.endswith("ies") and not term.endswith(("eies", "aies")):
+        return term[:-3] + "y"
+    if term.endswith("es") and not term.endswith(("aes", "ees", "oes")):
+        return term[:-1]
+    if term.endswith("s") and not term.endswith(("us", "ss")):
+        return term[:-1]
+    return term
+
+
+def tokenize(text: str) -> Iterator[Tuple[str, int, int]]:
+    """Yield (normalized_term, start, end) for every indexable token."""
+    for match in TOKEN_RE.finditer(text):
+        term = normalize_term(match.group())
+        if len(term) < 2 or len(term) > MAX_TERM_LENGTH or term in STOP_WORDS:
+            continue
+        yield term, match.start(), match.end()
+
+
+def query_terms(query_text: str) -> List[str]:
+    """Distinct normalized terms of a search query."""
+    terms = []
+    for term, _, _ in tokenize(query_text):
+        if term not in terms:
+            terms.append(term)
+    return terms
+
+
+def build_term_positions(text: str) -> Dict[str, List[Tuple[int, int]]]:
+    """Map each term to its first MAX_POSITIONS_PER_TERM (start, end) offsets."""
+    positions: Dict[str, List[Tuple[int, int]]] = {}
+    for term, start, end in tokenize(text or ""):
+        offsets = positions.setdefault(term, [])
+        if len(offsets) < MAX_POSITIONS_PER_TERM:
+            offsets.append((start, end))
+    return positions
+
+
+def encode_positions(offsets: Iterable[Tuple[int, int]]) -> str:
+    return " ".join(f"{start}:{end}" for start, end in offsets)
+
+
+def decode_positions(value: str) -> List[Tuple[int, int]]:
+    offsets = []
+    for pair in value.split():
+        start, end = pair.split(":")
+        offsets.append((int(start), int(end)))
+    return offsets
+
+
+@dataclass
+class Snippet:
+    """A document excerpt with highlight spans (offsets into `text`)."""
+    text: str
+    spans: List[Tuple[int, int]] = field(default_factory=list)
+    truncated_start: bool = False
+    truncated_end: bool = False
+
+    def render(
+        self,
+        start: str = HIGHLIGHT_START,
+        end: str = HIGHLIGHT_END,
+        ellipsis: str = SNIPPET_ELLIPSIS,
+    ) -> str:
+        """Excerpt with highlighted spans wrapped in start/end markers."""
+        parts = [ellipsis] if self.truncated_start else []
+        cursor = 0
+        for span_start, span_end in self.spans:
+            parts.append(self.text[cursor:span_start])
+            parts.append(start + self.text[span_start:span_end] + end)
+            cursor = span_end
+        parts.append(self.text[cursor:])
+        if self.truncated_end:
+            parts.append(ellipsis)
+        return "".join(parts)
+
+    @classmethod
+    def from_marked(cls, marked: str, max_chars: int = SNIPPET_MAX_CHARS) -> "Snippet":
+        """Parse text with inline start/end markers (e.g. ts_headline output)."""
+        text_parts: List[str] = []
+        spans = []
+        length = 0
+        for i, part in enumerate(re.split(f"{re.escape(HIGHLIGHT_START)}|{re.escape(HIGHLIGHT_END)}", marked)):
+            if i % 2 == 1:
+                spans.append((length, length + len(part)))
+            text_parts.append(part)
+            length += len(part)
+
+        text = "".join(text_parts)
+        snippet = cls(text=text, spans=spans)
+        if len(text) > max_chars:
+            snippet.text = text[:max_chars]
+            snippet.spans = [(s, e) for s, e in spans if e <= max_chars]
+            snippet.truncated_end = True
+        return snippet
+
+
+def _collapse_whitespace(text: str, spans: List[Tuple[int, int]]) -> Tuple[str, List[Tuple[int, int]]]:
+    """Collapse runs of whitespace to one space, remapping span offsets."""
+    out: List[str] = []
+    mapping = [0] * (len(text) + 1)
+    for i, char in enumerate(text):
+        mapping[i] = len(out)
+        if char.isspace():
+            if out and out[-1] != " ":
+                out.append(" ")
+        else:
+            out.append(char)
+    mapping[len(text)] = len(out)
+
+    collapsed = "".join(out).rstrip()
+    return collapsed, [(mapping[s], min(mapping[e], len(collapsed))) for s, e in spans]
+
+
+def _merge_spans(text: str, spans: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Merge overlapping spans and spans separated only by whitespace."""
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(spans):
+        if merged and (start <= merged[-1][1] or text[merged[-1][1]:start].isspace()):
+            merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class SnippetEngine:
+    """Builds capped, highlighted snippets for search results."""
+
+    def __init__(self, max_chars: int = SNIPPET_MAX_CHARS, context_chars: int = SNIPPET_CONTEXT_CHARS):
+        self.max_chars = max_chars
+        self.context_chars = context_chars
+
+    def best_window(self, hits: List[Tuple[int, int, str]]) -> Tuple[int, List[Tuple[int, int]]]:
+        """
+        Choose the snippet window for a document.
+
+        Args:
+            hits: (start, end, term) offsets of query terms in the document
+
+        Returns:
+            (window_start, [(start, end), ...] of hits inside the window)
+        """
+        hits = sorted(hits)
+        best = (0, 0)
+        best_score = (-1, -1)
+        j = 0
+        for i in range(len(hits)):
+            while j < i and hits[i][1] - hits[j][0] > self.max_chars:
+                j += 1
+            window = hits[j:i + 1]
+            score = (len({term for _, _, term in window}), len(window))
+            if score > best_score:
+                best_score = score
+                best = (j, i)
+
+        first, last = hits[best[0]][0], hits[best[1]][1]
+        slack = max(0, self.max_chars - (last - first))
+        window_start = max(0, first - min(slack // 2, self.context_chars))
+        window_end = window_start + self.max_chars
+        return window_start, [(s, e) for s, e, _ in hits if s >= window_start and e <= window_end]
+
+    def snippets(
+        self,
+        db: Session,
+        doc_type: str,
+        doc_ids: Sequence[str],
+        query_text: str,
+    ) -> Dict[str, Snippet]:
+        """
+        Snippets for the documents that contain at least one query term.
+
+        Args:
+            db: Database session
+            doc_type: DOC_ARTICLE or DOC_STANDATA
+            doc_ids: Document IDs (strings) to build snippets for
+            query_text: The user's query
+
+        Returns:
+            Dict of document ID -> Snippet; documents without a match are omitted
+        """
+        terms = query_terms(query_text)
+        if not terms or not doc_ids:
+            return {}
+        if db.get_bind().dialect.name == "postgresql":
+            return self._headlines(db, doc_type, doc_ids, terms)
+        return self._from_positions(db, doc_type, doc_ids, terms)
+
+    def _from_positions(self, db, doc_type, doc_ids, terms) -> Dict[str, Snippet]:
+        rows = db.query(TermPosition.doc_id, TermPosition.term, TermPosition.positions).filter(
+            TermPosition.doc_type == doc_type,
+            TermPosition.doc_id.in_([UUID(doc_id) for doc_id in doc_ids]),
+            TermPosition.term.in_(terms),
+        ).all()
+
+        hits_by_doc: Dict[UUID, List[Tuple[int, int, str]]] = {}
+        for row in rows:
+            hits_by_doc.setdefault(row.doc_id, []).extend(
+                (start, end, row.term) for start, end in decode_positions(row.positions)
+            )
+        if not hits_by_doc:
+            return {}
+
+        windows = {doc_id: self.best_window(hits) for doc_id, hits in hits_by_doc.items()}
+
+        # One query fetching only each document's window (SUBSTR is 1-based)
+        model = _MODELS[doc_type]
+        window_start = case(
+            *[(model.id == doc_id, start + 1) for doc_id, (start, _) in windows.items()]
+        )
+        excerpts = db.query(
+            model.id, func.substr(model.full_text, window_start, self.max_chars + 1).label("excerpt")
+        ).filter(model.id.in_(list(windows))).all()
+
+        snippets = {}
+        for doc_id, excerpt in excerpts:
+            start, spans = windows[doc_id]
+            snippet = self._build(excerpt or "", start, spans)
+            if snippet.spans:
+                snippets[str(doc_id)] = snippet
+        return snippets
+
+    def _build(self, excerpt: str, window_start: int, spans: List[Tuple[int, int]]) -> Snippet:
+        """Turn a fetched window into a Snippet with relative spans and clean edges."""
+        truncated_end = len(excerpt) > self.max_chars
+        text = excerpt[:self.max_chars]
+        spans = [(s - window_start, e - window_start) for s, e in spans]
+        spans = [(s, e) for s, e in spans if 0 <= s and e <= len(text)]
+
+        # Drop partial words at the window edges (never a highlighted one)
+        if window_start > 0:
+            cut = re.search(r"\s", text)
+            if cut and (not spans or cut.start() < spans[0][0]):
+                offset = cut.start() + 1
+                text = text[offset:]
+                spans = [(s - offset, e - offset) for s, e in spans]
+        if truncated_end:
+            cut = max(text.rfind(" "), text.rfind("\n"))
+            if cut > 0 and (not spans or cut >= spans[-1][1]):
+                text = text[:cut]
+
+        text, spans = _collapse_whitespace(text, spans)
+        return Snippet(
+            text=text,
+            spans=_merge_spans(text, spans),
+            truncated_start=window_start > 0,
+            truncated_end=truncated_end,
+        )
+
+    def _headlines(self, db, doc_type, doc_ids, terms) -> Dict[str, Snippet]:
+        model = _MODELS[doc_type]
+        ts_query = func.to_tsquery("english", " | ".join(terms))
+        headline = func.ts_headline("english", model.full_text, ts_query, HEADLINE_OPTIONS)
+        rows = db.query(model.id, headline.label("headline")).filter(
+            model.id.in_([UUID(doc_id) for doc_id in doc_ids])
+        ).all()
+
+        snippets = {}
+        for row in rows:
+            snippet = Snippet.from_marked(row.headline or "", self.max_chars)
+            if snippet.spans:
+                snippets[str(row.id)] = snippet
+        return snippets
+
+    # --- Index maintenance ---
+
+    @staticmethod
+    def index_document(connection, doc_type: str, doc_id, text: Optional[str], replace: bool = True) -> int:
+        """
+        (Re)index one document's term offsets.
+
+        Args:
+            connection: SQLAlchemy Connection or Session
+            doc_type: DOC_ARTICLE or DOC_STANDATA
+            doc_id: Document UUID
+            text: Document full_text
+            replace: Delete existing rows for the document first
+
+        Returns:
+            Number of term rows written
+        """
+        table = TermPosition.__table__
+        if replace:
+            connection.execute(
+                delete(table).where(table.c.doc_type == doc_type, table.c.doc_id == doc_id)
+            )
+        rows = [
+            {"doc_type": doc_type, "doc_id": doc_id, "term": term, "positions": encode_positions(offsets)}
+            for term, offsets in build_term_positions(text).items()
+        ]
+        if rows:
+            connection.execute(table.insert(), rows)
+        return len(rows)
+
+    def rebuild(self, db: Session, doc_type: Optional[str] = None) -> int:
+        """
+        Rebuild the positional index after a bulk load (no-op on PostgreSQL).
+
+        Args:
+            db: Database session
+            doc_type: Rebuild one document type only
+
+        Returns:
+            Number of documents indexed
+        """
+        if db.get_bind().dialect.name == "postgresql":
+            return 0
+
+        table = TermPosition.__table__
+        indexed = 0
+        for current_type in ([doc_type] if doc_type else list(_MODELS)):
+            model = _MODELS[current_type]
+            db.execute(delete(table).where(table.c.doc_type == current_type))
+            for doc_id, text in db.query(model.id, model.full_text).all():
+                self.index_document(db, current_type, doc_id, text, replace=False)
+                indexed += 1
+        db.commit()
+        logger.info(f"Snippet index rebuilt: {indexed} documents")
+        return indexed
+
+
+# Singleton instance for easy import
+snippet_engine = SnippetEngine()
+
+
+def rebuild_snippet_index(db: Session, doc_type: Optional[str] = None) -> int:
+    """Rebuild the positional index used for search snippets."""
+    return snippet_engine.rebuild(db, doc_type)
+
+
+def ensure_snippet_index(db: Session) -> int:
+    """
+    Build the positional index for document types that have documents but
+    no index rows - databases loaded before the index existed, since only
+    ORM writes and rebuilds fill it. A no-op once built and on PostgreSQL.
+
+    Returns:
+        Number of documents indexed
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return 0
+    indexed = 0
+    for doc_type, model in _MODELS.items():
+        has_rows = db.query(TermPosition.doc_id).filter(TermPosition.doc_type == doc_type).first()
+        has_text = db.query(model.id).filter(model.full_text.isnot(None)).first()
+        if has_text is not None and has_rows is None:
+            indexed += snippet_engine.rebuild(db, doc_type)
+    return indexed
+
+
+def _doc_type(target) -> str:
+    return DOC_ARTICLE if isinstance(target, Article) else DOC_STANDATA
+
+
+def _on_insert(mapper, connection, target):
+    if connection.dialect.name != "postgresql":
+        snippet_engine.index_document(connection, _doc_type(target), target.id, target.full_text, replace=False)
+
+
+def _on_update(mapper, connection, target):
+    if connection.dialect.name != "postgresql" and inspect(target).attrs.full_text.history.has_changes():
+        snippet_engine.index_document(connection, _doc_type(target), target.id, target.full_text)
+
+
+def _on_delete(mapper, connection, target):
+    if connection.dialect.name != "postgresql":
+        table = TermPosition.__table__
+        connection.execute(
+            delete(table).where(table.c.doc_type == _doc_type(target), table.c.doc_id == target.id)
+        )
+
+
+def register_index_listeners() -> None:
+    """Keep the positional index in step with ORM writes to articles and bulletins."""
+    for model in (Article, Standata):
+        for event_name, handler in (
+            ("after_insert", _on_insert),
+            ("after_update", _on_update),
+            ("after_delete", _on_delete),
+        ):
+            if not event.contains(model, event_name, handler):
+                event.listen(model, event_name, handler)
+
+
+register_index_listeners()
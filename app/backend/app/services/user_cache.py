@@ -0,0 +1,144 @@
+"""
+Cache of authenticated users for the auth dependencies.
+
+`get_current_user` used to load the user row on every authenticated
+request; a dashboard page firing 10-20 API calls made 10-20 identical
+lookups. Users are now kept in an LRU (TTLCache) keyed by user id, holding
+the column values and the credential version (core/security.py) that
+tokens carry in their "ver" claim:
+
+- A hit rebuilds the User from the cached values and attaches it to the
+  request's session with `merge(load=False)` - no SELECT - so endpoints
+  can still modify and commit it as before
+- A token whose "ver" differs from the user's current credential version
+  (issued before a password change or reset) is rejected
+
+Entries are dropped on User writes in this process (profile updates,
+password changes and resets, deactivation) and after
+`user_cache_ttl_seconds` for changes made by other processes.
+"""
+import logging
+import threading
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from ..config import get_settings
+from ..core.security import credential_version
+from ..models.auth import User
+from .search_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_COLUMNS = tuple(column.key for column in inspect(User).column_attrs)
+
+
+class UserCache:
+    """Authenticated users by id, attached to sessions without a query."""
+
+    def __init__(self):
+        settings = get_settings()
+        self._cache = TTLCache(
+            maxsize=settings.user_cache_size,
+            ttl_seconds=settings.user_cache_ttl_seconds,
+            name="users",
+        )
+        self._generation = 0  # Bumped by every invalidation, so a load racing a write is not cached
+        self._lock = threading.Lock()
+
+    def get_user(self, db: Session, user_id: UUID, version: Optional[str] = None) -> Optional[User]:
+        """
+        The user for a verified token.
+
+        Args:
+            db: Database session the user is attached to
+            user_id: The token's user id
+            version: The token's "ver" claim; None for tokens issued without one
+
+        Returns:
+            The User, or None if it does not exist or the token's credential
+            version is out of date
+        """
+        entry = self._cache.get(user_id)
+        if entry is None:
+            generation = self._generation
+            user = db.query(User).filter(User.id == user_id).first()
+            if user is None:
+                return None
+            stamp = credential_version(user.password_changed_at)
+            with self._lock:
+                if generation == self._generation:
+                    self._cache.set(user_id, (stamp, {key: getattr(user, key) for key in _COLUMNS}))
+        else:
+            stamp, values = entry
+            user = _attach(db, values)
+
+        if version is not None and version != stamp:
+            return None
+        return user
+
+    def invalidate(self, user_id: Optional[UUID] = None) -> None:
+        """Drop one user (or all users) from the cache."""
+        with self._lock:
+            self._generation += 1
+            if user_id is None:
+                self._cache.clear()
+            else:
+                self._cache.discard(user_id)
+
+    def get_stats(self) -> dict:
+        return self._cache.get_stats()
+
+
+def _attach(db: Session, values: dict) -> User:
+    """A persistent User in `db` built from cached column values, without a SELECT."""
+    user = User(**values)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+# Singleton instance for easy import
+user_cache = UserCache()
+
+
+def ensure_password_changed_at(db: Session) -> bool:
+    """
+    Add `users.password_changed_at` to databases created before it existed.
+
+    Existing users keep NULL (never changed), so their tokens stay valid.
+
+    Returns:
+        True if the column was added
+    """
+    columns = {column["name"] for column in inspect(db.get_bind()).get_columns("users")}
+    if "password_changed_at" in columns:
+        return False
+    column_type = "TIMESTAMP" if db.get_bind().dialect.name == "postgresql" else "DATETIME"
+    db.execute(text(f"ALTER TABLE users ADD COLUMN password_changed_at {column_type}"))
+    db.commit()
+    user_cache.invalidate()
+    logger.info("Added users.password_changed_at")
+    return True
+
+
+def _on_user_change(mapper, connection, target):
+    user_cache.invalidate(target.id)
+
+
+def _on_schema_change(target, connection, **kw):
+    user_cache.invalidate()
+
+
+def register_user_cache_listeners() -> None:
+    """Drop cached users on User writes and table (re)creation in this process."""
+    for event_name in ("after_update", "after_delete"):
+        if not event.contains(User, event_name, _on_user_change):
+            event.listen(User, event_name, _on_user_change)
+    for event_name in ("after_create", "after_drop"):
+        if not event.contains(User.__table__, event_name, _on_schema_change):
+            event.listen(User.__table__, event_name, _on_schema_change)
+
+
+register_user_cache_listeners()
@@ -0,0 +1,368 @@
+"""
+Approximate nearest-neighbour (ANN) index for semantic article search.
+
+Implements an IVF-flat index over the 384-dim `Article.embedding` vectors:
+- Vectors are L2-normalized so inner product == cosine similarity
+- k-means partitions the vectors into `nlist` clusters (inverted lists)
+- A query scores the centroids, then scans only the `nprobe` closest lists
+
+The index is persisted as plain .npy files and memory-mapped at startup, so
+queries never touch the database column. This matters most on SQLite, where
+pgvector is unavailable and `Vector` falls back to a JSON-encoded Text column.
+
+Files written to each version of the index directory (index_files.py):
+    vectors.npy    float32 (N, dim), grouped by cluster
+    ids.npy        article UUID strings, same order as vectors
+    centroids.npy  float32 (nlist, dim)
+    offsets.npy    int64 (nlist + 1,) - list i is vectors[offsets[i]:offsets[i+1]]
+    meta.json      dimension, counts, model name, build time
+"""
+import json
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..config import get_settings
+from .index_files import current_version_dir, save_version
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+
+# Below this many vectors a single list (exact flat scan) is fastest
+MIN_VECTORS_FOR_CLUSTERING = 1024
+KMEANS_ITERATIONS = 20
+KMEANS_SAMPLE_SIZE = 50_000
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize rows, leaving zero rows untouched."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _kmeans(vectors: np.ndarray, nlist: int, seed: int = 42) -> np.ndarray:
+    """
+    Spherical k-means (cosine) returning `nlist` unit-length centroids.
+
+    Trains on a random sample for large inputs; assignment of every vector
+    happens afterwards in `VectorIndex.build`.
+    """
+    rng = np.random.default_rng(seed)
+    sample = vectors
+    if len(vectors) > KMEANS_SAMPLE_SIZE:
+        sample = vectors[rng.choice(len(vectors), KMEANS_SAMPLE_SIZE, replace=False)]
+
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+
+    for _ in range(KMEANS_ITERATIONS):
+        assignments = np.argmax(sample @ centroids.T, axis=1)
+        for i in range(nlist):
+            members = sample[assignments == i]
+            if len(members):
+                centroids[i] = members.mean(axis=0)
+            else:
+                # Re-seed empty clusters with a random point
+                centroids[i] = sample[rng.integers(len(sample))]
+        centroids = _normalize(centroids)
+
+    return centroids.astype(np.float32)
+
+
+class VectorIndex:
+    """IVF-flat cosine-similarity index over article embeddings."""
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        ids: np.ndarray,
+        centroids: np.ndarray,
+        offsets: np.ndarray,
+        meta: Optional[dict] = None,
+    ):
+        self.vectors = vectors
+        self.ids = ids
+        self.centroids = centroids
+        self.offsets = offsets
+        self.meta = meta or {}
+
+    @property
+    def size(self) -> int:
+        """Number of indexed vectors."""
+        return int(self.vectors.shape[0])
+
+    @property
+    def dim(self) -> int:
+        """Embedding dimension."""
+        return int(self.vectors.shape[1]) if self.vectors.ndim == 2 else 0
+
+    @property
+    def nlist(self) -> int:
+        """Number of inverted lists (clusters)."""
+        return int(self.centroids.shape[0])
+
+    @classmethod
+    def build(
+        cls,
+        ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        nlist: Optional[int] = None,
+        model_name: Optional[str] = None,
+    ) -> "VectorIndex":
+        """
+        Build an index from parallel id / embedding sequences.
+
+        Args:
+            ids: Article IDs (UUIDs or strings)
+            embeddings: Embedding vectors, all of the same dimension
+            nlist: Number of clusters (defaults to ~sqrt(N), 1 for small N)
+            model_name: Embedding model name, recorded in metadata
+
+        Returns:
+            A new in-memory VectorIndex
+        """
+        matrix = _normalize(np.asarray(embeddings, dtype=np.float32))
+        id_array = np.asarray([str(i) for i in ids])
+
+        if matrix.ndim != 2 or len(matrix) != len(id_array):
+            raise ValueError("ids and embeddings must be non-empty and the same length")
+
+        if nlist is None:
+            nlist = 1 if len(matrix) < MIN_VECTORS_FOR_CLUSTERING else int(np.sqrt(len(matrix)))
+        nlist = max(1, min(nlist, len(matrix)))
+
+        if nlist == 1:
+            centroids = _normalize(matrix.mean(axis=0, keepdims=True)).astype(np.float32)
+            assignments = np.zeros(len(matrix), dtype=np.int64)
+        else:
+            centroids = _kmeans(matrix, nlist)
+            assignments = np.argmax(matrix @ centroids.T, axis=1)
+
+        # Store each inverted list contiguously so a probe is a single slice
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=nlist)
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        meta = {
+            "format_version": INDEX_FORMAT_VERSION,
+            "count": int(len(matrix)),
+            "dim": int(matrix.shape[1]),
+            "nlist": int(nlist),
+            "model_name": model_name,
+            "built_at": datetime.utcnow().isoformat(),
+        }
+        return cls(matrix[order], id_array[order], centroids, offsets, meta)
+
+    def search(
+        self,
+        query: Sequence[float],
+        k: int = 20,
+        nprobe: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Find the k nearest articles to a query embedding.
+
+        Args:
+            query: Query embedding (same dimension as the index)
+            k: Number of results to return
+            nprobe: Number of inverted lists to scan (defaults to settings)
+
+        Returns:
+            List of (article_id, cosine_similarity) sorted best-first
+        """
+        if self.size == 0 or k <= 0:
+            return []
+
+        q = np.asarray(query, dtype=np.float32).reshape(-1)
+        if q.shape[0] != self.dim:
+            raise ValueError(f"Query dimension {q.shape[0]} does not match index dimension {self.dim}")
+        norm = np.linalg.norm(q)
+        if norm == 0:
+            return []
+        q = q / norm
+
+        if nprobe is None:
+            nprobe = get_settings().vector_index_nprobe
+        nprobe = max(1, min(nprobe, self.nlist))
+
+        if nprobe >= self.nlist:
+            probe_lists = range(self.nlist)
+        else:
+            centroid_scores = self.centroids @ q
+            probe_lists = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+
+        candidate_scores = []
+        candidate_rows = []
+        for list_no in probe_lists:
+            start, end = int(self.offsets[list_no]), int(self.offsets[list_no + 1])
+            if start == end:
+                continue
+            candidate_scores.append(self.vectors[start:end] @ q)
+            candidate_rows.append(np.arange(start, end))
+
+        if not candidate_scores:
+            return []
+
+        scores = np.concatenate(candidate_scores)
+        rows = np.concatenate(candidate_rows)
+
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+
+        return [(str(self.ids[rows[i]]), float(scores[i])) for i in top]
+
+    def save(self, directory: Path) -> None:
+        """
+        Persist the index to a directory.
+
+        The files are written as a new version and made current with one
+        rename (index_files.py), so a concurrent load never mixes versions.
+        """
+        arrays = {
+            "vectors": self.vectors,
+            "ids": self.ids,
+            "centroids": self.centroids,
+            "offsets": self.offsets,
+        }
+
+        def write(version_dir: Path) -> None:
+            for name, array in arrays.items():
+                np.save(version_dir / f"{name}.npy", np.ascontiguousarray(array))
+            (version_dir / "meta.json").write_text(json.dumps(self.meta, indent=2))
+
+        save_version(directory, write)
+
+    @classmethod
+    def load(cls, directory: Path, mmap: bool = True) -> Optional["VectorIndex"]:
+        """
+        Load a persisted index, memory-mapping the large arrays.
+
+        Args:
+            directory: Directory written by `save`
+            mmap: Memory-map vectors and ids instead of reading them into RAM
+
+        Returns:
+            VectorIndex, or None if no (compatible) index exists
+        """
+        directory = current_version_dir(directory)
+        if directory is None or not (directory / "meta.json").exists():
+            return None
+
+        meta = json.loads((directory / "meta.json").read_text())
+        if meta.get("format_version") != INDEX_FORMAT_VERSION:
+            logger.warning(f"Ignoring vector index at {directory}: unsupported format {meta.get('format_version')}")
+            return None
+
+        mode = "r" if mmap else None
+        return cls(
+            vectors=np.load(directory / "vectors.npy", mmap_mode=mode),
+            ids=np.load(directory / "ids.npy", mmap_mode=mode),
+            centroids=np.load(directory / "centroids.npy"),
+            offsets=np.load(directory / "offsets.npy"),
+            meta=meta,
+        )
+
+
+# --- Article index singleton ---
+
+_article_index: Optional[VectorIndex] = None
+_article_index_lock = threading.Lock()
+
+
+def get_index_dir() -> Path:
+    """Directory holding the persisted article index."""
+    settings = get_settings()
+    if settings.vector_index_dir:
+        return Path(settings.vector_index_dir)
+    return Path(settings.data_dir) / "indexes" / "articles"
+
+
+def get_article_index() -> Optional[VectorIndex]:
+    """Get the loaded article index, or None if semantic search is unavailable."""
+    return _article_index
+
+
+def set_article_index(index: Optional[VectorIndex]) -> None:
+    """Swap in a new article index (atomic for concurrent readers)."""
+    global _article_index
+    _article_index = index
+
+    # Cached search results were ranked against the previous index
+    from .search_cache import search_cache
+    search_cache.invalidate_results("vector index replaced")
+
+
+def build_article_index(db, save: bool = True) -> Optional[VectorIndex]:
+    """
+    Build the article index from `Article.embedding` and install it.
+
+    Decodes every embedding once (JSON on SQLite), so run it after loading
+    articles/embeddings rather than per request.
+
+    Args:
+        db: SQLAlchemy session
+        save: Persist the index to `get_index_dir()`
+
+    Returns:
+        The new VectorIndex, or None if no article has an embedding
+    """
+    from ..models.codes import Article
+    from .embedding_service import MODEL_NAME
+
+    with _article_index_lock:
+        rows = db.query(Article.id, Article.embedding).filter(
+            Article.embedding.isnot(None)
+        ).all()
+        rows = [r for r in rows if r.embedding is not None and len(r.embedding)]
+
+        if not rows:
+            logger.info("No article embeddings found; vector index not built")
+            set_article_index(None)
+            return None
+
+        index = VectorIndex.build(
+            ids=[r.id for r in rows],
+            embeddings=[list(r.embedding) for r in rows],
+            model_name=MODEL_NAME,
+        )
+        logger.info(f"Built article vector index: {index.size} vectors, {index.nlist} lists")
+
+        if save:
+            index.save(get_index_dir())
+            # Re-open from disk so the process serves from the memory map
+            index = VectorIndex.load(get_index_dir()) or index
+
+        set_article_index(index)
+        return index
+
+
+def load_article_index(db=None) -> Optional[VectorIndex]:
+    """
+    Load the persisted article index at startup.
+
+    Falls back to building from the database when no index file exists
+    and a session is provided.
+    """
+    index = None
+    try:
+        index = VectorIndex.load(get_index_dir())
+    except Exception as e:
+        logger.warning(f"Could not load vector index from {get_index_dir()}: {e}")
+
+    if index is not None:
+        logger.info(f"Loaded article vector index: {index.size} vectors (memory-mapped)")
+        set_article_index(index)
+        return index
+
+    if db is not None:
+        return build_article_index(db)
+    return None
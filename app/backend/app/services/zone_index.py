@@ -0,0 +1,277 @@
+"""
+Spatial zone lookup from Calgary land-use district polygons.
+
+`Parcel.zone_id` used to come only from matching address strings against
+the property assessment data, which leaves many parcels with no zone. The
+city's land-use district layer (`data/zoning/land-use-districts.geojson`)
+answers the question geometrically: which district polygon contains the
+point?
+
+- Polygons are loaded once into a Shapely STRtree; each query checks only
+  the few polygons whose bounding boxes contain the point
+- Polygons are prepared, so the exact point-in-polygon test is cheap
+- Batches of points are resolved with vectorized Shapely calls
+  (`lookup_many`), which the bulk re-zoning pass uses
+- Where districts overlap (or a point is on a shared edge) the smallest
+  district wins
+
+A single lookup takes tens of microseconds.
+"""
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import shapely
+from shapely.geometry import shape
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..models.zones import Zone, Parcel
+
+logger = logging.getLogger(__name__)
+
+CODE_PROPERTIES = ("lu_code", "LU_CODE", "land_use_district", "land_use_designation")
+
+
+def clean_zone_code(code: Optional[str]) -> Optional[str]:
+    """District code as stored in `zones` ("DC (PRE 1P2007)" -> "DC")."""
+    if not code:
+        return None
+    return code.split("(")[0].strip() or None
+
+
+class ZoneIndex:
+    """STRtree over land-use district polygons."""
+
+    def __init__(self, geometries: Sequence, zone_codes: Sequence[str], source: Optional[str] = None):
+        self.geometries = np.asarray(geometries, dtype=object)
+        invalid = ~shapely.is_valid(self.geometries)
+        if invalid.any():
+            self.geometries[invalid] = shapely.make_valid(self.geometries[invalid])
+        shapely.prepare(self.geometries)
+        self.zone_codes = np.asarray(zone_codes, dtype=object)
+        self.areas = shapely.area(self.geometries)
+        self.tree = shapely.STRtree(self.geometries)
+        self.source = source
+        self.loaded_at = datetime.utcnow()
+        self.lookups = 0
+
+    @classmethod
+    def from_features(cls, features: List[dict], source: Optional[str] = None) -> "ZoneIndex":
+        """
+        Build from GeoJSON features (WGS84 lon/lat).
+
+        Features without a geometry or district code are skipped.
+        """
+        geometries, codes = [], []
+        for feature in features:
+            properties = feature.get("properties") or {}
+            code = next((properties[k] for k in CODE_PROPERTIES if properties.get(k)), None)
+            if not code or not feature.get("geometry"):
+                continue
+            geometries.append(shape(feature["geometry"]))
+            codes.append(str(code).strip())
+        return cls(geometries, codes, source=source)
+
+    @classmethod
+    def from_geojson(cls, path: Path) -> Optional["ZoneIndex"]:
+        """Load a GeoJSON FeatureCollection; None if the file is missing or has no districts."""
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls.from_features(data.get("features") or [], source=str(path))
+        return index if index.size else None
+
+    @property
+    def size(self) -> int:
+        return len(self.geometries)
+
+    def lookup(self, latitude: float, longitude: float) -> Optional[str]:
+        """
+        District code at a point.
+
+        Args:
+            latitude: WGS84 latitude
+            longitude: WGS84 longitude
+
+        Returns:
+            Zone code as given in the district data, or None outside every district
+        """
+        self.lookups += 1
+        candidates = self.tree.query(shapely.Point(longitude, latitude))
+        if not len(candidates):
+            return None
+        hits = candidates[shapely.intersects_xy(self.geometries[candidates], longitude, latitude)]
+        if not len(hits):
+            return None
+        return self.zone_codes[hits[np.argmin(self.areas[hits])]]
+
+    def lookup_many(self, latitudes: Sequence[float], longitudes: Sequence[float]) -> np.ndarray:
+        """
+        District codes for many points at once.
+
+        Returns:
+            Object array aligned with the input (None outside every district)
+        """
+        xs = np.asarray(longitudes, dtype=float)
+        ys = np.asarray(latitudes, dtype=float)
+        result = np.full(len(xs), None, dtype=object)
+        if not len(xs):
+            return result
+        self.lookups += len(xs)
+
+        point_idx, poly_idx = self.tree.query(shapely.points(xs, ys))
+        inside = shapely.intersects_xy(self.geometries[poly_idx], xs[point_idx], ys[point_idx])
+        point_idx, poly_idx = point_idx[inside], poly_idx[inside]
+
+        # Smallest containing district per point: sort by (point, area), keep the first of each point
+        order = np.lexsort((self.areas[poly_idx], point_idx))
+        point_idx, poly_idx = point_idx[order], poly_idx[order]
+        first = np.unique(point_idx, return_index=True)[1]
+        result[point_idx[first]] = self.zone_codes[poly_idx[first]]
+        return result
+
+    def get_stats(self) -> dict:
+        return {
+            "loaded": True,
+            "districts": self.size,
+            "zone_codes": len(set(self.zone_codes)),
+            "lookups": self.lookups,
+            "source": self.source,
+            "loaded_at": self.loaded_at.isoformat(),
+        }
+
+
+# --- Zone index singleton ---
+
+_zone_index: Optional[ZoneIndex] = None
+_zone_index_lock = threading.Lock()
+
+
+def get_districts_path() -> Path:
+    """GeoJSON file holding the land-use district polygons."""
+    settings = get_settings()
+    if settings.zone_districts_path:
+        return Path(settings.zone_districts_path)
+    return Path(settings.data_dir) / "zoning" / "land-use-districts.geojson"
+
+
+def get_zone_index() -> Optional[ZoneIndex]:
+    """Get the loaded zone index, or None if district polygons are unavailable."""
+    return _zone_index
+
+
+def set_zone_index(index: Optional[ZoneIndex]) -> None:
+    """Swap in a new zone index (atomic for concurrent readers)."""
+    global _zone_index
+    _zone_index = index
+
+
+def load_zone_index(path: Optional[Path] = None) -> Optional[ZoneIndex]:
+    """
+    Load district polygons and install the index.
+
+    Args:
+        path: GeoJSON file (defaults to `get_districts_path()`)
+
+    Returns:
+        The new ZoneIndex, or None if the file is missing, unreadable or empty
+    """
+    path = path or get_districts_path()
+    with _zone_index_lock:
+        started = time.perf_counter()
+        try:
+            index = ZoneIndex.from_geojson(path)
+        except Exception as e:
+            logger.warning(f"Could not load land-use districts from {path}: {e}")
+            index = None
+        if index is None:
+            logger.info(f"No land-use district polygons at {path}; spatial zone lookup unavailable")
+        else:
+            logger.info(
+                f"Loaded {index.size} land-use district polygons in {time.perf_counter() - started:.2f}s"
+            )
+        set_zone_index(index)
+        return index
+
+
+def lookup_zone(db: Session, latitude: float, longitude: float) -> Optional[Zone]:
+    """
+    The Zone record whose district contains a point.
+
+    Returns:
+        Zone, or None if the index is not loaded, the point is outside every
+        district, or the district's code is not in the zones table
+    """
+    index = get_zone_index()
+    code = clean_zone_code(index.lookup(latitude, longitude)) if index else None
+    if code is None:
+        return None
+    return db.query(Zone).filter(Zone.zone_code == code).first()
+
+
+def rezone_parcels(db: Session, index: ZoneIndex, batch_size: int = 5000) -> Dict[str, float]:
+    """
+    Assign every parcel with coordinates the zone of the district containing it.
+
+    Parcels are read in primary-key order (keyset batches), resolved with one
+    vectorized lookup per batch, and only changed rows are written. Parcels
+    outside every district, or in a district whose code is not in `zones`,
+    keep their current zone.
+
+    Args:
+        db: Database session
+        index: Loaded ZoneIndex
+        batch_size: Parcels per batch/commit
+
+    Returns:
+        Counts: scanned, updated, unchanged, outside, unknown_zone, seconds
+    """
+    started = time.perf_counter()
+    zone_ids = {code: zone_id for zone_id, code in db.query(Zone.id, Zone.zone_code).all()}
+    stats = {"scanned": 0, "updated": 0, "unchanged": 0, "outside": 0, "unknown_zone": 0}
+
+    last_id = None
+    while True:
+        query = db.query(
+            Parcel.id, Parcel.latitude, Parcel.longitude, Parcel.zone_id, Parcel.land_use_designation
+        ).filter(Parcel.latitude.isnot(None), Parcel.longitude.isnot(None))
+        if last_id is not None:
+            query = query.filter(Parcel.id > last_id)
+        rows = query.order_by(Parcel.id).limit(batch_size).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        codes = index.lookup_many([float(r.latitude) for r in rows], [float(r.longitude) for r in rows])
+        now = datetime.utcnow()
+        changes = []
+        for row, code in zip(rows, codes):
+            if code is None:
+                stats["outside"] += 1
+                continue
+            zone_id = zone_ids.get(clean_zone_code(code)) or zone_ids.get(code)
+            if zone_id is None:
+                stats["unknown_zone"] += 1
+            elif zone_id == row.zone_id and code == row.land_use_designation:
+                stats["unchanged"] += 1
+            else:
+                # updated_at is set explicitly: bulk updates skip onupdate, and the
+                # address index picks up changed parcels by it
+                changes.append({"id": row.id, "zone_id": zone_id, "land_use_designation": code,
+                                "updated_at": now})
+        if changes:
+            db.bulk_update_mappings(Parcel, changes)
+            db.commit()
+        stats["scanned"] += len(rows)
+        stats["updated"] += len(changes)
+
+    stats["seconds"] = round(time.perf_counter() - started, 2)
+    logger.info(f"Spatial re-zoning: {stats}")
+    return stats
@@ -0,0 +1,470 @@
+"""
+Zone rule engine: parcel-specific zoning limits from compiled ZoneRules.
+
+`ZoneRule.calculation_formula` holds expressions such as "0.25 * lot_depth"
+and `ZoneRule.conditions` holds JSON such as {"lot_width": {"min": 10}}.
+This module compiles both once into small closures - the expression is
+parsed with `ast` and only arithmetic, comparisons, `and`/`or`/`not`,
+`x if c else y` and min/max/abs/round on the known variables are accepted;
+nothing is ever passed to `eval`.
+
+All zones and rules are loaded into memory once (`ZoneRuleEngine`); zone
+codes are looked up case-insensitively without touching the database.
+Limits for a parcel start from the Zone columns; each rule whose condition
+holds then sets the limit for its check (the most restrictive one wins
+when several apply).
+
+Variables available to formulas and conditions:
+    lot_area, lot_width, lot_depth (from the parcel)
+    building_height, building_storeys, building_area (from the proposal)
+
+The cache is dropped on Zone/ZoneRule writes in this process and when
+update_parcel_zones.py updates zones; loads by other processes are picked
+up within `zone_rules_check_interval_seconds`.
+"""
+import ast
+import json
+import logging
+import math
+import operator
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..models.zones import Zone, ZoneRule
+
+logger = logging.getLogger(__name__)
+
+VARIABLES = frozenset({
+    "lot_area", "lot_width", "lot_depth", "building_height", "building_storeys", "building_area",
+})
+FUNCTIONS = {"min": min, "max": max, "abs": abs, "round": round}
+
+BINARY_OPS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod,
+}
+UNARY_OPS = {ast.USub: operator.neg, ast.UAdd: operator.pos, ast.Not: operator.not_}
+COMPARE_OPS = {
+    ast.Lt: operator.lt, ast.LtE: operator.le, ast.Gt: operator.gt, ast.GtE: operator.ge,
+    ast.Eq: operator.eq, ast.NotEq: operator.ne,
+}
+CONDITION_OPS = {
+    "min": operator.ge, "max": operator.le, "ge": operator.ge, "le": operator.le,
+    "gt": operator.gt, "lt": operator.lt, "eq": operator.eq,
+}
+
+# Check name (as in services/zoning_batch.py) -> Zone column holding its default limit
+ZONE_LIMITS = {
+    "height_m": "max_height_m",
+    "storeys": "max_storeys",
+    "front_setback_m": "min_front_setback_m",
+    "side_setback_m": "min_side_setback_m",
+    "rear_setback_m": "min_rear_setback_m",
+    "far": "max_far",
+    "coverage": None,
+    "parking_stalls": "min_parking_stalls",
+}
+MIN_CHECKS = frozenset({"front_setback_m", "side_setback_m", "rear_setback_m", "parking_stalls"})
+RULE_CHECKS = {
+    "setback_front": "front_setback_m",
+    "setback_side": "side_setback_m",
+    "setback_rear": "rear_setback_m",
+    "far": "far",
+    "coverage": "coverage",
+    "lot_coverage": "coverage",
+    "parking": "parking_stalls",
+}
+MAX_FORMULA_LENGTH = 500
+
+Evaluator = Callable[[Dict[str, float]], object]
+
+
+class FormulaError(ValueError):
+    """A formula or condition that cannot be compiled."""
+
+
+class _Missing(Exception):
+    """A variable the formula needs is not known for this parcel."""
+
+
+def _compile_node(node: ast.AST) -> Evaluator:
+    """Turn a whitelisted expression node into a closure over the variables dict."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        value = node.value
+        return lambda env: value
+    if isinstance(node, ast.Name):
+        name = node.id
+        if name not in VARIABLES:
+            raise FormulaError(f"Unknown variable '{name}'")
+
+        def variable(env):
+            value = env.get(name)
+            if value is None:
+                raise _Missing(name)
+            return value
+        return variable
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPS:
+        op, left, right = BINARY_OPS[type(node.op)], _compile_node(node.left), _compile_node(node.right)
+        return lambda env: op(left(env), right(env))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPS:
+        op, operand = UNARY_OPS[type(node.op)], _compile_node(node.operand)
+        return lambda env: op(operand(env))
+    if isinstance(node, ast.Compare) and all(type(op) in COMPARE_OPS for op in node.ops):
+        ops = [COMPARE_OPS[type(op)] for op in node.ops]
+        operands = [_compile_node(node.left)] + [_compile_node(c) for c in node.comparators]
+
+        def compare(env):
+            values = [operand(env) for operand in operands]
+            return all(op(a, b) for op, a, b in zip(ops, values, values[1:]))
+        return compare
+    if isinstance(node, ast.BoolOp):
+        values = [_compile_node(v) for v in node.values]
+        combine = all if isinstance(node.op, ast.And) else any
+        return lambda env: combine(value(env) for value in values)
+    if isinstance(node, ast.IfExp):
+        test, body, orelse = _compile_node(node.test), _compile_node(node.body), _compile_node(node.orelse)
+        return lambda env: body(env) if test(env) else orelse(env)
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS
+            and not node.keywords and node.args):
+        fn, args = FUNCTIONS[node.func.id], [_compile_node(a) for a in node.args]
+        return lambda env: fn(*(arg(env) for arg in args))
+    raise FormulaError(f"Unsupported expression: {ast.dump(node)[:80]}")
+
+
+def compile_formula(expression: str) -> Evaluator:
+    """
+    Compile an arithmetic/boolean expression.
+
+    Args:
+        expression: e.g. "0.25 * lot_depth" or "max(1.2, 0.1 * lot_width)"
+
+    Returns:
+        Function of a variables dict (run it with `evaluate`)
+
+    Raises:
+        FormulaError: If the expression is not allowed or does not parse
+    """
+    if len(expression) > MAX_FORMULA_LENGTH:
+        raise FormulaError("Formula too long")
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as e:
+        raise FormulaError(f"Invalid formula '{expression}': {e.msg}") from e
+    return _compile_node(tree.body)
+
+
+def compile_conditions(conditions) -> Optional[Evaluator]:
+    """
+    Compile `ZoneRule.conditions`.
+
+    Accepts a JSON object (or its text) mapping variables to a number
+    (equality) or to bounds - {"lot_width": {"min": 10, "lt": 15}} - with
+    an optional "expression" key holding a boolean formula. All parts must
+    hold. A plain non-JSON string is treated as a boolean formula.
+
+    Returns:
+        Predicate, or None if there are no conditions
+
+    Raises:
+        FormulaError: If the conditions are malformed
+    """
+    if conditions is None or conditions == "" or conditions == {}:
+        return None
+    if isinstance(conditions, str):
+        try:
+            conditions = json.loads(conditions)
+        except ValueError:
+            return compile_formula(conditions)
+    if not isinstance(conditions, dict):
+        raise FormulaError(f"Conditions must be an object, got {type(conditions).__name__}")
+
+    parts: List[Evaluator] = []
+    for key, spec in conditions.items():
+        if key == "expression":
+            parts.append(compile_formula(str(spec)))
+            continue
+        variable = _compile_node(ast.Name(id=key))
+        bounds = {"eq": spec} if isinstance(spec, (int, float)) else spec
+        if not isinstance(bounds, dict) or not bounds:
+            raise FormulaError(f"Bad condition for '{key}': {spec!r}")
+        for op_name, bound in bounds.items():
+            if op_name not in CONDITION_OPS or not isinstance(bound, (int, float)):
+                raise FormulaError(f"Bad condition for '{key}': {op_name}={bound!r}")
+            parts.append(
+                lambda env, variable=variable, op=CONDITION_OPS[op_name], bound=bound: op(variable(env), bound)
+            )
+    return lambda env: all(part(env) for part in parts)
+
+
+def evaluate(evaluator: Evaluator, variables: Dict[str, float]):
+    """Run a compiled formula; None if it needs a variable that is not known or fails (e.g. / 0)."""
+    try:
+        return evaluator(variables)
+    except (_Missing, ArithmeticError, ValueError, TypeError):
+        return None
+
+
+class CompiledRule(NamedTuple):
+    """A ZoneRule ready to evaluate."""
+    check: Optional[str]  # Check it sets (see RULE_CHECKS), None for rules that set no limit
+    rule_type: str
+    min_value: Optional[float]
+    max_value: Optional[float]
+    formula: Optional[Evaluator]
+    condition: Optional[Evaluator]
+    bylaw_reference: Optional[str]
+
+    def limit(self, variables: Dict[str, float]) -> Optional[float]:
+        """The limit this rule sets for a parcel, or None if it does not apply."""
+        if self.condition is not None and not evaluate(self.condition, variables):
+            return None
+        if self.formula is not None:
+            value = evaluate(self.formula, variables)
+            return float(value) if isinstance(value, (int, float)) and math.isfinite(value) else None
+        return self.min_value if self.check in MIN_CHECKS else self.max_value
+
+
+class CompiledZone(NamedTuple):
+    """A zone's default limits and compiled rules."""
+    zone_id: object
+    zone_code: str
+    defaults: Dict[str, Optional[float]]
+    rules: Tuple[CompiledRule, ...]
+
+
+def _float(value) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+def _rule_check(rule: ZoneRule) -> Optional[str]:
+    rule_type = (rule.rule_type or "").lower()
+    if rule_type == "height":
+        return "storeys" if (rule.unit or "").lower().startswith("storey") else "height_m"
+    return RULE_CHECKS.get(rule_type)
+
+
+def compile_rule(rule: ZoneRule) -> CompiledRule:
+    """
+    Compile one ZoneRule.
+
+    Raises:
+        FormulaError: If its formula or conditions are malformed
+    """
+    scale = 0.01 if (rule.unit or "").strip().lower() in ("%", "percent") else 1.0
+    formula = compile_formula(rule.calculation_formula) if rule.calculation_formula else None
+    if formula is not None and scale != 1.0:
+        inner = formula
+        formula = lambda env: inner(env) * scale  # noqa: E731
+    return CompiledRule(
+        check=_rule_check(rule),
+        rule_type=rule.rule_type,
+        min_value=_float(rule.min_value) * scale if rule.min_value is not None else None,
+        max_value=_float(rule.max_value) * scale if rule.max_value is not None else None,
+        formula=formula,
+        condition=compile_conditions(rule.conditions),
+        bylaw_reference=rule.bylaw_reference,
+    )
+
+
+def parcel_variables(parcel=None, proposal=None) -> Dict[str, float]:
+    """
+    Formula variables for a parcel and (optionally) a proposal.
+
+    Args:
+        parcel: Object with area_sqm, frontage_m, depth_m (e.g. a Parcel)
+        proposal: Object with building_height_m, building_storeys, building_area_sqm
+    """
+    def get(obj, name):
+        return _float(getattr(obj, name, None)) if obj is not None else None
+
+    return {
+        "lot_area": get(parcel, "area_sqm"),
+        "lot_width": get(parcel, "frontage_m"),
+        "lot_depth": get(parcel, "depth_m"),
+        "building_height": get(proposal, "building_height_m"),
+        "building_storeys": get(proposal, "building_storeys"),
+        "building_area": get(proposal, "building_area_sqm"),
+    }
+
+
+class ZoneRuleEngine:
+    """All zones and compiled rules in memory, keyed by upper-cased zone code."""
+
+    def __init__(self):
+        self.check_interval = get_settings().zone_rules_check_interval_seconds
+        self._zones: Optional[Dict[str, CompiledZone]] = None
+        self._by_id: Dict[object, CompiledZone] = {}
+        self._fingerprint = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self._generation = 0  # Bumped by invalidate(), so a load racing a write is re-checked
+        self.loads = 0
+        self.invalid_rules = 0
+        self.lookups = 0
+
+    def load(self, db: Session) -> int:
+        """
+        (Re)load and compile every Zone and ZoneRule.
+
+        Rules whose formula or conditions do not compile are skipped and logged.
+
+        Returns:
+            Number of zones loaded
+        """
+        return len(self._load(db))
+
+    def _load(self, db: Session) -> Dict[str, CompiledZone]:
+        # Queries and compilation run without the lock: under AsyncSession.run_sync
+        # a query yields to the event loop, and a request waiting on a held thread
+        # lock would block the loop thread. Concurrent loads just both compile.
+        generation = self._generation
+        fingerprint = _fingerprint(db)
+        rules_by_zone: Dict[object, List[CompiledRule]] = {}
+        invalid = 0
+        for rule in db.query(ZoneRule).all():
+            try:
+                compiled = compile_rule(rule)
+            except FormulaError as e:
+                invalid += 1
+                logger.warning(f"Skipping zone rule {rule.id} ({rule.rule_type}): {e}")
+                continue
+            rules_by_zone.setdefault(rule.zone_id, []).append(compiled)
+
+        zones = {}
+        for zone in db.query(Zone).all():
+            defaults = {
+                check: _float(getattr(zone, column)) if column else None
+                for check, column in ZONE_LIMITS.items()
+            }
+            zones[zone.zone_code.upper()] = CompiledZone(
+                zone_id=zone.id,
+                zone_code=zone.zone_code,
+                defaults=defaults,
+                rules=tuple(rules_by_zone.get(zone.id, ())),
+            )
+
+        with self._lock:
+            self._zones = zones
+            self._by_id = {z.zone_id: z for z in zones.values()}
+            # Invalidated while loading: keep the result, but re-check on the next lookup
+            current = generation == self._generation
+            self._fingerprint = fingerprint if current else None
+            self._last_check = time.monotonic() if current else 0.0
+            self.invalid_rules = invalid
+            self.loads += 1
+        logger.info(f"Zone rules loaded: {len(zones)} zones, {sum(len(z.rules) for z in zones.values())} rules")
+        return zones
+
+    def _ensure_loaded(self, db: Session) -> Dict[str, CompiledZone]:
+        zones = self._zones
+        if zones is None:
+            return self._load(db)
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            self._last_check = now
+            if _fingerprint(db) != self._fingerprint:
+                return self._load(db)
+        return zones
+
+    def get_zone(self, db: Session, zone_code: str) -> Optional[CompiledZone]:
+        """A zone by code (case-insensitive), or None."""
+        self.lookups += 1
+        return self._ensure_loaded(db).get((zone_code or "").strip().upper())
+
+    def get_zone_by_id(self, db: Session, zone_id) -> Optional[CompiledZone]:
+        """A zone by primary key, or None."""
+        zones = self._ensure_loaded(db)
+        self.lookups += 1
+        if zones is self._zones:
+            return self._by_id.get(zone_id)
+        # Invalidated since the load returned; look it up in the zones we got
+        return next((z for z in zones.values() if z.zone_id == zone_id), None)
+
+    def limits(self, db: Session, zone_id, parcel=None, proposal=None) -> Dict[str, Optional[float]]:
+        """
+        Zoning limits for a parcel in a zone.
+
+        Args:
+            db: Database session (used only to load/refresh the cache)
+            zone_id: Zone primary key
+            parcel: Parcel (or row with area_sqm, frontage_m, depth_m)
+            proposal: Proposed building (ZoningCheckRequest-like), for rules
+                that depend on the building
+
+        Returns:
+            Check name (see ZONE_LIMITS) -> limit, None where the zone sets none
+        """
+        zone = self.get_zone_by_id(db, zone_id)
+        if zone is None:
+            return {check: None for check in ZONE_LIMITS}
+        limits = dict(zone.defaults)
+        if not zone.rules:
+            return limits
+
+        variables = parcel_variables(parcel, proposal)
+        ruled: Dict[str, float] = {}
+        for rule in zone.rules:
+            if rule.check is None:
+                continue
+            value = rule.limit(variables)
+            if value is None:
+                continue
+            current = ruled.get(rule.check)
+            if current is None:
+                ruled[rule.check] = value
+            else:
+                ruled[rule.check] = max(current, value) if rule.check in MIN_CHECKS else min(current, value)
+        limits.update(ruled)
+        return limits
+
+    def invalidate(self) -> None:
+        """Drop the cache; the next lookup reloads."""
+        with self._lock:
+            self._generation += 1
+            self._zones = None
+            self._by_id = {}
+
+    def get_stats(self) -> dict:
+        zones = self._zones
+        return {
+            "loaded": zones is not None,
+            "zones": len(zones) if zones is not None else 0,
+            "rules": sum(len(z.rules) for z in zones.values()) if zones is not None else 0,
+            "invalid_rules": self.invalid_rules,
+            "loads": self.loads,
+            "lookups": self.lookups,
+        }
+
+
+def _fingerprint(db: Session) -> tuple:
+    """Changes when zones or rules are added, removed or (for zones) updated."""
+    zones = db.query(func.count(Zone.id), func.max(Zone.updated_at)).one()
+    rules = db.query(func.count(ZoneRule.id), func.max(ZoneRule.created_at)).one()
+    return tuple(zones) + tuple(rules)
+
+
+# Singleton instance for easy import
+zone_rule_engine = ZoneRuleEngine()
+
+
+def _on_change(*args, **kw):
+    zone_rule_engine.invalidate()
+
+
+def register_zone_rule_listeners() -> None:
+    """Drop the cache on Zone/ZoneRule writes and table (re)creation in this process."""
+    for model in (Zone, ZoneRule):
+        for event_name in ("after_insert", "after_update", "after_delete"):
+            if not event.contains(model, event_name, _on_change):
+                event.listen(model, event_name, _on_change)
+        for event_name in ("after_create", "after_drop"):
+            if not event.contains(model.__table__, event_name, _on_change):
+                event.listen(model.__table__, event_name, _on_change)
+
+
+register_zone_rule_listeners()
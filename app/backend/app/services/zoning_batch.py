@@ -0,0 +1,204 @@
+"""
+Batch zoning compliance checks.
+
+`/zones/check-zoning` checks one proposal against one parcel's zone, one
+hand-written branch per limit. Feasibility sweeps check hundreds of
+(parcel, proposal) pairs at once; here:
+
+- Parcels are fetched in one query (addresses go through the cached
+  address resolver first); zones and their parcel-specific limits come
+  from the in-memory zone rule engine (services/zone_rules.py)
+- Proposed values and limits become (items x checks) float arrays, with
+  NaN for "not given"
+- Every check for every item is one NumPy comparison; a check applies only
+  where both the proposal and the limit are present, as in the single check
+
+Results are columnar: one list per field, aligned with the request items.
+"""
+import logging
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from ..models.zones import Parcel
+from .address_resolver import address_resolver
+from .zone_index import get_zone_index, clean_zone_code
+from .zone_rules import CompiledZone, zone_rule_engine
+
+logger = logging.getLogger(__name__)
+
+NOT_CHECKED, PASS, FAIL = 0, 1, 2
+STATUS_NAMES = {PASS: "pass", FAIL: "fail"}
+
+
+class BatchCheck(NamedTuple):
+    """One vectorized compliance check."""
+    name: str
+    request_field: str  # Proposed value on ZoningCheckRequest
+    is_max: bool  # Proposed must be <= limit (else >= limit)
+
+
+CHECKS = (
+    BatchCheck("height_m", "building_height_m", True),
+    BatchCheck("storeys", "building_storeys", True),
+    BatchCheck("front_setback_m", "front_setback_m", False),
+    BatchCheck("side_setback_m", "side_setback_m", False),
+    BatchCheck("rear_setback_m", "rear_setback_m", False),
+    BatchCheck("far", "floor_area_ratio", True),
+    BatchCheck("coverage", "building_area_sqm", True),  # building area / lot area
+    BatchCheck("parking_stalls", "parking_stalls", False),
+)
+COVERAGE = [c.name for c in CHECKS].index("coverage")
+
+
+def _float(value) -> float:
+    return float(value) if value is not None else np.nan
+
+
+def evaluate(proposed: np.ndarray, limits: np.ndarray, is_max: np.ndarray) -> np.ndarray:
+    """
+    Status codes for a grid of checks.
+
+    Args:
+        proposed: (items x checks) proposed values, NaN where not given
+        limits: (items x checks) limits, NaN (or 0) where the zone sets none
+        is_max: (checks,) True where the limit is a maximum
+
+    Returns:
+        (items x checks) int8 array of NOT_CHECKED, PASS or FAIL
+    """
+    applies = ~np.isnan(proposed) & ~np.isnan(limits) & (limits != 0)
+    with np.errstate(invalid="ignore"):
+        violates = np.where(is_max, proposed > limits, proposed < limits)
+    return np.where(applies, np.where(violates, FAIL, PASS), NOT_CHECKED).astype(np.int8)
+
+
+def _resolve_parcels(db: Session, items: Sequence) -> List[Optional[object]]:
+    """Parcel rows aligned with items (None if not found), in one query."""
+    wanted = [
+        item.parcel_id if item.parcel_id else (
+            resolution.parcel_id
+            if item.address and (resolution := address_resolver.resolve_match(db, item.address))
+            else None
+        )
+        for item in items
+    ]
+    ids = {parcel_id for parcel_id in wanted if parcel_id is not None}
+    rows = {}
+    if ids:
+        rows = {
+            r.id: r
+            for r in db.query(
+                Parcel.id, Parcel.address, Parcel.zone_id, Parcel.area_sqm, Parcel.frontage_m,
+                Parcel.depth_m, Parcel.latitude, Parcel.longitude,
+            ).filter(Parcel.id.in_(ids)).all()
+        }
+    return [rows.get(parcel_id) if parcel_id is not None else None for parcel_id in wanted]
+
+
+def _resolve_zones(db: Session, parcels: Sequence) -> List[Optional[CompiledZone]]:
+    """Zones aligned with parcels; parcels without zone_id fall back to the district polygons."""
+    codes: Dict[int, str] = {}
+    index = get_zone_index()
+    unzoned = [
+        i for i, p in enumerate(parcels)
+        if p is not None and p.zone_id is None and p.latitude is not None and p.longitude is not None
+    ]
+    if index is not None and unzoned:
+        found = index.lookup_many(
+            [float(parcels[i].latitude) for i in unzoned], [float(parcels[i].longitude) for i in unzoned]
+        )
+        codes = {i: clean_zone_code(code) for i, code in zip(unzoned, found) if code is not None}
+
+    return [
+        None if p is None else (
+            zone_rule_engine.get_zone_by_id(db, p.zone_id) if p.zone_id is not None
+            else zone_rule_engine.get_zone(db, codes[i]) if i in codes else None
+        )
+        for i, p in enumerate(parcels)
+    ]
+
+
+def check_zoning_batch(db: Session, items: Sequence) -> dict:
+    """
+    Check many proposals against their parcels' zones.
+
+    Args:
+        db: Database session
+        items: ZoningCheckRequest-like objects (parcel_id or address, plus
+            proposed building parameters)
+
+    Returns:
+        Columnar result: "checks" (check names), then one list per field
+        aligned with items - parcel_id, address, zone_code, overall_status
+        (pass, fail, needs_review or error), failed, error - and "status"
+        and "limit" mapping each check name to its column
+    """
+    n = len(items)
+    parcels = _resolve_parcels(db, items)
+    zones = _resolve_zones(db, parcels)
+
+    proposed = np.array(
+        [[_float(getattr(item, check.request_field)) for check in CHECKS] for item in items], dtype=float
+    ).reshape(n, len(CHECKS))
+    zone_limits = [
+        zone_rule_engine.limits(db, zone.zone_id, parcel, item) if zone is not None else {}
+        for zone, parcel, item in zip(zones, parcels, items)
+    ]
+    limits = np.array(
+        [[_float(z.get(check.name)) for check in CHECKS] for z in zone_limits], dtype=float
+    ).reshape(n, len(CHECKS))
+
+    # Coverage: proposed footprint over lot area
+    lot_area = np.array(
+        [_float(p.area_sqm) if p is not None else np.nan for p in parcels], dtype=float
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        proposed[:, COVERAGE] = np.where(lot_area > 0, proposed[:, COVERAGE] / lot_area, np.nan)
+
+    status = evaluate(proposed, limits, np.array([check.is_max for check in CHECKS]))
+    failed = (status == FAIL).sum(axis=1)
+    checked = (status != NOT_CHECKED).sum(axis=1)
+
+    errors = [
+        "Parcel not found" if parcel is None else ("No zone designation found" if zone is None else None)
+        for parcel, zone in zip(parcels, zones)
+    ]
+    overall = np.where(failed > 0, "fail", np.where(checked == 0, "needs_review", "pass"))
+
+    return {
+        "count": n,
+        "checks": [check.name for check in CHECKS],
+        "parcel_id": [str(p.id) if p is not None else None for p in parcels],
+        "address": [p.address if p is not None else None for p in parcels],
+        "zone_code": [zone.zone_code if zone is not None else None for zone in zones],
+        "overall_status": ["error" if error else str(s) for s, error in zip(overall, errors)],
+        "failed": failed.tolist(),
+        "error": errors,
+        "status": {
+            check.name: [STATUS_NAMES.get(int(code)) for code in status[:, j]]
+            for j, check in enumerate(CHECKS)
+        },
+        "limit": {
+            check.name: [None if np.isnan(v) else float(v) for v in limits[:, j]]
+            for j, check in enumerate(CHECKS)
+        },
+    }
+
+
+def iter_rows(result: dict):
+    """Rows of a columnar batch result, one dict per item (for NDJSON)."""
+    for i in range(result["count"]):
+        yield {
+            "index": i,
+            "parcel_id": result["parcel_id"][i],
+            "address": result["address"][i],
+            "zone_code": result["zone_code"][i],
+            "overall_status": result["overall_status"][i],
+            "failed": result["failed"][i],
+            "error": result["error"][i],
+            "checks": {
+                name: result["status"][name][i] for name in result["checks"] if result["status"][name][i]
+            },
+        }
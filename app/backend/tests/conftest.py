@@ -2,19 +2,23 @@
 Pytest fixtures for Calgary Building Code Expert System tests.
 """
 import os
+import tempfile
 import pytest
 from datetime import date, datetime
 from uuid import uuid4
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 from fastapi.testclient import TestClient
 
 # Set test environment before importing app modules
 os.environ["DATABASE_URL"] = "sqlite:///:memory:"
 os.environ["DATABASE_ECHO"] = "false"
+# Tuned password-hash parameters are persisted at startup; keep them out of the real data_dir
+os.environ["PASSWORD_HASH_PARAMS_PATH"] = os.path.join(tempfile.mkdtemp(), "password_hash.json")
 
-from app.database import Base, get_db
+from app.database import Base, get_db, get_read_db, get_async_db, get_async_read_db
 from app.main import app
 from app.models.codes import Code, Article, Requirement, RequirementCondition
 from app.models.zones import Zone, ZoneRule, Parcel
@@ -22,10 +26,14 @@ from app.models.projects import Project, ComplianceCheck, Document, ExtractedDat
 from app.models.auth import User  # Import User model for auth tests
 from app.models.permits import PermitApplication  # Import PermitApplication for permit tests
 from app.models.standata import Standata  # Import Standata for standata tests
+from app.services.search_cache import search_cache
+from app.middleware.rate_limit import rate_limiter
 
 
-# Create test database
-TEST_DATABASE_URL = "sqlite:///:memory:"
+# Create test database: a shared-cache in-memory database, so the async
+# endpoints (aiosqlite, its own connections) see the same tables and rows.
+# The sync engine's single connection keeps it alive.
+TEST_DATABASE_URL = "sqlite:///file:testdb?mode=memory&cache=shared&uri=true"
 engine = create_engine(
     TEST_DATABASE_URL,
     connect_args={"check_same_thread": False},
@@ -33,6 +41,12 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(
+    "sqlite+aiosqlite:///file:testdb?mode=memory&cache=shared&uri=true",
+    poolclass=NullPool,
+)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
 
 @pytest.fixture(scope="function")
 def db_session():
@@ -55,7 +69,16 @@ def client(db_session):
         finally:
             pass
 
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as session:
+            yield session
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_read_db] = override_get_async_db
+    search_cache.clear()  # Tables are recreated per test, so cached results would be stale
+    rate_limiter.reset()  # Rate-limit counts are re-seeded from the fresh rate_limits table
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
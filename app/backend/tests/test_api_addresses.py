@@ -109,6 +109,40 @@ class TestAddressAutocomplete:
         assert abs(data[0]["latitude"] - 51.0447) < 0.01
         assert abs(data[0]["longitude"] - (-114.0719)) < 0.01
 
+    def test_autocomplete_prefix_of_last_word(self, client, sample_parcel):
+        """Test that the word being typed matches as a prefix."""
+        response = client.get("/api/v1/addresses/autocomplete?q=123 Tes")
+        assert response.status_code == 200
+        data = response.json()
+        assert [r["address"] for r in data] == ["123 Test Street NW"]
+
+    def test_autocomplete_tolerates_typos(self, client, db_session, sample_zone):
+        """Test that a misspelled street still finds the address."""
+        from app.models.zones import Parcel
+
+        db_session.add(Parcel(address="4500 Macleod Trail SE", community_name="Manchester",
+                              zone_id=sample_zone.id))
+        db_session.commit()
+
+        response = client.get("/api/v1/addresses/autocomplete?q=4500 Makleod")
+        assert response.status_code == 200
+        data = response.json()
+        assert data[0]["address"] == "4500 Macleod Trail SE"
+        assert data[0]["zone_code"] == "R-C1"
+
+    def test_autocomplete_sees_updates(self, client, db_session, sample_parcel):
+        """Test that renamed and deleted parcels are reflected immediately."""
+        client.get("/api/v1/addresses/autocomplete?q=Test")
+
+        sample_parcel.address = "123 Renamed Street NW"
+        db_session.commit()
+        assert client.get("/api/v1/addresses/autocomplete?q=Test").json() == []
+        assert len(client.get("/api/v1/addresses/autocomplete?q=Renamed").json()) == 1
+
+        db_session.delete(sample_parcel)
+        db_session.commit()
+        assert client.get("/api/v1/addresses/autocomplete?q=Renamed").json() == []
+
     def test_autocomplete_max_limit_validation(self, client, sample_parcel):
         """Test autocomplete validates maximum limit (50)."""
         response = client.get("/api/v1/addresses/autocomplete?q=Test&limit=100")
@@ -315,3 +349,63 @@ class TestAddressSearch:
         data = response.json()
         assert len(data) >= 1
         assert "Test" in data[0]["community"]
+
+
+class TestReverseGeocode:
+    """Tests for the nearest-parcel (reverse geocoding) endpoints."""
+
+    @pytest.fixture
+    def located_parcels(self, db_session, sample_zone, tmp_path, monkeypatch):
+        from app.config import get_settings
+        from app.models.zones import Parcel
+        from app.services.parcel_locator import parcel_locator
+
+        monkeypatch.setattr(get_settings(), "parcel_grid_dir", str(tmp_path))
+        parcels = [
+            Parcel(address=f"{100 + i} Grid Street NW", community_name="Grid Park",
+                   zone_id=sample_zone.id, latitude=51.0450, longitude=-114.0700 + i * 0.001)
+            for i in range(3)
+        ]
+        db_session.add_all(parcels)
+        db_session.commit()
+        parcel_locator.invalidate()
+        yield parcels
+        parcel_locator.invalidate()
+
+    def test_reverse_nearest_first(self, client, located_parcels):
+        response = client.get("/api/v1/addresses/reverse?lat=51.0450&lon=-114.0692&k=2")
+        assert response.status_code == 200
+        data = response.json()
+        assert [r["address"] for r in data] == ["101 Grid Street NW", "100 Grid Street NW"]
+        assert data[0]["zone_code"] == "R-C1"
+        assert data[0]["parcel_id"] == str(located_parcels[1].id)
+        assert data[0]["distance_m"] < data[1]["distance_m"]
+
+    def test_reverse_outside_radius(self, client, located_parcels):
+        response = client.get("/api/v1/addresses/reverse?lat=51.2&lon=-114.07&radius_m=500")
+        assert response.status_code == 200
+        assert response.json() == []
+
+        response = client.get("/api/v1/addresses/reverse?lat=51.2&lon=-114.07&radius_m=0")
+        assert response.status_code == 422
+
+    def test_reverse_sees_new_parcels(self, client, db_session, located_parcels):
+        from app.models.zones import Parcel
+
+        client.get("/api/v1/addresses/reverse?lat=51.0450&lon=-114.0600")
+        db_session.add(Parcel(address="900 New Street NW", latitude=51.0450, longitude=-114.0600))
+        db_session.commit()
+
+        response = client.get("/api/v1/addresses/reverse?lat=51.0450&lon=-114.0600")
+        assert response.json()[0]["address"] == "900 New Street NW"
+
+    def test_reverse_batch(self, client, located_parcels):
+        response = client.post("/api/v1/addresses/reverse/batch", json={
+            "points": [{"lat": 51.0450, "lon": -114.0681}, {"lat": 51.2, "lon": -114.07}],
+            "k": 1,
+        })
+        assert response.status_code == 200
+        data = response.json()
+        assert [len(item["results"]) for item in data] == [1, 0]
+        assert data[0]["results"][0]["address"] == "102 Grid Street NW"
+        assert data[1]["lat"] == 51.2
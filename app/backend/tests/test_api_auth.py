@@ -1101,3 +1101,131 @@ class TestAuthenticationFlow:
         response2 = client.get("/api/v1/auth/me")
         assert response2.status_code == 200
         assert response2.json()["email"] == "refreshsession@example.com"
+
+
+class TestUserCache:
+    """Tests for the authenticated-user cache."""
+
+    def _login(self, client, email):
+        client.post("/api/v1/auth/register", json={"email": email, "password": "securepass123"})
+        client.post("/api/v1/auth/login", json={"email": email, "password": "securepass123"})
+
+    def test_cached_user_skips_lookup_and_sees_updates(self, client, db_session):
+        from sqlalchemy import event
+        from app.models.auth import User
+
+        self._login(client, "cached@example.com")
+        assert client.get("/api/v1/auth/me").status_code == 200
+
+        statements = []
+        bind = db_session.get_bind()
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+        event.listen(bind, "before_cursor_execute", listener)
+        try:
+            assert client.get("/api/v1/auth/me").status_code == 200
+        finally:
+            event.remove(bind, "before_cursor_execute", listener)
+        assert not [s for s in statements if "FROM users" in s]
+
+        # Writes through the cached object work and drop the entry
+        response = client.patch("/api/v1/auth/me", json={"full_name": "Cached Name"})
+        assert response.json()["full_name"] == "Cached Name"
+        assert client.get("/api/v1/auth/me").json()["full_name"] == "Cached Name"
+
+        # Deactivation takes effect at once
+        user = db_session.query(User).filter(User.email == "cached@example.com").first()
+        user.is_active = False
+        db_session.commit()
+        assert client.get("/api/v1/auth/me").status_code == 403
+
+    def test_password_change_revokes_old_tokens(self, client):
+        self._login(client, "revoke@example.com")
+        old_token = client.cookies.get("access_token")
+
+        response = client.post(
+            "/api/v1/auth/change-password",
+            json={"current_password": "securepass123", "new_password": "newpassword123"},
+        )
+        assert response.status_code == 200
+        assert client.get("/api/v1/auth/me").status_code == 200  # New cookies were set
+
+        client.cookies.clear()
+        response = client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {old_token}"})
+        assert response.status_code == 401
+
+
+class TestPasswordHashing:
+    """Tests for Argon2 hashing off the event loop."""
+
+    def test_tune_and_rehash_weaker_hashes(self):
+        import asyncio
+        from app.core.password_hashing import PasswordHasher, make_context
+
+        hasher = PasswordHasher()
+        hasher.memory_kib = 1024  # Keep the test fast
+        tuned = hasher.tune(target_ms=10_000, max_time_cost=2, min_time_cost=1)
+        assert tuned["time_cost"] == 2 and hasher.time_cost == 2
+
+        weak = make_context(1, 1024, hasher.parallelism).hash("securepass123")
+        strong = make_context(3, 1024, hasher.parallelism).hash("securepass123")
+        assert hasher.needs_rehash(weak) and not hasher.needs_rehash(strong)
+
+        async def run():
+            return (
+                await hasher.verify_and_update("securepass123", weak),
+                await hasher.verify_and_update("securepass123", strong),
+                await hasher.verify_and_update("wrongpass", weak),
+            )
+
+        (valid, new_hash), strong_result, wrong_result = asyncio.run(run())
+        assert valid and "t=2" in new_hash and hasher.context.verify("securepass123", new_hash)
+        assert strong_result == (True, None) and wrong_result == (False, None)
+        stats = hasher.get_stats()
+        assert stats["operations"] == 3 and stats["rehashes"] == 1 and stats["queue_depth"] == 0
+        hasher.shutdown()
+
+    def test_login_upgrades_weak_hash(self, client, db_session):
+        from app.core.password_hashing import make_context
+        from app.models.auth import User
+
+        client.post("/api/v1/auth/register", json={"email": "rehash@example.com", "password": "securepass123"})
+        user = db_session.query(User).filter(User.email == "rehash@example.com").first()
+        user.hashed_password = make_context(1, 1024, 1).hash("securepass123")
+        db_session.commit()
+
+        client.post("/api/v1/auth/login", json={"email": "rehash@example.com", "password": "securepass123"})
+        earlier_token = client.cookies.get("access_token")
+        user.hashed_password = make_context(1, 1024, 1).hash("securepass123")
+        db_session.commit()
+
+        response = client.post("/api/v1/auth/login", json={"email": "rehash@example.com", "password": "securepass123"})
+        assert response.status_code == 200
+        db_session.expire_all()
+        assert "m=1024" not in user.hashed_password
+
+        # The rehash is not a password change: tokens from other sessions stay valid
+        client.cookies.clear()
+        response = client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {earlier_token}"})
+        assert response.status_code == 200
+
+    def test_tuning_floor_and_persistence(self, tmp_path, monkeypatch):
+        import asyncio
+        from app.core import password_hashing
+        from app.core.password_hashing import MIN_TIME_COST, PasswordHasher
+
+        hasher = PasswordHasher()
+        hasher.memory_kib = 1024
+        tuned = hasher.tune(target_ms=0, max_time_cost=MIN_TIME_COST + 2)
+        assert tuned["time_cost"] == MIN_TIME_COST  # Never below passlib's default
+
+        params_file = tmp_path / "password_hash.json"
+        monkeypatch.setattr(password_hashing, "params_path", lambda: params_file)
+        hasher._save_params(params_file)
+
+        restarted = PasswordHasher()
+        restarted.memory_kib = 1024
+        restarted.tune = None  # A persisted cost must not be re-measured
+        params = asyncio.run(restarted.configure())
+        assert params["time_cost"] == MIN_TIME_COST and params["source"] == "persisted"
+        hasher.shutdown()
+        restarted.shutdown()
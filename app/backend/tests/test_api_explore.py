@@ -94,12 +94,92 @@ class TestExploreArticleEndpoints:
         assert data["article_number"] == "9.8.4.1"
         assert data["title"] == "Stair Width"
 
+    def test_list_articles_returns_summary(self, client, sample_code, sample_article):
+        """Test that list endpoints omit full_text unless requested."""
+        response = client.get(f"/api/v1/explore/codes/{sample_code.id}/articles")
+        assert response.status_code == 200
+        data = response.json()
+        assert "full_text" not in data[0]
+        assert data[0]["title"] == "Stair Width"
+
+    def test_list_articles_sparse_fields(self, client, sample_code, sample_article):
+        """Test choosing article fields with fields=."""
+        response = client.get(
+            f"/api/v1/explore/codes/{sample_code.id}/articles?fields=article_number,full_text"
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert set(data[0]) == {"id", "article_number", "full_text"}
+        assert "860 mm" in data[0]["full_text"]
+
+    def test_list_articles_unknown_field(self, client, sample_code, sample_article):
+        """Test that unknown or internal fields are rejected."""
+        response = client.get(f"/api/v1/explore/codes/{sample_code.id}/articles?fields=embedding")
+        assert response.status_code == 400
+        assert "embedding" in response.json()["detail"]
+
+    def test_list_articles_cursor_pagination(self, client, db_session, sample_code, sample_article):
+        """Test walking every article page by page with cursors."""
+        from app.models.codes import Article
+
+        for number in ("9.8.4.2", "9.8.4.3", "9.8.5.1", "9.8.6.1"):
+            db_session.add(Article(
+                id=uuid4(), code_id=sample_code.id, article_number=number,
+                full_text="Text.", part_number=9, division_number=8,
+            ))
+        db_session.commit()
+
+        url = f"/api/v1/explore/codes/{sample_code.id}/articles?limit=2&include_total=true"
+        response = client.get(url)
+        assert response.headers["X-Total-Count"] == "5"
+
+        numbers = []
+        while True:
+            assert response.status_code == 200
+            numbers.extend(a["article_number"] for a in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+            response = client.get(f"{url}&cursor={cursor}")
+
+        assert numbers == ["9.8.4.1", "9.8.4.2", "9.8.4.3", "9.8.5.1", "9.8.6.1"]
+
+    def test_list_articles_invalid_cursor(self, client, sample_code, sample_article):
+        """Test that malformed cursors are rejected."""
+        response = client.get(f"/api/v1/explore/codes/{sample_code.id}/articles?cursor=not-a-cursor")
+        assert response.status_code == 400
+
+    def test_get_article_sparse_fields(self, client, sample_article):
+        """Test selecting fields on a single article."""
+        response = client.get(f"/api/v1/explore/articles/{sample_article.id}?fields=title")
+        assert response.status_code == 200
+        assert response.json() == {"id": str(sample_article.id), "title": "Stair Width"}
+
     def test_get_article_not_found(self, client):
         """Test getting a non-existent article."""
         fake_id = uuid4()
         response = client.get(f"/api/v1/explore/articles/{fake_id}")
         assert response.status_code == 404
 
+    def test_list_standata_cursor_pagination(self, client, db_session):
+        """Test STANDATA pages newest first, with undated bulletins last."""
+        from datetime import date
+
+        self._add_bulletin(db_session, "22-BCI-010", [], date(2022, 1, 1))
+        self._add_bulletin(db_session, "23-BCI-011", [], date(2023, 1, 1))
+        self._add_bulletin(db_session, "23-BCI-012", [])
+        self._add_bulletin(db_session, "24-BCI-013", [], date(2024, 1, 1))
+
+        response = client.get("/api/v1/explore/standata?limit=3")
+        assert response.status_code == 200
+        first = [b["bulletin_number"] for b in response.json()]
+        assert first == ["24-BCI-013", "23-BCI-011", "22-BCI-010"]
+
+        cursor = response.headers["X-Next-Cursor"]
+        response = client.get(f"/api/v1/explore/standata?limit=3&cursor={cursor}")
+        assert [b["bulletin_number"] for b in response.json()] == ["23-BCI-012"]
+        assert "X-Next-Cursor" not in response.headers
+
     def test_get_article_requirements(self, client, sample_article, sample_requirement):
         """Test getting requirements for an article."""
         response = client.get(f"/api/v1/explore/articles/{sample_article.id}/requirements")
@@ -109,6 +189,56 @@ class TestExploreArticleEndpoints:
         assert data[0]["element"] == "stair_width"
         assert data[0]["min_value"] == 860
 
+    @staticmethod
+    def _add_bulletin(db_session, bulletin_number, code_references, effective_date=None):
+        from app.models.standata import Standata
+
+        bulletin = Standata(
+            id=uuid4(),
+            bulletin_number=bulletin_number,
+            title=f"Bulletin {bulletin_number}",
+            category="BCI",
+            effective_date=effective_date,
+            full_text="Interpretation text.",
+            code_references=code_references,
+            pdf_path=f"/data/standata/{bulletin_number}.pdf",
+            pdf_filename=f"{bulletin_number}.pdf",
+        )
+        db_session.add(bulletin)
+        db_session.commit()
+        return bulletin
+
+    def test_related_standata_exact_reference(self, client, db_session):
+        """Test bulletins citing the article are returned, newest first."""
+        from datetime import date
+
+        self._add_bulletin(db_session, "22-BCI-001", ["9.8.4.1"], date(2022, 1, 1))
+        self._add_bulletin(db_session, "23-BCI-002", ["9.8.4.1", "9.9.10.1"], date(2023, 1, 1))
+        self._add_bulletin(db_session, "23-BCI-003", ["9.8.4.2"], date(2023, 6, 1))
+
+        response = client.get("/api/v1/explore/articles/9.8.4.1/related-standata")
+        assert response.status_code == 200
+        data = response.json()
+        assert [b["bulletin_number"] for b in data["bulletins"]] == ["23-BCI-002", "22-BCI-001"]
+
+    def test_related_standata_falls_back_to_section(self, client, db_session):
+        """Test an uncited article gets bulletins citing its Section."""
+        self._add_bulletin(db_session, "23-BCI-004", ["9.10.9.6"])
+        self._add_bulletin(db_session, "23-BCI-005", ["9.10.14.1"])
+
+        response = client.get("/api/v1/explore/articles/9.10.9.2/related-standata")
+        assert response.status_code == 200
+        data = response.json()
+        assert [b["bulletin_number"] for b in data["bulletins"]] == ["23-BCI-004"]
+
+    def test_related_standata_none(self, client, db_session):
+        """Test no bulletins are returned for an unrelated article."""
+        self._add_bulletin(db_session, "23-BCI-006", ["9.10.9.6"])
+
+        response = client.get("/api/v1/explore/articles/3.2.1.1/related-standata")
+        assert response.status_code == 200
+        assert response.json()["total_results"] == 0
+
 
 class TestExploreSearchEndpoints:
     """Tests for search endpoints."""
@@ -155,6 +285,121 @@ class TestExploreSearchEndpoints:
         data = response.json()
         assert len(data["results"]) <= 1
 
+    def test_search_codes_semantic_uses_vector_index(self, client, sample_code, sample_article):
+        """Test semantic search ranks from the ANN index and fills relevance_score."""
+        from unittest.mock import AsyncMock, patch
+        from app.services import vector_index
+        from app.services.vector_index import VectorIndex
+
+        embedding = [0.0] * 384
+        embedding[0] = 1.0
+        index = VectorIndex.build([sample_article.id], [embedding])
+
+        mock_service = patch("app.services.hybrid_search.get_embedding_service")
+        with patch.object(vector_index, "_article_index", index), mock_service as get_service:
+            get_service.return_value.embed_query_async = AsyncMock(return_value=embedding)
+            response = client.post(
+                "/api/v1/explore/search",
+                json={"query": "how broad must a staircase be", "limit": 5}
+            )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["search_type"] == "semantic"
+        assert data["results"][0]["article_number"] == "9.8.4.1"
+        assert data["results"][0]["relevance_score"] > 0.99
+
+    def test_search_codes_hybrid_fuses_lexical_and_vector(self, client, sample_code, sample_article):
+        """Test queries matched by both stages are fused and report stage timings."""
+        from unittest.mock import AsyncMock, patch
+        from app.services import vector_index
+        from app.services.vector_index import VectorIndex
+
+        embedding = [0.0] * 384
+        embedding[0] = 1.0
+        index = VectorIndex.build([sample_article.id], [embedding])
+
+        mock_service = patch("app.services.hybrid_search.get_embedding_service")
+        with patch.object(vector_index, "_article_index", index), mock_service as get_service:
+            get_service.return_value.embed_query_async = AsyncMock(return_value=embedding)
+            response = client.post(
+                "/api/v1/explore/search",
+                json={"query": "stair width", "limit": 5, "part_numbers": [9]}
+            )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["search_type"] == "hybrid"
+        assert data["results"][0]["relevance_score"] > 0
+        assert "lexical_ms" in data["timings"]
+        assert "vector_ms" in data["timings"]
+        assert "<mark>" in data["results"][0]["highlight"]
+
+    def test_search_codes_hybrid_honours_part_filter(self, client, sample_code, sample_article):
+        """Test both stages drop articles outside the requested parts."""
+        from unittest.mock import AsyncMock, patch
+        from app.services import vector_index
+        from app.services.vector_index import VectorIndex
+
+        embedding = [0.0] * 384
+        embedding[0] = 1.0
+        index = VectorIndex.build([sample_article.id], [embedding])
+
+        mock_service = patch("app.services.hybrid_search.get_embedding_service")
+        with patch.object(vector_index, "_article_index", index), mock_service as get_service:
+            get_service.return_value.embed_query_async = AsyncMock(return_value=embedding)
+            response = client.post(
+                "/api/v1/explore/search",
+                json={"query": "stair width", "limit": 5, "part_numbers": [3]}
+            )
+
+        assert response.status_code == 200
+        assert response.json()["total_results"] == 0
+
+    def test_search_codes_repeat_query_served_from_cache(self, client, sample_code, sample_article):
+        """Test an identical search is answered from the result cache."""
+        first = client.post("/api/v1/explore/search", json={"query": "stair width", "limit": 5})
+        second = client.post("/api/v1/explore/search", json={"query": "Stair  width?", "limit": 5})
+
+        assert first.status_code == 200
+        assert second.status_code == 200
+        assert second.json()["results"] == first.json()["results"]
+        assert "cache_ms" in second.json()["timings"]
+        assert second.json()["query"] == "Stair  width?"
+
+    def test_search_cache_invalidated_when_articles_change(self, client, db_session, sample_code, sample_article):
+        """Test adding an article drops cached results."""
+        from app.models.codes import Article
+
+        first = client.post("/api/v1/explore/search", json={"query": "stair", "limit": 10})
+        assert first.json()["total_results"] == 1
+
+        db_session.add(Article(
+            code_id=sample_code.id,
+            article_number="9.8.2.1",
+            title="Stair Riser Height",
+            full_text="The rise of a stair shall be not more than 200 mm.",
+            part_number=9,
+        ))
+        db_session.commit()
+
+        second = client.post("/api/v1/explore/search", json={"query": "stair", "limit": 10})
+        assert second.json()["total_results"] == 2
+
+    def test_search_codes_semantic_falls_back_without_index(self, client, sample_code, sample_article):
+        """Test semantic search falls back to full-text when no index is loaded."""
+        from unittest.mock import patch
+        from app.services import vector_index
+
+        with patch.object(vector_index, "_article_index", None):
+            response = client.post(
+                "/api/v1/explore/search",
+                json={"query": "stair width", "limit": 5, "use_semantic": True}
+            )
+
+        assert response.status_code == 200
+        assert response.json()["search_type"] == "fulltext"
+
     def test_search_requirements_by_element(self, client, sample_requirement):
         """Test searching requirements by element."""
         response = client.get("/api/v1/explore/requirements?element=stair")
@@ -171,6 +416,21 @@ class TestExploreSearchEndpoints:
         assert len(data) >= 1
         assert data[0]["requirement_type"] == "dimensional"
 
+    def test_search_requirements_summary_and_fields(self, client, sample_requirement):
+        """Test requirement summary projection and fields= with conditions."""
+        response = client.get("/api/v1/explore/requirements?element=stair")
+        assert response.status_code == 200
+        summary = response.json()[0]
+        assert "exact_quote" not in summary
+        assert "conditions" not in summary
+        assert summary["min_value"] == 860
+
+        response = client.get("/api/v1/explore/requirements?element=stair&fields=exact_quote,conditions")
+        assert response.status_code == 200
+        data = response.json()[0]
+        assert set(data) == {"id", "exact_quote", "conditions"}
+        assert data["conditions"] == []
+
     def test_search_requirements_verified_only(self, client, sample_requirement):
         """Test searching only verified requirements."""
         response = client.get("/api/v1/explore/requirements?verified_only=true")
@@ -179,6 +439,38 @@ class TestExploreSearchEndpoints:
         assert all(r["is_verified"] for r in data)
 
 
+class TestExploreCapabilities:
+    """Tests for the search capability registry endpoints."""
+
+    def test_get_capabilities(self, client, sample_code, sample_article):
+        """Test reporting available search backends per code."""
+        response = client.get("/api/v1/explore/capabilities")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["dialect"] == "sqlite"
+        assert data["fts5"]["articles"] is True
+        assert data["codes"][str(sample_code.id)]["article_count"] == 1
+
+    def test_refresh_requires_admin(self, client, db_session):
+        """Test that only admins can force a refresh."""
+        from app.models.auth import User
+
+        assert client.post("/api/v1/explore/capabilities/refresh").status_code == 401
+
+        client.post(
+            "/api/v1/auth/register",
+            json={"email": "ops@example.com", "password": "securepass123"}
+        )
+        assert client.post("/api/v1/explore/capabilities/refresh").status_code == 403
+
+        user = db_session.query(User).filter(User.email == "ops@example.com").one()
+        user.role = "admin"
+        db_session.commit()
+        response = client.post("/api/v1/explore/capabilities/refresh")
+        assert response.status_code == 200
+        assert "codes" in response.json()
+
+
 class TestExploreBrowseEndpoints:
     """Tests for browse endpoints."""
 
@@ -196,6 +488,71 @@ class TestExploreBrowseEndpoints:
         response = client.get("/api/v1/explore/browse/nonexistent")
         assert response.status_code == 404
 
+    def test_browse_code_structure_counts(self, client, sample_code, sample_article):
+        """Test parts carry titles and counts."""
+        response = client.get("/api/v1/explore/browse/building")
+        part = response.json()["parts"][0]
+        assert part["part_number"] == 9
+        assert part["title"] == "Stair Width"
+        assert part["article_count"] == 1
+        assert part["division_count"] == 1
+
+    def test_browse_etag_not_modified(self, client, sample_code, sample_article):
+        """Test a matching If-None-Match gets 304 without a body."""
+        first = client.get("/api/v1/explore/browse/building")
+        etag = first.headers["etag"]
+
+        second = client.get("/api/v1/explore/browse/building", headers={"If-None-Match": etag})
+        assert second.status_code == 304
+        assert second.content == b""
+
+    def test_browse_etag_changes_when_articles_change(self, client, db_session, sample_code, sample_article):
+        """Test the tree is rebuilt and re-tagged after a reload."""
+        from app.models.codes import Article
+
+        etag = client.get("/api/v1/explore/browse/building").headers["etag"]
+        db_session.add(Article(
+            code_id=sample_code.id, article_number="9.9.1.1", title="Means of Egress",
+            full_text="Egress text.", part_number=9, division_number=9, section_number=1,
+        ))
+        db_session.commit()
+
+        response = client.get("/api/v1/explore/browse/building", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert response.json()["parts"][0]["article_count"] == 2
+
+    def test_code_tree_depth(self, client, sample_code, sample_article):
+        """Test the tree endpoint expands to the requested depth without full text."""
+        response = client.get("/api/v1/explore/browse/building/tree?depth=3")
+        assert response.status_code == 200
+        part = response.json()["parts"][0]
+        division = part["children"][0]
+        section = division["children"][0]
+        assert (part["number"], division["number"], section["number"]) == ("9", "9.8", "9.8.4")
+        assert section["articles"] == [{
+            "id": str(sample_article.id), "article_number": "9.8.4.1", "title": "Stair Width",
+        }]
+
+        shallow = client.get("/api/v1/explore/browse/building/tree?depth=1").json()
+        assert "children" not in shallow["parts"][0]["children"][0]
+
+    def test_code_tree_node_expansion(self, client, sample_code, sample_article):
+        """Test lazy expansion returns a node's direct children."""
+        response = client.get("/api/v1/explore/browse/building/nodes/9.8")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["node"]["division_number"] == 8
+        assert [c["number"] for c in data["children"]] == ["9.8.4"]
+
+        section = client.get("/api/v1/explore/browse/building/nodes/9.8.4").json()
+        assert section["articles"][0]["article_number"] == "9.8.4.1"
+
+    def test_code_tree_node_not_found(self, client, sample_code, sample_article):
+        """Test unknown nodes return 404."""
+        response = client.get("/api/v1/explore/browse/building/nodes/3.1")
+        assert response.status_code == 404
+
 
 class TestExploreValidation:
     """Tests for input validation."""
@@ -117,6 +117,28 @@ class TestGuideAnalyzeEndpoint:
         assert len(data["warnings"]) > 0
         assert any("not found" in w.lower() for w in data["warnings"])
 
+    def test_analyze_project_ambiguous_address(self, client, db_session, sample_zone, sample_parcel):
+        """Test that an address matching several parcels is flagged."""
+        from app.models.zones import Parcel
+
+        db_session.add(Parcel(address="123 Test Street SE", zone_id=sample_zone.id))
+        db_session.commit()
+
+        response = client.post(
+            "/api/v1/guide/analyze",
+            json={
+                "address": "123 Test Street",
+                "project_type": "new_construction",
+                "occupancy_type": "residential",
+                "building_height_storeys": 2,
+                "footprint_area_sqm": 150
+            }
+        )
+        assert response.status_code == 200
+        warnings = response.json()["warnings"]
+        assert any("more than one parcel" in w for w in warnings)
+        assert not any("not found" in w.lower() for w in warnings)
+
     def test_analyze_project_permits_included(self, client, sample_zone, sample_parcel):
         """Test that permits are included in response."""
         response = client.post(
@@ -381,6 +381,19 @@ class TestPublicExploreEdgeCases:
         status = client.get("/api/v1/public/rate-limit-status").json()
         assert status["queries_remaining"] == initial_remaining - 1
 
+    def test_cached_query_still_counts(self, client, db_session):
+        """Test a repeated query served from the search cache still uses quota."""
+        for _ in range(2):
+            response = client.post(
+                "/api/v1/public/explore",
+                json={"query": "guard height", "limit": 10}
+            )
+            assert response.status_code == 200
+
+        assert response.headers["X-Queries-Remaining"] == "3"
+        status = client.get("/api/v1/public/rate-limit-status").json()
+        assert status["queries_used"] == 2
+
     def test_search_type_in_response(self, client):
         """Test search type is included in response (with empty results)."""
         response = client.post(
@@ -349,6 +349,40 @@ class TestSearchStandata:
         assert data["total_results"] >= 1
         assert data["results"][0]["relevance_snippet"] is not None
 
+    def test_search_full_text_snippet_is_highlighted(self, client, sample_standata_bci):
+        """Test full-text matches come back with highlighted snippets."""
+        response = client.get("/api/v1/standata/search?q=smoke+alarms")
+        assert response.status_code == 200
+        result = response.json()["results"][0]
+        assert result["match_type"] == "full_text"
+        assert "<mark>Smoke alarms</mark>" in result["relevance_snippet"]
+
+    def test_search_snippet_is_capped_for_long_bulletins(self, client, db_session):
+        """Test full-text snippets stay short for very long bulletins."""
+        bulletin = Standata(
+            id=uuid4(),
+            bulletin_number="24-BCB-099",
+            title="Long Bulletin",
+            category="BCB",
+            full_text=("Background material. " * 2000) + "Radon mitigation is required. " + ("More text. " * 2000),
+            pdf_path="/data/standata/24-BCB-099.pdf",
+            pdf_filename="24-BCB-099.pdf",
+        )
+        db_session.add(bulletin)
+        db_session.commit()
+
+        response = client.get("/api/v1/standata/search?q=radon")
+        assert response.status_code == 200
+        snippet = response.json()["results"][0]["relevance_snippet"]
+        assert "<mark>Radon</mark>" in snippet
+        assert len(snippet) < 400
+
+    def test_search_matches_word_variants(self, client, sample_standata_bci):
+        """Test stemming matches other forms of a word."""
+        response = client.get("/api/v1/standata/search?q=separations")
+        assert response.status_code == 200
+        assert response.json()["total_results"] == 1
+
     def test_search_filter_by_categories(
         self, client, sample_standata_bci, sample_standata_bcb
     ):
@@ -453,6 +487,24 @@ class TestGetBulletinsByCode:
             assert "title" in bulletin
             assert "category" in bulletin
 
+    def test_by_code_section_prefix(
+        self, client, sample_standata_bci, sample_standata_bcb
+    ):
+        """Test a Section number finds bulletins citing articles beneath it."""
+        response = client.get("/api/v1/standata/by-code/9.36")
+        assert response.status_code == 200
+        data = response.json()
+        assert [b["bulletin_number"] for b in data["bulletins"]] == ["23-BCB-001"]
+
+    def test_by_code_does_not_match_longer_numbers(self, client, db_session, sample_standata_bci):
+        """Test 9.8.4.1 does not match a bulletin citing only 9.8.4.10."""
+        sample_standata_bci.code_references = ["9.8.4.10"]
+        db_session.commit()
+
+        response = client.get("/api/v1/standata/by-code/9.8.4.1")
+        assert response.status_code == 200
+        assert response.json()["total_results"] == 0
+
 
 class TestGetBulletinByNumber:
     """Tests for getting a specific bulletin by number."""
@@ -130,6 +130,14 @@ class TestParcelEndpoints:
         data = response.json()
         assert len(data) <= 1
 
+    def test_search_parcels_normalized_prefix(self, client, sample_parcel):
+        """Test that spelling variants of the address find the parcel."""
+        response = client.get("/api/v1/zones/parcels/search?query=123 test st. n.w.")
+        assert response.status_code == 200
+        data = response.json()
+        assert [p["address"] for p in data] == ["123 Test Street NW"]
+        assert data[0]["zone_code"] == "R-C1"
+
     def test_search_parcels_query_too_short(self, client):
         """Test parcel search with query too short."""
         response = client.get("/api/v1/zones/parcels/search?query=ab")
@@ -141,6 +149,7 @@ class TestParcelEndpoints:
         assert response.status_code == 200
         data = response.json()
         assert data["address"] == "123 Test Street NW"
+        assert data["zone"]["zone_code"] == "R-C1"
 
     def test_get_parcel_not_found(self, client):
         """Test getting a non-existent parcel."""
@@ -149,6 +158,61 @@ class TestParcelEndpoints:
         assert response.status_code == 404
 
 
+class TestZoneLookupEndpoint:
+    """Tests for the point-in-polygon zone lookup endpoint."""
+
+    @pytest.fixture
+    def zone_index(self):
+        from app.services.zone_index import ZoneIndex, set_zone_index
+
+        index = ZoneIndex.from_features([{
+            "type": "Feature",
+            "properties": {"lu_code": "R-C1"},
+            "geometry": {"type": "Polygon", "coordinates": [[
+                [-114.10, 51.00], [-114.00, 51.00], [-114.00, 51.10], [-114.10, 51.10], [-114.10, 51.00]
+            ]]},
+        }])
+        set_zone_index(index)
+        yield index
+        set_zone_index(None)
+
+    def test_lookup(self, client, sample_zone, zone_index):
+        """Test resolving a point to its zone."""
+        response = client.get("/api/v1/zones/lookup?lat=51.05&lon=-114.05")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["zone_code"] == "R-C1"
+        assert data["zone"]["id"] == str(sample_zone.id)
+
+    def test_lookup_outside_districts(self, client, zone_index):
+        """Test a point outside every district."""
+        response = client.get("/api/v1/zones/lookup?lat=49.0&lon=-110.0")
+        assert response.status_code == 404
+
+    def test_lookup_without_districts(self, client):
+        """Test lookup when no district polygons are loaded."""
+        from app.services.zone_index import set_zone_index
+
+        set_zone_index(None)
+        response = client.get("/api/v1/zones/lookup?lat=51.05&lon=-114.05")
+        assert response.status_code == 503
+
+    def test_check_zoning_falls_back_to_polygons(self, client, db_session, sample_zone, zone_index):
+        """Test zoning check for a parcel with coordinates but no zone_id."""
+        from app.models.zones import Parcel
+
+        parcel = Parcel(address="5 Unmatched Way NW", latitude=51.05, longitude=-114.05)
+        db_session.add(parcel)
+        db_session.commit()
+
+        response = client.post(
+            "/api/v1/zones/check-zoning",
+            json={"parcel_id": str(parcel.id), "building_height_m": 8.0}
+        )
+        assert response.status_code == 200
+        assert response.json()["zone"]["zone_code"] == "R-C1"
+
+
 class TestZoningCheckEndpoints:
     """Tests for zoning compliance check endpoints."""
 
@@ -259,6 +323,33 @@ class TestZoningCheckEndpoints:
         )
         assert response.status_code == 404
 
+    def test_check_zoning_by_address_variant(self, client, sample_parcel, sample_zone):
+        """Test zoning check with an abbreviated, punctuated address."""
+        response = client.post(
+            "/api/v1/zones/check-zoning",
+            json={"address": "123 Test St. N.W., Calgary AB"}
+        )
+        assert response.status_code == 200
+        assert response.json()["parcel"]["address"] == "123 Test Street NW"
+
+    def test_check_zoning_uses_rule_formulas(self, client, db_session, sample_parcel, sample_zone):
+        """Test parcel-specific limits computed from zone rule formulas."""
+        from app.models.zones import ZoneRule
+
+        sample_parcel.depth_m = 40
+        db_session.add(ZoneRule(zone_id=sample_zone.id, rule_type="setback_rear",
+                                calculation_formula="0.25 * lot_depth"))
+        db_session.commit()
+
+        response = client.post(
+            "/api/v1/zones/check-zoning",
+            json={"parcel_id": str(sample_parcel.id), "rear_setback_m": 8.0}
+        )
+        assert response.status_code == 200
+        check = response.json()["checks"][0]
+        assert check["status"] == "fail"
+        assert check["required_value"] == "≥ 10 m"
+
     def test_check_zoning_address_not_found(self, client):
         """Test zoning check with address that doesn't match any parcel."""
         response = client.post(
@@ -268,6 +359,57 @@ class TestZoningCheckEndpoints:
         assert response.status_code == 404
 
 
+class TestZoningBatchEndpoint:
+    """Tests for the batch zoning compliance endpoint."""
+
+    def test_batch_columnar(self, client, db_session, sample_parcel, sample_zone):
+        """Test pass, fail, not-found and coverage results in one batch."""
+        from app.models.zones import ZoneRule
+
+        sample_parcel.area_sqm = 500
+        db_session.add(ZoneRule(zone_id=sample_zone.id, rule_type="coverage", max_value=45, unit="%"))
+        db_session.commit()
+
+        response = client.post("/api/v1/zones/check-zoning/batch", json={"items": [
+            {"parcel_id": str(sample_parcel.id), "building_height_m": 8.0, "front_setback_m": 6.5},
+            {"address": "123 Test St NW", "building_storeys": 3, "building_area_sqm": 300},
+            {"parcel_id": str(uuid4()), "building_height_m": 8.0},
+            {"parcel_id": str(sample_parcel.id)},
+        ]})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["count"] == 4
+        assert data["overall_status"] == ["pass", "fail", "error", "needs_review"]
+        assert data["failed"] == [0, 2, 0, 0]
+        assert data["parcel_id"][1] == str(sample_parcel.id)
+        assert data["zone_code"][:3] == ["R-C1", "R-C1", None]
+        assert data["error"][2] == "Parcel not found"
+        assert data["status"]["height_m"] == ["pass", None, None, None]
+        assert data["status"]["storeys"] == [None, "fail", None, None]
+        assert data["status"]["coverage"] == [None, "fail", None, None]  # 300/500 > 45%
+        assert data["limit"]["coverage"][0] == 0.45
+        assert data["limit"]["height_m"][0] == 10.0
+
+    def test_batch_ndjson(self, client, sample_parcel):
+        """Test one JSON line per item."""
+        import json
+
+        response = client.post("/api/v1/zones/check-zoning/batch?format=ndjson", json={"items": [
+            {"parcel_id": str(sample_parcel.id), "building_height_m": 12.0},
+            {"parcel_id": str(sample_parcel.id), "rear_setback_m": 8.0},
+        ]})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["overall_status"] for row in rows] == ["fail", "pass"]
+        assert rows[0]["checks"] == {"height_m": "fail"}
+
+    def test_batch_validation(self, client):
+        """Test empty batches are rejected."""
+        response = client.post("/api/v1/zones/check-zoning/batch", json={"items": []})
+        assert response.status_code == 422
+
+
 class TestCommunityEndpoints:
     """Tests for community endpoints."""
 
@@ -293,3 +435,30 @@ class TestCommunityEndpoints:
         data = response.json()
         assert "parcel_count" in data[0]
         assert data[0]["parcel_count"] >= 1
+
+
+class TestConcurrentColdRequests:
+    """Concurrent requests that each load a cold process-wide cache through run_sync."""
+
+    def test_concurrent_cold_requests_complete(self, client, db_session, sample_zone):
+        """Test concurrent first requests don't block the event loop on a cache lock."""
+        from concurrent.futures import ThreadPoolExecutor
+        from app.models.zones import ZoneRule
+        from app.services.zone_rules import zone_rule_engine
+        from app.middleware.rate_limit import rate_limiter
+
+        db_session.add(ZoneRule(zone_id=sample_zone.id, rule_type="height", max_value=10))
+        db_session.commit()
+        zone_rule_engine.invalidate()
+        rate_limiter.reset()
+
+        # TestClient runs the app on one event loop thread, so requests sent
+        # from several threads interleave on it like concurrent requests do.
+        explore = {"query": "xyznonexistent123", "limit": 10}
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            futures = [pool.submit(client.get, "/api/v1/zones/zones/R-C1/rules") for _ in range(4)]
+            futures += [pool.submit(client.post, "/api/v1/public/explore", json=explore) for _ in range(4)]
+            responses = [f.result(timeout=30) for f in futures]
+
+        assert [r.status_code for r in responses] == [200] * 8
+        assert zone_rule_engine.get_stats()["loaded"] is True
@@ -106,6 +106,76 @@ class TestGetDbDependency:
         assert session is not None
 
 
+class TestGetAsyncDbDependency:
+    """Tests for the async session path."""
+
+    def test_async_database_url(self):
+        """Sync URLs map to the matching async driver."""
+        from app.database import async_database_url
+
+        assert async_database_url("postgresql://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+        assert async_database_url("postgresql+psycopg2://db/app") == "postgresql+asyncpg://db/app"
+        assert async_database_url("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+        assert async_database_url("postgresql+asyncpg://db/app") == "postgresql+asyncpg://db/app"
+
+    def test_async_sessions_see_sync_writes(self, db_session, sample_code):
+        """Concurrent async sessions read what the sync session committed."""
+        import asyncio
+        from sqlalchemy import select
+        from app.models.codes import Code
+        from tests.conftest import TestingAsyncSessionLocal
+
+        async def read_code():
+            async with TestingAsyncSessionLocal() as session:
+                return await session.scalar(select(Code.short_name).where(Code.id == sample_code.id))
+
+        async def read_concurrently():
+            return await asyncio.gather(*(read_code() for _ in range(5)))
+
+        assert asyncio.run(read_concurrently()) == ["NBC(AE)"] * 5
+
+
+class TestConnectionPool:
+    """Tests for pool configuration and checkout metrics."""
+
+    def test_engine_options(self):
+        """Server databases get a sized, monitored pool; SQLite keeps the default."""
+        from app.database import engine_options, settings
+
+        options = engine_options("postgresql://db/app", "test")
+        assert options["pool_size"] == settings.database_pool_size
+        assert options["max_overflow"] == settings.database_max_overflow
+        assert options["pool_recycle"] == settings.database_pool_recycle_seconds
+        assert options["poolclass"].metrics.name == "test"
+        assert "pool_size" not in engine_options("sqlite:///./app.db", "test")
+
+    def test_monitored_pool_records_checkouts_and_timeouts(self, tmp_path):
+        """Checkouts, in-use gauge and exhausted-pool timeouts are recorded."""
+        from sqlalchemy import create_engine
+        from sqlalchemy.exc import TimeoutError
+        from app.database import monitored_pool_class
+
+        pool_engine = create_engine(
+            f"sqlite:///{tmp_path / 'pool.db'}",
+            poolclass=monitored_pool_class("test"),
+            pool_size=1, max_overflow=0, pool_timeout=0.05,
+        )
+        pool = pool_engine.pool
+        try:
+            with pool_engine.connect():
+                assert pool.metrics.get_stats(pool)["in_use"] == 1
+                with pytest.raises(TimeoutError):
+                    pool_engine.connect()
+            stats = pool.metrics.get_stats(pool)
+            assert stats["checkouts"] == 1
+            assert stats["timeouts"] == 1
+            assert stats["in_use"] == 0
+            assert stats["peak_in_use"] == 1
+            assert stats["max_wait_ms"] >= 50
+        finally:
+            pool_engine.dispose()
+
+
 class TestBase:
     """Tests for the declarative base."""
 
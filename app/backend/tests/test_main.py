@@ -32,6 +32,30 @@ class TestRootEndpoints:
         data = response.json()
         assert data["status"] == "healthy"
 
+    def test_metrics(self, client, db_session):
+        """Test runtime metrics endpoint (admins only)."""
+        from app.models.auth import User
+
+        assert client.get("/metrics").status_code == 401
+
+        client.post(
+            "/api/v1/auth/register",
+            json={"email": "metrics@example.com", "password": "securepass123"}
+        )
+        assert client.get("/metrics").status_code == 403
+
+        user = db_session.query(User).filter(User.email == "metrics@example.com").one()
+        user.role = "admin"
+        db_session.commit()
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        data = response.json()
+        assert "embedding_batcher" in data
+        assert data["embedding_batcher"]["max_batch_size"] > 0
+        assert "builds" in data["code_tree"]
+        assert "hits" in data["list_counts"]
+        assert "primary" in data["database_pools"]
+
 
 class TestSettings:
     """Tests for application settings."""
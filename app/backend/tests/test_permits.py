@@ -120,6 +120,35 @@ class TestPermitApplicationEndpoints:
         assert "page_size" in data
         assert data["total"] >= 3
 
+    def test_list_applications_cursor_pagination(self, client):
+        """Test following next_cursor through every page."""
+        created = set()
+        for i in range(5):
+            response = client.post(
+                "/api/v1/permits/applications",
+                json={"permit_type": "BP", "address": f"{i+300} Cursor Ave NW"}
+            )
+            created.add(response.json()["id"])
+
+        seen = []
+        url = "/api/v1/permits/applications?permit_type=BP&page_size=2&include_total=false"
+        response = client.get(url)
+        while True:
+            data = response.json()
+            assert data["total"] is None
+            seen.extend(r["id"] for r in data["results"])
+            if not data["next_cursor"]:
+                break
+            response = client.get(f"{url}&cursor={data['next_cursor']}")
+
+        assert len(seen) == len(set(seen))
+        assert created <= set(seen)
+
+    def test_list_applications_invalid_cursor(self, client):
+        """Test that a cursor from another listing is rejected."""
+        response = client.get("/api/v1/permits/applications?cursor=eyJrIjoieCIsInYiOltdfQ")
+        assert response.status_code == 400
+
     def test_list_applications_filter_by_type(self, client):
         """Test filtering applications by permit type."""
         # Create one of each type
@@ -375,3 +375,1208 @@ class TestExtractedValueDataclass:
         assert value.unit is None
         assert value.location_description is None
         assert value.notes is None
+
+
+class TestVectorIndex:
+    """Tests for the IVF-flat ANN vector index."""
+
+    def _random_vectors(self, n, dim=384, seed=0):
+        import numpy as np
+        rng = np.random.default_rng(seed)
+        return rng.normal(size=(n, dim)).astype("float32")
+
+    def test_flat_search_returns_exact_match_first(self):
+        """Test that a stored vector is its own nearest neighbour."""
+        from app.services.vector_index import VectorIndex
+
+        vectors = self._random_vectors(50)
+        ids = [f"article-{i}" for i in range(50)]
+        index = VectorIndex.build(ids, vectors)
+
+        assert index.size == 50
+        assert index.nlist == 1
+
+        hits = index.search(vectors[7], k=3)
+        assert hits[0][0] == "article-7"
+        assert abs(hits[0][1] - 1.0) < 1e-4
+        assert len(hits) == 3
+        assert hits[0][1] >= hits[1][1] >= hits[2][1]
+
+    def test_clustered_search_with_full_probe_is_exact(self):
+        """Test IVF search probing every list matches brute force."""
+        from app.services.vector_index import VectorIndex
+
+        vectors = self._random_vectors(300, dim=16)
+        ids = [str(i) for i in range(300)]
+        index = VectorIndex.build(ids, vectors, nlist=8)
+
+        assert index.nlist == 8
+        assert int(index.offsets[-1]) == 300
+
+        hits = index.search(vectors[42], k=5, nprobe=8)
+        assert hits[0][0] == "42"
+
+    def test_search_dimension_mismatch(self):
+        """Test that a query of the wrong dimension is rejected."""
+        from app.services.vector_index import VectorIndex
+
+        index = VectorIndex.build(["a", "b"], self._random_vectors(2, dim=8))
+        with pytest.raises(ValueError):
+            index.search([0.1] * 4)
+
+    def test_save_and_load_memory_mapped(self):
+        """Test persisting the index and memory-mapping it back."""
+        import numpy as np
+        from app.services.vector_index import VectorIndex
+
+        vectors = self._random_vectors(20, dim=8)
+        index = VectorIndex.build([f"id-{i}" for i in range(20)], vectors)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            index.save(tmp)
+            loaded = VectorIndex.load(tmp)
+
+            assert loaded is not None
+            assert isinstance(loaded.vectors, np.memmap)
+            assert loaded.size == 20
+            assert loaded.meta["dim"] == 8
+            assert loaded.search(vectors[3], k=1)[0][0] == "id-3"
+
+    def test_save_swaps_versions(self):
+        """Test that saves write new versions and keep only the previous one."""
+        from pathlib import Path
+        from app.services.vector_index import VectorIndex
+
+        with tempfile.TemporaryDirectory() as tmp:
+            for count in (10, 20, 30):
+                ids = [f"id-{i}" for i in range(count)]
+                VectorIndex.build(ids, self._random_vectors(count, dim=8)).save(tmp)
+
+            versions = sorted(p.name for p in Path(tmp).iterdir() if p.is_dir())
+            assert len(versions) == 2
+            assert (Path(tmp) / "CURRENT").read_text() == versions[-1]
+            assert VectorIndex.load(tmp).size == 30
+
+    def test_load_missing_index(self):
+        """Test loading from an empty directory returns None."""
+        from app.services.vector_index import VectorIndex
+
+        with tempfile.TemporaryDirectory() as tmp:
+            assert VectorIndex.load(tmp) is None
+
+
+class TestHybridSearch:
+    """Tests for hybrid search helpers."""
+
+    def test_extract_search_terms(self):
+        """Test stop words, short words and punctuation are dropped."""
+        from app.services.hybrid_search import extract_search_terms
+
+        terms = extract_search_terms("How wide do my stairs need to be?")
+        assert terms == ["wide", "stairs"]
+
+    def test_extract_search_terms_keeps_article_numbers(self):
+        """Test article numbers keep their inner dots."""
+        from app.services.hybrid_search import extract_search_terms
+
+        assert extract_search_terms("see 9.8.4.1.") == ["see", "9.8.4.1"]
+
+    def test_reciprocal_rank_fusion(self):
+        """Test items ranked well by both lists win."""
+        from app.services.hybrid_search import reciprocal_rank_fusion
+
+        fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]], k=60)
+        ids = [item_id for item_id, _ in fused]
+
+        assert ids[0] == "b"
+        assert set(ids) == {"a", "b", "c", "d"}
+        assert abs(dict(fused)["b"] - (1 / 62 + 1 / 61)) < 1e-9
+
+    def test_reciprocal_rank_fusion_weights(self):
+        """Test per-generator weights shift the fused order."""
+        from app.services.hybrid_search import reciprocal_rank_fusion
+
+        fused = reciprocal_rank_fusion([["a"], ["b"]], weights=[1.0, 2.0])
+        assert fused[0][0] == "b"
+
+
+class TestEmbeddingBatcher:
+    """Tests for the async embedding micro-batcher."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_queries_share_one_encode(self):
+        """Test concurrent embed calls are resolved by a single batched encode."""
+        import asyncio
+        from app.services.embedding_service import EmbeddingBatcher
+
+        calls = []
+
+        def encode_batch(texts):
+            calls.append(list(texts))
+            return [[float(len(t))] for t in texts]
+
+        batcher = EmbeddingBatcher(encode_batch, max_batch_size=8, max_wait_ms=50)
+        try:
+            results = await asyncio.gather(*(batcher.embed("x" * n) for n in range(1, 6)))
+        finally:
+            await batcher.close()
+
+        assert results == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+        assert len(calls) == 1
+        metrics = batcher.get_metrics()
+        assert metrics["batches"] == 1
+        assert metrics["items"] == 5
+        assert metrics["max_batch_seen"] == 5
+        assert metrics["batch_size_histogram"] == {5: 1}
+
+    @pytest.mark.asyncio
+    async def test_batch_size_limit_splits_batches(self):
+        """Test batches never exceed max_batch_size."""
+        import asyncio
+        from app.services.embedding_service import EmbeddingBatcher
+
+        sizes = []
+
+        def encode_batch(texts):
+            sizes.append(len(texts))
+            return [[0.0] for _ in texts]
+
+        batcher = EmbeddingBatcher(encode_batch, max_batch_size=2, max_wait_ms=50)
+        try:
+            await asyncio.gather(*(batcher.embed(str(i)) for i in range(5)))
+        finally:
+            await batcher.close()
+
+        assert max(sizes) <= 2
+        assert sum(sizes) == 5
+
+    @pytest.mark.asyncio
+    async def test_encode_error_resolves_callers_with_none(self):
+        """Test a failing encode does not leave callers waiting."""
+        from app.services.embedding_service import EmbeddingBatcher
+
+        def encode_batch(texts):
+            raise RuntimeError("model crashed")
+
+        batcher = EmbeddingBatcher(encode_batch, max_wait_ms=1)
+        try:
+            assert await batcher.embed("stair width") is None
+        finally:
+            await batcher.close()
+
+        assert batcher.get_metrics()["errors"] == 1
+
+    @pytest.mark.asyncio
+    async def test_embed_query_async_without_model(self):
+        """Test async query embedding returns None when the model is unavailable."""
+        from app.services.embedding_service import EmbeddingService
+
+        service = EmbeddingService()
+        with patch.object(service, "_ensure_model_loaded", return_value=False):
+            assert await service.embed_query_async("guard height") is None
+
+
+class TestSearchCache:
+    """Tests for the search caches."""
+
+    def test_ttl_cache_hit_and_miss_counters(self):
+        """Test hits and misses are counted."""
+        from app.services.search_cache import TTLCache
+
+        cache = TTLCache(maxsize=4, ttl_seconds=60)
+        assert cache.get("a") is None
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+
+        stats = cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_ttl_cache_evicts_least_recently_used(self):
+        """Test the LRU entry is evicted when full."""
+        from app.services.search_cache import TTLCache
+
+        cache = TTLCache(maxsize=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # "b" is now least recently used
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_ttl_cache_expires_entries(self):
+        """Test entries expire after their TTL."""
+        from app.services.search_cache import TTLCache
+
+        cache = TTLCache(maxsize=2, ttl_seconds=0)
+        cache.set("a", 1)
+        assert cache.get("a") is None
+        assert cache.get_stats()["expirations"] == 1
+
+    def test_normalize_query(self):
+        """Test query normalization for cache keys."""
+        from app.services.search_cache import normalize_query
+
+        assert normalize_query("  Stair   Width? ") == "stair width"
+
+    def test_result_key_ignores_filter_order(self):
+        """Test filter order does not change the cache key."""
+        from app.services.search_cache import make_result_key
+
+        key1 = make_result_key("explore", "guard height", ["fire", "building"], [9, 3], 20)
+        key2 = make_result_key("explore", "Guard height", ["building", "fire"], [3, 9], 20)
+        assert key1 == key2
+
+    def test_validate_invalidates_on_fingerprint_change(self):
+        """Test results are dropped when the corpus fingerprint changes."""
+        from app.services.search_cache import SearchCache
+
+        cache = SearchCache()
+        cache.check_interval = 0
+        cache.set_result(("k",), "cached")
+        cache.set_embedding("stair width", [0.1])
+
+        with patch("app.services.search_cache.corpus_fingerprint", side_effect=["v1", "v1", "v2"]):
+            cache.validate(None)
+            cache.validate(None)
+            assert cache.get_result(("k",)) == "cached"
+            cache.validate(None)
+
+        assert cache.get_result(("k",)) is None
+        # Query embeddings do not depend on the corpus
+        assert cache.get_embedding("Stair width") == [0.1]
+
+
+class TestFullTextBackend:
+    """Tests for the pluggable full-text backends."""
+
+    def test_fts5_match_query_quotes_and_prefixes_terms(self):
+        """Test terms are quoted, prefix-matched and OR-ed."""
+        from app.services.fulltext import fts5_match_query
+
+        assert fts5_match_query(["stair", "9.8.4.1"]) == '"stair" * OR "9.8.4.1" *'
+        assert fts5_match_query(["secondary", "sui"], phrase=True) == '"secondary sui" *'
+        assert fts5_match_query(['say "hi"']) == '"say ""hi""" *'
+        assert fts5_match_query(["--"]) == ""
+
+    def test_sqlite_backend_selected(self, db_session):
+        """Test SQLite sessions get the FTS5 backend."""
+        from app.services.fulltext import get_fulltext_backend
+
+        assert get_fulltext_backend(db_session).name == "sqlite_fts5"
+
+    def test_fts5_ranks_with_bm25(self, db_session, sample_code, sample_article):
+        """Test bm25 ranking and stemming."""
+        from uuid import uuid4
+        from app.models.codes import Article
+        from app.services.fulltext import get_fulltext_backend
+
+        db_session.add(Article(
+            id=uuid4(), code_id=sample_code.id, article_number="9.8.7.1",
+            title="Handrails", full_text="Handrails shall be provided on stairs.",
+            part_number=9,
+        ))
+        db_session.commit()
+
+        hits = get_fulltext_backend(db_session).search_articles(db_session, ["stairs", "width"], 10)
+
+        # Title hit on "Stair Width" outranks the body-only match
+        assert [h.id for h in hits][0] == str(sample_article.id)
+        assert len(hits) == 2
+
+    def test_fts5_index_follows_updates_and_deletes(self, db_session, sample_article):
+        """Test the sync triggers keep the FTS5 index current."""
+        from app.services.fulltext import get_fulltext_backend
+
+        backend = get_fulltext_backend(db_session)
+        sample_article.full_text = "Guards are required around openings."
+        db_session.commit()
+
+        assert backend.search_articles(db_session, ["860"], 10) == []
+        assert len(backend.search_articles(db_session, ["guards"], 10)) == 1
+
+        db_session.delete(sample_article)
+        db_session.commit()
+        assert backend.search_articles(db_session, ["guards"], 10) == []
+
+    def test_fts5_filters_by_part(self, db_session, sample_article):
+        """Test the part_numbers filter applies to FTS5 matches."""
+        from app.services.fulltext import get_fulltext_backend
+
+        backend = get_fulltext_backend(db_session)
+        assert backend.search_articles(db_session, ["stair"], 10, part_numbers=[3]) == []
+        assert len(backend.search_articles(db_session, ["stair"], 10, part_numbers=[9])) == 1
+
+    def test_rebuild_fulltext_index(self, db_session, sample_article):
+        """Test a rebuild restores an emptied index."""
+        from sqlalchemy import text
+        from app.services.fulltext import get_fulltext_backend, rebuild_fulltext_index
+
+        db_session.execute(text("INSERT INTO articles_fts(articles_fts) VALUES ('delete-all')"))
+        backend = get_fulltext_backend(db_session)
+        assert backend.search_articles(db_session, ["stair"], 10) == []
+
+        assert rebuild_fulltext_index(db_session) is True
+        assert len(backend.search_articles(db_session, ["stair"], 10)) == 1
+
+
+class TestSnippetEngine:
+    """Tests for positional-index snippets."""
+
+    def test_normalize_term_strips_plurals(self):
+        """Test the S stemmer maps plurals onto their singular."""
+        from app.services.snippets import normalize_term
+
+        assert normalize_term("Stairs") == "stair"
+        assert normalize_term("storeys") == "storey"
+        assert normalize_term("facilities") == "facility"
+        assert normalize_term("glass") == "glass"
+        assert normalize_term("9.8.4.1") == "9.8.4.1"
+
+    def test_build_term_positions_caps_occurrences(self):
+        """Test offsets are recorded per term and capped."""
+        from app.services.snippets import build_term_positions, MAX_POSITIONS_PER_TERM
+
+        positions = build_term_positions("Stair width. " * (MAX_POSITIONS_PER_TERM + 5))
+        assert positions["stair"][0] == (0, 5)
+        assert len(positions["width"]) == MAX_POSITIONS_PER_TERM
+
+    def test_best_window_prefers_distinct_terms(self):
+        """Test the window covering more distinct terms wins over repeated hits."""
+        from app.services.snippets import SnippetEngine
+
+        engine = SnippetEngine(max_chars=50)
+        hits = [(0, 5, "stair"), (10, 15, "stair"), (500, 505, "stair"), (520, 525, "width")]
+        start, spans = engine.best_window(hits)
+
+        assert start <= 500
+        assert spans == [(500, 505), (520, 525)]
+
+    def test_snippet_is_capped_and_highlighted(self, db_session, sample_code):
+        """Test long documents yield a capped window around the matches."""
+        from uuid import uuid4
+        from app.models.codes import Article
+        from app.services.snippets import snippet_engine, DOC_ARTICLE, SNIPPET_MAX_CHARS
+
+        filler = "general provisions apply here " * 200
+        article = Article(
+            id=uuid4(), code_id=sample_code.id, article_number="9.10.1.1", title="Fire",
+            full_text=filler + "the fire separation between suites " + filler,
+        )
+        db_session.add(article)
+        db_session.commit()
+
+        snippets = snippet_engine.snippets(db_session, DOC_ARTICLE, [str(article.id)], "fire separations")
+        rendered = snippets[str(article.id)].render()
+
+        assert "<mark>fire separation</mark>" in rendered
+        assert rendered.startswith("...") and rendered.endswith("...")
+        assert len(snippets[str(article.id)].text) <= SNIPPET_MAX_CHARS
+
+    def test_no_snippet_without_matching_terms(self, db_session, sample_article):
+        """Test documents without a query term get no snippet."""
+        from app.services.snippets import snippet_engine, DOC_ARTICLE
+
+        assert snippet_engine.snippets(db_session, DOC_ARTICLE, [str(sample_article.id)], "sprinkler") == {}
+
+    def test_index_follows_updates_and_rebuild(self, db_session, sample_article):
+        """Test ORM updates re-index a document and rebuild restores the index."""
+        from app.models.search_index import TermPosition
+        from app.services.snippets import snippet_engine, rebuild_snippet_index, DOC_ARTICLE
+
+        sample_article.full_text = "Guards are required around openings."
+        db_session.commit()
+        doc_ids = [str(sample_article.id)]
+        assert snippet_engine.snippets(db_session, DOC_ARTICLE, doc_ids, "stair") == {}
+        assert doc_ids[0] in snippet_engine.snippets(db_session, DOC_ARTICLE, doc_ids, "guard")
+
+        db_session.query(TermPosition).delete()
+        db_session.commit()
+        assert rebuild_snippet_index(db_session, DOC_ARTICLE) == 1
+        assert doc_ids[0] in snippet_engine.snippets(db_session, DOC_ARTICLE, doc_ids, "guard")
+
+    def test_startup_backfill_builds_empty_index_once(self, db_session, sample_article):
+        """Test the startup backfill indexes documents loaded without the index, then no-ops."""
+        from app.models.search_index import TermPosition
+        from app.services.snippets import snippet_engine, ensure_snippet_index, DOC_ARTICLE
+
+        db_session.query(TermPosition).delete()
+        db_session.commit()
+        assert ensure_snippet_index(db_session) == 1
+        assert ensure_snippet_index(db_session) == 0
+        doc_ids = [str(sample_article.id)]
+        assert doc_ids[0] in snippet_engine.snippets(db_session, DOC_ARTICLE, doc_ids, "stair")
+
+    def test_snippet_from_headline_markup(self):
+        """Test ts_headline-style markup is parsed into spans and capped."""
+        from app.services.snippets import Snippet
+
+        snippet = Snippet.from_marked("the <mark>stair</mark> width", max_chars=100)
+        assert snippet.text == "the stair width"
+        assert snippet.spans == [(4, 9)]
+
+        capped = Snippet.from_marked("x" * 50 + " <mark>stair</mark>", max_chars=20)
+        assert len(capped.text) == 20
+        assert capped.spans == []
+        assert capped.truncated_end
+
+
+class TestCodeReferenceIndex:
+    """Tests for the STANDATA cross-reference index."""
+
+    def test_normalize_reference(self):
+        """Test article numbers are reduced to canonical dotted form."""
+        from app.services.code_references import normalize_reference
+
+        assert normalize_reference("Article 9.10.09.6.") == "9.10.9.6"
+        assert normalize_reference(" 9.36 ") == "9.36"
+        assert normalize_reference("n/a") is None
+
+    def test_reference_prefixes(self):
+        """Test every hierarchy level is produced, shallowest first."""
+        from app.services.code_references import reference_prefixes
+
+        assert reference_prefixes("9.10.9.6") == ["9", "9.10", "9.10.9", "9.10.9.6"]
+
+    def test_startup_backfill_builds_empty_index_once(self, db_session):
+        """Test the startup backfill indexes bulletins loaded without the index, then no-ops."""
+        from uuid import uuid4
+        from app.models.standata import Standata, StandataCodeReference
+        from app.services.code_references import ensure_cross_references, find_bulletin_ids
+
+        bulletin = Standata(
+            id=uuid4(), bulletin_number="23-BCI-030", title="Suites", category="BCI",
+            full_text="text", code_references=["9.10.9.6"],
+            pdf_path="/x.pdf", pdf_filename="x.pdf",
+        )
+        db_session.add(bulletin)
+        db_session.commit()
+        db_session.query(StandataCodeReference).delete()
+        db_session.commit()
+
+        assert ensure_cross_references(db_session) == 1
+        assert ensure_cross_references(db_session) == 0
+        assert find_bulletin_ids(db_session, "9.10.9.6", exact=True) == [bulletin.id]
+
+    def test_index_tracks_bulletin_changes(self, db_session):
+        """Test inserts, reference edits and deletes keep the index current."""
+        from uuid import uuid4
+        from app.models.standata import Standata
+        from app.services.code_references import find_bulletin_ids, rebuild_cross_references
+
+        bulletin = Standata(
+            id=uuid4(), bulletin_number="23-BCI-030", title="Suites", category="BCI",
+            full_text="text", code_references=["9.10.9.6"],
+            pdf_path="/x.pdf", pdf_filename="x.pdf",
+        )
+        db_session.add(bulletin)
+        db_session.commit()
+
+        assert find_bulletin_ids(db_session, "9.10.9.6", exact=True) == [bulletin.id]
+        assert find_bulletin_ids(db_session, "9.10") == [bulletin.id]
+        assert find_bulletin_ids(db_session, "9.10.9", exact=True) == []
+
+        bulletin.code_references = ["9.8.4.1"]
+        db_session.commit()
+        assert find_bulletin_ids(db_session, "9.10") == []
+        assert find_bulletin_ids(db_session, "9.8.4.1", exact=True) == [bulletin.id]
+
+        assert rebuild_cross_references(db_session) == 1
+        assert find_bulletin_ids(db_session, "9") == [bulletin.id]
+
+        db_session.delete(bulletin)
+        db_session.commit()
+        assert find_bulletin_ids(db_session, "9") == []
+
+
+class TestCodeTree:
+    """Tests for the cached code tree."""
+
+    def test_article_sort_key_is_numeric(self):
+        """Test article numbers sort numerically, not lexically."""
+        from app.services.code_tree import article_sort_key
+
+        numbers = ["9.10.1.1", "9.2.1.1", "9.2.1.10", "9.2.1.2"]
+        assert sorted(numbers, key=article_sort_key) == ["9.2.1.1", "9.2.1.2", "9.2.1.10", "9.10.1.1"]
+
+    def test_tree_cached_until_code_changes(self, db_session, sample_code, sample_article):
+        """Test the tree is built once and rebuilt after an article change."""
+        from app.models.codes import Article
+        from app.services.code_tree import CodeTreeCache
+
+        cache = CodeTreeCache()
+        first = cache.get(db_session, sample_code)
+        assert cache.get(db_session, sample_code) is first
+        assert cache.get_stats()["builds"] == 1
+
+        db_session.add(Article(
+            code_id=sample_code.id, article_number="9.8.4.2", title="Stair Headroom",
+            full_text="Headroom text.", part_number=9, division_number=8, section_number=4,
+        ))
+        db_session.commit()
+
+        # Out-of-process reloads are caught by the fingerprint re-check
+        cache.check_interval = 0
+        rebuilt = cache.get(db_session, sample_code)
+        assert rebuilt is not first
+        assert rebuilt.etag != first.etag
+        assert rebuilt.nodes["9.8.4"].article_count == 2
+
+
+class TestFieldSelection:
+    """Tests for sparse fieldsets."""
+
+    def test_parse_fields_orders_and_adds_id(self):
+        from app.schemas.codes import ArticleResponse
+        from app.services.field_selection import parse_fields
+
+        assert parse_fields(None, ArticleResponse) is None
+        assert parse_fields(" title, article_number ", ArticleResponse) == ["article_number", "title", "id"]
+
+    def test_parse_fields_rejects_unknown(self):
+        from app.schemas.codes import ArticleResponse
+        from app.services.field_selection import parse_fields
+
+        with pytest.raises(ValueError):
+            parse_fields("title,search_vector", ArticleResponse)
+
+    def test_heavy_columns_not_loaded(self, db_session, sample_article):
+        from sqlalchemy import inspect as sa_inspect
+        from app.models.codes import Article
+        from app.schemas.codes import ArticleSummary
+        from app.services.field_selection import load_options
+
+        db_session.expunge_all()
+        article = db_session.query(Article).options(
+            *load_options(Article, ArticleSummary.model_fields)
+        ).filter(Article.id == sample_article.id).one()
+
+        unloaded = sa_inspect(article).unloaded
+        assert {"full_text", "embedding", "search_vector"} <= unloaded
+        assert "article_number" not in unloaded
+
+
+class TestKeysetPagination:
+    """Tests for cursors and approximate totals."""
+
+    def test_cursor_round_trip(self):
+        from datetime import date
+        from uuid import uuid4
+        from app.models.standata import Standata
+        from app.services.pagination import Keyset
+
+        keyset = Keyset("standata", Standata.effective_date, Standata.id, descending=True)
+        values = (date(2024, 1, 1), uuid4())
+        assert keyset.decode(keyset.encode(values)) == values
+        assert keyset.decode(keyset.encode((None, values[1]))) == (None, values[1])
+
+    def test_cursor_from_other_keyset_rejected(self):
+        from app.models.codes import Article, Requirement
+        from app.services.pagination import Keyset, InvalidCursor
+
+        articles = Keyset("articles", Article.article_number, Article.id)
+        requirements = Keyset("requirements", Requirement.created_at, Requirement.id)
+        with pytest.raises(InvalidCursor):
+            requirements.decode(articles.encode(("9.8.4.1", "x")))
+        with pytest.raises(InvalidCursor):
+            articles.decode("%%%")
+
+    def test_count_cache_invalidated_on_insert(self, db_session, sample_code, sample_article):
+        from uuid import uuid4
+        from app.models.codes import Article
+        from app.services.pagination import count_cache
+
+        query = db_session.query(Article).filter(Article.code_id == sample_code.id)
+        assert count_cache.count(query, Article) == 1
+
+        db_session.add(Article(id=uuid4(), code_id=sample_code.id, article_number="9.8.4.2", full_text="x"))
+        db_session.commit()
+        assert count_cache.count(query, Article) == 2
+
+
+class TestSearchCapabilities:
+    """Tests for the search capability registry."""
+
+    def test_snapshot_per_code(self, db_session, sample_code, sample_article):
+        from app.services.search_capabilities import compute_capabilities
+
+        snapshot = compute_capabilities(db_session)
+        assert snapshot.has_fts5("articles")
+        assert not snapshot.has_tsvector()  # PostgreSQL only
+        assert not snapshot.has_embeddings()
+
+        sample_article.embedding = [0.1] * 384
+        db_session.commit()
+        snapshot = compute_capabilities(db_session)
+        assert snapshot.has_embeddings(["building"])
+        assert not snapshot.has_embeddings(["zoning"])
+
+    def test_registry_reuses_snapshot_until_stale(self, db_session, sample_code, sample_article):
+        from uuid import uuid4
+        from app.models.codes import Article
+        from app.services.search_capabilities import search_capabilities
+
+        first = search_capabilities.refresh(db_session)
+        assert search_capabilities.get(db_session) is first
+
+        db_session.add(Article(id=uuid4(), code_id=sample_code.id, article_number="9.8.4.2", full_text="x"))
+        db_session.commit()
+        second = search_capabilities.get(db_session)
+        assert second is not first
+        assert second.codes[str(sample_code.id)].article_count == 2
+
+
+class TestAddressIndex:
+    """Tests for the in-memory address autocomplete index."""
+
+    @staticmethod
+    def _parcels(db_session, zone, addresses):
+        from app.models.zones import Parcel
+
+        for address in addresses:
+            db_session.add(Parcel(address=address, community_name="Test", zone_id=zone.id))
+        db_session.commit()
+
+    def test_ranks_starts_with_first(self, db_session, sample_zone):
+        from app.services.address_index import AddressIndex
+
+        self._parcels(db_session, sample_zone, ["10 Main St NW", "22 Main St NW", "Main Hall 5 Ave SW"])
+        index = AddressIndex()
+        assert index.build(db_session) == 3
+
+        results = index.search(db_session, "main", 10)
+        assert results[0].address == "Main Hall 5 Ave SW"
+        assert {r.address for r in results[1:]} == {"10 Main St NW", "22 Main St NW"}
+        assert results[0].zone_code == "R-C1"
+        assert [r.address for r in index.search(db_session, "22 ma", 10)] == ["22 Main St NW"]
+
+    def test_multi_word_street_names(self, db_session, sample_zone):
+        from app.services.address_index import AddressIndex
+
+        self._parcels(db_session, sample_zone, [
+            "1 Sage Hill Dr NW", "2 Sage Valley Dr NW", "3 Hill Sage Dr NW", "4 Sage Hill Dr NE",
+        ])
+        index = AddressIndex()
+        index.build(db_session)
+
+        assert [r.address for r in index.search(db_session, "sage hill dr nw", 1)] == ["1 Sage Hill Dr NW"]
+        # Same words in another order only come back from the fallback, ranked last
+        results = [r.address for r in index.search(db_session, "sage hill dr n", 10)]
+        assert results[:2] == ["1 Sage Hill Dr NW", "4 Sage Hill Dr NE"]
+        assert "2 Sage Valley Dr NW" not in results
+
+    def test_picks_up_rows_written_elsewhere(self, db_session, sample_zone):
+        from sqlalchemy import insert
+        from uuid import uuid4
+        from datetime import datetime
+        from app.models.zones import Parcel
+        from app.services.address_index import AddressIndex
+
+        self._parcels(db_session, sample_zone, ["10 Main St NW"])
+        index = AddressIndex()
+        index.build(db_session)
+        index.check_interval = 0
+
+        # Core INSERT bypasses ORM events, like a bulk load in another process
+        db_session.execute(insert(Parcel.__table__).values(
+            id=str(uuid4()), address="77 Bow Trail SW", updated_at=datetime.utcnow()
+        ))
+        db_session.commit()
+
+        assert [r.address for r in index.search(db_session, "bow tr", 5)] == ["77 Bow Trail SW"]
+        assert index.builds == 1
+
+    def test_removed_slots_are_reused(self, db_session, sample_zone):
+        from types import SimpleNamespace
+        from app.services.address_index import AddressIndex
+
+        self._parcels(db_session, sample_zone, ["10 Main St NW", "22 Main St NW"])
+        index = AddressIndex()
+        index.build(db_session)
+
+        # Delta-sync churn: each delete frees a slot the next new parcel takes
+        for i in range(5):
+            removed = index.search(db_session, "main", 10)[0].parcel_id
+            index.remove(removed)
+            index.upsert(SimpleNamespace(
+                id=f"new-{i}", address=f"{30 + i} Main St NW", address_key=None, community_name="Test",
+                zone_id=None, latitude=None, longitude=None, updated_at=None,
+            ))
+        assert len(index._entries) == 2 and index.size == 2
+        assert [r.address for r in index.search(db_session, "34 main", 5)] == ["34 Main St NW"]
+
+
+class TestAddressNormalizer:
+    """Tests for canonical address keys."""
+
+    def test_variants_share_one_key(self):
+        from app.services.address_normalizer import normalize_address
+
+        assert normalize_address("123 17th Ave. S.W., Calgary AB T2P 1J9") == "123 17 AVENUE SW"
+        assert normalize_address("123 17 AV SW") == "123 17 AVENUE SW"
+        assert normalize_address("Unit 2402 111 Tarawood Lane North West") == "#2402 111 TARAWOOD LANE NW"
+        assert normalize_address("2402-111 TARAWOOD LN NW") == "#2402 111 TARAWOOD LANE NW"
+        assert normalize_address("# 2402 111 Tarawood Ln N W") == "#2402 111 TARAWOOD LANE NW"
+
+    def test_type_word_at_start_of_name_is_kept(self):
+        from app.services.address_normalizer import normalize_address
+
+        assert normalize_address("12 St Andrews Pl NW") == "12 ST ANDREWS PLACE NW"
+        assert normalize_address("Centre St N") == "CENTRE STREET N"
+
+    def test_street_without_house_number(self):
+        from app.services.address_normalizer import normalize_address
+
+        # Street-only input agrees with the street part of full addresses
+        assert normalize_address("17 Ave SW") == "17 AVENUE SW"
+        assert normalize_address("17th Ave S.W.") == "17 AVENUE SW"
+        assert normalize_address("123 17 Ave SW").endswith(normalize_address("17 Ave SW"))
+        assert normalize_address("100 Park Ave SW") == "100 PARK AVENUE SW"
+
+
+class TestAddressResolver:
+    """Tests for resolving typed addresses to parcels."""
+
+    def test_exact_and_prefix(self, db_session, sample_parcel):
+        from app.services.address_resolver import AddressResolver
+
+        resolver = AddressResolver()
+        assert sample_parcel.address_key == "123 TEST STREET NW"
+
+        match = resolver.resolve_match(db_session, "123 test st. n.w.")
+        assert (match.parcel_id, match.match, match.ambiguous) == (sample_parcel.id, "exact", False)
+        assert resolver.resolve_match(db_session, "123 Test St").match == "prefix"
+        assert resolver.resolve_match(db_session, "123 Test Stone") is None
+        # "12" must not resolve to "123 ..."
+        assert resolver.resolve_match(db_session, "12 Test St") is None
+
+    def test_cache_dropped_on_parcel_write(self, db_session, sample_parcel, sample_zone):
+        from app.models.zones import Parcel
+        from app.services.address_resolver import address_resolver
+
+        address_resolver.invalidate()
+        assert address_resolver.resolve_match(db_session, "123 Test St").ambiguous is False
+
+        db_session.add(Parcel(address="123 Test Street SE", zone_id=sample_zone.id))
+        db_session.commit()
+        assert address_resolver.resolve_match(db_session, "123 Test St").ambiguous is True
+
+    def test_backfills_missing_keys(self, db_session):
+        from sqlalchemy import insert
+        from uuid import uuid4
+        from app.models.zones import Parcel
+        from app.services.address_resolver import ensure_address_keys
+
+        db_session.execute(insert(Parcel.__table__).values(id=str(uuid4()), address="5 Bow Tr SW"))
+        db_session.commit()
+
+        assert ensure_address_keys(db_session) == 1
+        assert db_session.query(Parcel.address_key).scalar() == "5 BOW TRAIL SW"
+        assert ensure_address_keys(db_session) == 0
+
+
+def _district(code, west, south, east, north):
+    return {
+        "type": "Feature",
+        "properties": {"lu_code": code},
+        "geometry": {"type": "Polygon", "coordinates": [[
+            [west, south], [east, south], [east, north], [west, north], [west, south]
+        ]]},
+    }
+
+
+class TestZoneIndex:
+    """Tests for point-in-polygon zone lookup."""
+
+    def test_lookup_smallest_district_wins(self):
+        from app.services.zone_index import ZoneIndex
+
+        index = ZoneIndex.from_features([
+            _district("R-C1", -114.10, 51.00, -114.00, 51.10),
+            _district("DC (PRE 1P2007)", -114.05, 51.04, -114.04, 51.05),  # Inside R-C1
+            {"type": "Feature", "properties": {}, "geometry": None},
+        ])
+        assert index.size == 2
+        assert index.lookup(51.02, -114.08) == "R-C1"
+        assert index.lookup(51.045, -114.045) == "DC (PRE 1P2007)"
+        assert index.lookup(52.0, -114.08) is None
+
+        codes = index.lookup_many([51.02, 51.045, 52.0], [-114.08, -114.045, -114.08])
+        assert list(codes) == ["R-C1", "DC (PRE 1P2007)", None]
+
+    def test_rezone_parcels(self, db_session, sample_zone):
+        from app.models.zones import Parcel
+        from app.services.zone_index import ZoneIndex, rezone_parcels
+
+        index = ZoneIndex.from_features([
+            _district("R-C1", -114.10, 51.00, -114.00, 51.10),
+            _district("I-G", -113.90, 51.00, -113.80, 51.10),  # Not in the zones table
+        ])
+        inside = Parcel(address="1 Inside St NW", latitude=51.05, longitude=-114.05)
+        unknown = Parcel(address="2 Industrial Rd SE", latitude=51.05, longitude=-113.85)
+        outside = Parcel(address="3 Far Away Rd", latitude=49.0, longitude=-110.0)
+        no_coords = Parcel(address="4 Nowhere Pl")
+        db_session.add_all([inside, unknown, outside, no_coords])
+        db_session.commit()
+
+        stats = rezone_parcels(db_session, index, batch_size=2)
+        assert (stats["scanned"], stats["updated"], stats["outside"], stats["unknown_zone"]) == (3, 1, 1, 1)
+        db_session.expire_all()
+        assert inside.zone_id == sample_zone.id
+        assert inside.land_use_designation == "R-C1"
+        assert unknown.zone_id is None
+
+        assert rezone_parcels(db_session, index)["unchanged"] == 1
+
+
+class TestParcelGrid:
+    """Tests for the nearest-parcel grid."""
+
+    def _grid(self):
+        from app.services.parcel_locator import ParcelGrid
+
+        # A row of parcels ~70 m apart heading east, plus one ~5 km away
+        longitudes = [-114.0700 + i * 0.001 for i in range(10)] + [-114.0000]
+        return ParcelGrid.build(
+            ids=[f"p{i}" for i in range(11)],
+            latitudes=[51.0450] * 11,
+            longitudes=longitudes,
+            cell_m=100,
+        )
+
+    def test_nearest_k_in_distance_order(self):
+        grid = self._grid()
+        hits = grid.nearest(51.0450, -114.0681, k=3)
+        assert [parcel_id for parcel_id, _ in hits] == ["p2", "p1", "p3"]
+        assert hits[0][1] < hits[1][1] < hits[2][1]
+
+        # Far from everything: still found without a radius
+        assert grid.nearest(51.2, -114.0, k=1)[0][0] == "p10"
+
+    def test_nearest_radius(self):
+        grid = self._grid()
+        assert [p for p, _ in grid.nearest(51.0450, -114.0700, k=5, radius_m=100)] == ["p0", "p1"]
+        assert grid.nearest(51.2, -114.0, k=1, radius_m=250) == []
+
+    def test_save_and_load(self, tmp_path):
+        from app.services.parcel_locator import ParcelGrid
+
+        grid = self._grid()
+        grid.save(tmp_path)
+        loaded = ParcelGrid.load(tmp_path)
+        assert loaded.size == grid.size
+        assert loaded.nearest(51.0450, -114.0681, k=3) == grid.nearest(51.0450, -114.0681, k=3)
+        assert ParcelGrid.load(tmp_path / "missing") is None
+
+        # A newer save becomes current in one swap; the previous version stays for in-flight loads
+        grid.save(tmp_path)
+        assert len([p for p in tmp_path.iterdir() if p.is_dir()]) == 2
+        assert ParcelGrid.load(tmp_path).size == grid.size
+
+
+class TestZoneRules:
+    """Tests for the compiled zone rule engine."""
+
+    def test_compile_formula(self):
+        from app.services.zone_rules import compile_formula, evaluate
+
+        formula = compile_formula("max(7.5, 0.25 * lot_depth)")
+        assert evaluate(formula, {"lot_depth": 40.0}) == 10.0
+        assert evaluate(formula, {"lot_depth": 20.0}) == 7.5
+        assert evaluate(formula, {}) is None  # Depth unknown
+        assert evaluate(compile_formula("lot_area / lot_width"), {"lot_area": 1.0, "lot_width": 0.0}) is None
+
+    @pytest.mark.parametrize("expression", [
+        "__import__('os').system('true')",
+        "lot_depth.__class__",
+        "open('x')",
+        "unknown_variable * 2",
+        "2 ** 1000000",
+        "0.25 *",
+    ])
+    def test_compile_formula_rejects(self, expression):
+        from app.services.zone_rules import compile_formula, FormulaError
+
+        with pytest.raises(FormulaError):
+            compile_formula(expression)
+
+    def test_compile_conditions(self):
+        from app.services.zone_rules import compile_conditions, evaluate
+
+        condition = compile_conditions('{"lot_width": {"min": 10, "lt": 15}}')
+        assert evaluate(condition, {"lot_width": 12.0}) is True
+        assert evaluate(condition, {"lot_width": 15.0}) is False
+        assert not evaluate(condition, {})
+        assert evaluate(compile_conditions("lot_area > 300 and lot_width >= 9"),
+                        {"lot_area": 400.0, "lot_width": 9.0}) is True
+        assert compile_conditions(None) is None
+
+    def test_limits_for_parcel(self, db_session, sample_zone):
+        from app.models.zones import Parcel, ZoneRule
+        from app.services.zone_rules import zone_rule_engine
+
+        db_session.add_all([
+            ZoneRule(zone_id=sample_zone.id, rule_type="setback_rear", calculation_formula="0.25 * lot_depth"),
+            ZoneRule(zone_id=sample_zone.id, rule_type="height", max_value=8.6,
+                     conditions='{"lot_width": {"lt": 10}}'),
+            ZoneRule(zone_id=sample_zone.id, rule_type="coverage", max_value=45, unit="%"),
+            ZoneRule(zone_id=sample_zone.id, rule_type="FAR", calculation_formula="lot_depth +"),  # Skipped
+        ])
+        db_session.commit()
+
+        deep = Parcel(address="1 Deep Lot NW", frontage_m=15, depth_m=40)
+        narrow = Parcel(address="2 Narrow Lot NW", frontage_m=7.5, depth_m=20)
+        limits = zone_rule_engine.limits(db_session, sample_zone.id, deep)
+        assert (limits["rear_setback_m"], limits["height_m"], limits["coverage"]) == (10.0, 10.0, 0.45)
+        limits = zone_rule_engine.limits(db_session, sample_zone.id, narrow)
+        assert (limits["rear_setback_m"], limits["height_m"]) == (5.0, 8.6)
+        assert zone_rule_engine.get_stats()["invalid_rules"] == 1
+        assert zone_rule_engine.get_zone(db_session, "r-c1").zone_id == sample_zone.id
+
+        # Writes drop the cache
+        sample_zone.max_storeys = 3
+        db_session.commit()
+        assert zone_rule_engine.limits(db_session, sample_zone.id, deep)["storeys"] == 3
+
+
+class TestParcelIngest:
+    """Tests for streaming parcel/address loads."""
+
+    def _write(self, path, records):
+        import json
+
+        path.write_text(json.dumps(records, indent=1))
+        return path
+
+    def test_iter_json_records(self, tmp_path):
+        import json
+        from app.services.parcel_ingest import iter_json_records
+
+        records = [{"address": f"{i} Stream St NW", "note": "x" * (i * 7)} for i in range(50)]
+        path = self._write(tmp_path / "parcels.json", records)
+        assert list(iter_json_records(path, chunk_size=64)) == records
+
+        geojson = tmp_path / "parcels.geojson"
+        geojson.write_text(json.dumps({"type": "FeatureCollection", "features": [
+            {"type": "Feature", "properties": {"address": "1 Point Pl NW"},
+             "geometry": {"type": "Point", "coordinates": [-114.07, 51.04]}},
+        ]}))
+        assert list(iter_json_records(geojson, chunk_size=16)) == [
+            {"address": "1 Point Pl NW", "longitude": -114.07, "latitude": 51.04}
+        ]
+
+        truncated = tmp_path / "truncated.json"
+        truncated.write_text('[{"address": "1 A St"}, {"addr')
+        with pytest.raises(ValueError):
+            list(iter_json_records(truncated, chunk_size=8))
+
+        # A malformed record fails at once instead of buffering the rest of the file
+        malformed = tmp_path / "malformed.json"
+        malformed.write_text('[{"address": "1 A St"}, {"address": oops}, ' + '{"address": "2 B St"}, ' * 5000 + '{}]')
+        with pytest.raises(ValueError, match="at character 24"):
+            list(iter_json_records(malformed, chunk_size=64))
+
+    def test_ingest_merges_and_skips_existing(self, db_session, sample_parcel, sample_zone, tmp_path):
+        from app.models.zones import Parcel
+        from app.services.parcel_ingest import ingest_parcel_file
+
+        path = self._write(tmp_path / "parcel-addresses-1.json", [
+            {"address": "123 Test Street NW"},  # Already loaded
+            {"address": "1 New Rd SW", "street_quad": "SW", "latitude": "51.01", "longitude": "-114.1",
+             "land_use_designation": "R-C1"},
+            {"address": "1 New Rd SW"},  # Duplicate within the file
+            {"address": "  "},
+            {"address": "#5 2 New Rd SW"},
+        ])
+        stats = ingest_parcel_file(db_session, path, zone_map={"R-C1": sample_zone.id}, chunk_size=2)
+        assert (stats["records"], stats["inserted"], stats["skipped"], stats["invalid"]) == (5, 2, 2, 1)
+        assert stats["peak_rss_mb"] is None or stats["peak_rss_mb"] > 0
+
+        parcel = db_session.query(Parcel).filter(Parcel.address == "1 New Rd SW").one()
+        assert parcel.address_key == "1 NEW ROAD SW"
+        assert parcel.zone_id == sample_zone.id
+        assert float(parcel.latitude) == 51.01
+        unit = db_session.query(Parcel).filter(Parcel.address == "#5 2 New Rd SW").one()
+        assert unit.unit_number == "5"
+
+    def test_ingest_resume(self, db_session, tmp_path, monkeypatch):
+        from app.models.zones import Parcel
+        from app.services import parcel_ingest
+
+        path = self._write(tmp_path / "parcel-addresses-2.json",
+                           [{"address": f"{i} Resume Ave NE"} for i in range(10)])
+        merge, calls = parcel_ingest._merge, []
+
+        def failing_merge(db, skip_existing):
+            calls.append(1)
+            if len(calls) == 3:
+                raise RuntimeError("connection lost")
+            return merge(db, skip_existing)
+
+        monkeypatch.setattr(parcel_ingest, "_merge", failing_merge)
+        with pytest.raises(RuntimeError):
+            parcel_ingest.ingest_parcel_file(db_session, path, chunk_size=3)
+        assert db_session.query(Parcel).count() == 6
+
+        monkeypatch.setattr(parcel_ingest, "_merge", merge)
+        stats = parcel_ingest.ingest_parcel_file(db_session, path, chunk_size=3, resume=True)
+        assert (stats["resumed_from"], stats["records"], stats["inserted"]) == (6, 4, 4)
+        assert db_session.query(Parcel).count() == 10
+
+        # Completed files are skipped
+        assert parcel_ingest.ingest_parcel_file(db_session, path, resume=True)["records"] == 0
+
+
+class TestParcelZoning:
+    """Tests for set-based address re-zoning."""
+
+    def test_rezone_by_address(self, db_session, sample_zone):
+        from app.models.zones import Parcel, Zone
+        from app.services.parcel_zoning import rezone_parcels_by_address
+
+        dc = Zone(zone_code="DC", zone_name="Direct Control", category="direct_control")
+        db_session.add(dc)
+        parcels = [Parcel(address=f"{i} Ranged Rd NW") for i in range(7)]
+        unchanged = Parcel(address="50 Kept Ave SW", zone_id=sample_zone.id, land_use_designation="R-C1")
+        db_session.add_all(parcels + [unchanged])
+        db_session.commit()
+
+        mapping = {f"{i} RANGED RD NW": "R-C1" for i in range(5)}
+        mapping.update({
+            "5 Ranged Road N.W.": "DC (PRE 1P2007)",  # Normalized and cleaned
+            "6 RANGED RD NW": "X-UNKNOWN",
+            "50 KEPT AV SW": "R-C1",
+            "999 NOWHERE ST": "R-C1",
+        })
+        stats = rezone_parcels_by_address(db_session, mapping, batch_size=3)
+        assert (stats["parcels"], stats["matched"], stats["updated"]) == (8, 8, 6)
+        assert (stats["unchanged"], stats["zone_not_found"], stats["no_match"]) == (1, 1, 0)
+        assert stats["unknown_zone_codes"] == 1
+
+        db_session.expire_all()
+        assert {p.zone_id for p in parcels[:5]} == {sample_zone.id}
+        assert (parcels[5].zone_id, parcels[5].land_use_designation) == (dc.id, "DC (PRE 1P2007)")
+        assert parcels[6].zone_id is None
+
+        assert rezone_parcels_by_address(db_session, mapping)["updated"] == 0
+
+
+class TestParcelSync:
+    """Tests for delta sync of parcel dumps."""
+
+    def _write(self, path, records):
+        import json
+
+        path.write_text(json.dumps(records))
+        return path
+
+    def test_delta_sync(self, db_session, sample_zone, tmp_path):
+        from app.models.zones import Parcel, ParcelChange
+        from app.services.parcel_sync import sync_parcel_files
+
+        path = tmp_path / "parcel-addresses-1.json"
+        first = [
+            {"source_id": "A1", "address": "1 Delta St NW", "land_use_designation": "R-C1"},
+            {"source_id": "A2", "address": "2 Delta St NW"},
+            {"address": "3 Delta St NW"},  # Keyed by address
+            {"source_id": "A1", "address": "1 Delta St NW"},  # Duplicate key
+        ]
+        stats = sync_parcel_files(db_session, [self._write(path, first)], zone_map={"R-C1": sample_zone.id})
+        assert (stats["inserted"], stats["duplicates"], stats["updated"], stats["deleted"]) == (3, 1, 0, 0)
+
+        second = [
+            {"source_id": "A1", "address": "1 Delta St NW", "land_use_designation": "R-C1"},
+            {"source_id": "A2", "address": "2 Delta Street NW", "latitude": "51.05", "longitude": "-114.07"},
+            {"source_id": "A4", "address": "4 Delta St NW"},
+        ]
+        stats = sync_parcel_files(db_session, [self._write(path, second)], zone_map={"R-C1": sample_zone.id})
+        assert (stats["unchanged"], stats["updated"], stats["inserted"], stats["deleted"]) == (1, 1, 1, 1)
+
+        db_session.expire_all()
+        parcels = {p.source_id or p.address: p for p in db_session.query(Parcel).all()}
+        assert set(parcels) == {"A1", "A2", "A4"}
+        assert parcels["A1"].zone_id == sample_zone.id
+        assert parcels["A2"].address == "2 Delta Street NW" and float(parcels["A2"].latitude) == 51.05
+
+        journal = db_session.query(ParcelChange).filter(ParcelChange.sync_id == stats["sync_id"]).all()
+        assert sorted(c.change for c in journal) == ["delete", "insert", "update"]
+
+        # Nothing changed; an empty dump deletes nothing
+        assert sync_parcel_files(db_session, [path], zone_map={"R-C1": sample_zone.id})["unchanged"] == 3
+        empty = self._write(tmp_path / "empty.json", [])
+        assert sync_parcel_files(db_session, [empty])["deleted"] == 0
+
+    def test_adopts_loaded_parcels_and_keeps_referenced(self, db_session, sample_parcel, sample_project, tmp_path):
+        from app.models.zones import Parcel
+        from app.services.parcel_sync import sync_parcel_files
+
+        path = self._write(tmp_path / "parcels.json", [{"address": "123 TEST ST NW", "source_id": "S1"}])
+        stats = sync_parcel_files(db_session, [path])
+        assert (stats["adopted"], stats["updated"], stats["inserted"]) == (1, 1, 0)
+        assert db_session.query(Parcel).count() == 1
+
+        # Removed from the dump but still referenced by a project
+        path = self._write(path, [{"address": "9 Other St NW", "source_id": "S9"}])
+        stats = sync_parcel_files(db_session, [path])
+        assert (stats["inserted"], stats["deleted"], stats["kept_referenced"]) == (1, 0, 1)
+        assert db_session.get(Parcel, sample_parcel.id) is not None
+
+    def test_change_feed_updates_address_index(self, db_session, sample_parcel, tmp_path, monkeypatch):
+        from app.services.address_index import AddressIndex
+        from app.services.parcel_sync import ParcelChangeFeed, sync_parcel_files
+
+        path = self._write(tmp_path / "parcels.json", [{"address": "77 Feed Way SW", "source_id": "F1"}])
+        sync_parcel_files(db_session, [path])
+        index, feed = AddressIndex(), ParcelChangeFeed()
+        index.build(db_session)
+        feed.poll(db_session)  # Starts at the current position
+
+        path = self._write(path, [{"address": "78 Feed Way SW", "source_id": "F2"}])
+        sync_parcel_files(db_session, [path])
+
+        monkeypatch.setattr("app.services.address_index.address_index", index)
+        assert feed.poll(db_session) == 2
+        assert [m.address for m in index.search(db_session, "feed way")] == ["78 Feed Way SW"]
+        assert index.size == 2
+
+
+class TestRateLimiter:
+    """Tests for the in-memory public API rate limiter."""
+
+    def test_counts_seed_and_flush(self, db_session):
+        from app.models.rate_limits import RateLimit
+        from datetime import date
+        from app.services.rate_limiter import MemoryCounterStore, RateLimiter
+
+        db_session.add(RateLimit(ip_address="10.0.0.2", query_count=2, last_query_date=date.today()))
+        db_session.commit()
+
+        limiter = RateLimiter(3, store=MemoryCounterStore(4))
+        assert [limiter.hit(db_session, "10.0.0.1") for _ in range(4)] == [
+            (True, 2), (True, 1), (True, 0), (False, 0)
+        ]
+        assert limiter.hit(db_session, "10.0.0.2") == (True, 0)  # Seeded from rate_limits
+        assert limiter.status(db_session, "10.0.0.2") == (3, 0)
+
+        assert limiter.flush(db_session) == 2
+        assert limiter.flush(db_session) == 0
+        counts = dict(db_session.query(RateLimit.ip_address, RateLimit.query_count).all())
+        assert counts == {"10.0.0.1": 3, "10.0.0.2": 3}
+
+        # A restarted process picks up the persisted counts
+        restarted = RateLimiter(3, store=MemoryCounterStore(4))
+        assert restarted.hit(db_session, "10.0.0.1") == (False, 0)
+
+    def test_shared_sqlite_store(self, db_session, tmp_path):
+        from app.services.rate_limiter import RateLimiter, SQLiteCounterStore
+
+        path = tmp_path / "rate_limits.sqlite3"
+        worker_1 = RateLimiter(2, store=SQLiteCounterStore(path))
+        worker_2 = RateLimiter(2, store=SQLiteCounterStore(path))
+        assert worker_1.hit(db_session, "10.0.0.9") == (True, 1)
+        assert worker_2.hit(db_session, "10.0.0.9") == (True, 0)
+        assert worker_1.hit(db_session, "10.0.0.9") == (False, 0)
+        assert worker_2.status(db_session, "10.0.0.9") == (2, 0)
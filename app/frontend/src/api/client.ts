@@ -74,12 +74,12 @@ export const exploreApi = {
     return request<import('../types').Code>(`/explore/codes/${codeId}`);
   },
 
-  // List articles for a code
+  // List articles for a code (summaries; fetch full text with getArticle)
   listArticles: (codeId: string, params?: { part_number?: number; division_number?: number }) => {
     const searchParams = new URLSearchParams();
     if (params?.part_number) searchParams.set('part_number', String(params.part_number));
     if (params?.division_number) searchParams.set('division_number', String(params.division_number));
-    return request<import('../types').Article[]>(`/explore/codes/${codeId}/articles?${searchParams}`);
+    return request<import('../types').ArticleSummary[]>(`/explore/codes/${codeId}/articles?${searchParams}`);
   },
 
   // Get specific article
@@ -15,17 +15,21 @@ export interface Code {
   created_at: string;
 }
 
-export interface Article {
+// Compact article returned by list endpoints (no full_text)
+export interface ArticleSummary {
   id: string;
   code_id: string;
   article_number: string;
   title?: string;
-  full_text: string;
-  parent_article_id?: string;
   part_number?: number;
   division_number?: number;
   section_number?: number;
   page_number?: number;
+}
+
+export interface Article extends ArticleSummary {
+  full_text: string;
+  parent_article_id?: string;
   created_at: string;
   updated_at: string;
 }
@@ -7,21 +7,22 @@ This script imports:
 2. Parcel addresses from parcel-addresses-*.json files
 
 Usage:
-    python import_calgary_data.py [--zones-only] [--parcels-only] [--batch-size 1000]
+    python import_calgary_data.py [--zones-only] [--parcels-only] [--batch-size 10000] [--resume | --delta]
 """
 import json
 import os
 import sys
 import argparse
 from pathlib import Path
-from datetime import datetime
 
 # Add the app directory to the path
 sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
 
 from sqlalchemy.orm import Session
 from app.database import engine, SessionLocal, Base
-from app.models.zones import Zone, Parcel
+from app.models.zones import Zone
+from app.services.parcel_ingest import ingest_parcel_file, peak_rss_mb
+from app.services.parcel_sync import sync_parcel_files
 
 
 # Data directory
@@ -94,9 +95,12 @@ def import_zones(db: Session) -> dict:
     return zone_map
 
 
-def import_parcels(db: Session, zone_map: dict, batch_size: int = 1000):
+def import_parcels(db: Session, zone_map: dict, batch_size: int = 10000, resume: bool = False):
     """
     Import parcel addresses from parcel-addresses-*.json files.
+
+    Files are streamed through a staging table (COPY on PostgreSQL) and
+    merged one chunk per transaction; addresses already loaded are skipped.
     """
     parcel_files = sorted(DATA_DIR.glob("parcel-addresses-*.json"))
 
@@ -104,97 +108,49 @@ def import_parcels(db: Session, zone_map: dict, batch_size: int = 1000):
         print("Warning: No parcel files found")
         return
 
-    total_imported = 0
-    total_skipped = 0
+    totals = {"inserted": 0, "skipped": 0}
 
     for parcel_file in parcel_files:
         print(f"\nProcessing {parcel_file.name}...")
+        stats = ingest_parcel_file(db, parcel_file, zone_map=zone_map, chunk_size=batch_size, resume=resume)
+        print(f"  {parcel_file.name}: {stats['inserted']:,} imported, "
+              f"{stats['skipped'] + stats['invalid']:,} skipped "
+              f"({stats['rows_per_sec']:,.0f} rows/s, {stats['seconds']}s)")
+        totals["inserted"] += stats["inserted"]
+        totals["skipped"] += stats["skipped"] + stats["invalid"]
+
+    print(f"\nTotal: {totals['inserted']:,} parcels imported, {totals['skipped']:,} skipped "
+          f"(peak RSS {peak_rss_mb()} MB)")
+
+
+def sync_parcels(db: Session, zone_map: dict, batch_size: int = 10000):
+    """
+    Apply only the parcel records that changed since the last delta import.
+
+    New records are inserted, changed ones updated and parcels no longer in
+    the files deleted (services/parcel_sync.py).
+    """
+    parcel_files = sorted(DATA_DIR.glob("parcel-addresses-*.json"))
+
+    if not parcel_files:
+        print("Warning: No parcel files found")
+        return
 
-        with open(parcel_file, 'r') as f:
-            parcels_data = json.load(f)
-
-        batch = []
-        file_imported = 0
-        file_skipped = 0
-
-        for i, parcel_data in enumerate(parcels_data):
-            address = parcel_data.get("address", "").strip()
-            if not address:
-                file_skipped += 1
-                continue
-
-            # Check for existing parcel by address (simplified - production would use source_id)
-            # For bulk import, we'll skip this check and rely on constraints
-
-            # Parse coordinates
-            try:
-                latitude = float(parcel_data.get("latitude")) if parcel_data.get("latitude") else None
-                longitude = float(parcel_data.get("longitude")) if parcel_data.get("longitude") else None
-            except (ValueError, TypeError):
-                latitude = None
-                longitude = None
-
-            # Get zone ID if we have it
-            land_use = parcel_data.get("land_use_designation", "").strip()
-            zone_id = zone_map.get(land_use)
-
-            # Create parcel
-            parcel = Parcel(
-                address=address,
-                street_name=parcel_data.get("street_name"),
-                street_type=parcel_data.get("street_type"),
-                street_direction=parcel_data.get("street_quad"),
-                house_number=parcel_data.get("house_number"),
-                quadrant=parcel_data.get("street_quad"),
-                land_use_designation=land_use or None,
-                zone_id=zone_id,
-                latitude=latitude,
-                longitude=longitude,
-                source_id=parcel_data.get(":@computed_region_4a3i_ccfj"),  # Use one of the computed regions as source ID
-                source_updated=datetime.utcnow()
-            )
-
-            batch.append(parcel)
-
-            # Commit in batches
-            if len(batch) >= batch_size:
-                try:
-                    db.bulk_save_objects(batch)
-                    db.commit()
-                    file_imported += len(batch)
-                except Exception as e:
-                    print(f"  Error saving batch: {e}")
-                    db.rollback()
-                    file_skipped += len(batch)
-                batch = []
-
-                # Progress update
-                if file_imported % 10000 == 0:
-                    print(f"  {file_imported:,} parcels imported from {parcel_file.name}...")
-
-        # Save remaining batch
-        if batch:
-            try:
-                db.bulk_save_objects(batch)
-                db.commit()
-                file_imported += len(batch)
-            except Exception as e:
-                print(f"  Error saving final batch: {e}")
-                db.rollback()
-                file_skipped += len(batch)
-
-        print(f"  {parcel_file.name}: {file_imported:,} imported, {file_skipped:,} skipped")
-        total_imported += file_imported
-        total_skipped += file_skipped
-
-    print(f"\nTotal: {total_imported:,} parcels imported, {total_skipped:,} skipped")
+    stats = sync_parcel_files(db, parcel_files, zone_map=zone_map, batch_size=batch_size)
+    print(f"\nParcels: {stats['inserted']:,} inserted, {stats['updated']:,} updated, "
+          f"{stats['deleted']:,} deleted, {stats['unchanged']:,} unchanged "
+          f"({stats['rows_per_sec']:,.0f} rows/s, {stats['seconds']}s, peak RSS {stats['peak_rss_mb']} MB)")
 
 
 def main():
     parser = argparse.ArgumentParser(description="Import Calgary parcel and zoning data")
     parser.add_argument("--zones-only", action="store_true", help="Only import zones")
     parser.add_argument("--parcels-only", action="store_true", help="Only import parcels")
-    parser.add_argument("--batch-size", type=int, default=1000, help="Batch size for parcel import")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Records per staged chunk for parcel import")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted parcel import after its last committed chunk")
+    parser.add_argument("--delta", action="store_true",
+                        help="Apply only parcel records changed since the last delta import")
     args = parser.parse_args()
 
     print("Calgary Data Import Script")
@@ -219,7 +175,10 @@ def main():
                 zone_map = {z.zone_code: z.id for z in zones}
                 print(f"Loaded {len(zone_map)} existing zones")
 
-            import_parcels(db, zone_map, args.batch_size)
+            if args.delta:
+                sync_parcels(db, zone_map, args.batch_size)
+            else:
+                import_parcels(db, zone_map, args.batch_size, resume=args.resume)
 
         print("\nImport complete!")
 
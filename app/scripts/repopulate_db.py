@@ -377,6 +377,21 @@ def update_search_vectors(session):
         logger.error(f"Failed to update search vectors: {e}")
 
 
+def rebuild_vector_index(session):
+    """Rebuild the ANN index the API memory-maps for semantic search."""
+    logger.info("Rebuilding article vector index...")
+
+    try:
+        from app.services.vector_index import build_article_index
+        index = build_article_index(session)
+        if index is not None:
+            logger.info(f"Vector index rebuilt: {index.size} articles")
+        else:
+            logger.warning("No embeddings found, vector index not built")
+    except Exception as e:
+        logger.error(f"Failed to rebuild vector index: {e}")
+
+
 def verify_database(session):
     """Verify database counts and data quality."""
     logger.info("\n" + "=" * 60)
@@ -544,6 +559,8 @@ def main():
     # Update search vectors
     if not args.dry_run and total_inserted > 0:
         update_search_vectors(session)
+        if embedding_service:
+            rebuild_vector_index(session)
 
     # Summary
     logger.info("\n" + "=" * 60)
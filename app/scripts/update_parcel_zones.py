@@ -6,9 +6,12 @@ This script:
 1. Loads property-zone mapping from Calgary's property assessment dataset
 2. Updates parcels in the database with correct zone_id based on land_use_designation
 3. Updates zone records with HEIGHT, FAR, and DENSITY from land use districts data
+4. With --spatial, assigns every parcel with coordinates the zone of the
+   land-use district polygon containing it (land-use-districts.geojson),
+   overriding the address match
 
 Usage:
-    python update_parcel_zones.py [--batch-size 5000] [--update-zones]
+    python update_parcel_zones.py [--batch-size 5000] [--update-zones] [--spatial]
 """
 import json
 import os
@@ -24,7 +27,10 @@ sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 from app.database import engine, SessionLocal, Base
-from app.models.zones import Zone, Parcel
+from app.models.zones import Zone
+from app.services.zone_index import ZoneIndex, rezone_parcels
+from app.services.parcel_zoning import rezone_parcels_by_address
+from app.services.zone_rules import zone_rule_engine
 
 
 # Data directory
@@ -136,66 +142,47 @@ def update_zones_with_rules(db: Session, zone_rules: dict):
             updated += 1
 
     db.commit()
+    zone_rule_engine.invalidate()
     print(f"Updated {updated} zones with height/FAR rules")
 
 
 def update_parcel_zones(db: Session, zone_mapping: dict, batch_size: int = 5000):
     """
     Update parcels with zone_id based on land_use_designation.
+
+    One set-based join between parcels and the normalized mapping (see
+    app/services/parcel_zoning.py) instead of paging through parcels.
     """
     print("\nUpdating parcels with zone assignments...")
+    stats = rezone_parcels_by_address(db, zone_mapping, batch_size)
 
-    # Get all zones as lookup
-    zones = db.query(Zone).all()
-    zone_lookup = {z.zone_code: z.id for z in zones}
-    print(f"Loaded {len(zone_lookup)} zones from database")
-
-    # Get total parcel count
-    total_parcels = db.query(Parcel).count()
-    print(f"Total parcels to process: {total_parcels:,}")
-
-    # Process in batches
-    offset = 0
-    updated = 0
-    no_match = 0
-    zone_not_found = 0
-
-    while offset < total_parcels:
-        parcels = db.query(Parcel).offset(offset).limit(batch_size).all()
+    print(f"\nParcel zone update complete ({stats['seconds']}s: "
+          f"mapping {stats['load_seconds']}s, update {stats['update_seconds']}s):")
+    print(f"  Parcels: {stats['parcels']:,}")
+    print(f"  Updated: {stats['updated']:,}")
+    print(f"  Unchanged: {stats['unchanged']:,}")
+    print(f"  No address match: {stats['no_match']:,}")
+    print(f"  Zone code not in database: {stats['zone_not_found']:,}")
 
-        for parcel in parcels:
-            # Normalize address for matching
-            address_normalized = parcel.address.strip().upper() if parcel.address else ""
 
-            # Look up zone from mapping
-            zone_code = zone_mapping.get(address_normalized)
+def rezone_parcels_spatially(db: Session, batch_size: int = 5000):
+    """Assign zones to parcels with coordinates from the district polygons."""
+    districts_file = DATA_DIR / "land-use-districts.geojson"
+    print(f"\nLoading land use district polygons from {districts_file}...")
+    index = ZoneIndex.from_geojson(districts_file)
+    if index is None:
+        print(f"Warning: No district polygons found at {districts_file}")
+        return
 
-            if zone_code:
-                # Clean zone code (remove "(PRE 1P2007)" etc.)
-                zone_code_clean = zone_code.split('(')[0].strip()
+    print(f"Loaded {index.size:,} district polygons")
+    stats = rezone_parcels(db, index, batch_size)
 
-                zone_id = zone_lookup.get(zone_code_clean) or zone_lookup.get(zone_code)
-
-                if zone_id:
-                    parcel.zone_id = zone_id
-                    parcel.land_use_designation = zone_code
-                    updated += 1
-                else:
-                    zone_not_found += 1
-            else:
-                no_match += 1
-
-        db.commit()
-        offset += batch_size
-
-        # Progress update
-        if offset % 50000 == 0:
-            print(f"  Processed {offset:,}/{total_parcels:,} parcels ({updated:,} updated)")
-
-    print(f"\nParcel zone update complete:")
-    print(f"  Updated: {updated:,}")
-    print(f"  No address match: {no_match:,}")
-    print(f"  Zone code not in database: {zone_not_found:,}")
+    print(f"\nSpatial zone update complete ({stats['seconds']}s):")
+    print(f"  Parcels with coordinates: {stats['scanned']:,}")
+    print(f"  Updated: {stats['updated']:,}")
+    print(f"  Unchanged: {stats['unchanged']:,}")
+    print(f"  Outside all districts: {stats['outside']:,}")
+    print(f"  Zone code not in database: {stats['unknown_zone']:,}")
 
 
 def main():
@@ -203,6 +190,8 @@ def main():
     parser.add_argument("--batch-size", type=int, default=5000, help="Batch size for updates")
     parser.add_argument("--update-zones", action="store_true", help="Also update zone rules")
     parser.add_argument("--zones-only", action="store_true", help="Only update zone rules, not parcels")
+    parser.add_argument("--spatial", action="store_true",
+                        help="Also assign zones by point-in-polygon against land-use-districts.geojson")
     args = parser.parse_args()
 
     print("Calgary Parcel Zone Update Script")
@@ -225,6 +214,10 @@ def main():
             if zone_mapping:
                 update_parcel_zones(db, zone_mapping, args.batch_size)
 
+            if args.spatial:
+                # Geometry is authoritative for parcels with coordinates, so it runs last
+                rezone_parcels_spatially(db, args.batch_size)
+
         print("\nUpdate complete!")
 
     except Exception as e: